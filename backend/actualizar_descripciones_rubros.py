@@ -14,6 +14,9 @@ Reglas:
 from __future__ import annotations
 
 from app.core.database import SessionLocal
+from app.modules.discovery.services.catalogo_version_services import (
+    incrementar_version_catalogo,
+)
 from app.modules.products.models.rubros_models import Rubro
 from app.modules.products.services.rubros_services import (
     CATALOGO_RUBROS_DESCRIPCIONES,
@@ -57,6 +60,7 @@ def actualizar_descripciones_rubros() -> None:
             omitidos += 1
 
         if creados or actualizados or reactivados:
+            incrementar_version_catalogo(db)
             db.commit()
 
     print(
@@ -30,6 +30,7 @@ import app.modules.analytics.models.comercios_metricas_snapshots_models
 import app.modules.discovery.models.taxonomy_models
 
 from app.core.database import SessionLocal, engine
+from app.modules.discovery.models.catalogo_version_models import CatalogoVersion
 from app.modules.discovery.models.taxonomy_models import (
     TaxonomyAssignment,
     TaxonomyNode,
@@ -42,6 +43,7 @@ from app.modules.discovery.services.taxonomy_seed_services import (
 def crear_tablas_taxonomia() -> None:
     TaxonomyNode.__table__.create(bind=engine, checkfirst=True)
     TaxonomyAssignment.__table__.create(bind=engine, checkfirst=True)
+    CatalogoVersion.__table__.create(bind=engine, checkfirst=True)
 
 
 def actualizar_taxonomia() -> None:
@@ -17,6 +17,12 @@ class Settings(BaseSettings):
     # --------------------------
     DATABASE_URL: str   # ← SIN VALOR POR DEFECTO (usa .env)
 
+    # Pool de conexiones (motores con QueuePool). Al overflow se le suma
+    # CANDIDATE_ENGINE_MAX_WORKERS: cada fuente del candidate engine en
+    # paralelo usa su propia sesion ademas de la del request.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
     # --------------------------
     # 🔐 Configuración JWT
     # --------------------------
@@ -29,6 +35,71 @@ class Settings(BaseSettings):
     # --------------------------
     EMBEDDINGS_PROVIDER: str = "simulated"
     EMBEDDINGS_LOCAL_MODEL_PATH: str = "all-MiniLM-L6-v2"
+    # Carga el modelo en segundo plano al iniciar (health informa "warming")
+    EMBEDDINGS_WARMUP_ON_STARTUP: bool = False
+
+    # Cola diferida de embeddings (fuera del request)
+    EMBEDDINGS_JOBS_WORKER_ENABLED: bool = True
+    EMBEDDINGS_JOBS_DEBOUNCE_SECONDS: float = 2.0
+    # Un lote reclamado por un worker caido vuelve a la cola pasado este plazo
+    EMBEDDINGS_JOBS_CLAIM_TIMEOUT_SECONDS: float = 300.0
+
+    # Cache de embeddings de consultas (memoria LRU + disco SQLite opcional,
+    # acotado a EMBEDDINGS_CACHE_DISK_MAX_ENTRIES filas; 0 = sin tope)
+    EMBEDDINGS_CACHE_MAX_ENTRIES: int = 1024
+    EMBEDDINGS_CACHE_TTL_SECONDS: float = 0.0
+    EMBEDDINGS_CACHE_DISK_PATH: str | None = None
+    EMBEDDINGS_CACHE_DISK_MAX_ENTRIES: int = 100_000
+
+    # Precisión de los indices vectoriales en memoria: float32, float16 o int8
+    EMBEDDINGS_INDEX_PRECISION: str = "float32"
+
+    # Indice aproximado (IVF) de comercios: si está habilitado se abre al
+    # iniciar y suma la fuente semantic_ann a smart_semantic; archivo
+    # mapeable y listas a sondear
+    EMBEDDINGS_ANN_ENABLED: bool = False
+    EMBEDDINGS_ANN_INDEX_PATH: str | None = None
+    EMBEDDINGS_ANN_N_PROBE: int = 8
+
+    # Read model de scores de publicaciones (decaimiento de recencia)
+    PUBLICACION_SCORES_DECAY_WORKER_ENABLED: bool = True
+    PUBLICACION_SCORES_DECAY_INTERVAL_SECONDS: float = 300.0
+
+    # Vistas de publicaciones: acumuladas en memoria y persistidas por lote
+    PUBLICACION_VIEWS_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Cache del ranking del feed por usuario (0 desactiva)
+    FEED_CACHE_MAX_ENTRIES: int = 2048
+    FEED_CACHE_TTL_SECONDS: float = 30.0
+
+    # Busqueda full-text de publicaciones. En true y con MySQL usa el indice
+    # FULLTEXT (activar despues de correr migrate_publicaciones_fulltext.py);
+    # si no, el indice en memoria. El tope solo aplica al candidate engine:
+    # los listados paginan sobre todas las coincidencias.
+    PUBLICACIONES_FULLTEXT_MYSQL: bool = False
+    PUBLICACIONES_BUSQUEDA_MAX_RESULTADOS: int = 500
+
+    # Candidate engine: fuentes en paralelo (1 = secuencial) y presupuesto
+    # por fuente (cuenta desde que la fuente arranca); la que lo excede se
+    # descarta sin romper la busqueda, igual que la que espera en cola mas
+    # de CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS
+    CANDIDATE_ENGINE_MAX_WORKERS: int = 6
+    CANDIDATE_SOURCE_BUDGET_MS: float = 300.0
+    CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS: float = 1000.0
+
+    # Cache de candidatos + nodos discovery por query normalizada, invalidado
+    # por version de catalogo / busqueda (0 desactiva)
+    CANDIDATE_CACHE_MAX_ENTRIES: int = 1024
+    CANDIDATE_CACHE_TTL_SECONDS: float = 60.0
+
+    # Sesiones de busqueda de Explorar (paginado por cursor sobre el ranking
+    # de la primera pagina); TTL 0 desactiva el cursor. Store "local" (por
+    # proceso) o "db" (tabla comercios_sesiones_busqueda, compartida entre
+    # workers; crear con create_tables.py)
+    COMERCIOS_SESION_BUSQUEDA_STORE: str = "local"
+    COMERCIOS_SESION_BUSQUEDA_TTL_SECONDS: float = 300.0
+    COMERCIOS_SESION_BUSQUEDA_MAX_ENTRIES: int = 2048
+    COMERCIOS_SESION_BUSQUEDA_MAX_IDS: int = 1000
 
     # Integracion geografica. La ausencia de key no impide iniciar FeedGo.
     GEOCODING_PROVIDER: str = "geoapify"
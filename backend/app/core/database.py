@@ -10,16 +10,28 @@ Incluye:
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
 # Crear la URL de conexión usando nuestras configuraciones
 DATABASE_URL = settings.DATABASE_URL
 
+# Pool: las fuentes del candidate engine en paralelo abren hasta
+# CANDIDATE_ENGINE_MAX_WORKERS sesiones extra por proceso (pool compartido).
+_opciones_pool = {}
+if make_url(DATABASE_URL).get_backend_name() != "sqlite":
+    _opciones_pool = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW
+        + max(0, settings.CANDIDATE_ENGINE_MAX_WORKERS),
+    }
+
 # Motor de base de datos
 engine = create_engine(
     DATABASE_URL,
-    echo=False  # Cambiar a True para ver las consultas SQL en consola
+    echo=False,  # Cambiar a True para ver las consultas SQL en consola
+    **_opciones_pool,
 )
 
 # Sesiones de base de datos
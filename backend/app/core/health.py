@@ -19,6 +19,7 @@ HEALTHY = "healthy"
 DEGRADED = "degraded"
 UNHEALTHY = "unhealthy"
 UNKNOWN = "unknown"
+WARMING = "warming"
 
 SAFE_MESSAGE_OK = "Componente disponible."
 SAFE_MESSAGE_DEGRADED = "Componente disponible con capacidad reducida."
@@ -91,6 +92,8 @@ def _aggregate_status(checks: list[HealthCheckResult]) -> str:
     statuses = {check.status for check in checks}
     if UNHEALTHY in statuses:
         return UNHEALTHY
+    if WARMING in statuses:
+        return WARMING
     if DEGRADED in statuses:
         return DEGRADED
     if UNKNOWN in statuses:
@@ -174,9 +177,21 @@ def uploads_storage_check(upload_dir: Path | None = None) -> HealthCheckResult:
 def embeddings_check() -> HealthCheckResult:
     def operation() -> tuple[str, str]:
         provider = (settings.EMBEDDINGS_PROVIDER or "simulated").strip().lower()
-        if provider in {"simulated", "local"}:
-            return HEALTHY, SAFE_MESSAGE_OK
-        return DEGRADED, "Provider de embeddings no disponible."
+        if provider not in {"simulated", "local"}:
+            return DEGRADED, "Provider de embeddings no disponible."
+
+        from app.modules.ai.core.embedding_factory import (
+            ESTADO_CALENTANDO,
+            ESTADO_FALLBACK,
+            estado_embeddings,
+        )
+
+        estado = estado_embeddings()
+        if estado == ESTADO_CALENTANDO:
+            return WARMING, "Modelo de embeddings cargando."
+        if estado == ESTADO_FALLBACK:
+            return DEGRADED, "Modelo de embeddings no disponible; se usa el simulado."
+        return HEALTHY, SAFE_MESSAGE_OK
 
     return _timed_check("embeddings", operation)
 
@@ -22,6 +22,9 @@ def import_all_models() -> None:
 
     # SPACES
     from app.modules.spaces.models.comercios_models import Comercio  # noqa: F401
+    from app.modules.spaces.models.comercios_sesion_busqueda_models import (  # noqa: F401
+        ComercioSesionBusqueda,
+    )
 
     # AVAILABILITY
     from app.modules.availability.models.horarios_atencion_models import (  # noqa: F401
@@ -45,6 +48,9 @@ def import_all_models() -> None:
     from app.modules.products.models.secciones_models import Seccion  # noqa: F401
 
     # DISCOVERY
+    from app.modules.discovery.models.catalogo_version_models import (  # noqa: F401
+        CatalogoVersion,
+    )
     from app.modules.discovery.models.taxonomy_models import (  # noqa: F401
         TaxonomyAssignment,
         TaxonomyNode,
@@ -60,6 +66,9 @@ def import_all_models() -> None:
 
     # POSTS
     from app.modules.posts.models.publicaciones_models import Publicacion  # noqa: F401
+    from app.modules.posts.models.publicacion_scores_models import (  # noqa: F401
+        PublicacionScore,
+    )
 
     # SOCIAL
     from app.modules.social.models.publicaciones_guardadas_models import (  # noqa: F401
@@ -90,9 +99,15 @@ def import_all_models() -> None:
     )
 
     # AI
+    from app.modules.ai.models.catalogo_embeddings_models import (  # noqa: F401
+        CatalogoEmbedding,
+    )
     from app.modules.ai.models.comercios_embeddings_models import (  # noqa: F401
         ComercioEmbedding,
     )
+    from app.modules.ai.models.embeddings_jobs_models import (  # noqa: F401
+        EmbeddingJob,
+    )
     from app.modules.ai.models.usuarios_embeddings_models import (  # noqa: F401
         UsuarioEmbedding,
     )
@@ -35,6 +35,24 @@ METRIC_UPLOAD_ACCEPTED_COUNT = "upload.accepted.count"
 METRIC_UPLOAD_REJECTED_COUNT = "upload.rejected.count"
 METRIC_UPLOAD_DURATION_MS = "upload.duration_ms"
 METRIC_SEARCH_NO_RESULTS_COUNT = "search.no_results.count"
+METRIC_EMBEDDINGS_JOBS_PROCESSED_COUNT = "embeddings.jobs.processed.count"
+METRIC_EMBEDDINGS_JOBS_FAILED_COUNT = "embeddings.jobs.failed.count"
+METRIC_EMBEDDINGS_JOBS_BATCH_DURATION_MS = "embeddings.jobs.batch.duration_ms"
+METRIC_EMBEDDINGS_CACHE_HIT_COUNT = "embeddings.cache.hit.count"
+METRIC_EMBEDDINGS_CACHE_MISS_COUNT = "embeddings.cache.miss.count"
+METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT = "embeddings.cache.eviction.count"
+METRIC_PUBLICACION_SCORES_DECAY_COUNT = "publicacion_scores.decay.count"
+METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT = "publicacion_scores.refresh.failed.count"
+METRIC_PUBLICACION_VIEWS_FLUSH_COUNT = "publicacion_views.flush.count"
+METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT = "publicacion_views.flush.failed.count"
+METRIC_FEED_CACHE_HIT_COUNT = "feed.cache.hit.count"
+METRIC_FEED_CACHE_MISS_COUNT = "feed.cache.miss.count"
+METRIC_FEED_CACHE_INVALIDATION_COUNT = "feed.cache.invalidation.count"
+METRIC_FEED_CACHE_REBUILD_DURATION_MS = "feed.cache.rebuild.duration_ms"
+METRIC_CANDIDATE_SOURCE_DURATION_MS = "candidate.source.duration_ms"
+METRIC_CANDIDATE_SOURCE_DROPPED_COUNT = "candidate.source.dropped.count"
+METRIC_CANDIDATE_CACHE_HIT_COUNT = "candidate.cache.hit.count"
+METRIC_CANDIDATE_CACHE_MISS_COUNT = "candidate.cache.miss.count"
 
 METRIC_CATALOG = frozenset(
     {
@@ -55,6 +73,24 @@ METRIC_CATALOG = frozenset(
         METRIC_UPLOAD_REJECTED_COUNT,
         METRIC_UPLOAD_DURATION_MS,
         METRIC_SEARCH_NO_RESULTS_COUNT,
+        METRIC_EMBEDDINGS_JOBS_PROCESSED_COUNT,
+        METRIC_EMBEDDINGS_JOBS_FAILED_COUNT,
+        METRIC_EMBEDDINGS_JOBS_BATCH_DURATION_MS,
+        METRIC_EMBEDDINGS_CACHE_HIT_COUNT,
+        METRIC_EMBEDDINGS_CACHE_MISS_COUNT,
+        METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+        METRIC_PUBLICACION_SCORES_DECAY_COUNT,
+        METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT,
+        METRIC_PUBLICACION_VIEWS_FLUSH_COUNT,
+        METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT,
+        METRIC_FEED_CACHE_HIT_COUNT,
+        METRIC_FEED_CACHE_MISS_COUNT,
+        METRIC_FEED_CACHE_INVALIDATION_COUNT,
+        METRIC_FEED_CACHE_REBUILD_DURATION_MS,
+        METRIC_CANDIDATE_SOURCE_DURATION_MS,
+        METRIC_CANDIDATE_SOURCE_DROPPED_COUNT,
+        METRIC_CANDIDATE_CACHE_HIT_COUNT,
+        METRIC_CANDIDATE_CACHE_MISS_COUNT,
     }
 )
 
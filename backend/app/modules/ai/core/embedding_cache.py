@@ -0,0 +1,397 @@
+"""
+embedding_cache.py
+------------------
+
+Cache de embeddings independiente del provider.
+
+Esta capa es infraestructura técnica reusable.
+No conoce nada del dominio (Comercio, Usuario, etc.).
+
+Diseño:
+- CachedEmbeddingProvider envuelve cualquier EmbeddingProvider
+- Nivel memoria: LRU acotado (OrderedDict) con TTL opcional
+- Nivel disco opcional: SQLite keyed por (model_id, hash del texto),
+  para que las consultas populares sobrevivan reinicios; acotado a
+  max_entries filas (se borran las más viejas)
+- Los caminos bulk (regeneración, cola de jobs, catálogo) no pasan por
+  el cache: get_embedding_provider(usar_cache=False)
+- Las claves incluyen model_id: cambiar de modelo no devuelve
+  vectores incompatibles
+- Aciertos/fallos/desalojos se reportan en operation_metrics
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Sequence
+
+from app.core.operation_metrics import (
+    METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+    METRIC_EMBEDDINGS_CACHE_HIT_COUNT,
+    METRIC_EMBEDDINGS_CACHE_MISS_COUNT,
+    increment_counter,
+)
+from app.modules.ai.core.embedding_provider import (
+    DEFAULT_BATCH_SIZE,
+    EmbeddingProvider,
+)
+from app.modules.ai.core.vector_codec import (
+    DTYPE_FLOAT64,
+    VectorCodecError,
+    desempaquetar_vector,
+    empaquetar_vector,
+)
+
+
+TIER_MEMORIA = "memory"
+TIER_DISCO = "disk"
+
+
+def _normalizar_texto(text: str | None) -> str:
+    return (text or "").strip()
+
+
+def hash_texto_embedding(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingDiskCache:
+    """
+    Nivel persistente del cache: un archivo SQLite local al worker.
+
+    Los vectores se guardan en float64 (vector_codec) para que un acierto
+    en disco devuelva exactamente lo que calculó el provider.
+
+    max_entries <= 0 deja el archivo sin tope.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: float | None = None,
+        max_entries: int = 0,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings_cache ("
+            "model_id TEXT NOT NULL, "
+            "text_hash TEXT NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "creado_en REAL NOT NULL, "
+            "PRIMARY KEY (model_id, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_cache_creado_en "
+            "ON embeddings_cache (creado_en)"
+        )
+        self.purgar_vencidos()
+        # Cota superior de filas: solo se cuenta de verdad al pasar el tope.
+        self._entradas_estimadas = self._contar()
+
+    def _contar(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM embeddings_cache").fetchone()[0])
+
+    def _vigente_desde(self) -> float:
+        return time.time() - self._ttl if self._ttl else float("-inf")
+
+    def obtener_muchos(
+        self,
+        model_id: str,
+        text_hashes: Sequence[str],
+    ) -> dict[str, tuple[float, ...]]:
+        if not text_hashes:
+            return {}
+
+        placeholders = ", ".join("?" for _ in text_hashes)
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT text_hash, vector FROM embeddings_cache "
+                f"WHERE model_id = ? AND creado_en >= ? AND text_hash IN ({placeholders})",
+                [model_id, self._vigente_desde(), *text_hashes],
+            ).fetchall()
+
+        encontrados: dict[str, tuple[float, ...]] = {}
+        for text_hash, blob in filas:
+            try:
+                encontrados[text_hash] = tuple(desempaquetar_vector(blob).tolist())
+            except VectorCodecError:
+                # Entrada corrupta: se recalcula y se sobrescribe.
+                continue
+        return encontrados
+
+    def guardar_muchos(
+        self,
+        model_id: str,
+        vectores: dict[str, Sequence[float]],
+    ) -> int:
+        """
+        Guarda los vectores y devuelve cuántas filas viejas desalojó el tope.
+        """
+        if not vectores:
+            return 0
+
+        ahora = time.time()
+        params = [
+            (model_id, text_hash, empaquetar_vector(vector, DTYPE_FLOAT64), ahora)
+            for text_hash, vector in vectores.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings_cache "
+                "(model_id, text_hash, vector, creado_en) VALUES (?, ?, ?, ?)",
+                params,
+            )
+            self._conn.commit()
+            self._entradas_estimadas += len(params)
+            if not self.max_entries or self._entradas_estimadas <= self.max_entries:
+                return 0
+
+            total = int(self._conn.execute("SELECT COUNT(*) FROM embeddings_cache").fetchone()[0])
+            excedente = total - self.max_entries
+            if excedente > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings_cache WHERE rowid IN ("
+                    "SELECT rowid FROM embeddings_cache ORDER BY creado_en ASC LIMIT ?)",
+                    (excedente,),
+                )
+                self._conn.commit()
+            self._entradas_estimadas = min(total, self.max_entries)
+        return max(0, excedente)
+
+    def purgar_vencidos(self) -> int:
+        if not self._ttl:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings_cache WHERE creado_en < ?",
+                (self._vigente_desde(),),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    Decorador de EmbeddingProvider con cache LRU + TTL + disco opcional.
+
+    Es thread-safe. Los vectores se devuelven como listas nuevas, así que
+    los callers pueden mutarlos sin contaminar el cache.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        *,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = None,
+        disk_cache: EmbeddingDiskCache | None = None,
+    ) -> None:
+        self.provider = provider
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.disk_cache = disk_cache
+        self._lock = threading.Lock()
+        # hash -> (vector, vence_en monotonic | None)
+        self._memoria: OrderedDict[str, tuple[tuple[float, ...], float | None]] = OrderedDict()
+        self._estadisticas = {
+            "hits_memoria": 0,
+            "hits_disco": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    @property
+    def model_id(self) -> str:
+        return self.provider.model_id
+
+    # --------------------------------------------------------
+    # Nivel memoria
+    # --------------------------------------------------------
+
+    def _leer_memoria(self, text_hashes: Sequence[str]) -> dict[str, tuple[float, ...]]:
+        ahora = time.monotonic()
+        encontrados: dict[str, tuple[float, ...]] = {}
+        vencidos = 0
+
+        with self._lock:
+            for text_hash in text_hashes:
+                entrada = self._memoria.get(text_hash)
+                if entrada is None:
+                    continue
+                vector, vence_en = entrada
+                if vence_en is not None and vence_en <= ahora:
+                    del self._memoria[text_hash]
+                    vencidos += 1
+                    continue
+                self._memoria.move_to_end(text_hash)
+                encontrados[text_hash] = vector
+            self._estadisticas["evictions"] += vencidos
+
+        if vencidos:
+            increment_counter(
+                METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+                vencidos,
+                tags={"tier": TIER_MEMORIA, "reason": "ttl"},
+            )
+        return encontrados
+
+    def _guardar_memoria(self, vectores: dict[str, tuple[float, ...]]) -> None:
+        if self.max_entries <= 0 or not vectores:
+            return
+
+        vence_en = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        desalojados = 0
+
+        with self._lock:
+            for text_hash, vector in vectores.items():
+                self._memoria[text_hash] = (vector, vence_en)
+                self._memoria.move_to_end(text_hash)
+            while len(self._memoria) > self.max_entries:
+                self._memoria.popitem(last=False)
+                desalojados += 1
+            self._estadisticas["evictions"] += desalojados
+
+        if desalojados:
+            increment_counter(
+                METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+                desalojados,
+                tags={"tier": TIER_MEMORIA, "reason": "size"},
+            )
+
+    # --------------------------------------------------------
+    # Interfaz EmbeddingProvider
+    # --------------------------------------------------------
+
+    def embed_text(self, text: str) -> List[float]:
+        return self.embed_texts([text])[0]
+
+    def embed_texts(
+        self,
+        texts: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[List[float]]:
+        """
+        Resuelve memoria -> disco -> provider, en un solo lote por nivel.
+        """
+        normalizados = [_normalizar_texto(text) for text in texts]
+        if not normalizados:
+            return []
+
+        hash_por_texto = {
+            texto: hash_texto_embedding(texto)
+            for texto in dict.fromkeys(normalizados)
+        }
+        hashes = list(hash_por_texto.values())
+        model_id = self.model_id
+
+        vectores = self._leer_memoria(hashes)
+        hits_memoria = len(vectores)
+
+        hits_disco = 0
+        if self.disk_cache is not None and len(vectores) < len(hashes):
+            faltantes = [text_hash for text_hash in hashes if text_hash not in vectores]
+            desde_disco = self._leer_disco(model_id, faltantes)
+            hits_disco = len(desde_disco)
+            vectores.update(desde_disco)
+            self._guardar_memoria(desde_disco)
+
+        pendientes = [
+            texto
+            for texto, text_hash in hash_por_texto.items()
+            if text_hash not in vectores
+        ]
+        if pendientes:
+            calculados = {
+                hash_por_texto[texto]: tuple(float(valor) for valor in vector)
+                for texto, vector in zip(
+                    pendientes,
+                    self.provider.embed_texts(pendientes, batch_size=batch_size),
+                )
+            }
+            vectores.update(calculados)
+            self._guardar_memoria(calculados)
+            self._guardar_disco(model_id, calculados)
+
+        self._registrar(hits_memoria, hits_disco, len(pendientes))
+
+        return [list(vectores[hash_por_texto[texto]]) for texto in normalizados]
+
+    # --------------------------------------------------------
+    # Nivel disco (best effort)
+    # --------------------------------------------------------
+
+    def _leer_disco(self, model_id: str, text_hashes: list[str]) -> dict[str, tuple[float, ...]]:
+        try:
+            return self.disk_cache.obtener_muchos(model_id, text_hashes)
+        except sqlite3.Error:
+            return {}
+
+    def _guardar_disco(self, model_id: str, vectores: dict[str, tuple[float, ...]]) -> None:
+        if self.disk_cache is None:
+            return
+        try:
+            desalojados = self.disk_cache.guardar_muchos(model_id, vectores)
+        except sqlite3.Error:
+            # Disco lleno o archivo bloqueado: el vector ya quedó en memoria.
+            return
+
+        if desalojados:
+            with self._lock:
+                self._estadisticas["evictions"] += desalojados
+            increment_counter(
+                METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+                desalojados,
+                tags={"tier": TIER_DISCO, "reason": "size"},
+            )
+
+    # --------------------------------------------------------
+    # Estadísticas
+    # --------------------------------------------------------
+
+    def _registrar(self, hits_memoria: int, hits_disco: int, misses: int) -> None:
+        with self._lock:
+            self._estadisticas["hits_memoria"] += hits_memoria
+            self._estadisticas["hits_disco"] += hits_disco
+            self._estadisticas["misses"] += misses
+
+        if hits_memoria:
+            increment_counter(
+                METRIC_EMBEDDINGS_CACHE_HIT_COUNT,
+                hits_memoria,
+                tags={"tier": TIER_MEMORIA},
+            )
+        if hits_disco:
+            increment_counter(
+                METRIC_EMBEDDINGS_CACHE_HIT_COUNT,
+                hits_disco,
+                tags={"tier": TIER_DISCO},
+            )
+        if misses:
+            increment_counter(METRIC_EMBEDDINGS_CACHE_MISS_COUNT, misses)
+
+    def estadisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._estadisticas, "entradas": len(self._memoria)}
+
+    def limpiar(self) -> None:
+        """
+        Vacía el nivel memoria (el disco se conserva).
+        """
+        with self._lock:
+            self._memoria.clear()
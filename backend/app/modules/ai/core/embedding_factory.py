@@ -6,46 +6,198 @@ Factory para obtener el EmbeddingProvider activo según configuración.
 
 - Mantiene desacoplado el dominio del motor IA
 - Permite cambiar provider sin tocar services/routers
+- Todo provider se envuelve en CachedEmbeddingProvider (LRU + TTL + disco);
+  los caminos bulk piden usar_cache=False y embeben sin pasar por él
+- El provider local (sentence-transformers/torch) se importa recién
+  cuando se selecciona: scripts y tests que no embeben no lo cargan
+- Precalentamiento opcional en segundo plano (carga + encode de prueba)
+- La carga del modelo se serializa con su propio lock: estado y model_id
+  se consultan sin esperarla
 """
 
+import sqlite3
+import threading
+
 from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.modules.ai.core.embedding_cache import (
+    CachedEmbeddingProvider,
+    EmbeddingDiskCache,
+)
 from app.modules.ai.core.embedding_provider import EmbeddingProvider
 from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
-from app.modules.ai.providers.local_provider import LocalEmbeddingProvider
 
 
+ESTADO_FRIO = "cold"
+ESTADO_CALENTANDO = "warming"
+ESTADO_LISTO = "ready"
+ESTADO_FALLBACK = "fallback"
+
+TEXTO_PRECALENTAMIENTO = "feedgo"
+
+logger = get_operation_logger("embeddings")
+
 _PROVIDERS_CACHE: dict[str, EmbeddingProvider] = {}
+_ESTADOS: dict[str, str] = {}
+_CALENTANDO: set[str] = set()
+# _LOCK protege los dicts de estado; _LOCK_CARGA serializa la construcción
+# (que puede tardar la carga completa del modelo local).
+_LOCK = threading.Lock()
+_LOCK_CARGA = threading.Lock()
+
+
+def _nombre_provider() -> str:
+    return (settings.EMBEDDINGS_PROVIDER or "simulated").strip().lower()
+
+
+def _con_cache(provider: EmbeddingProvider) -> CachedEmbeddingProvider:
+    ttl_seconds = settings.EMBEDDINGS_CACHE_TTL_SECONDS
+    disk_cache = None
+    if settings.EMBEDDINGS_CACHE_DISK_PATH:
+        try:
+            disk_cache = EmbeddingDiskCache(
+                settings.EMBEDDINGS_CACHE_DISK_PATH,
+                ttl_seconds=ttl_seconds,
+                max_entries=settings.EMBEDDINGS_CACHE_DISK_MAX_ENTRIES,
+            )
+        except (OSError, sqlite3.Error):
+            # Sin disco el cache sigue funcionando solo en memoria.
+            disk_cache = None
+
+    return CachedEmbeddingProvider(
+        provider,
+        max_entries=settings.EMBEDDINGS_CACHE_MAX_ENTRIES,
+        ttl_seconds=ttl_seconds,
+        disk_cache=disk_cache,
+    )
+
+
+def _crear_provider_local() -> tuple[EmbeddingProvider, str]:
+    try:
+        # Import diferido: arrastra sentence-transformers y torch.
+        from app.modules.ai.providers.local_provider import LocalEmbeddingProvider
 
+        return LocalEmbeddingProvider(), ESTADO_LISTO
+    except Exception as exc:
+        logger.warning(
+            "embeddings_local_no_disponible error_class=%s",
+            safe_error_class(exc),
+        )
+        return SimulatedEmbeddingProvider(), ESTADO_FALLBACK
 
-def get_embedding_provider() -> EmbeddingProvider:
+
+def get_embedding_provider(*, usar_cache: bool = True) -> EmbeddingProvider:
     """
     Devuelve el provider configurado en settings.
 
     Soporta:
     - simulated (gratis, 0 dependencias)
     - local (modelo open-source local)
+
+    La construcción ocurre una sola vez por proceso, aunque varios hilos
+    (requests + precalentamiento) lo pidan a la vez.
+
+    usar_cache=False devuelve el mismo provider sin el cache de consultas:
+    textos que se embeben una sola vez (comercios, catálogo, regeneración)
+    desalojarían las consultas populares sin volver a usarse.
     """
+    provider = _provider_con_cache()
+    if usar_cache:
+        return provider
+    return getattr(provider, "provider", provider)
+
 
-    provider_name = (settings.EMBEDDINGS_PROVIDER or "simulated").strip().lower()
+def _provider_con_cache() -> EmbeddingProvider:
+    provider_name = _nombre_provider()
 
     provider = _PROVIDERS_CACHE.get(provider_name)
     if provider is not None:
         return provider
 
-    if provider_name == "simulated":
-        provider = SimulatedEmbeddingProvider()
-        _PROVIDERS_CACHE[provider_name] = provider
+    if provider_name not in {"simulated", "local"}:
+        raise ValueError(
+            f"EMBEDDINGS_PROVIDER no soportado: '{provider_name}'. "
+            "Valores soportados: simulated, local"
+        )
+
+    with _LOCK_CARGA:
+        provider = _PROVIDERS_CACHE.get(provider_name)
+        if provider is not None:
+            return provider
+
+        if provider_name == "simulated":
+            base, estado = SimulatedEmbeddingProvider(), ESTADO_LISTO
+        else:
+            base, estado = _crear_provider_local()
+
+        provider = _con_cache(base)
+        with _LOCK:
+            _PROVIDERS_CACHE[provider_name] = provider
+            _ESTADOS[provider_name] = estado
         return provider
 
+
+def model_id_configurado() -> str:
+    """
+    model_id del provider configurado, sin construirlo (no espera la carga
+    del modelo local). Si ya está construido, devuelve el real (que puede
+    ser el simulado de fallback).
+    """
+    provider_name = _nombre_provider()
+    provider = _PROVIDERS_CACHE.get(provider_name)
+    if provider is not None:
+        return provider.model_id
+
     if provider_name == "local":
-        try:
-            provider = LocalEmbeddingProvider()
-        except Exception:
-            provider = SimulatedEmbeddingProvider()
-        _PROVIDERS_CACHE[provider_name] = provider
-        return provider
+        return f"sentence-transformers:{settings.EMBEDDINGS_LOCAL_MODEL_PATH}"
+    return SimulatedEmbeddingProvider().model_id
+
+
+def estado_embeddings() -> str:
+    """
+    Estado del provider configurado: cold, warming, ready o fallback.
+    """
+    provider_name = _nombre_provider()
+    with _LOCK:
+        if provider_name in _CALENTANDO:
+            return ESTADO_CALENTANDO
+        return _ESTADOS.get(provider_name, ESTADO_FRIO)
+
+
+def _precalentar(provider_name: str) -> None:
+    try:
+        # Encode de prueba contra el modelo (sin pasar por el cache).
+        get_embedding_provider(usar_cache=False).embed_text(TEXTO_PRECALENTAMIENTO)
+        logger.info("embeddings_precalentamiento_ok provider=%s", provider_name)
+    except Exception as exc:
+        logger.warning(
+            "embeddings_precalentamiento_error provider=%s error_class=%s",
+            provider_name,
+            safe_error_class(exc),
+        )
+    finally:
+        with _LOCK:
+            _CALENTANDO.discard(provider_name)
+
+
+def iniciar_precalentamiento_embeddings() -> threading.Thread | None:
+    """
+    Carga el modelo y corre un encode de prueba en un hilo daemon.
+
+    Mientras corre, estado_embeddings() devuelve "warming".
+    Devuelve None si el provider ya estaba construido.
+    """
+    provider_name = _nombre_provider()
+    with _LOCK:
+        if provider_name in _PROVIDERS_CACHE or provider_name in _CALENTANDO:
+            return None
+        _CALENTANDO.add(provider_name)
 
-    raise ValueError(
-        f"EMBEDDINGS_PROVIDER no soportado: '{provider_name}'. "
-        "Valores soportados: simulated, local"
+    hilo = threading.Thread(
+        target=_precalentar,
+        args=(provider_name,),
+        name="embeddings-warmup",
+        daemon=True,
     )
+    hilo.start()
+    return hilo
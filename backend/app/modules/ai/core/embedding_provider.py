@@ -14,10 +14,16 @@ Permite intercambiar motores:
 - remoto
 
 Sin modificar servicios ni routers.
+
+Los callers bulk (taxonomía, rubros, regeneración) usan embed_texts
+para que cada motor pueda inferir por lotes.
 """
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Sequence
+
+
+DEFAULT_BATCH_SIZE = 64
 
 
 class EmbeddingProvider(ABC):
@@ -25,9 +31,31 @@ class EmbeddingProvider(ABC):
     Interfaz abstracta para cualquier motor de embeddings.
     """
 
+    @property
+    def model_id(self) -> str:
+        """
+        Identidad estable del modelo (se persiste junto a los vectores).
+
+        Dos providers con el mismo model_id deben generar vectores compatibles.
+        """
+        return type(self).__name__
+
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
         """
         Genera embedding vectorial para un texto.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def embed_texts(
+        self,
+        texts: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[List[float]]:
+        """
+        Genera embeddings para varios textos, en el mismo orden recibido.
+
+        Implementación por defecto: una llamada a embed_text por texto.
+        Los providers con inferencia por lotes la sobrescriben.
+        """
+        return [self.embed_text(text) for text in texts]
@@ -0,0 +1,458 @@
+"""
+ivf_index.py
+------------
+
+Indice aproximado (ANN) de vecinos más cercanos tipo IVF, en NumPy.
+
+Esta capa es infraestructura técnica reusable.
+No conoce nada del dominio (Comercio, Usuario, etc.).
+
+Diseño:
+- Entrenamiento: k-means esférico sobre una muestra -> n_listas centroides
+- Segmento base: matriz float32 normalizada, ordenada por lista
+  (cada lista es un rango contiguo de filas, offsets[l]:offsets[l+1])
+- Query: centroides @ q -> se sondean las n_probe listas más cercanas
+  y solo esas filas se puntúan
+- Cambios incrementales sin reconstruir:
+  - upsert: la fila base anterior queda como tombstone y el vector nuevo
+    va a un segmento delta exacto (VectorIndex)
+  - baja: tombstone en base y/o baja en delta
+  - compactar() reconstruye el segmento base cuando el delta crece
+- Persistencia en un solo archivo mapeable en memoria (np.memmap):
+  header JSON + arrays alineados
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import threading
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.modules.ai.core.vector_index import VectorIndex, normalizar_vector
+
+
+MAGIC = b"FGIVF\x00"
+FORMATO_VERSION = 1
+_HEADER = struct.Struct("<6sHI")
+_ALINEACION = 64
+
+ITERACIONES_KMEANS = 10
+MUESTRAS_POR_LISTA = 64
+_FILAS_POR_BLOQUE = 8192
+
+
+class IVFIndexError(ValueError):
+    pass
+
+
+def n_listas_sugerido(total: int) -> int:
+    # Regla usual de IVF: ~sqrt(N) listas.
+    return max(1, int(round(np.sqrt(max(total, 1)))))
+
+
+def _normalizar_matriz(matriz: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Normaliza filas a norma 1. Devuelve (matriz, máscara de filas válidas).
+    """
+    normas = np.linalg.norm(matriz, axis=1)
+    validas = np.isfinite(normas) & (normas > 0)
+    salida = np.zeros_like(matriz, dtype=np.float32)
+    salida[validas] = matriz[validas] / normas[validas, None]
+    return salida, validas
+
+
+def _asignar_listas(matriz: np.ndarray, centroides: np.ndarray) -> np.ndarray:
+    asignacion = np.empty(matriz.shape[0], dtype=np.int32)
+    for inicio in range(0, matriz.shape[0], _FILAS_POR_BLOQUE):
+        bloque = matriz[inicio : inicio + _FILAS_POR_BLOQUE]
+        asignacion[inicio : inicio + bloque.shape[0]] = np.argmax(bloque @ centroides.T, axis=1)
+    return asignacion
+
+
+def entrenar_centroides(
+    matriz: np.ndarray,
+    n_listas: int,
+    *,
+    iteraciones: int = ITERACIONES_KMEANS,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    K-means esférico (similitud coseno) sobre una muestra de la matriz.
+    """
+    rng = np.random.default_rng(seed)
+    total = matriz.shape[0]
+    n_listas = max(1, min(n_listas, total))
+
+    muestra_size = min(total, n_listas * MUESTRAS_POR_LISTA)
+    muestra = matriz[rng.choice(total, size=muestra_size, replace=False)]
+    centroides = muestra[rng.choice(muestra_size, size=n_listas, replace=False)].copy()
+
+    for _ in range(iteraciones):
+        asignacion = _asignar_listas(muestra, centroides)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, muestra)
+        normas = np.linalg.norm(sumas, axis=1)
+        vacias = normas == 0
+        if np.any(vacias):
+            # Lista vacía: se re-siembra con un punto aleatorio.
+            sumas[vacias] = muestra[rng.choice(muestra_size, size=int(vacias.sum()))]
+            normas = np.linalg.norm(sumas, axis=1)
+        centroides = (sumas / normas[:, None]).astype(np.float32)
+
+    return centroides
+
+
+class IVFIndex:
+    """
+    Indice IVF de similitud coseno con segmento delta para cambios en vivo.
+
+    top_k devuelve (id, score) con score DESC y luego id DESC, igual que
+    VectorIndex, para poder comparar contra el indice exacto.
+
+    Es thread-safe: todas las operaciones toman un lock interno.
+    """
+
+    def __init__(
+        self,
+        *,
+        centroides: np.ndarray,
+        matriz: np.ndarray,
+        ids: np.ndarray,
+        offsets: np.ndarray,
+        n_probe: int = 8,
+        metadata: dict | None = None,
+    ) -> None:
+        self._lock = threading.RLock()
+        self._centroides = centroides
+        self._matriz = matriz
+        self._ids = ids
+        self._offsets = offsets
+        self._vivos = np.ones(ids.shape[0], dtype=bool)
+        self._fila_por_id = {int(entity_id): fila for fila, entity_id in enumerate(ids.tolist())}
+        self._delta = VectorIndex(dim=int(centroides.shape[1]))
+        self.n_probe = max(1, int(n_probe))
+        self.metadata = dict(metadata or {})
+
+    # ------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------
+
+    @classmethod
+    def construir(
+        cls,
+        items: Iterable[tuple[int, Sequence[float] | np.ndarray | None]],
+        *,
+        n_listas: int | None = None,
+        n_probe: int = 8,
+        seed: int = 0,
+        metadata: dict | None = None,
+    ) -> "IVFIndex":
+        """
+        Construye el indice desde (id, vector). Ignora vectores degenerados
+        y los de dimensión distinta a la del primer vector válido.
+        """
+        ids_validos: list[int] = []
+        filas: list[np.ndarray] = []
+        dim: int | None = None
+        for entity_id, vector in dict(items).items():
+            normalizado = normalizar_vector(vector)
+            if normalizado is None:
+                continue
+            if dim is None:
+                dim = int(normalizado.shape[0])
+            if normalizado.shape[0] != dim:
+                continue
+            ids_validos.append(int(entity_id))
+            filas.append(normalizado)
+
+        if dim is None:
+            raise IVFIndexError("No hay vectores válidos para construir el indice.")
+
+        matriz = np.vstack(filas).astype(np.float32)
+        ids = np.asarray(ids_validos, dtype=np.int64)
+
+        centroides = entrenar_centroides(
+            matriz,
+            n_listas or n_listas_sugerido(len(ids)),
+            seed=seed,
+        )
+        asignacion = _asignar_listas(matriz, centroides)
+
+        # Orden estable por lista: cada lista queda contigua.
+        orden = np.argsort(asignacion, kind="stable")
+        conteos = np.bincount(asignacion, minlength=centroides.shape[0])
+        offsets = np.zeros(centroides.shape[0] + 1, dtype=np.int64)
+        np.cumsum(conteos, out=offsets[1:])
+
+        return cls(
+            centroides=centroides,
+            matriz=matriz[orden],
+            ids=ids[orden],
+            offsets=offsets,
+            n_probe=n_probe,
+            metadata=metadata,
+        )
+
+    # ------------------------------------------------------------
+    # Propiedades
+    # ------------------------------------------------------------
+
+    @property
+    def dim(self) -> int:
+        return int(self._centroides.shape[1])
+
+    @property
+    def n_listas(self) -> int:
+        return int(self._centroides.shape[0])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._vivos.sum()) + len(self._delta)
+
+    def __contains__(self, entity_id: object) -> bool:
+        with self._lock:
+            if entity_id in self._delta:
+                return True
+            fila = self._fila_por_id.get(entity_id)
+            return fila is not None and bool(self._vivos[fila])
+
+    def tamano_delta(self) -> int:
+        return len(self._delta)
+
+    # ------------------------------------------------------------
+    # Escritura incremental
+    # ------------------------------------------------------------
+
+    def upsert(self, entity_id: int, vector: Sequence[float] | np.ndarray | None) -> bool:
+        """
+        Inserta o reemplaza un vector sin reconstruir el segmento base.
+
+        Devuelve False si el vector no es utilizable (la entidad se da de baja).
+        """
+        with self._lock:
+            self._tombstone_locked(entity_id)
+            aceptado = self._delta.upsert(entity_id, vector)
+            return aceptado
+
+    def remove(self, entity_id: int) -> bool:
+        with self._lock:
+            en_base = self._tombstone_locked(entity_id)
+            en_delta = self._delta.remove(entity_id)
+            return en_base or en_delta
+
+    def _tombstone_locked(self, entity_id: int) -> bool:
+        fila = self._fila_por_id.get(entity_id)
+        if fila is None or not self._vivos[fila]:
+            return False
+        self._vivos[fila] = False
+        return True
+
+    def items(self) -> list[tuple[int, np.ndarray]]:
+        """
+        Vectores vigentes (base viva + delta), normalizados.
+        """
+        with self._lock:
+            filas = np.flatnonzero(self._vivos)
+            vigentes = [
+                (int(self._ids[fila]), np.asarray(self._matriz[fila], dtype=np.float32))
+                for fila in filas
+            ]
+            for entity_id in self._delta.ids():
+                vigentes.append((entity_id, self._delta.vector(entity_id)))
+        return vigentes
+
+    def compactar(self, *, seed: int = 0) -> "IVFIndex":
+        """
+        Devuelve un indice nuevo con base + delta fusionados y re-entrenado.
+        """
+        vigentes = self.items()
+        return IVFIndex.construir(
+            vigentes,
+            n_listas=n_listas_sugerido(len(vigentes)),
+            n_probe=self.n_probe,
+            seed=seed,
+            metadata=self.metadata,
+        )
+
+    # ------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------
+
+    def top_k(
+        self,
+        query: Sequence[float] | np.ndarray | None,
+        k: int,
+        *,
+        n_probe: int | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Devuelve los k ids aproximadamente más similares: score DESC, id DESC.
+        """
+        if k <= 0:
+            return []
+
+        query_vector = normalizar_vector(query)
+        if query_vector is None or query_vector.shape[0] != self.dim:
+            return []
+
+        with self._lock:
+            sondeos = min(self.n_listas, max(1, int(n_probe or self.n_probe)))
+            afinidad = self._centroides @ query_vector
+            if sondeos < self.n_listas:
+                listas = np.argpartition(-afinidad, sondeos - 1)[:sondeos]
+            else:
+                listas = np.arange(self.n_listas)
+
+            partes_scores: list[np.ndarray] = []
+            partes_ids: list[np.ndarray] = []
+            for lista in listas.tolist():
+                inicio, fin = int(self._offsets[lista]), int(self._offsets[lista + 1])
+                if inicio == fin:
+                    continue
+                vivos = self._vivos[inicio:fin]
+                scores = np.asarray(self._matriz[inicio:fin] @ query_vector)
+                partes_scores.append(scores[vivos])
+                partes_ids.append(np.asarray(self._ids[inicio:fin])[vivos])
+
+            candidatos_delta = self._delta.top_k(query_vector, k)
+
+        if candidatos_delta:
+            partes_ids.append(np.asarray([entity_id for entity_id, _ in candidatos_delta], dtype=np.int64))
+            partes_scores.append(np.asarray([score for _, score in candidatos_delta], dtype=np.float32))
+
+        if not partes_ids:
+            return []
+
+        ids = np.concatenate(partes_ids)
+        scores = np.concatenate(partes_scores)
+        if k < scores.size:
+            seleccion = np.argpartition(-scores, k - 1)[:k]
+            ids = ids[seleccion]
+            scores = scores[seleccion]
+
+        orden = np.lexsort((-ids, -scores))
+        return [(int(ids[posicion]), float(scores[posicion])) for posicion in orden]
+
+    # ------------------------------------------------------------
+    # Persistencia (archivo único, mapeable)
+    # ------------------------------------------------------------
+
+    def guardar(self, path: str | Path) -> Path:
+        """
+        Escribe el indice (base + delta compactados) en un archivo.
+
+        Formato: MAGIC | versión | largo header | header JSON | arrays
+        alineados a 64 bytes. Se escribe a un temporal y se reemplaza.
+        """
+        indice = self if self.tamano_delta() == 0 and bool(self._vivos.all()) else self.compactar()
+
+        arrays = {
+            "centroides": np.ascontiguousarray(indice._centroides, dtype=np.float32),
+            "matriz": np.ascontiguousarray(indice._matriz, dtype=np.float32),
+            "ids": np.ascontiguousarray(indice._ids, dtype=np.int64),
+            "offsets": np.ascontiguousarray(indice._offsets, dtype=np.int64),
+        }
+
+        descriptores = {}
+        posicion = 0
+        for nombre, arreglo in arrays.items():
+            posicion = -(-posicion // _ALINEACION) * _ALINEACION
+            descriptores[nombre] = {
+                "offset": posicion,
+                "dtype": arreglo.dtype.str,
+                "shape": list(arreglo.shape),
+            }
+            posicion += arreglo.nbytes
+
+        header = json.dumps(
+            {
+                "arrays": descriptores,
+                "n_probe": indice.n_probe,
+                "metadata": indice.metadata,
+            }
+        ).encode("utf-8")
+        inicio_datos = -(-(_HEADER.size + len(header)) // _ALINEACION) * _ALINEACION
+
+        destino = Path(path)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporal = destino.with_suffix(destino.suffix + ".tmp")
+        with open(temporal, "wb") as archivo:
+            archivo.write(_HEADER.pack(MAGIC, FORMATO_VERSION, len(header)))
+            archivo.write(header)
+            for nombre, arreglo in arrays.items():
+                archivo.seek(inicio_datos + descriptores[nombre]["offset"])
+                archivo.write(arreglo.tobytes())
+        temporal.replace(destino)
+        return destino
+
+    @classmethod
+    def cargar(cls, path: str | Path, *, mmap: bool = True) -> "IVFIndex":
+        """
+        Abre un indice guardado. Con mmap=True los arrays grandes no se
+        copian a memoria: el sistema operativo pagina bajo demanda y varios
+        workers comparten las mismas páginas.
+        """
+        origen = Path(path)
+        with open(origen, "rb") as archivo:
+            cabecera = archivo.read(_HEADER.size)
+            if len(cabecera) != _HEADER.size:
+                raise IVFIndexError("Archivo de indice truncado.")
+            magic, version, largo_header = _HEADER.unpack(cabecera)
+            if magic != MAGIC or version != FORMATO_VERSION:
+                raise IVFIndexError("Archivo de indice con formato desconocido.")
+            try:
+                header = json.loads(archivo.read(largo_header).decode("utf-8"))
+            except ValueError as exc:
+                raise IVFIndexError("Header de indice corrupto.") from exc
+
+        inicio_datos = -(-(_HEADER.size + largo_header) // _ALINEACION) * _ALINEACION
+        arrays = {}
+        for nombre, descriptor in header["arrays"].items():
+            dtype = np.dtype(descriptor["dtype"])
+            shape = tuple(descriptor["shape"])
+            offset = inicio_datos + int(descriptor["offset"])
+            if int(np.prod(shape)) == 0:
+                arrays[nombre] = np.zeros(shape, dtype=dtype)
+            elif mmap:
+                arrays[nombre] = np.memmap(origen, dtype=dtype, mode="r", offset=offset, shape=shape)
+            else:
+                arrays[nombre] = np.fromfile(
+                    origen,
+                    dtype=dtype,
+                    count=int(np.prod(shape)),
+                    offset=offset,
+                ).reshape(shape)
+
+        return cls(
+            centroides=np.asarray(arrays["centroides"]),
+            matriz=arrays["matriz"],
+            ids=np.asarray(arrays["ids"]),
+            offsets=np.asarray(arrays["offsets"]),
+            n_probe=int(header.get("n_probe") or 8),
+            metadata=header.get("metadata") or {},
+        )
+
+
+def medir_recall(
+    aproximado: IVFIndex,
+    exacto: VectorIndex,
+    queries: Iterable[Sequence[float] | np.ndarray],
+    *,
+    k: int = 10,
+    n_probe: int | None = None,
+) -> float:
+    """
+    Recall@k medio del indice IVF contra el indice exacto.
+    """
+    recalls: list[float] = []
+    for query in queries:
+        esperados = {entity_id for entity_id, _ in exacto.top_k(query, k)}
+        if not esperados:
+            continue
+        obtenidos = {entity_id for entity_id, _ in aproximado.top_k(query, k, n_probe=n_probe)}
+        recalls.append(len(esperados & obtenidos) / len(esperados))
+    return float(np.mean(recalls)) if recalls else 1.0
@@ -0,0 +1,110 @@
+"""
+vector_codec.py
+---------------
+
+Formato binario para persistir vectores de embeddings.
+
+Esta capa es infraestructura técnica reusable.
+No conoce nada del dominio (Comercio, Usuario, etc.).
+
+Layout (little-endian):
+- 2 bytes: magic b"FV"
+- 1 byte : versión del formato (1)
+- 1 byte : código de dtype (1 = float32, 2 = float64)
+- 4 bytes: dimensión (uint32)
+- dim * itemsize bytes: valores
+
+Se lee directo a NumPy con frombuffer (sin copia ni parseo de texto).
+El formato legado (JSON en TEXT) se sigue leyendo durante el rollout.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+
+_MAGIC = b"FV"
+_VERSION = 1
+DTYPE_FLOAT32 = 1
+DTYPE_FLOAT64 = 2
+
+_HEADER = struct.Struct("<2sBBI")
+HEADER_BYTES = _HEADER.size
+
+_DTYPES = {
+    DTYPE_FLOAT32: np.dtype("<f4"),
+    DTYPE_FLOAT64: np.dtype("<f8"),
+}
+
+
+class VectorCodecError(ValueError):
+    pass
+
+
+def empaquetar_vector(
+    vector: Sequence[float] | np.ndarray,
+    dtype_code: int = DTYPE_FLOAT32,
+) -> bytes:
+    """
+    Serializa un vector como blob binario con header.
+
+    float32 por defecto; float64 para acumuladores que reciben muchos deltas.
+    """
+    valores = np.asarray(vector, dtype=_DTYPES[dtype_code]).reshape(-1)
+    header = _HEADER.pack(_MAGIC, _VERSION, dtype_code, valores.shape[0])
+    return header + valores.tobytes()
+
+
+def es_vector_binario(blob: bytes | None) -> bool:
+    return (
+        blob is not None
+        and len(blob) >= HEADER_BYTES
+        and bytes(blob[:2]) == _MAGIC
+    )
+
+
+def desempaquetar_vector(blob: bytes) -> np.ndarray:
+    """
+    Lee un blob binario como arreglo NumPy (vista de solo lectura).
+    """
+    if not es_vector_binario(blob):
+        raise VectorCodecError("Blob de vector sin header valido")
+
+    _, version, dtype_code, dim = _HEADER.unpack_from(blob)
+    if version != _VERSION:
+        raise VectorCodecError(f"Version de vector no soportada: {version}")
+
+    dtype = _DTYPES.get(dtype_code)
+    if dtype is None:
+        raise VectorCodecError(f"Dtype de vector no soportado: {dtype_code}")
+
+    esperado = HEADER_BYTES + dim * dtype.itemsize
+    if len(blob) != esperado:
+        raise VectorCodecError("Longitud de blob inconsistente con la dimension")
+
+    return np.frombuffer(blob, dtype=dtype, count=dim, offset=HEADER_BYTES)
+
+
+def leer_vector_persistido(
+    vector_binario: bytes | None,
+    vector_legacy: str | None = None,
+) -> np.ndarray | None:
+    """
+    Lee un vector persistido en cualquiera de los dos formatos.
+
+    - Prioriza el blob binario.
+    - Si no existe, cae al JSON legado.
+    - Devuelve None si no hay vector.
+    - Lanza VectorCodecError / ValueError si el contenido está corrupto.
+    """
+    if vector_binario is not None:
+        return desempaquetar_vector(vector_binario)
+
+    if vector_legacy is None:
+        return None
+
+    return np.asarray(json.loads(vector_legacy), dtype=np.float32)
@@ -0,0 +1,405 @@
+"""
+vector_index.py
+---------------
+
+Indice vectorial en memoria basado en NumPy.
+
+Esta capa es infraestructura técnica reusable.
+No conoce nada del dominio (Comercio, Usuario, etc.).
+
+Diseño:
+- Matriz float32 con vectores pre-normalizados (norma 1)
+- Mapa id -> fila para upserts/bajas en O(dim)
+- Scoring por lote: producto matriz-vector sobre todo el indice
+  o sobre cualquier subconjunto de ids
+- Top-k con argpartition (sin ordenar el pool completo)
+- Precisión opcional de almacenamiento (opt-in):
+  - float16: mitad de memoria
+  - int8 con escala por vector: ~4x menos memoria
+  El scoring cuantizado trabaja por bloques para no materializar
+  una copia float32 completa de la matriz
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+
+_CAPACIDAD_INICIAL = 64
+_FILAS_POR_BLOQUE = 4096
+
+PRECISION_FLOAT32 = "float32"
+PRECISION_FLOAT16 = "float16"
+PRECISION_INT8 = "int8"
+
+_DTYPES = {
+    PRECISION_FLOAT32: np.float32,
+    PRECISION_FLOAT16: np.float16,
+    PRECISION_INT8: np.int8,
+}
+_INT8_MAX = 127.0
+
+
+def resolver_precision(precision: str | None) -> str:
+    normalizada = (precision or PRECISION_FLOAT32).strip().lower()
+    if normalizada not in _DTYPES:
+        raise ValueError(
+            f"Precisión de indice no soportada: '{precision}'. "
+            f"Valores soportados: {', '.join(_DTYPES)}"
+        )
+    return normalizada
+
+
+def normalizar_vector(vector: Sequence[float] | np.ndarray | None) -> np.ndarray | None:
+    """
+    Devuelve el vector como float32 con norma 1.
+
+    Devuelve None si el vector es nulo, vacío o degenerado (norma 0 / no finito).
+    """
+    if vector is None:
+        return None
+
+    arreglo = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if arreglo.size == 0:
+        return None
+
+    norma = float(np.linalg.norm(arreglo))
+    if not np.isfinite(norma) or norma <= 0.0:
+        return None
+
+    return arreglo / norma
+
+
+class VectorIndex:
+    """
+    Indice exacto de similitud coseno sobre vectores de dimensión fija.
+
+    La dimensión se fija con el primer vector aceptado. Los vectores con otra
+    dimensión se rechazan (se comportan como "sin embedding").
+
+    Es thread-safe: todas las operaciones toman un lock interno.
+    """
+
+    def __init__(self, dim: int | None = None, precision: str | None = None) -> None:
+        self._lock = threading.RLock()
+        self._precision = resolver_precision(precision)
+        self._dtype = _DTYPES[self._precision]
+        self._dim_inicial = dim
+        self._dim = dim
+        self._matrix = np.zeros((0, dim or 0), dtype=self._dtype)
+        self._escalas = self._nuevas_escalas(0)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._row_by_id: dict[int, int] = {}
+        self._size = 0
+
+    # ------------------------------------------------------------
+    # Propiedades
+    # ------------------------------------------------------------
+
+    @property
+    def dim(self) -> int | None:
+        return self._dim
+
+    @property
+    def precision(self) -> str:
+        return self._precision
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, entity_id: object) -> bool:
+        return entity_id in self._row_by_id
+
+    def ids(self) -> list[int]:
+        with self._lock:
+            return [int(entity_id) for entity_id in self._ids[: self._size]]
+
+    def vector(self, entity_id: int) -> np.ndarray | None:
+        """
+        Vector normalizado (float32) de una entidad, o None si no está.
+        """
+        with self._lock:
+            fila = self._row_by_id.get(entity_id)
+            if fila is None:
+                return None
+            vector = self._matrix[fila].astype(np.float32)
+            if self._escalas is not None:
+                vector *= self._escalas[fila]
+            return vector
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            total = int(self._matrix[: self._size].nbytes)
+            if self._escalas is not None:
+                total += int(self._escalas[: self._size].nbytes)
+            return total
+
+    # ------------------------------------------------------------
+    # Cuantización
+    # ------------------------------------------------------------
+
+    def _nuevas_escalas(self, capacidad: int) -> np.ndarray | None:
+        if self._precision != PRECISION_INT8:
+            return None
+        return np.zeros(capacidad, dtype=np.float32)
+
+    def _codificar(self, normalizado: np.ndarray) -> tuple[np.ndarray, float]:
+        if self._precision != PRECISION_INT8:
+            return normalizado.astype(self._dtype), 1.0
+
+        # Escala por vector: el máximo absoluto se mapea a 127.
+        escala = float(np.max(np.abs(normalizado))) / _INT8_MAX
+        cuantizado = np.clip(np.rint(normalizado / escala), -_INT8_MAX, _INT8_MAX)
+        return cuantizado.astype(np.int8), escala
+
+    # ------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dim = self._dim_inicial
+            self._matrix = np.zeros((0, self._dim or 0), dtype=self._dtype)
+            self._escalas = self._nuevas_escalas(0)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._row_by_id.clear()
+            self._size = 0
+
+    def upsert(self, entity_id: int, vector: Sequence[float] | np.ndarray | None) -> bool:
+        """
+        Inserta o reemplaza el vector de una entidad.
+
+        Devuelve False si el vector no es utilizable. En ese caso la entidad
+        queda fuera del indice (si existía, se elimina).
+        """
+        normalizado = normalizar_vector(vector)
+
+        with self._lock:
+            if normalizado is None or (
+                self._dim is not None and normalizado.shape[0] != self._dim
+            ):
+                self._remove_locked(entity_id)
+                return False
+
+            if self._dim is None:
+                self._dim = int(normalizado.shape[0])
+                self._matrix = np.zeros((0, self._dim), dtype=self._dtype)
+
+            fila = self._row_by_id.get(entity_id)
+            if fila is None:
+                self._ensure_capacity_locked(self._size + 1)
+                fila = self._size
+                self._ids[fila] = entity_id
+                self._row_by_id[entity_id] = fila
+                self._size += 1
+
+            codificado, escala = self._codificar(normalizado)
+            self._matrix[fila] = codificado
+            if self._escalas is not None:
+                self._escalas[fila] = escala
+            return True
+
+    def upsert_many(
+        self,
+        items: Iterable[tuple[int, Sequence[float] | np.ndarray | None]],
+    ) -> int:
+        """
+        Inserta o reemplaza varios vectores. Devuelve cuántos se aceptaron.
+        """
+        aceptados = 0
+        with self._lock:
+            for entity_id, vector in items:
+                if self.upsert(entity_id, vector):
+                    aceptados += 1
+        return aceptados
+
+    def remove(self, entity_id: int) -> bool:
+        with self._lock:
+            return self._remove_locked(entity_id)
+
+    def _remove_locked(self, entity_id: int) -> bool:
+        fila = self._row_by_id.pop(entity_id, None)
+        if fila is None:
+            return False
+
+        ultima = self._size - 1
+        if fila != ultima:
+            # Swap con la última fila para mantener la matriz compacta.
+            id_ultimo = int(self._ids[ultima])
+            self._matrix[fila] = self._matrix[ultima]
+            if self._escalas is not None:
+                self._escalas[fila] = self._escalas[ultima]
+            self._ids[fila] = id_ultimo
+            self._row_by_id[id_ultimo] = fila
+
+        self._size -= 1
+        return True
+
+    def _ensure_capacity_locked(self, requerido: int) -> None:
+        capacidad = self._matrix.shape[0]
+        if requerido <= capacidad:
+            return
+
+        nueva_capacidad = max(_CAPACIDAD_INICIAL, capacidad * 2, requerido)
+        matriz = np.zeros((nueva_capacidad, self._dim or 0), dtype=self._dtype)
+        matriz[: self._size] = self._matrix[: self._size]
+        escalas = self._nuevas_escalas(nueva_capacidad)
+        if escalas is not None:
+            escalas[: self._size] = self._escalas[: self._size]
+            self._escalas = escalas
+        ids = np.zeros(nueva_capacidad, dtype=np.int64)
+        ids[: self._size] = self._ids[: self._size]
+        self._matrix = matriz
+        self._ids = ids
+
+    # ------------------------------------------------------------
+    # Lectura / scoring
+    # ------------------------------------------------------------
+
+    def _query_vector(
+        self,
+        query: Sequence[float] | np.ndarray | None,
+    ) -> np.ndarray | None:
+        normalizado = normalizar_vector(query)
+        if normalizado is None or self._dim is None:
+            return None
+        if normalizado.shape[0] != self._dim:
+            return None
+        return normalizado
+
+    def _candidate_rows_locked(
+        self,
+        entity_ids: Iterable[int] | None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if entity_ids is None:
+            filas = np.arange(self._size, dtype=np.int64)
+        else:
+            filas = np.fromiter(
+                (
+                    self._row_by_id[entity_id]
+                    for entity_id in dict.fromkeys(entity_ids)
+                    if entity_id in self._row_by_id
+                ),
+                dtype=np.int64,
+            )
+        return filas, self._ids[filas]
+
+    def _puntuar_filas_locked(self, filas: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+        if self._precision == PRECISION_FLOAT32:
+            return self._matrix[filas] @ query_vector
+
+        similitudes = np.empty(filas.size, dtype=np.float32)
+        for inicio in range(0, filas.size, _FILAS_POR_BLOQUE):
+            bloque = filas[inicio : inicio + _FILAS_POR_BLOQUE]
+            parcial = self._matrix[bloque].astype(np.float32) @ query_vector
+            if self._escalas is not None:
+                parcial *= self._escalas[bloque]
+            similitudes[inicio : inicio + bloque.size] = parcial
+        return similitudes
+
+    def scores(
+        self,
+        query: Sequence[float] | np.ndarray | None,
+        entity_ids: Iterable[int] | None = None,
+    ) -> dict[int, float]:
+        """
+        Similitud coseno de la query contra cada id indexado.
+
+        - entity_ids=None puntúa todo el indice.
+        - Los ids ausentes del indice no aparecen en el resultado.
+        """
+        with self._lock:
+            query_vector = self._query_vector(query)
+            if query_vector is None or self._size == 0:
+                return {}
+
+            filas, ids = self._candidate_rows_locked(entity_ids)
+            if filas.size == 0:
+                return {}
+
+            similitudes = self._puntuar_filas_locked(filas, query_vector)
+
+        return {
+            int(entity_id): float(score)
+            for entity_id, score in zip(ids.tolist(), similitudes.tolist())
+        }
+
+    def top_k(
+        self,
+        query: Sequence[float] | np.ndarray | None,
+        k: int,
+        entity_ids: Iterable[int] | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Devuelve los k ids más similares: score DESC, luego id DESC.
+        """
+        if k <= 0:
+            return []
+
+        with self._lock:
+            query_vector = self._query_vector(query)
+            if query_vector is None or self._size == 0:
+                return []
+
+            filas, ids = self._candidate_rows_locked(entity_ids)
+            if filas.size == 0:
+                return []
+
+            similitudes = self._puntuar_filas_locked(filas, query_vector)
+
+        if k < similitudes.size:
+            seleccion = np.argpartition(-similitudes, k - 1)[:k]
+            similitudes = similitudes[seleccion]
+            ids = ids[seleccion]
+
+        orden = np.lexsort((-ids, -similitudes))
+        return [
+            (int(ids[posicion]), float(similitudes[posicion]))
+            for posicion in orden
+        ]
+
+
+def comparar_ranking_cuantizado(
+    vectores: Iterable[tuple[int, Sequence[float] | np.ndarray | None]],
+    queries: Iterable[Sequence[float] | np.ndarray],
+    *,
+    precision: str,
+    k: int = 10,
+) -> dict[str, object]:
+    """
+    Chequeo de regresión: compara el top-k cuantizado contra float32.
+
+    Devuelve recall@k medio y mínimo (fracción del top-k float32 que el
+    indice cuantizado también devuelve) y la memoria de ambos indices.
+    """
+    items = list(vectores)
+    referencia = VectorIndex()
+    cuantizado = VectorIndex(precision=precision)
+    referencia.upsert_many(items)
+    cuantizado.upsert_many(items)
+
+    recalls: list[float] = []
+    for query in queries:
+        esperados = {entity_id for entity_id, _ in referencia.top_k(query, k)}
+        if not esperados:
+            continue
+        obtenidos = {entity_id for entity_id, _ in cuantizado.top_k(query, k)}
+        recalls.append(len(esperados & obtenidos) / len(esperados))
+
+    memoria_referencia = referencia.memory_bytes()
+    memoria_cuantizada = cuantizado.memory_bytes()
+    return {
+        "precision": cuantizado.precision,
+        "k": k,
+        "queries": len(recalls),
+        "recall_medio": float(np.mean(recalls)) if recalls else 1.0,
+        "recall_minimo": float(np.min(recalls)) if recalls else 1.0,
+        "memoria_float32_bytes": memoria_referencia,
+        "memoria_bytes": memoria_cuantizada,
+        "reduccion_memoria": (
+            memoria_referencia / memoria_cuantizada if memoria_cuantizada else 1.0
+        ),
+    }
@@ -0,0 +1,59 @@
+"""
+catalogo_embeddings_models.py
+-----------------------------
+Modelo ORM para embeddings persistidos del catalogo (IA v2).
+
+Cubre entidades de catalogo que antes solo vivian en caches por proceso:
+- nodos de taxonomia
+- rubros
+
+Un vector se recalcula solo si cambia el hash del texto fuente o el modelo.
+"""
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class CatalogoEmbedding(Base):
+    """
+    Embedding persistido de una entidad de catalogo.
+
+    - entity_type: "taxonomy_node" | "rubro"
+    - content_hash: sha256 del texto semantico usado para el embedding
+    - model_id: identidad del provider/modelo que genero el vector
+    - vector_binario: float32 little-endian con header (ver vector_codec)
+    """
+
+    __tablename__ = "catalogo_embeddings"
+    __table_args__ = (
+        UniqueConstraint(
+            "entity_type",
+            "entity_id",
+            "model_id",
+            name="uq_catalogo_embeddings_entity_model",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    entity_type = Column(String(50), nullable=False, index=True)
+    entity_id = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    model_id = Column(String(255), nullable=False, index=True)
+    vector_binario = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
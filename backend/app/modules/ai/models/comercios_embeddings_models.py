@@ -9,7 +9,7 @@ Se separa en tabla propia para:
 - escalar a múltiples representaciones IA sin romper contratos
 """
 
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary, Text, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -20,7 +20,8 @@ class ComercioEmbedding(Base):
     """
     Embedding persistido asociado 1 a 1 con un Comercio.
 
-    - vector: representación serializada (por ahora TEXT)
+    - vector_binario: float32 little-endian con header (ver vector_codec)
+    - vector: formato legado (JSON en TEXT), solo lectura durante el rollout
     - model_version: permite versionar embeddings (v2, v3, etc.)
     """
 
@@ -36,8 +37,13 @@ class ComercioEmbedding(Base):
         index=True
     )
 
-    # Vector serializado (por ahora JSON string dentro de TEXT)
-    vector = Column(Text, nullable=False)
+    # Vector empaquetado en binario (header + float32 little-endian)
+    vector_binario = Column(LargeBinary, nullable=True)
+
+    # Formato legado: JSON string dentro de TEXT.
+    # Las escrituras nuevas lo dejan en NULL; se conserva para leer filas
+    # todavía no migradas (migrate_embeddings_vector_binario.py).
+    vector = Column(Text, nullable=True)
 
     # Versionado (para poder recalcular a futuro sin confundir)
     model_version = Column(Integer, nullable=False, default=1)
@@ -0,0 +1,43 @@
+"""
+embeddings_jobs_models.py
+-------------------------
+Cola persistida de recálculos de embeddings (IA v2).
+
+Una fila por entidad pendiente: pedidos repetidos sobre la misma entidad
+solo actualizan solicitado_en (debounce). Si el proceso se reinicia, las
+filas quedan y se procesan al volver a levantar el worker.
+
+Reclamo: un worker marca el lote con su token (reclamado_por) y un
+vencimiento (reclamado_hasta) antes de procesarlo; otro worker no lo toma
+hasta que se libere o venza (worker caído a mitad de lote). Columnas
+agregadas por migrate_embeddings_jobs_reclamo.py.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class EmbeddingJob(Base):
+    __tablename__ = "embeddings_jobs"
+    __table_args__ = (
+        UniqueConstraint(
+            "entity_type",
+            "entity_id",
+            name="uq_embeddings_jobs_entity",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+
+    # Último pedido (UTC naive). El job corre cuando pasa el debounce.
+    solicitado_en = Column(DateTime, nullable=False, index=True)
+
+    intentos = Column(Integer, nullable=False, default=0)
+    ultimo_error = Column(String(255), nullable=True)
+
+    reclamado_por = Column(String(32), nullable=True)
+    reclamado_hasta = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 # backend/app/modules/ai/models/usuarios_embeddings_models.py
 
 # Importamos las columnas y tipos que vamos a usar en la tabla
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary, Text, DateTime, func
 
 # Importamos la base declarativa del proyecto
 from app.core.database import Base
@@ -13,8 +13,10 @@ class UsuarioEmbedding(Base):
 
     Regla de diseño:
     - 1 usuario -> 1 embedding
-    - El vector se guarda serializado en texto
+    - El vector se guarda empaquetado en binario (float32 + header)
     - model_version permite regenerar embeddings a futuro
+    - vector_suma_binario + interacciones_count forman el acumulador
+      incremental: vector = suma / count, con deltas O(dim) por like/guardado
     """
 
     __tablename__ = "usuarios_embeddings"
@@ -32,8 +34,19 @@ class UsuarioEmbedding(Base):
         index=True
     )
 
-    # Vector serializado (por ejemplo JSON en string)
-    vector = Column(Text, nullable=False)
+    # Vector empaquetado en binario (header + float32 little-endian)
+    vector_binario = Column(LargeBinary, nullable=True)
+
+    # Formato legado (JSON en string). Solo lectura durante el rollout.
+    vector = Column(Text, nullable=True)
+
+    # Acumulador incremental: suma (float64) de los vectores de comercio de
+    # las publicaciones con like o guardado, y cantidad de vectores sumados.
+    vector_suma_binario = Column(LargeBinary, nullable=True)
+    interacciones_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Última reconstrucción completa del acumulador (corrige drift)
+    reconstruido_en = Column(DateTime, nullable=True)
 
     # Versión del modelo/proceso que generó el embedding
     model_version = Column(Integer, nullable=False, default=1)
@@ -4,15 +4,18 @@ local_provider.py
 ETAPA 52 — Provider local real usando sentence-transformers.
 
 Implementa correctamente la interfaz EmbeddingProvider.
+El cache de vectores vive en embedding_cache (lo aplica la factory).
 """
 
-from functools import lru_cache
-from typing import List
+from typing import List, Sequence
 
 from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
-from app.modules.ai.core.embedding_provider import EmbeddingProvider
+from app.modules.ai.core.embedding_provider import (
+    DEFAULT_BATCH_SIZE,
+    EmbeddingProvider,
+)
 
 
 class LocalEmbeddingProvider(EmbeddingProvider):
@@ -32,6 +35,10 @@ class LocalEmbeddingProvider(EmbeddingProvider):
             local_files_only=True,
         )
 
+    @property
+    def model_id(self) -> str:
+        return f"sentence-transformers:{settings.EMBEDDINGS_LOCAL_MODEL_PATH}"
+
     def embed_text(self, text: str) -> List[float]:
         """
         Implementación obligatoria de la interfaz.
@@ -40,10 +47,29 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         if not text:
             text = ""
 
-        return list(self._embed_text_cached(text.strip()))
+        return self.model.encode(text.strip()).tolist()
+
+    def embed_texts(
+        self,
+        texts: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[List[float]]:
+        """
+        Inferencia por lotes: una sola llamada a model.encode.
+
+        Los textos repetidos se codifican una vez.
+        """
+        normalizados = [(text or "").strip() for text in texts]
+        unicos = list(dict.fromkeys(normalizados))
+        if not unicos:
+            return []
 
-    @lru_cache(maxsize=256)
-    def _embed_text_cached(self, text: str) -> tuple[float, ...]:
-        vector = self.model.encode(text)
+        matriz = self.model.encode(
+            unicos,
+            batch_size=max(1, int(batch_size)),
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        por_texto = dict(zip(unicos, matriz.tolist()))
 
-        return tuple(vector.tolist())
+        return [list(por_texto[text]) for text in normalizados]
@@ -14,9 +14,14 @@ No es semántico real, pero sirve para el pipeline.
 """
 
 import hashlib
-from typing import List
+from typing import List, Sequence
 
-from app.modules.ai.core.embedding_provider import EmbeddingProvider
+import numpy as np
+
+from app.modules.ai.core.embedding_provider import (
+    DEFAULT_BATCH_SIZE,
+    EmbeddingProvider,
+)
 
 
 class SimulatedEmbeddingProvider(EmbeddingProvider):
@@ -27,6 +32,10 @@ class SimulatedEmbeddingProvider(EmbeddingProvider):
     def __init__(self, dim: int = 128) -> None:
         self.dim = dim
 
+    @property
+    def model_id(self) -> str:
+        return f"simulated-sha256-{self.dim}"
+
     def embed_text(self, text: str) -> List[float]:
         """
         Convierte el texto en un vector [0..1] de tamaño fijo (dim).
@@ -50,4 +59,33 @@ class SimulatedEmbeddingProvider(EmbeddingProvider):
             values.append(b / 255.0)
             i += 1
 
-        return values
\ No newline at end of file
+        return values
+
+    def embed_texts(
+        self,
+        texts: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[List[float]]:
+        """
+        Versión vectorizada de embed_text (mismo resultado por texto).
+
+        - Un digest por texto, expansión a dim en una sola operación NumPy
+        - batch_size no aplica: no hay modelo que procesar por lotes
+        """
+        if not texts:
+            return []
+
+        normalizados = [(text or "").strip().lower() for text in texts]
+        digests = np.frombuffer(
+            b"".join(
+                hashlib.sha256(text.encode("utf-8")).digest()
+                for text in normalizados
+            ),
+            dtype=np.uint8,
+        ).reshape(len(normalizados), -1)
+
+        columnas = np.arange(self.dim) % digests.shape[1]
+        matriz = digests[:, columnas] / 255.0
+        matriz[[not text for text in normalizados]] = 0.0
+
+        return matriz.tolist()
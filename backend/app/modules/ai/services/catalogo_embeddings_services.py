@@ -0,0 +1,224 @@
+"""
+catalogo_embeddings_services.py
+-------------------------------
+Embeddings persistidos de entidades de catalogo (taxonomia, rubros).
+
+- Cada vector se guarda con el hash de su texto fuente y el model_id
+- Solo se recalcula si cambia el texto o el modelo
+- Los workers cargan todos los vectores en una lectura bulk (startup)
+  y luego reutilizan la copia en memoria del proceso
+- Se llama desde lecturas (detección de rubros/taxonomía en Explorar):
+  la carga perezosa y la persistencia usan una sesión propia y nunca
+  commitean ni hacen rollback de la del request
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.modules.ai.core.embedding_factory import (
+    get_embedding_provider,
+    model_id_configurado,
+)
+from app.modules.ai.core.vector_codec import desempaquetar_vector, empaquetar_vector
+from app.modules.ai.models.catalogo_embeddings_models import CatalogoEmbedding
+
+
+ENTITY_TAXONOMY_NODE = "taxonomy_node"
+ENTITY_RUBRO = "rubro"
+
+_LOCK = threading.Lock()
+
+# model_id -> (entity_type, entity_id) -> (content_hash, vector)
+_VECTORES_CATALOGO: dict[str, dict[tuple[str, int], tuple[str, list[float]]]] = {}
+
+
+def hash_texto_catalogo(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _cargar_modelo(db: Session, model_id: str) -> dict[tuple[str, int], tuple[str, list[float]]]:
+    filas = (
+        db.query(
+            CatalogoEmbedding.entity_type,
+            CatalogoEmbedding.entity_id,
+            CatalogoEmbedding.content_hash,
+            CatalogoEmbedding.vector_binario,
+        )
+        .filter(CatalogoEmbedding.model_id == model_id)
+        .all()
+    )
+
+    vectores: dict[tuple[str, int], tuple[str, list[float]]] = {}
+    for entity_type, entity_id, content_hash, vector_binario in filas:
+        try:
+            vector = desempaquetar_vector(vector_binario).tolist()
+        except ValueError:
+            # Vector corrupto: se recalcula en el próximo uso.
+            continue
+        vectores[(entity_type, entity_id)] = (content_hash, vector)
+
+    return vectores
+
+
+def _sesion_propia(db: Session) -> Session:
+    # Misma BD que el request, otra transacción (como SesionBusquedaStoreBD).
+    return Session(bind=db.get_bind(), autoflush=False)
+
+
+def _vectores_del_modelo(
+    db: Session,
+    model_id: str,
+) -> dict[tuple[str, int], tuple[str, list[float]]]:
+    with _LOCK:
+        vectores = _VECTORES_CATALOGO.get(model_id)
+    if vectores is not None:
+        return vectores
+
+    propia = _sesion_propia(db)
+    try:
+        vectores = _cargar_modelo(propia, model_id)
+    except Exception:
+        # Tabla ausente o BD no disponible: se trabaja solo en memoria.
+        vectores = {}
+    finally:
+        propia.close()
+
+    with _LOCK:
+        return _VECTORES_CATALOGO.setdefault(model_id, vectores)
+
+
+def _persistir_vectores(
+    db: Session,
+    *,
+    entity_type: str,
+    model_id: str,
+    nuevos: Mapping[int, tuple[str, list[float]]],
+) -> None:
+    """
+    Upsert de los vectores nuevos en una sesión propia (commit o rollback
+    solo de esa sesión).
+    """
+    propia = _sesion_propia(db)
+    try:
+        existentes = {
+            fila.entity_id: fila
+            for fila in (
+                propia.query(CatalogoEmbedding)
+                .filter(CatalogoEmbedding.entity_type == entity_type)
+                .filter(CatalogoEmbedding.model_id == model_id)
+                .filter(CatalogoEmbedding.entity_id.in_(list(nuevos)))
+                .all()
+            )
+        }
+
+        for entity_id, (content_hash, vector) in nuevos.items():
+            fila = existentes.get(entity_id)
+            if fila is None:
+                fila = CatalogoEmbedding(
+                    entity_type=entity_type,
+                    entity_id=entity_id,
+                    model_id=model_id,
+                )
+                propia.add(fila)
+
+            fila.content_hash = content_hash
+            fila.vector_binario = empaquetar_vector(vector)
+
+        propia.commit()
+    except Exception:
+        propia.rollback()
+        raise
+    finally:
+        propia.close()
+
+
+def precargar_embeddings_catalogo(db: Session) -> int:
+    """
+    Carga en memoria todos los vectores del modelo activo (1 lectura bulk).
+
+    Pensado para el startup de cada worker. Devuelve cuántos vectores cargó.
+    No construye el provider: no espera la carga del modelo local.
+    """
+    model_id = model_id_configurado()
+    vectores = _cargar_modelo(db, model_id)
+
+    with _LOCK:
+        _VECTORES_CATALOGO[model_id] = vectores
+
+    return len(vectores)
+
+
+def obtener_embeddings_catalogo(
+    db: Session,
+    *,
+    entity_type: str,
+    textos_por_id: Mapping[int, str],
+) -> dict[int, list[float]]:
+    """
+    Devuelve {entity_id: vector} para los textos indicados.
+
+    Reutiliza vectores persistidos cuyo hash coincide. Los faltantes o
+    desactualizados se calculan en un solo lote y se persisten.
+    """
+    if not textos_por_id:
+        return {}
+
+    provider = get_embedding_provider(usar_cache=False)
+    model_id = provider.model_id
+    vectores = _vectores_del_modelo(db, model_id)
+
+    resultado: dict[int, list[float]] = {}
+    pendientes: dict[int, tuple[str, str]] = {}
+
+    for entity_id, texto in textos_por_id.items():
+        content_hash = hash_texto_catalogo(texto)
+        cacheado = vectores.get((entity_type, entity_id))
+        if cacheado is not None and cacheado[0] == content_hash:
+            resultado[entity_id] = cacheado[1]
+        else:
+            pendientes[entity_id] = (content_hash, texto)
+
+    if not pendientes:
+        return resultado
+
+    calculados = provider.embed_texts([texto for _, texto in pendientes.values()])
+    # Se redondea a float32 para que todos los workers vean el mismo vector.
+    nuevos = {
+        entity_id: (content_hash, np.asarray(vector, dtype=np.float32).tolist())
+        for (entity_id, (content_hash, _)), vector in zip(
+            pendientes.items(),
+            calculados,
+        )
+    }
+
+    with _LOCK:
+        for entity_id, entrada in nuevos.items():
+            vectores[(entity_type, entity_id)] = entrada
+
+    try:
+        _persistir_vectores(
+            db,
+            entity_type=entity_type,
+            model_id=model_id,
+            nuevos=nuevos,
+        )
+    except Exception:
+        # Otro worker pudo persistir primero, o la tabla no existe:
+        # el vector ya quedó en memoria y se reintenta en el próximo cambio.
+        pass
+
+    for entity_id, (_, vector) in nuevos.items():
+        resultado[entity_id] = vector
+
+    return resultado
+
+
+def reiniciar_cache_embeddings_catalogo() -> None:
+    with _LOCK:
+        _VECTORES_CATALOGO.clear()
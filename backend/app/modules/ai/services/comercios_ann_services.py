@@ -0,0 +1,306 @@
+"""
+comercios_ann_services.py
+-------------------------
+Indice aproximado (IVF) de Comercios compartido por proceso (IA v2).
+
+- Se abre desde EMBEDDINGS_ANN_INDEX_PATH (np.memmap) si el archivo existe
+  y corresponde al modelo activo; si no, se construye desde
+  comercios_embeddings y se guarda en esa ruta
+- Solo indexa comercios activos; se abre al iniciar si EMBEDDINGS_ANN_ENABLED
+  y alimenta la fuente "semantic_ann" del candidate engine (smart_semantic)
+- upsert_embedding_comercio y desactivar_comercio lo actualizan en el mismo
+  proceso (segmento delta)
+- Los cambios de otros workers entran por updated_at del embedding o del
+  comercio (altas, desactivaciones, reactivaciones)
+- Pensado para top-k sobre todo el catálogo; para puntuar un conjunto de ids
+  ya acotado sigue siendo mejor el indice exacto
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.ivf_index import IVFIndex, IVFIndexError
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.services.comercios_embeddings_services import (
+    _deserializar_vector,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+
+
+INTERVALO_SINCRONIZACION_SEGUNDOS = 5.0
+MARGEN_MARCA_SEGUNDOS = 1
+
+logger = get_operation_logger("comercios_ann")
+
+_ESTADO_LOCK = threading.Lock()
+_estado: dict[str, object] = {
+    "indice": None,
+    "marca_updated_at": None,
+    "sincronizado_en": 0.0,
+    # Upserts llegados mientras se compacta; None si no hay compactación.
+    "pendientes_compactacion": None,
+}
+
+
+def _filas_embeddings(db: Session, *, desde_updated_at=None):
+    """
+    (comercio_id, vector, updated_at); vector None = sacar del indice.
+    """
+    query = db.query(
+        ComercioEmbedding.comercio_id,
+        ComercioEmbedding.vector_binario,
+        ComercioEmbedding.vector,
+        ComercioEmbedding.updated_at,
+        Comercio.activo,
+        Comercio.updated_at,
+    ).join(Comercio, Comercio.id == ComercioEmbedding.comercio_id)
+    if desde_updated_at is None:
+        query = query.filter(Comercio.activo.is_(True))
+    else:
+        # Margen de 1s: updated_at puede tener granularidad de segundos.
+        desde = desde_updated_at - timedelta(seconds=MARGEN_MARCA_SEGUNDOS)
+        query = query.filter(
+            or_(ComercioEmbedding.updated_at >= desde, Comercio.updated_at >= desde)
+        )
+
+    for (
+        comercio_id,
+        vector_binario,
+        vector_legacy,
+        updated_at,
+        activo,
+        comercio_updated_at,
+    ) in query.all():
+        vector = None
+        if activo:
+            try:
+                vector = _deserializar_vector(vector_binario, vector_legacy)
+            except Exception:
+                vector = None
+        yield comercio_id, vector, _marca_mayor(updated_at, comercio_updated_at)
+
+
+def _aplicar_upsert_locked(indice: IVFIndex, comercio_id: int, vector) -> None:
+    indice.upsert(comercio_id, vector)
+    pendientes = _estado["pendientes_compactacion"]
+    if pendientes is not None:
+        pendientes[comercio_id] = vector
+
+
+def _marca_mayor(actual, updated_at):
+    if updated_at is not None and (actual is None or updated_at > actual):
+        return updated_at
+    return actual
+
+
+def construir_indice_ann_comercios(
+    db: Session,
+    *,
+    n_listas: int | None = None,
+    n_probe: int | None = None,
+) -> IVFIndex:
+    """
+    Construye el indice IVF con todos los embeddings de comercios.
+
+    Lanza IVFIndexError si no hay ningún vector utilizable.
+    """
+    vectores = []
+    marca = None
+    for comercio_id, vector, updated_at in _filas_embeddings(db):
+        if vector is not None:
+            vectores.append((comercio_id, vector))
+        marca = _marca_mayor(marca, updated_at)
+
+    return IVFIndex.construir(
+        vectores,
+        n_listas=n_listas,
+        n_probe=n_probe or settings.EMBEDDINGS_ANN_N_PROBE,
+        metadata={
+            "model_id": get_embedding_provider().model_id,
+            "marca_updated_at": marca.isoformat() if marca is not None else None,
+        },
+    )
+
+
+def _marca_de_metadata(indice: IVFIndex):
+    valor = indice.metadata.get("marca_updated_at")
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def _abrir_o_construir(db: Session) -> IVFIndex | None:
+    path = settings.EMBEDDINGS_ANN_INDEX_PATH
+    model_id = get_embedding_provider().model_id
+
+    if path and Path(path).exists():
+        try:
+            indice = IVFIndex.cargar(path)
+        except (OSError, IVFIndexError) as exc:
+            logger.warning(
+                "ann_indice_carga_fallida error_class=%s",
+                safe_error_class(exc),
+            )
+        else:
+            if indice.metadata.get("model_id") == model_id:
+                return indice
+            # Archivo de otro modelo: los vectores no son comparables.
+            logger.info("ann_indice_de_otro_modelo path=%s", path)
+
+    try:
+        indice = construir_indice_ann_comercios(db)
+    except IVFIndexError:
+        return None
+
+    if path:
+        try:
+            indice.guardar(path)
+        except OSError as exc:
+            logger.warning(
+                "ann_indice_guardado_fallido error_class=%s",
+                safe_error_class(exc),
+            )
+    return indice
+
+
+def sincronizar_indice_ann_comercios(
+    db: Session,
+    *,
+    forzar: bool = False,
+) -> IVFIndex | None:
+    """
+    Asegura que el indice IVF esté abierto y razonablemente fresco.
+
+    Devuelve None si todavía no hay embeddings para construirlo.
+    """
+    ahora = time.monotonic()
+
+    with _ESTADO_LOCK:
+        indice = _estado["indice"]
+        if indice is None or forzar:
+            indice = _abrir_o_construir(db)
+            _estado["indice"] = indice
+            _estado["marca_updated_at"] = (
+                _marca_de_metadata(indice) if indice is not None else None
+            )
+            _estado["sincronizado_en"] = ahora
+            if indice is None or _estado["marca_updated_at"] is None:
+                return indice
+        elif ahora - float(_estado["sincronizado_en"]) < INTERVALO_SINCRONIZACION_SEGUNDOS:
+            return indice
+
+        # Incremental: lo escrito después de la marca va al segmento delta.
+        marca = _estado["marca_updated_at"]
+        for comercio_id, vector, updated_at in _filas_embeddings(db, desde_updated_at=marca):
+            _aplicar_upsert_locked(indice, comercio_id, vector)
+            marca = _marca_mayor(marca, updated_at)
+        _estado["marca_updated_at"] = marca
+        _estado["sincronizado_en"] = ahora
+
+    return indice
+
+
+def registrar_vector_comercio_en_ann(
+    comercio_id: int,
+    vector: Sequence[float] | None,
+) -> None:
+    """
+    Aplica un upsert local al indice IVF (sin tocar la BD ni el archivo).
+
+    vector None saca al comercio del indice (desactivación).
+    """
+    with _ESTADO_LOCK:
+        indice = _estado["indice"]
+        if indice is None:
+            return
+        _aplicar_upsert_locked(indice, comercio_id, vector)
+
+
+def quitar_comercio_de_ann(comercio_id: int) -> None:
+    """
+    Hook de desactivación: saca al comercio del indice de este proceso.
+
+    La fila de comercios_embeddings se conserva; si el comercio se
+    reactiva vuelve a entrar por la sincronización incremental.
+    """
+    registrar_vector_comercio_en_ann(comercio_id, None)
+
+
+def top_k_comercios_ann(
+    db: Session,
+    *,
+    query_vector: Sequence[float] | None,
+    k: int,
+    n_probe: int | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Top-k aproximado sobre todo el catálogo (score DESC, id DESC).
+    """
+    indice = sincronizar_indice_ann_comercios(db)
+    if indice is None:
+        return []
+    return indice.top_k(query_vector, k, n_probe=n_probe)
+
+
+def compactar_indice_ann_comercios(db: Session) -> IVFIndex | None:
+    """
+    Reconstruye el segmento base con los cambios acumulados en el delta
+    y, si hay ruta configurada, reescribe el archivo.
+
+    Los upserts que llegan mientras se entrena el indice nuevo se
+    re-aplican sobre él antes de reemplazar al actual.
+    """
+    indice = sincronizar_indice_ann_comercios(db)
+    if indice is None:
+        return None
+
+    with _ESTADO_LOCK:
+        if _estado["indice"] is not indice or _estado["pendientes_compactacion"] is not None:
+            # Otro hilo reinició o ya está compactando.
+            return _estado["indice"]
+        pendientes: dict[int, object] = {}
+        _estado["pendientes_compactacion"] = pendientes
+        marca = _estado["marca_updated_at"]
+
+    try:
+        compacto = indice.compactar()
+        if settings.EMBEDDINGS_ANN_INDEX_PATH:
+            # Lo pendiente queda después de la marca: al reabrir el archivo
+            # entra por la sincronización incremental.
+            compacto.metadata["marca_updated_at"] = marca.isoformat() if marca else None
+            compacto.guardar(settings.EMBEDDINGS_ANN_INDEX_PATH)
+    except BaseException:
+        with _ESTADO_LOCK:
+            if _estado["pendientes_compactacion"] is pendientes:
+                _estado["pendientes_compactacion"] = None
+        raise
+
+    with _ESTADO_LOCK:
+        if _estado["pendientes_compactacion"] is pendientes:
+            _estado["pendientes_compactacion"] = None
+        if _estado["indice"] is not indice:
+            return _estado["indice"]
+        for comercio_id, vector in pendientes.items():
+            compacto.upsert(comercio_id, vector)
+        _estado["indice"] = compacto
+    return compacto
+
+
+def reiniciar_indice_ann_comercios() -> None:
+    """
+    Descarta el indice en memoria. La próxima consulta lo reabre o reconstruye.
+    """
+    with _ESTADO_LOCK:
+        _estado["indice"] = None
+        _estado["marca_updated_at"] = None
+        _estado["sincronizado_en"] = 0.0
+        _estado["pendientes_compactacion"] = None
@@ -5,16 +5,34 @@ Dominio: embeddings asociados a Comercios (IA v2).
 
 ETAPA 55:
 - Se agrega soporte BULK para evitar consultas N+1 en el feed
+- obtener_matriz_embeddings_comercios devuelve los vectores como matriz
+  NumPy normalizada por fila (afinidad del feed en una sola operación)
+
+Formato binario:
+- Se persiste vector_binario (float32 + header) en lugar de JSON
+- Las lecturas aceptan ambos formatos mientras dura la migración
+
+Escritura bulk:
+- guardar_vectores_comercios hace un único INSERT ... ON DUPLICATE KEY
+  UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite) por lote
 """
 
 from __future__ import annotations
 
-import json
-from typing import List, Dict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.embedding_provider import DEFAULT_BATCH_SIZE
+from app.modules.ai.core.vector_codec import (
+    empaquetar_vector,
+    leer_vector_persistido,
+)
 from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
 
 
@@ -81,12 +99,34 @@ def _build_texto_comercio(comercio: Comercio) -> str:
     return " | ".join([p for p in partes if p])
 
 
-def _serializar_vector(vector: List[float]) -> str:
-    return json.dumps(vector)
+def _serializar_vector(vector: List[float]) -> bytes:
+    return empaquetar_vector(vector)
+
+
+def _deserializar_vector(
+    vector_binario: bytes | None,
+    vector_legacy: str | None = None,
+) -> np.ndarray | None:
+    return leer_vector_persistido(vector_binario, vector_legacy)
+
+
+def _vector_como_lista(vector: np.ndarray | None) -> List[float] | None:
+    if vector is None:
+        return None
+    return vector.tolist()
+
 
+def _actualizar_indice_vectorial(comercio_id: int, vector: List[float]) -> None:
+    # Import local: los indices dependen de este módulo para deserializar.
+    from app.modules.ai.services.comercios_ann_services import (
+        registrar_vector_comercio_en_ann,
+    )
+    from app.modules.ai.services.comercios_vector_index_services import (
+        registrar_vector_comercio_en_indice,
+    )
 
-def _deserializar_vector(vector_str: str) -> List[float]:
-    return json.loads(vector_str)
+    registrar_vector_comercio_en_indice(comercio_id, vector)
+    registrar_vector_comercio_en_ann(comercio_id, vector)
 
 
 # ============================================================
@@ -99,11 +139,11 @@ def upsert_embedding_comercio(
     model_version: int = 1,
 ) -> ComercioEmbedding:
 
-    provider = get_embedding_provider()
+    provider = get_embedding_provider(usar_cache=False)
 
     texto = _build_texto_comercio(comercio)
     vector = provider.embed_text(texto)
-    vector_str = _serializar_vector(vector)
+    vector_binario = _serializar_vector(vector)
 
     existente = (
         db.query(ComercioEmbedding)
@@ -112,23 +152,137 @@ def upsert_embedding_comercio(
     )
 
     if existente:
-        existente.vector = vector_str
+        existente.vector_binario = vector_binario
+        existente.vector = None
         existente.model_version = model_version
         db.commit()
         db.refresh(existente)
+        _actualizar_indice_vectorial(comercio.id, vector)
         return existente
 
     nuevo = ComercioEmbedding(
         comercio_id=comercio.id,
-        vector=vector_str,
+        vector_binario=vector_binario,
         model_version=model_version,
     )
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    _actualizar_indice_vectorial(comercio.id, vector)
     return nuevo
 
 
+def _upsert_statement(db: Session, filas: list[dict]):
+    dialecto = db.get_bind().dialect.name
+    columnas_actualizadas = ("vector_binario", "vector", "model_version")
+
+    if dialecto == "mysql":
+        stmt = mysql_insert(ComercioEmbedding.__table__).values(filas)
+        return stmt.on_duplicate_key_update(
+            {
+                **{columna: stmt.inserted[columna] for columna in columnas_actualizadas},
+                # updated_at explícito: el indice vectorial sincroniza por esa marca.
+                "updated_at": func.now(),
+            }
+        )
+
+    if dialecto == "sqlite":
+        stmt = sqlite_insert(ComercioEmbedding.__table__).values(filas)
+        return stmt.on_conflict_do_update(
+            index_elements=[ComercioEmbedding.comercio_id],
+            set_={
+                **{columna: stmt.excluded[columna] for columna in columnas_actualizadas},
+                "updated_at": func.now(),
+            },
+        )
+
+    return None
+
+
+def guardar_vectores_comercios(
+    db: Session,
+    vectores_por_comercio: Mapping[int, Sequence[float]],
+    model_version: int = 1,
+) -> int:
+    """
+    Persiste vectores ya calculados en una sola sentencia + un commit.
+
+    Devuelve la cantidad de embeddings escritos.
+    """
+    if not vectores_por_comercio:
+        return 0
+
+    filas = [
+        {
+            "comercio_id": comercio_id,
+            "vector_binario": _serializar_vector(vector),
+            "vector": None,
+            "model_version": model_version,
+        }
+        for comercio_id, vector in vectores_por_comercio.items()
+    ]
+
+    stmt = _upsert_statement(db, filas)
+    if stmt is not None:
+        db.execute(stmt)
+    else:
+        # Otros motores: upsert ORM (1 lectura IN + flush).
+        existentes = {
+            embedding.comercio_id: embedding
+            for embedding in (
+                db.query(ComercioEmbedding)
+                .filter(ComercioEmbedding.comercio_id.in_(list(vectores_por_comercio)))
+                .all()
+            )
+        }
+        for fila in filas:
+            existente = existentes.get(fila["comercio_id"])
+            if existente is None:
+                db.add(ComercioEmbedding(**fila))
+                continue
+            existente.vector_binario = fila["vector_binario"]
+            existente.vector = None
+            existente.model_version = model_version
+
+    db.commit()
+
+    for comercio_id, vector in vectores_por_comercio.items():
+        _actualizar_indice_vectorial(comercio_id, vector)
+
+    return len(filas)
+
+
+def upsert_embeddings_comercios(
+    db: Session,
+    comercios: Sequence[Comercio],
+    model_version: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Versión bulk de upsert_embedding_comercio.
+
+    - Una llamada a embed_texts para todos los comercios
+    - Un upsert en una sola sentencia
+    - Un solo commit
+
+    Devuelve la cantidad de embeddings escritos.
+    """
+    if not comercios:
+        return 0
+
+    provider = get_embedding_provider(usar_cache=False)
+    vectores = provider.embed_texts(
+        [_build_texto_comercio(comercio) for comercio in comercios],
+        batch_size=batch_size,
+    )
+
+    return guardar_vectores_comercios(
+        db,
+        {comercio.id: vector for comercio, vector in zip(comercios, vectores)},
+        model_version=model_version,
+    )
+
+
 def obtener_embedding_comercio(
     db: Session,
     comercio_id: int,
@@ -149,7 +303,7 @@ def obtener_vector_embedding_comercio(
     emb = obtener_embedding_comercio(db=db, comercio_id=comercio_id)
     if not emb:
         return None
-    return _deserializar_vector(emb.vector)
+    return _vector_como_lista(_deserializar_vector(emb.vector_binario, emb.vector))
 
 
 # ============================================================
@@ -176,6 +330,7 @@ def obtener_vectores_embeddings_comercios(
     resultados = (
         db.query(
             ComercioEmbedding.comercio_id,
+            ComercioEmbedding.vector_binario,
             ComercioEmbedding.vector,
         )
         .filter(ComercioEmbedding.comercio_id.in_(comercios_ids))
@@ -184,10 +339,72 @@ def obtener_vectores_embeddings_comercios(
 
     vectores_map: Dict[int, List[float]] = {}
 
-    for comercio_id, vector_str in resultados:
+    for comercio_id, vector_binario, vector_legacy in resultados:
         try:
-            vectores_map[comercio_id] = _deserializar_vector(vector_str)
+            vectores_map[comercio_id] = _vector_como_lista(
+                _deserializar_vector(vector_binario, vector_legacy)
+            )
         except Exception:
             vectores_map[comercio_id] = None
 
-    return vectores_map
\ No newline at end of file
+    return vectores_map
+
+
+def obtener_matriz_embeddings_comercios(
+    db: Session,
+    *,
+    comercios_ids: Iterable[int],
+    dim: Optional[int] = None,
+) -> Tuple[List[int], np.ndarray]:
+    """
+    Devuelve (ids, matriz) con una fila float32 de norma 1 por comercio.
+
+    - Cada comercio aparece una sola vez aunque se repita en comercios_ids
+    - Se omiten vectores corruptos, de norma 0 o de otra dimensión que `dim`
+    - Sin vectores válidos: ([], matriz vacía)
+    """
+
+    ids_unicos = sorted(set(comercios_ids))
+    if not ids_unicos:
+        return [], np.empty((0, dim or 0), dtype=np.float32)
+
+    resultados = (
+        db.query(
+            ComercioEmbedding.comercio_id,
+            ComercioEmbedding.vector_binario,
+            ComercioEmbedding.vector,
+        )
+        .filter(ComercioEmbedding.comercio_id.in_(ids_unicos))
+        .all()
+    )
+
+    ids: List[int] = []
+    filas: List[np.ndarray] = []
+
+    for comercio_id, vector_binario, vector_legacy in resultados:
+        try:
+            vector = _deserializar_vector(vector_binario, vector_legacy)
+        except Exception:
+            continue
+        if vector is None or vector.ndim != 1 or vector.shape[0] == 0:
+            continue
+        if dim is not None and vector.shape[0] != dim:
+            continue
+        if filas and vector.shape[0] != filas[0].shape[0]:
+            continue
+        ids.append(comercio_id)
+        filas.append(vector)
+
+    if not filas:
+        return [], np.empty((0, dim or 0), dtype=np.float32)
+
+    matriz = np.vstack(filas).astype(np.float32, copy=False)
+    normas = np.linalg.norm(matriz, axis=1)
+    validas = normas > 0
+    if not validas.all():
+        ids = [comercio_id for comercio_id, valida in zip(ids, validas) if valida]
+        matriz = matriz[validas]
+        normas = normas[validas]
+
+    matriz /= normas[:, None]
+    return ids, matriz
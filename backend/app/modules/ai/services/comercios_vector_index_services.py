@@ -0,0 +1,221 @@
+"""
+comercios_vector_index_services.py
+----------------------------------
+Indice vectorial de Comercios compartido por proceso (IA v2).
+
+- Se construye en memoria desde comercios_embeddings (1 lectura bulk)
+- upsert_embedding_comercio lo actualiza en el mismo proceso
+- Los cambios hechos por otros workers se incorporan con una lectura
+  incremental por updated_at (del embedding o del comercio), como máximo
+  cada INTERVALO_SINCRONIZACION_SEGUNDOS; los comercios desactivados salen
+  del indice
+- La lectura a la BD corre fuera del lock; solo la aplicación de las filas
+  al indice lo toma, así una consulta lenta no frena las búsquedas
+- Reemplaza la decodificación + coseno en Python por candidato de smart_semantic
+- La precisión del indice (float32/float16/int8) sale de
+  EMBEDDINGS_INDEX_PRECISION
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from datetime import timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.services.comercios_embeddings_services import (
+    _deserializar_vector,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+
+
+INTERVALO_SINCRONIZACION_SEGUNDOS = 5.0
+MARGEN_MARCA_SEGUNDOS = 1
+
+_INDICE_COMERCIOS = VectorIndex(precision=settings.EMBEDDINGS_INDEX_PRECISION)
+_ESTADO_LOCK = threading.Lock()
+_estado: dict[str, object] = {
+    "construido": False,
+    "marca_updated_at": None,
+    "sincronizado_en": 0.0,
+    # Lecturas en curso y los ids que registrar_... actualizó mientras tanto:
+    # esas filas leídas antes son más viejas que el upsert local.
+    "lecturas_en_curso": 0,
+    "tocados_durante_lectura": set(),
+}
+
+
+def _leer_filas(db: Session, *, desde_updated_at=None):
+    """
+    [(comercio_id, vector o None, updated_at)]; vector None = sacar del indice.
+    """
+    query = db.query(
+        ComercioEmbedding.comercio_id,
+        ComercioEmbedding.vector_binario,
+        ComercioEmbedding.vector,
+        ComercioEmbedding.updated_at,
+        Comercio.activo,
+        Comercio.updated_at,
+    ).join(Comercio, Comercio.id == ComercioEmbedding.comercio_id)
+    if desde_updated_at is None:
+        query = query.filter(Comercio.activo.is_(True))
+    else:
+        # Margen de 1s: updated_at puede tener granularidad de segundos.
+        desde = desde_updated_at - timedelta(seconds=MARGEN_MARCA_SEGUNDOS)
+        query = query.filter(
+            or_(ComercioEmbedding.updated_at >= desde, Comercio.updated_at >= desde)
+        )
+
+    filas = []
+    for (
+        comercio_id,
+        vector_binario,
+        vector_legacy,
+        updated_at,
+        activo,
+        comercio_updated_at,
+    ) in query.all():
+        vector = None
+        if activo:
+            try:
+                vector = _deserializar_vector(vector_binario, vector_legacy)
+            except Exception:
+                # Vector corrupto: queda fuera del indice (se rankea al final).
+                vector = None
+        filas.append((comercio_id, vector, _marca_mayor(updated_at, comercio_updated_at)))
+    return filas
+
+
+def _marca_mayor(actual, updated_at):
+    if updated_at is not None and (actual is None or updated_at > actual):
+        return updated_at
+    return actual
+
+
+def _aplicar_filas_locked(filas, marca):
+    tocados = _estado["tocados_durante_lectura"]
+    for comercio_id, vector, updated_at in filas:
+        if comercio_id not in tocados:
+            _INDICE_COMERCIOS.upsert(comercio_id, vector)
+        marca = _marca_mayor(marca, updated_at)
+    return marca
+
+
+def _terminar_lectura_locked() -> None:
+    _estado["lecturas_en_curso"] = int(_estado["lecturas_en_curso"]) - 1
+    if not _estado["lecturas_en_curso"]:
+        _estado["tocados_durante_lectura"] = set()
+
+
+def sincronizar_indice_vectorial_comercios(
+    db: Session,
+    *,
+    forzar: bool = False,
+) -> VectorIndex:
+    """
+    Asegura que el indice esté construido y razonablemente fresco.
+
+    - Primera llamada: carga completa desde comercios_embeddings (activos).
+    - Siguientes: lectura incremental (updated_at >= última marca) respetando
+      el intervalo mínimo entre sincronizaciones.
+    """
+    ahora = time.monotonic()
+
+    with _ESTADO_LOCK:
+        completa = forzar or not _estado["construido"]
+        if not completa:
+            transcurrido = ahora - float(_estado["sincronizado_en"])
+            if transcurrido < INTERVALO_SINCRONIZACION_SEGUNDOS:
+                return _INDICE_COMERCIOS
+            # Reserva la ventana: los demás requests no repiten la lectura.
+            _estado["sincronizado_en"] = ahora
+        desde = None if completa else _estado["marca_updated_at"]
+        _estado["lecturas_en_curso"] = int(_estado["lecturas_en_curso"]) + 1
+
+    try:
+        filas = _leer_filas(db, desde_updated_at=desde)
+    except Exception:
+        with _ESTADO_LOCK:
+            _terminar_lectura_locked()
+        raise
+
+    with _ESTADO_LOCK:
+        if completa:
+            _INDICE_COMERCIOS.clear()
+            _estado["marca_updated_at"] = None
+        _estado["marca_updated_at"] = _aplicar_filas_locked(
+            filas,
+            _estado["marca_updated_at"],
+        )
+        _estado["construido"] = True
+        _estado["sincronizado_en"] = ahora
+        _terminar_lectura_locked()
+
+    return _INDICE_COMERCIOS
+
+
+def registrar_vector_comercio_en_indice(
+    comercio_id: int,
+    vector: Sequence[float] | None,
+) -> None:
+    """
+    Aplica un upsert local al indice (sin tocar la BD).
+
+    Si el indice todavía no fue construido no hace nada: la carga completa
+    inicial ya va a leer el vector persistido.
+    """
+    with _ESTADO_LOCK:
+        if not _estado["construido"] and not _estado["lecturas_en_curso"]:
+            return
+        if _estado["lecturas_en_curso"]:
+            _estado["tocados_durante_lectura"].add(comercio_id)
+        _INDICE_COMERCIOS.upsert(comercio_id, vector)
+
+
+def puntuar_similitud_comercios(
+    db: Session,
+    *,
+    query_vector: Sequence[float] | None,
+    comercio_ids: Iterable[int],
+) -> dict[int, float]:
+    """
+    Similitud coseno por lote de la query contra los comercios indicados.
+
+    Los comercios sin embedding (o con vector degenerado) no aparecen en
+    el resultado; el caller decide su score por defecto.
+    """
+    indice = sincronizar_indice_vectorial_comercios(db)
+    return indice.scores(query_vector, comercio_ids)
+
+
+def top_k_comercios_similares(
+    db: Session,
+    *,
+    query_vector: Sequence[float] | None,
+    k: int,
+    comercio_ids: Iterable[int] | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Devuelve los k comercios más similares (score DESC, id DESC).
+    """
+    indice = sincronizar_indice_vectorial_comercios(db)
+    return indice.top_k(query_vector, k, comercio_ids)
+
+
+def reiniciar_indice_vectorial_comercios() -> None:
+    """
+    Descarta el indice en memoria. La próxima consulta lo reconstruye.
+    """
+    with _ESTADO_LOCK:
+        _INDICE_COMERCIOS.clear()
+        _estado["construido"] = False
+        _estado["marca_updated_at"] = None
+        _estado["sincronizado_en"] = 0.0
+        _estado["lecturas_en_curso"] = 0
+        _estado["tocados_durante_lectura"] = set()
@@ -0,0 +1,351 @@
+"""
+embeddings_jobs_services.py
+---------------------------
+Cola diferida de recálculo de embeddings (IA v2).
+
+- Los endpoints de escritura solo encolan (1 upsert en embeddings_jobs)
+- Pedidos repetidos sobre la misma entidad se agrupan (debounce)
+- Un worker en segundo plano procesa por lotes: una inferencia batch
+  (embed_texts) + un upsert bulk por lote
+- Cada lote se reclama con un UPDATE condicional (token + vencimiento)
+  antes de procesarlo: varios workers/procesos no toman los mismos jobs
+- La cola es durable: si el proceso cae, las filas se procesan al reiniciar
+- Si la tabla no existe todavía, se cae al cálculo sincrónico anterior
+"""
+
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, lazyload, sessionmaker
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_EMBEDDINGS_JOBS_BATCH_DURATION_MS,
+    METRIC_EMBEDDINGS_JOBS_FAILED_COUNT,
+    METRIC_EMBEDDINGS_JOBS_PROCESSED_COUNT,
+    increment_counter,
+    record_duration,
+)
+from app.modules.ai.models.embeddings_jobs_models import EmbeddingJob
+from app.modules.ai.services.comercios_embeddings_services import (
+    upsert_embedding_comercio,
+    upsert_embeddings_comercios,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+
+
+ENTITY_COMERCIO = "comercio"
+
+TAMANO_LOTE = 64
+MAX_INTENTOS = 5
+INTERVALO_WORKER_SEGUNDOS = 1.0
+
+logger = get_operation_logger("embeddings_jobs")
+
+
+# ============================================================
+# Encolado
+# ============================================================
+
+def _marcar_pendiente(db: Session, entity_type: str, entity_id: int) -> None:
+    actualizadas = (
+        db.query(EmbeddingJob)
+        .filter(
+            EmbeddingJob.entity_type == entity_type,
+            EmbeddingJob.entity_id == entity_id,
+        )
+        .update(
+            {
+                EmbeddingJob.solicitado_en: datetime.utcnow(),
+                EmbeddingJob.intentos: 0,
+                EmbeddingJob.ultimo_error: None,
+            },
+            synchronize_session=False,
+        )
+    )
+    if not actualizadas:
+        db.add(
+            EmbeddingJob(
+                entity_type=entity_type,
+                entity_id=entity_id,
+                solicitado_en=datetime.utcnow(),
+                intentos=0,
+            )
+        )
+    db.commit()
+
+
+def encolar_embedding_comercio(db: Session, comercio: Comercio) -> None:
+    """
+    Pide el recálculo del embedding del comercio sin bloquear el request.
+    """
+    try:
+        try:
+            _marcar_pendiente(db, ENTITY_COMERCIO, comercio.id)
+        except IntegrityError:
+            # Otro request insertó la misma fila: alcanza con actualizarla.
+            db.rollback()
+            _marcar_pendiente(db, ENTITY_COMERCIO, comercio.id)
+    except Exception as exc:
+        db.rollback()
+        logger.warning(
+            "embeddings_jobs_encolado_fallback error_class=%s",
+            safe_error_class(exc),
+        )
+        upsert_embedding_comercio(db=db, comercio=comercio)
+        return
+
+    notificar_worker_embeddings()
+
+
+# ============================================================
+# Procesamiento
+# ============================================================
+
+def _reclamar_jobs(db: Session, *, limite: int, ahora: datetime) -> tuple[str, list[tuple]]:
+    """
+    Reclama hasta `limite` jobs vencidos y devuelve (token, jobs reclamados).
+
+    El UPDATE solo toma filas libres (o con reclamo vencido), así que dos
+    workers que eligieron los mismos candidatos se quedan con filas
+    distintas. No requiere SKIP LOCKED ni mantener locks durante la
+    inferencia.
+    """
+    vencimiento = ahora - timedelta(seconds=settings.EMBEDDINGS_JOBS_DEBOUNCE_SECONDS)
+    libre = or_(
+        EmbeddingJob.reclamado_hasta.is_(None),
+        EmbeddingJob.reclamado_hasta <= ahora,
+    )
+
+    candidatos = [
+        job_id
+        for (job_id,) in (
+            db.query(EmbeddingJob.id)
+            .filter(EmbeddingJob.solicitado_en <= vencimiento)
+            .filter(EmbeddingJob.intentos < MAX_INTENTOS)
+            .filter(libre)
+            .order_by(EmbeddingJob.solicitado_en.asc(), EmbeddingJob.id.asc())
+            .limit(limite)
+            .all()
+        )
+    ]
+    if not candidatos:
+        return "", []
+
+    token = secrets.token_hex(16)
+    db.query(EmbeddingJob).filter(EmbeddingJob.id.in_(candidatos)).filter(libre).update(
+        {
+            EmbeddingJob.reclamado_por: token,
+            EmbeddingJob.reclamado_hasta: ahora
+            + timedelta(seconds=settings.EMBEDDINGS_JOBS_CLAIM_TIMEOUT_SECONDS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+    jobs = (
+        db.query(
+            EmbeddingJob.id,
+            EmbeddingJob.entity_type,
+            EmbeddingJob.entity_id,
+            EmbeddingJob.solicitado_en,
+        )
+        .filter(EmbeddingJob.reclamado_por == token)
+        .order_by(EmbeddingJob.solicitado_en.asc(), EmbeddingJob.id.asc())
+        .all()
+    )
+    return token, jobs
+
+
+def _liberar_reclamo(db: Session, token: str) -> None:
+    # Jobs re-pedidos durante el proceso (no borrados) vuelven a la cola.
+    db.query(EmbeddingJob).filter(EmbeddingJob.reclamado_por == token).update(
+        {
+            EmbeddingJob.reclamado_por: None,
+            EmbeddingJob.reclamado_hasta: None,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def _borrar_jobs_procesados(db: Session, jobs: list[tuple]) -> None:
+    # Solo se borra si nadie lo volvió a pedir mientras se procesaba.
+    tabla = EmbeddingJob.__table__
+    db.execute(
+        delete(tabla).where(
+            and_(
+                tabla.c.id == bindparam("job_id"),
+                tabla.c.solicitado_en == bindparam("marca"),
+            )
+        ),
+        [{"job_id": job_id, "marca": marca} for job_id, _, _, marca in jobs],
+    )
+    db.commit()
+
+
+def procesar_embeddings_pendientes(
+    db: Session,
+    *,
+    limite: int = TAMANO_LOTE,
+    ahora: datetime | None = None,
+) -> int:
+    """
+    Procesa un lote de jobs vencidos. Devuelve cuántos jobs consumió.
+    """
+    ahora = ahora or datetime.utcnow()
+
+    token, jobs = _reclamar_jobs(db, limite=limite, ahora=ahora)
+    if not jobs:
+        return 0
+
+    comercio_ids = [
+        entity_id
+        for _, entity_type, entity_id, _ in jobs
+        if entity_type == ENTITY_COMERCIO
+    ]
+
+    inicio = time.perf_counter()
+    try:
+        comercios = (
+            db.query(Comercio)
+            .options(joinedload(Comercio.rubro), lazyload("*"))
+            .filter(Comercio.id.in_(comercio_ids))
+            .all()
+            if comercio_ids
+            else []
+        )
+        upsert_embeddings_comercios(db, comercios)
+    except Exception as exc:
+        db.rollback()
+        db.query(EmbeddingJob).filter(
+            EmbeddingJob.id.in_([job_id for job_id, _, _, _ in jobs])
+        ).update(
+            {
+                EmbeddingJob.intentos: EmbeddingJob.intentos + 1,
+                EmbeddingJob.ultimo_error: safe_error_class(exc),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        _liberar_reclamo(db, token)
+        increment_counter(METRIC_EMBEDDINGS_JOBS_FAILED_COUNT, len(jobs))
+        logger.warning(
+            "embeddings_jobs_lote_error jobs=%s error_class=%s",
+            len(jobs),
+            safe_error_class(exc),
+        )
+        return 0
+
+    # Comercios borrados y tipos desconocidos también se consumen.
+    _borrar_jobs_procesados(db, jobs)
+    _liberar_reclamo(db, token)
+
+    record_duration(
+        METRIC_EMBEDDINGS_JOBS_BATCH_DURATION_MS,
+        (time.perf_counter() - inicio) * 1000,
+    )
+    increment_counter(METRIC_EMBEDDINGS_JOBS_PROCESSED_COUNT, len(jobs))
+    return len(jobs)
+
+
+# ============================================================
+# Worker en segundo plano
+# ============================================================
+
+class EmbeddingsJobsWorker:
+    """
+    Hilo daemon que drena la cola cada INTERVALO_WORKER_SEGUNDOS
+    (o antes, si se le notifica un encolado).
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        intervalo_segundos: float = INTERVALO_WORKER_SEGUNDOS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._intervalo = intervalo_segundos
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._loop,
+            name="embeddings-jobs-worker",
+            daemon=True,
+        )
+        self._hilo.start()
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=timeout)
+        self._hilo = None
+
+    def notificar(self) -> None:
+        self._despertar.set()
+
+    def procesar_pendientes(self) -> int:
+        total = 0
+        db = self._session_factory()
+        try:
+            while not self._detener.is_set():
+                procesados = procesar_embeddings_pendientes(db)
+                total += procesados
+                if procesados < TAMANO_LOTE:
+                    break
+        except Exception as exc:
+            db.rollback()
+            logger.error(
+                "embeddings_jobs_worker_error error_class=%s",
+                safe_error_class(exc),
+            )
+        finally:
+            db.close()
+        return total
+
+    def _loop(self) -> None:
+        while not self._detener.is_set():
+            self._despertar.wait(self._intervalo)
+            self._despertar.clear()
+            if self._detener.is_set():
+                return
+            self.procesar_pendientes()
+
+
+_WORKER: EmbeddingsJobsWorker | None = None
+
+
+def iniciar_worker_embeddings(session_factory: sessionmaker) -> EmbeddingsJobsWorker:
+    global _WORKER
+
+    if _WORKER is None:
+        _WORKER = EmbeddingsJobsWorker(session_factory)
+    _WORKER.iniciar()
+    return _WORKER
+
+
+def detener_worker_embeddings() -> None:
+    global _WORKER
+
+    if _WORKER is not None:
+        _WORKER.detener()
+    _WORKER = None
+
+
+def notificar_worker_embeddings() -> None:
+    if _WORKER is not None:
+        _WORKER.notificar()
@@ -4,19 +4,29 @@ rubros_embeddings_services.py
 Deteccion semantica de rubros para busquedas.
 
 MVP:
-- Calcula embeddings de rubros activos en memoria.
 - Usa nombre + descripcion como texto semantico.
-- No persiste embeddings de rubros todavia.
+- Los vectores se persisten en catalogo_embeddings (hash del texto + modelo)
+  y solo se recalculan si cambia alguno de los dos.
+- El scoring usa un VectorIndex por version del catalogo (un producto
+  matriz-vector por query, con la precisión configurada).
 """
 
 from __future__ import annotations
 
-import math
 from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.services.catalogo_embeddings_services import (
+    ENTITY_RUBRO,
+    obtener_embeddings_catalogo,
+)
+from app.modules.discovery.services.catalogo_version_services import (
+    obtener_version_catalogo,
+)
 from app.modules.products.models.rubros_models import Rubro
 
 
@@ -27,9 +37,10 @@ class RubroDetectado:
     score: float
 
 
+# version del catalogo -> (nombres de rubros activos, indice vectorial)
 _RUBROS_EMBEDDINGS_CACHE: dict[
-    tuple[tuple[int, str, str], ...],
-    list[tuple[int, str, list[float]]],
+    int,
+    tuple[dict[int, str], VectorIndex],
 ] = {}
 
 
@@ -47,34 +58,15 @@ def _build_texto_rubro(rubro: Rubro) -> str:
     return ". ".join(parte for parte in partes if parte)
 
 
-def _cosine_similarity(a: list[float] | None, b: list[float] | None) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(y * y for y in b))
-
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-
-    return dot / (norm_a * norm_b)
-
-
-def _firma_rubros(rubros: list[Rubro]) -> tuple[tuple[int, str, str], ...]:
-    return tuple(
-        (
-            rubro.id,
-            _normalizar_texto(getattr(rubro, "nombre", None)),
-            _normalizar_texto(getattr(rubro, "descripcion", None)),
-        )
-        for rubro in rubros
-    )
-
-
 def _obtener_embeddings_rubros(
     db: Session,
-) -> list[tuple[int, str, list[float]]]:
+) -> tuple[dict[int, str], VectorIndex]:
+    version = obtener_version_catalogo(db)
+    if version is not None:
+        cacheado = _RUBROS_EMBEDDINGS_CACHE.get(version)
+        if cacheado is not None:
+            return cacheado
+
     rubros = (
         db.query(Rubro)
         .filter(Rubro.activo == True)
@@ -82,29 +74,26 @@ def _obtener_embeddings_rubros(
         .all()
     )
 
-    firma = _firma_rubros(rubros)
-    cacheado = _RUBROS_EMBEDDINGS_CACHE.get(firma)
-    if cacheado is not None:
-        return cacheado
-
-    provider = get_embedding_provider()
-    embeddings: list[tuple[int, str, list[float]]] = []
-
-    for rubro in rubros:
-        texto = _build_texto_rubro(rubro)
-        if not texto:
-            continue
-
-        embeddings.append(
-            (
-                rubro.id,
-                str(rubro.nombre),
-                provider.embed_text(texto),
-            )
-        )
-
-    _RUBROS_EMBEDDINGS_CACHE.clear()
-    _RUBROS_EMBEDDINGS_CACHE[firma] = embeddings
+    rubros_con_texto = [
+        (rubro, texto)
+        for rubro in rubros
+        if (texto := _build_texto_rubro(rubro))
+    ]
+
+    vectores = obtener_embeddings_catalogo(
+        db,
+        entity_type=ENTITY_RUBRO,
+        textos_por_id={rubro.id: texto for rubro, texto in rubros_con_texto},
+    )
+
+    nombres = {rubro.id: str(rubro.nombre) for rubro, _ in rubros_con_texto}
+    indice = VectorIndex(precision=settings.EMBEDDINGS_INDEX_PRECISION)
+    indice.upsert_many((rubro_id, vectores[rubro_id]) for rubro_id in nombres)
+    embeddings = (nombres, indice)
+
+    if version is not None:
+        _RUBROS_EMBEDDINGS_CACHE.clear()
+        _RUBROS_EMBEDDINGS_CACHE[version] = embeddings
     return embeddings
 
 
@@ -122,14 +111,15 @@ def detectar_rubros_por_query(
         provider = get_embedding_provider()
         query_vector = provider.embed_text(query_normalizada)
 
+        nombres, indice = _obtener_embeddings_rubros(db)
+
         scored: list[RubroDetectado] = []
-        for rubro_id, nombre, vector in _obtener_embeddings_rubros(db):
-            score = _cosine_similarity(query_vector, vector)
+        for rubro_id, score in indice.scores(query_vector).items():
             if score >= min_score:
                 scored.append(
                     RubroDetectado(
                         rubro_id=rubro_id,
-                        nombre=nombre,
+                        nombre=nombres[rubro_id],
                         score=score,
                     )
                 )
@@ -8,24 +8,48 @@ Responsabilidades:
 - Obtener embedding de un usuario
 - Generar embedding en base a interacciones
 - Decidir si corresponde recalcular o no según ventana temporal
+
+Formato binario:
+- Se persiste vector_binario (float32 + header)
+- Se sigue leyendo el JSON legado hasta completar la migración
+
+Acumulador incremental:
+- Se guarda la suma de vectores (float64) y la cantidad sumada
+- Cada like/guardado aplica un delta O(dim) (aplicar_interaccion_embedding_usuario)
+  en la misma transacción que escribe la interacción, con la fila del
+  usuario bloqueada desde antes de la escritura (bloquear_embedding_usuario)
+- Cada RECONSTRUCCION_HORAS se reconstruye completo para corregir drift
+  (p. ej. comercios re-embebidos después de la interacción)
 """
 
-import json
 from datetime import datetime, timedelta
 
+import numpy as np
+from sqlalchemy import select, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.modules.ai.models.usuarios_embeddings_models import UsuarioEmbedding
-from app.modules.posts.services.publicaciones_services import (
-    obtener_publicaciones_interactuadas_por_usuario,
+from app.modules.ai.core.vector_codec import (
+    DTYPE_FLOAT64,
+    desempaquetar_vector,
+    empaquetar_vector,
+    leer_vector_persistido,
 )
+from app.modules.ai.models.usuarios_embeddings_models import UsuarioEmbedding
 from app.modules.ai.services.comercios_embeddings_services import (
     obtener_vector_embedding_comercio,
+    obtener_vectores_embeddings_comercios,
 )
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.social.models.publicaciones_guardadas_models import PublicacionGuardada
 
 # Ventana mínima para evitar recálculos innecesarios
 VENTANA_RECALCULO_MINUTOS = 5
 
+# Antigüedad máxima del acumulador antes de una reconstrucción completa
+RECONSTRUCCION_HORAS = 24
+
 
 def obtener_embedding_usuario(db: Session, usuario_id: int):
     """
@@ -51,18 +75,21 @@ def guardar_embedding_usuario(
         UsuarioEmbedding.usuario_id == usuario_id
     ).first()
 
-    vector_serializado = json.dumps(vector)
+    vector_binario = empaquetar_vector(vector)
 
     if embedding_existente:
         # UPDATE
-        embedding_existente.vector = vector_serializado
+        embedding_existente.vector_binario = vector_binario
+        embedding_existente.vector = None
         embedding_existente.model_version = model_version
+        # El acumulador ya no corresponde al vector: forzar reconstrucción.
+        embedding_existente.reconstruido_en = None
 
     else:
         # CREATE
         nuevo_embedding = UsuarioEmbedding(
             usuario_id=usuario_id,
-            vector=vector_serializado,
+            vector_binario=vector_binario,
             model_version=model_version
         )
 
@@ -71,9 +98,18 @@ def guardar_embedding_usuario(
     db.commit()
 
 
+def _leer_vector_embedding(embedding: UsuarioEmbedding):
+    vector = leer_vector_persistido(embedding.vector_binario, embedding.vector)
+    if vector is None:
+        return None
+    return vector.tolist()
+
+
 def obtener_vector_usuario(db: Session, usuario_id: int):
     """
     Devuelve el vector del usuario ya deserializado (list).
+
+    Acepta tanto el formato binario como el JSON legado.
     """
 
     embedding = obtener_embedding_usuario(db, usuario_id)
@@ -81,7 +117,46 @@ def obtener_vector_usuario(db: Session, usuario_id: int):
     if not embedding:
         return None
 
-    return json.loads(embedding.vector)
+    return _leer_vector_embedding(embedding)
+
+
+def _vectores_interacciones_usuario(db: Session, usuario_id: int) -> list[np.ndarray]:
+    """
+    Vectores de comercio de las publicaciones con like o guardado.
+
+    Una publicación cuenta una sola vez aunque tenga like y guardado.
+    2 consultas en total (ids de comercio + vectores bulk), sin N+1.
+    """
+    interactuadas = union_all(
+        select(LikePublicacion.publicacion_id.label("publicacion_id")).where(
+            LikePublicacion.usuario_id == usuario_id
+        ),
+        select(PublicacionGuardada.publicacion_id.label("publicacion_id")).where(
+            PublicacionGuardada.usuario_id == usuario_id
+        ),
+    ).subquery()
+
+    comercio_ids = [
+        comercio_id
+        for (comercio_id,) in (
+            db.query(Publicacion.comercio_id)
+            .filter(Publicacion.id.in_(select(interactuadas.c.publicacion_id)))
+            .all()
+        )
+    ]
+    if not comercio_ids:
+        return []
+
+    vectores_por_comercio = obtener_vectores_embeddings_comercios(
+        db,
+        comercios_ids=list(set(comercio_ids)),
+    )
+
+    return [
+        np.asarray(vectores_por_comercio[comercio_id], dtype=np.float64)
+        for comercio_id in comercio_ids
+        if vectores_por_comercio.get(comercio_id)
+    ]
 
 
 def generar_embedding_usuario(db: Session, usuario_id: int):
@@ -90,71 +165,232 @@ def generar_embedding_usuario(db: Session, usuario_id: int):
 
     Estrategia inicial:
     - Obtener publicaciones con las que interactuó
-    - Obtener embeddings de sus comercios
+    - Obtener embeddings de sus comercios (bulk)
     - Promediar vectores
     """
 
-    publicaciones = obtener_publicaciones_interactuadas_por_usuario(
-        db=db,
-        usuario_id=usuario_id
-    )
+    vectores = _vectores_interacciones_usuario(db, usuario_id)
 
-    if not publicaciones:
+    if not vectores:
         return None
 
-    vectores = []
-
-    for pub in publicaciones:
-        vector = obtener_vector_embedding_comercio(
-            db=db,
-            comercio_id=pub.comercio_id
-        )
+    return np.mean(np.vstack(vectores), axis=0).tolist()
 
-        if vector:
-            vectores.append(vector)
 
-    if not vectores:
+def _guardar_acumulador(
+    embedding: UsuarioEmbedding,
+    *,
+    suma: np.ndarray | None,
+    count: int,
+) -> list | None:
+    if suma is None or count <= 0:
+        embedding.vector_suma_binario = None
+        embedding.interacciones_count = 0
+        embedding.vector_binario = None
+        embedding.vector = None
         return None
 
-    # Promedio de vectores
-    dimension = len(vectores[0])
-    vector_promedio = [0.0] * dimension
+    promedio = suma / count
+    embedding.vector_suma_binario = empaquetar_vector(suma, DTYPE_FLOAT64)
+    embedding.interacciones_count = count
+    embedding.vector_binario = empaquetar_vector(promedio)
+    embedding.vector = None
+    return promedio.tolist()
 
-    for vector in vectores:
-        for i in range(dimension):
-            vector_promedio[i] += vector[i]
 
-    vector_promedio = [v / len(vectores) for v in vector_promedio]
+def bloquear_embedding_usuario(db: Session, usuario_id: int) -> UsuarioEmbedding | None:
+    """
+    SELECT ... FOR UPDATE de la fila del usuario (None si todavía no existe).
 
-    return vector_promedio
+    Likes y guardados lo llaman antes de escribir la interacción, así los
+    toggles concurrentes del mismo usuario se serializan.
+    """
 
+    return (
+        db.query(UsuarioEmbedding)
+        .filter(UsuarioEmbedding.usuario_id == usuario_id)
+        .with_for_update()
+        .first()
+    )
 
-def regenerar_y_guardar_embedding_usuario(
+
+def _crear_embedding_usuario(db: Session, usuario_id: int) -> UsuarioEmbedding:
+    """
+    Inserta la fila del usuario en un savepoint.
+
+    Si otro request la creó en paralelo (usuario_id es único) se descarta
+    solo el savepoint y se usa la fila existente, ya bloqueada.
+    """
+
+    try:
+        with db.begin_nested():
+            embedding = UsuarioEmbedding(usuario_id=usuario_id)
+            db.add(embedding)
+    except IntegrityError:
+        embedding = bloquear_embedding_usuario(db, usuario_id)
+    return embedding
+
+
+def _reconstruir_acumulador(
+    db: Session,
+    usuario_id: int,
+    model_version: int,
+    embedding: UsuarioEmbedding | None,
+):
+    vectores = _vectores_interacciones_usuario(db, usuario_id)
+
+    if embedding is None:
+        if not vectores:
+            return None
+        embedding = _crear_embedding_usuario(db, usuario_id)
+
+    suma = np.sum(np.vstack(vectores), axis=0) if vectores else None
+    vector = _guardar_acumulador(embedding, suma=suma, count=len(vectores))
+    embedding.model_version = model_version
+    embedding.reconstruido_en = datetime.utcnow()
+    return vector
+
+
+def reconstruir_acumulador_usuario(
     db: Session,
     usuario_id: int,
     model_version: int = 1,
 ):
     """
-    Genera el embedding del usuario y lo guarda en BD.
+    Reconstrucción completa del acumulador (suma + count) y del promedio.
+
+    Se usa la primera vez, cuando el acumulador venció y desde el job
+    periódico (reconstruir_embeddings_usuarios.py).
     """
 
-    vector = generar_embedding_usuario(
-        db=db,
-        usuario_id=usuario_id,
+    embedding = bloquear_embedding_usuario(db, usuario_id)
+    vector = _reconstruir_acumulador(db, usuario_id, model_version, embedding)
+    db.commit()
+    return vector
+
+
+def _acumulador_vigente(embedding: UsuarioEmbedding | None) -> bool:
+    if embedding is None or embedding.vector_suma_binario is None:
+        return False
+
+    reconstruido_en = getattr(embedding, "reconstruido_en", None)
+    if reconstruido_en is None:
+        return False
+
+    return reconstruido_en >= datetime.utcnow() - timedelta(hours=RECONSTRUCCION_HORAS)
+
+
+def _canales_interaccion_publicacion(db: Session, usuario_id: int, publicacion_id: int) -> int:
+    """
+    Cantidad de canales (like, guardado) que vinculan al usuario con la
+    publicación, incluida la escritura todavía no commiteada del toggle.
+
+    Lecturas bloqueantes: ven lo último commiteado aunque la transacción
+    ya tenga un snapshot anterior.
+    """
+    like = (
+        db.query(LikePublicacion.id)
+        .filter(
+            LikePublicacion.usuario_id == usuario_id,
+            LikePublicacion.publicacion_id == publicacion_id,
+        )
+        .with_for_update()
+        .first()
+    )
+    guardado = (
+        db.query(PublicacionGuardada.id)
+        .filter(
+            PublicacionGuardada.usuario_id == usuario_id,
+            PublicacionGuardada.publicacion_id == publicacion_id,
+        )
+        .with_for_update()
+        .first()
     )
+    return int(like is not None) + int(guardado is not None)
 
-    if not vector:
-        return None
 
-    guardar_embedding_usuario(
+def aplicar_interaccion_embedding_usuario(
+    db: Session,
+    *,
+    usuario_id: int,
+    publicacion_id: int,
+    agregada: bool,
+    model_version: int = 1,
+):
+    """
+    Aplica el delta de un like/guardado dentro de la transacción que lo
+    escribe. No commitea: el caller commitea la interacción y el delta juntos.
+
+    Llamar después de bloquear_embedding_usuario y de escribir (flush) o
+    borrar la fila, y solo si esta transacción efectivamente la cambió.
+
+    - agregada=True: suma el vector si la publicación no estaba ya interactuada
+      por el otro canal
+    - agregada=False: resta el vector si la publicación dejó de estar
+      interactuada por ambos canales
+    - Sin acumulador (o vencido): reconstrucción completa
+
+    Costo constante por click, independiente del historial del usuario.
+    """
+
+    embedding = bloquear_embedding_usuario(db, usuario_id)
+
+    if not _acumulador_vigente(embedding):
+        return _reconstruir_acumulador(db, usuario_id, model_version, embedding)
+
+    canales = _canales_interaccion_publicacion(db, usuario_id, publicacion_id)
+    if (agregada and canales != 1) or (not agregada and canales != 0):
+        # La publicación ya contaba (o sigue contando) por el otro canal.
+        return _leer_vector_embedding(embedding)
+
+    comercio_id = (
+        db.query(Publicacion.comercio_id)
+        .filter(Publicacion.id == publicacion_id)
+        .scalar()
+    )
+    vector_comercio = (
+        obtener_vector_embedding_comercio(db, comercio_id)
+        if comercio_id is not None
+        else None
+    )
+    if not vector_comercio:
+        # El promedio completo también ignora comercios sin embedding.
+        return _leer_vector_embedding(embedding)
+
+    suma = np.array(desempaquetar_vector(embedding.vector_suma_binario), dtype=np.float64)
+    delta = np.asarray(vector_comercio, dtype=np.float64)
+    if suma.shape != delta.shape:
+        # Cambió el modelo de embeddings: el acumulador ya no es comparable.
+        return _reconstruir_acumulador(db, usuario_id, model_version, embedding)
+
+    count = int(embedding.interacciones_count or 0)
+    if agregada:
+        suma += delta
+        count += 1
+    else:
+        suma -= delta
+        count -= 1
+
+    return _guardar_acumulador(embedding, suma=suma, count=count)
+
+
+def regenerar_y_guardar_embedding_usuario(
+    db: Session,
+    usuario_id: int,
+    model_version: int = 1,
+):
+    """
+    Genera el embedding del usuario y lo guarda en BD.
+
+    Reconstruye también el acumulador incremental.
+    """
+
+    return reconstruir_acumulador_usuario(
         db=db,
         usuario_id=usuario_id,
-        vector=vector,
         model_version=model_version,
     )
 
-    return vector
-
 
 def embedding_usuario_esta_reciente(
     db: Session,
@@ -209,7 +445,7 @@ def regenerar_embedding_usuario_si_corresponde(
         usuario_id=usuario_id,
         ventana_minutos=ventana_minutos,
     ):
-        return json.loads(embedding_existente.vector)
+        return _leer_vector_embedding(embedding_existente)
 
     # Caso 2: no existe o está vencido -> regenerar y persistir
     return regenerar_y_guardar_embedding_usuario(
@@ -0,0 +1,28 @@
+"""
+catalogo_version_models.py
+--------------------------
+Sello de version del catalogo de descubrimiento.
+
+Una fila por clave. "catalogo" se incrementa cuando cambian taxonomia,
+rubros o sus assignments; "busqueda" cuando cambian comercios o
+publicaciones. Asi los caches de cada worker saben cuando reconstruirse
+con una sola lectura por clave primaria.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class CatalogoVersion(Base):
+    __tablename__ = "catalogo_versiones"
+
+    clave = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -0,0 +1,109 @@
+"""
+catalogo_version_services.py
+----------------------------
+Version del catalogo (taxonomia + rubros + assignments) para invalidar caches.
+
+- Las escrituras de catalogo llaman a incrementar_version_catalogo dentro de
+  su transaccion
+- CLAVE_BUSQUEDA es un sello aparte para altas / ediciones / bajas de
+  comercios y publicaciones (cache de candidatos de busqueda): cambian
+  mucho mas seguido y no deben invalidar los caches de taxonomia y rubros
+- Las lecturas consultan la fila por clave primaria, como maximo una vez por
+  TTL_VERSION_SEGUNDOS en cada proceso
+- Si la tabla no esta disponible se devuelve None: el caller no cachea
+- La existencia de la tabla se confirma una vez por engine y proceso: los
+  incrementos (cada escritura de comercios y publicaciones) no repiten la
+  consulta de esquema
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.modules.discovery.models.catalogo_version_models import CatalogoVersion
+
+
+CLAVE_CATALOGO = "catalogo"
+CLAVE_BUSQUEDA = "busqueda"
+TTL_VERSION_SEGUNDOS = 1.0
+
+_LOCK = threading.Lock()
+_version_memo: dict[str, tuple[int, float]] = {}
+# Engines donde ya se vio la tabla (una vez creada no desaparece).
+_engines_con_tabla: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def obtener_version_catalogo(db: Session, clave: str = CLAVE_CATALOGO) -> int | None:
+    """
+    Devuelve la version vigente de la clave (0 si nunca se incremento).
+    """
+    ahora = time.monotonic()
+
+    with _LOCK:
+        memo = _version_memo.get(clave)
+    if memo is not None and ahora - memo[1] < TTL_VERSION_SEGUNDOS:
+        return memo[0]
+
+    try:
+        version = (
+            db.query(CatalogoVersion.version)
+            .filter(CatalogoVersion.clave == clave)
+            .scalar()
+        )
+    except Exception:
+        db.rollback()
+        return None
+
+    version = int(version or 0)
+    with _LOCK:
+        _version_memo[clave] = (version, ahora)
+    return version
+
+
+def _tabla_disponible(db: Session) -> bool:
+    engine = db.get_bind()
+    with _LOCK:
+        if engine in _engines_con_tabla:
+            return True
+
+    if not inspect(db.connection()).has_table(CatalogoVersion.__tablename__):
+        return False
+
+    with _LOCK:
+        _engines_con_tabla.add(engine)
+    return True
+
+
+def incrementar_version_catalogo(db: Session, clave: str = CLAVE_CATALOGO) -> None:
+    """
+    Incrementa la version en la transaccion del caller (no hace commit).
+
+    Si la tabla todavia no fue creada (create_tables.py) no hace nada:
+    los lectores ya trabajan sin cache en ese caso.
+    """
+    if not _tabla_disponible(db):
+        return
+
+    actualizadas = (
+        db.query(CatalogoVersion)
+        .filter(CatalogoVersion.clave == clave)
+        .update(
+            {CatalogoVersion.version: CatalogoVersion.version + 1},
+            synchronize_session=False,
+        )
+    )
+    if not actualizadas:
+        db.add(CatalogoVersion(clave=clave, version=1))
+        db.flush()
+
+    reiniciar_memo_version_catalogo()
+
+
+def reiniciar_memo_version_catalogo() -> None:
+    with _LOCK:
+        _version_memo.clear()
@@ -4,19 +4,29 @@ taxonomy_embeddings_services.py
 Deteccion semantica de nodos de taxonomia para busquedas.
 
 MVP:
-- Calcula embeddings de nodos activos en memoria.
 - Usa nombre, slug, descripcion y type como texto semantico.
-- No persiste embeddings de taxonomia todavia.
+- Los vectores se persisten en catalogo_embeddings (hash del texto + modelo)
+  y solo se recalculan si cambia alguno de los dos.
+- El scoring usa un VectorIndex por version del catalogo (un producto
+  matriz-vector por query, con la precisión configurada).
 """
 
 from __future__ import annotations
 
-import math
 from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.services.catalogo_embeddings_services import (
+    ENTITY_TAXONOMY_NODE,
+    obtener_embeddings_catalogo,
+)
+from app.modules.discovery.services.catalogo_version_services import (
+    obtener_version_catalogo,
+)
 from app.modules.discovery.models.taxonomy_models import TaxonomyNode
 
 
@@ -37,9 +47,10 @@ class TaxonomyNodeDetectado:
     score: float
 
 
+# version del catalogo -> (metadata de nodos activos, indice vectorial)
 _TAXONOMY_EMBEDDINGS_CACHE: dict[
-    tuple[tuple[int, str, str, str, str], ...],
-    list[tuple[int, str, str, str, list[float]]],
+    int,
+    tuple[dict[int, tuple[str, str, str]], VectorIndex],
 ] = {}
 
 
@@ -76,41 +87,15 @@ def _build_texto_taxonomy_node(node: TaxonomyNode) -> str:
     return ". ".join(parte for parte in partes if parte)
 
 
-def _cosine_similarity(a: list[float] | None, b: list[float] | None) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(y * y for y in b))
-
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-
-    return dot / (norm_a * norm_b)
-
-
-def _firma_nodos_taxonomia(
-    nodes: list[TaxonomyNode],
-) -> tuple[tuple[int, str, str, str, str, str], ...]:
-    return tuple(
-        (
-            node.id,
-            _normalizar_texto(getattr(node, "slug", None)),
-            _normalizar_texto(getattr(node, "nombre", None)),
-            _normalizar_texto(getattr(node, "type", None)),
-            _normalizar_texto(getattr(node, "descripcion", None)),
-            _normalizar_texto(
-                " ".join(_extraer_terminos_metadata(getattr(node, "metadata_json", None)))
-            ),
-        )
-        for node in nodes
-    )
-
-
 def _obtener_embeddings_nodos_taxonomia(
     db: Session,
-) -> list[tuple[int, str, str, str, list[float]]]:
+) -> tuple[dict[int, tuple[str, str, str]], VectorIndex]:
+    version = obtener_version_catalogo(db)
+    if version is not None:
+        cacheado = _TAXONOMY_EMBEDDINGS_CACHE.get(version)
+        if cacheado is not None:
+            return cacheado
+
     nodes = (
         db.query(TaxonomyNode)
         .filter(TaxonomyNode.activo == True)
@@ -119,31 +104,29 @@ def _obtener_embeddings_nodos_taxonomia(
         .all()
     )
 
-    firma = _firma_nodos_taxonomia(nodes)
-    cacheado = _TAXONOMY_EMBEDDINGS_CACHE.get(firma)
-    if cacheado is not None:
-        return cacheado
-
-    provider = get_embedding_provider()
-    embeddings: list[tuple[int, str, str, str, list[float]]] = []
+    nodos_con_texto = [
+        (node, texto)
+        for node in nodes
+        if (texto := _build_texto_taxonomy_node(node))
+    ]
 
-    for node in nodes:
-        texto = _build_texto_taxonomy_node(node)
-        if not texto:
-            continue
+    vectores = obtener_embeddings_catalogo(
+        db,
+        entity_type=ENTITY_TAXONOMY_NODE,
+        textos_por_id={node.id: texto for node, texto in nodos_con_texto},
+    )
 
-        embeddings.append(
-            (
-                node.id,
-                str(node.slug),
-                str(node.nombre),
-                str(node.type),
-                provider.embed_text(texto),
-            )
-        )
-
-    _TAXONOMY_EMBEDDINGS_CACHE.clear()
-    _TAXONOMY_EMBEDDINGS_CACHE[firma] = embeddings
+    nodos = {
+        node.id: (str(node.slug), str(node.nombre), str(node.type))
+        for node, _ in nodos_con_texto
+    }
+    indice = VectorIndex(precision=settings.EMBEDDINGS_INDEX_PRECISION)
+    indice.upsert_many((node_id, vectores[node_id]) for node_id in nodos)
+    embeddings = (nodos, indice)
+
+    if version is not None:
+        _TAXONOMY_EMBEDDINGS_CACHE.clear()
+        _TAXONOMY_EMBEDDINGS_CACHE[version] = embeddings
     return embeddings
 
 
@@ -161,11 +144,11 @@ def detectar_nodos_taxonomia_por_query(
         provider = get_embedding_provider()
         query_vector = provider.embed_text(query_normalizada)
 
+        nodos, indice = _obtener_embeddings_nodos_taxonomia(db)
+
         scored: list[TaxonomyNodeDetectado] = []
-        for node_id, slug, nombre, type, vector in _obtener_embeddings_nodos_taxonomia(
-            db
-        ):
-            score = _cosine_similarity(query_vector, vector)
+        for node_id, score in indice.scores(query_vector).items():
+            slug, nombre, type = nodos[node_id]
             if score >= min_score:
                 scored.append(
                     TaxonomyNodeDetectado(
@@ -130,13 +130,31 @@ def _obtener_cache_nodos_taxonomia(db: Session) -> list[_TaxonomySearchCacheItem
 def buscar_rubro_ids_asignados_a_nodos_taxonomia(
     db: Session,
     node_ids: list[int],
+    *,
+    parent_ids_por_nodo: dict[int, int | None] | None = None,
 ) -> set[int]:
+    """
+    Rubros asignados a los nodos o a cualquiera de sus ancestros activos.
+
+    parent_ids_por_nodo (id -> parent_id de los nodos activos de node_ids,
+    ya leídos por el caller; los ausentes se toman como inactivos) evita
+    releer el primer nivel del recorrido.
+    """
     if not node_ids:
         return set()
 
     node_ids_con_ancestros = set(node_ids)
     pendientes = set(node_ids)
 
+    if parent_ids_por_nodo is not None:
+        pendientes = {
+            parent_id
+            for node_id in node_ids
+            if (parent_id := parent_ids_por_nodo.get(node_id)) is not None
+            and parent_id not in node_ids_con_ancestros
+        }
+        node_ids_con_ancestros.update(pendientes)
+
     while pendientes:
         rows = (
             db.query(TaxonomyNode.id, TaxonomyNode.parent_id)
@@ -9,6 +9,9 @@ from dataclasses import dataclass
 from sqlalchemy.orm import Session
 
 from app.modules.discovery.models.taxonomy_models import TaxonomyNode
+from app.modules.discovery.services.catalogo_version_services import (
+    incrementar_version_catalogo,
+)
 from app.modules.discovery.services.taxonomy_assignment_services import (
     AssignmentSyncResult,
     sincronizar_assignments_desde_rubros,
@@ -2869,5 +2872,12 @@ def asegurar_taxonomia_base(db: Session) -> TaxonomySeedResult:
         db,
         RUBRO_NOMBRE_A_TAXONOMY_SLUG,
     )
+    if (
+        result.nodos_creados
+        or result.nodos_actualizados
+        or result.assignments.rubro_assignments_creados
+        or result.assignments.comercio_assignments_creados
+    ):
+        incrementar_version_catalogo(db)
     db.commit()
     return result
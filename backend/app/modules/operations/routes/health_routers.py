@@ -1,6 +1,12 @@
 from fastapi import APIRouter, Response, status
 
-from app.core.health import HEALTHY, UNHEALTHY, HealthRegistry, build_default_health_registry
+from app.core.health import (
+    HEALTHY,
+    UNHEALTHY,
+    WARMING,
+    HealthRegistry,
+    build_default_health_registry,
+)
 from app.core.operation_logging import get_operation_logger
 from app.core.operation_metrics import (
     METRIC_HEALTH_CHECK_DURATION_MS,
@@ -34,7 +40,7 @@ def readiness(response: Response):
 
 
 def _status_code_for_report(report_status: str) -> int:
-    if report_status == UNHEALTHY:
+    if report_status in {UNHEALTHY, WARMING}:
         return status.HTTP_503_SERVICE_UNAVAILABLE
     return status.HTTP_200_OK
 
@@ -0,0 +1,68 @@
+# app/modules/posts/models/publicacion_scores_models.py
+"""
+Modelo ORM: Scores materializados de Publicaciones
+
+Read model del ranking y del feed:
+- Una fila por publicación con contadores (likes, guardados, views)
+  y los scores base ya calculados
+- Se actualiza en los eventos (like, guardado, alta, desactivación)
+  y por el job de decaimiento de recencia (recencia_hasta)
+- Índices (is_activa, score) e (is_activa, score_feed): el top-N sale
+  de una sola lectura indexada
+
+Reglas:
+- Models = solo SQLAlchemy (sin lógica de negocio)
+- Las fechas son UTC naive, como el resto de los jobs
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+)
+
+from app.core.database import Base
+
+
+class PublicacionScore(Base):
+    __tablename__ = "publicacion_scores"
+    __table_args__ = (
+        Index("ix_publicacion_scores_activa_score", "is_activa", "score"),
+        Index("ix_publicacion_scores_activa_score_feed", "is_activa", "score_feed"),
+    )
+
+    publicacion_id = Column(
+        Integer,
+        ForeignKey("publicaciones.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    comercio_id = Column(Integer, nullable=False, index=True)
+
+    # Copia de Publicacion.is_activa (la actividad del comercio se filtra al leer).
+    is_activa = Column(Boolean, nullable=False, default=True)
+    publicado_en = Column(DateTime, nullable=False)
+
+    # -------------------------
+    # Contadores
+    # -------------------------
+    likes_count = Column(Integer, nullable=False, default=0)
+    guardados_count = Column(Integer, nullable=False, default=0)
+    views_count = Column(Integer, nullable=False, default=0)
+
+    # -------------------------
+    # Scores base (sin afinidad por usuario)
+    # -------------------------
+    # Ranking: likes + guardados * 2 + bonus recencia
+    score = Column(Float, nullable=False, default=0.0)
+    # Feed: bonus recencia + likes/guardados topeados
+    score_feed = Column(Float, nullable=False, default=0.0)
+
+    # Próximo cambio de tramo de recencia (NULL = ya no decae).
+    recencia_hasta = Column(DateTime, nullable=True, index=True)
+    recalculado_en = Column(DateTime, nullable=False)
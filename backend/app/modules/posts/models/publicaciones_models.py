@@ -10,6 +10,15 @@ Reglas:
 ETAPA 57:
 - Se agrega imagen_url a Publicacion para permitir que
   el backend persista y exponga imagen real al frontend.
+
+Contadores desnormalizados:
+- likes_count / guardados_count se actualizan en la misma transacción
+  que el like/guardado (UPDATE atómico +-1)
+- reconciliar_contadores_publicaciones.py corrige drift
+
+Búsqueda:
+- Índice FULLTEXT (titulo, descripcion) solo en MySQL; en otros motores
+  la búsqueda usa el índice en memoria de publicaciones_busqueda_services
 """
 
 from __future__ import annotations
@@ -19,6 +28,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -39,6 +49,14 @@ class Publicacion(Base):
     """
 
     __tablename__ = "publicaciones"
+    __table_args__ = (
+        Index(
+            "ft_publicaciones_titulo_descripcion",
+            "titulo",
+            "descripcion",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
 
     # -------------------------
     # PK
@@ -152,3 +170,20 @@ class Publicacion(Base):
         nullable=False,
         server_default="0",
     )
+    likes_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    guardados_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+
+    @property
+    def interacciones_count(self) -> int:
+        # Interacciones = likes + guardados
+        return (self.likes_count or 0) + (self.guardados_count or 0)
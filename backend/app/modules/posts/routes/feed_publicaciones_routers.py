@@ -6,17 +6,23 @@ Reglas:
 - Routers = solo HTTP
 - Feed orientado a descubrimiento
 - Usa ranking + liked_by_me
+- Paginado por cursor opaco (next_cursor)
 """
 
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.auth import obtener_usuario_actual
-from app.modules.posts.schemas.publicaciones_schemas import PublicacionRead
-from app.modules.posts.services.feed_publicaciones_services import obtener_feed_publicaciones
+from app.modules.posts.schemas.publicaciones_schemas import FeedPublicacionesPage
+from app.modules.posts.services.feed_publicaciones_services import (
+    TAMANO_PAGINA_DEFAULT,
+    TAMANO_PAGINA_MAXIMO,
+    CursorFeedInvalidoError,
+    obtener_feed_publicaciones,
+)
 
 router = APIRouter(
     prefix="/feed/publicaciones",
@@ -26,17 +32,26 @@ router = APIRouter(
 
 @router.get(
     "",
-    response_model=List[PublicacionRead],
+    response_model=FeedPublicacionesPage,
 )
 def obtener_feed_publicaciones_endpoint(
+    limit: int = Query(default=TAMANO_PAGINA_DEFAULT, ge=1, le=TAMANO_PAGINA_MAXIMO),
+    cursor: Optional[str] = Query(default=None, max_length=512),
     db: Session = Depends(get_db),
     usuario=Depends(obtener_usuario_actual),
 ):
     """
-    Devuelve el feed personalizado de publicaciones.
+    Devuelve una página del feed personalizado de publicaciones.
     """
 
-    return obtener_feed_publicaciones(
-        db,
-        usuario_id=usuario.id,
-    )
+    try:
+        pagina = obtener_feed_publicaciones(
+            db,
+            usuario_id=usuario.id,
+            limit=limit,
+            cursor=cursor,
+        )
+    except CursorFeedInvalidoError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return FeedPublicacionesPage.model_validate(pagina, from_attributes=True)
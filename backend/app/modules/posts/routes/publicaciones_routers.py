@@ -70,10 +70,6 @@ def construir_publicacion_read(
     likes = publicacion.likes or []
     guardados = publicacion.usuarios_que_la_guardaron or []
 
-    likes_count = len(likes)
-    guardados_count = len(guardados)
-    interacciones_count = likes_count + guardados_count
-
     comercio_nombre = obtener_nombre_comercio(db, publicacion)
 
     liked_by_me = False
@@ -101,9 +97,9 @@ def construir_publicacion_read(
         is_activa=publicacion.is_activa,
         created_at=publicacion.created_at,
         updated_at=publicacion.updated_at,
-        likes_count=likes_count,
-        guardados_count=guardados_count,
-        interacciones_count=interacciones_count,
+        likes_count=publicacion.likes_count or 0,
+        guardados_count=publicacion.guardados_count or 0,
+        interacciones_count=publicacion.interacciones_count,
         liked_by_me=liked_by_me,
         guardada_by_me=guardada_by_me,
     )
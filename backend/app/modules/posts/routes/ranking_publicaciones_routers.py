@@ -10,12 +10,14 @@ Reglas:
 
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.modules.posts.schemas.publicaciones_schemas import PublicacionRead
 from app.modules.posts.services.ranking_publicaciones_services import (
+    TOP_RANKING_DEFAULT,
+    TOP_RANKING_MAXIMO,
     listar_publicaciones_ranked,
 )
 
@@ -30,10 +32,11 @@ router = APIRouter(
     response_model=List[PublicacionRead],
 )
 def obtener_publicaciones_ranked(
+    limit: int = Query(default=TOP_RANKING_DEFAULT, ge=1, le=TOP_RANKING_MAXIMO),
     db: Session = Depends(get_db),
 ):
     """
-    Devuelve publicaciones ordenadas por ranking (likes + recencia).
+    Devuelve el top de publicaciones por ranking (likes + recencia).
     """
 
-    return listar_publicaciones_ranked(db)
+    return listar_publicaciones_ranked(db, limit=limit)
@@ -1,7 +1,7 @@
 # app/modules/posts/schemas/publicaciones_schemas.py
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -66,3 +66,19 @@ class PublicacionRead(PublicacionBase):
     # Estado usuario
     liked_by_me: bool = False
     guardada_by_me: bool = False
+
+
+# --------------------------------------------------
+# Feed paginado
+# --------------------------------------------------
+
+class FeedPublicacionesPage(BaseModel):
+    """
+    Página del feed personalizado.
+
+    next_cursor es opaco: se reenvía tal cual para pedir la siguiente
+    página; None indica que no hay más.
+    """
+
+    items: List[PublicacionRead]
+    next_cursor: Optional[str] = None
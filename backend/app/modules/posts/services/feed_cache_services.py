@@ -0,0 +1,255 @@
+# app/modules/posts/services/feed_cache_services.py
+"""
+Service: Cache del ranking del feed por usuario
+
+- Guarda la lista rankeada [(publicacion_id, score)] de cada usuario
+  (clave None = feed anónimo compartido), no los objetos ORM
+- LRU acotado (FEED_CACHE_MAX_ENTRIES) con TTL corto (FEED_CACHE_TTL_SECONDS)
+- Invalidación por eventos:
+  - like / guardado / seguir del usuario -> su entrada
+  - publicación nueva de un comercio -> feed anónimo, seguidores del
+    comercio y usuarios cuyo ranking ya incluye ese comercio
+- Cache por proceso (como la lista caliente): con varios workers cada
+  uno mantiene el suyo y el TTL acota la divergencia
+- Aciertos/fallos/invalidaciones se reportan en operation_metrics
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+- Los hooks de invalidación nunca rompen la escritura que los dispara
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import FrozenSet, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_FEED_CACHE_HIT_COUNT,
+    METRIC_FEED_CACHE_INVALIDATION_COUNT,
+    METRIC_FEED_CACHE_MISS_COUNT,
+    increment_counter,
+)
+from app.modules.social.models.seguidores_models import Seguidores
+
+
+AUDIENCIA_ANONIMA = "anonimo"
+AUDIENCIA_USUARIO = "usuario"
+
+logger = get_operation_logger("feed_cache")
+
+
+@dataclass(frozen=True)
+class RankingFeedCacheado:
+    # Ordenado por score DESC, id DESC (mismo orden que el cursor).
+    ranking: Tuple[Tuple[int, float], ...]
+    comercios_ids: FrozenSet[int]
+    referencia: datetime
+    creado_en: float
+
+
+def _audiencia(usuario_id: Optional[int]) -> str:
+    return AUDIENCIA_ANONIMA if usuario_id is None else AUDIENCIA_USUARIO
+
+
+class FeedCache:
+    """
+    LRU + TTL de rankings de feed, seguro entre threads.
+
+    max_entries <= 0 o ttl_seconds <= 0 desactiva el cache.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._entradas: "OrderedDict[Optional[int], RankingFeedCacheado]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def habilitado(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    def obtener(
+        self,
+        usuario_id: Optional[int],
+        *,
+        referencia: Optional[datetime] = None,
+    ) -> Optional[RankingFeedCacheado]:
+        """
+        Entrada vigente del usuario o None (cuenta acierto/fallo).
+
+        Con `referencia` (páginas siguientes) solo sirve la entrada
+        rankeada a esa misma hora: otro ranking desordenaría el cursor.
+        """
+        entrada = None
+        if self.habilitado:
+            ahora = time.monotonic()
+            with self._lock:
+                entrada = self._entradas.get(usuario_id)
+                if entrada is not None and ahora - entrada.creado_en >= self.ttl_seconds:
+                    del self._entradas[usuario_id]
+                    entrada = None
+                if entrada is not None and referencia is not None and entrada.referencia != referencia:
+                    entrada = None
+                if entrada is not None:
+                    self._entradas.move_to_end(usuario_id)
+
+        tags = {"audiencia": _audiencia(usuario_id)}
+        if entrada is None:
+            increment_counter(METRIC_FEED_CACHE_MISS_COUNT, tags=tags)
+        else:
+            increment_counter(METRIC_FEED_CACHE_HIT_COUNT, tags=tags)
+        return entrada
+
+    def guardar(
+        self,
+        usuario_id: Optional[int],
+        *,
+        ranking: List[Tuple[int, float]],
+        comercios_ids: FrozenSet[int],
+        referencia: datetime,
+    ) -> RankingFeedCacheado:
+        """
+        Cachea el ranking y lo devuelve.
+
+        Un ranking con `referencia` anterior a la de la entrada vigente
+        (página siguiente de un cursor viejo) se devuelve sin reemplazarla.
+        """
+        entrada = RankingFeedCacheado(
+            ranking=tuple(ranking),
+            comercios_ids=frozenset(comercios_ids),
+            referencia=referencia,
+            creado_en=time.monotonic(),
+        )
+        if not self.habilitado:
+            return entrada
+
+        with self._lock:
+            vigente = self._entradas.get(usuario_id)
+            if (
+                vigente is not None
+                and vigente.referencia > referencia
+                and entrada.creado_en - vigente.creado_en < self.ttl_seconds
+            ):
+                return entrada
+            self._entradas[usuario_id] = entrada
+            self._entradas.move_to_end(usuario_id)
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def usuarios_cacheados(self) -> List[Optional[int]]:
+        with self._lock:
+            return list(self._entradas)
+
+    def invalidar(self, usuarios_ids) -> int:
+        eliminadas = 0
+        with self._lock:
+            for usuario_id in usuarios_ids:
+                if self._entradas.pop(usuario_id, None) is not None:
+                    eliminadas += 1
+        if eliminadas:
+            increment_counter(METRIC_FEED_CACHE_INVALIDATION_COUNT, eliminadas)
+        return eliminadas
+
+    def invalidar_comercio(self, comercio_id: int, usuarios_ids) -> int:
+        """
+        Invalida `usuarios_ids`, el feed anónimo y toda entrada cuyo
+        ranking ya incluye publicaciones del comercio.
+        """
+        with self._lock:
+            afectados = set(usuarios_ids)
+            afectados.add(None)
+            afectados.update(
+                usuario_id
+                for usuario_id, entrada in self._entradas.items()
+                if comercio_id in entrada.comercios_ids
+            )
+        return self.invalidar(afectados)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+_FEED_CACHE_LOCK = threading.Lock()
+_feed_cache: Optional[FeedCache] = None
+
+
+def obtener_feed_cache() -> FeedCache:
+    global _feed_cache
+    with _FEED_CACHE_LOCK:
+        if _feed_cache is None:
+            _feed_cache = FeedCache(
+                max_entries=settings.FEED_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.FEED_CACHE_TTL_SECONDS,
+            )
+        return _feed_cache
+
+
+def reiniciar_feed_cache() -> None:
+    """
+    Descarta el cache (vuelve a leer la configuración en el próximo uso).
+    """
+    global _feed_cache
+    with _FEED_CACHE_LOCK:
+        _feed_cache = None
+
+
+# ============================================================
+# Hooks de invalidación
+# ============================================================
+
+def invalidar_feed_usuario(usuario_id: int) -> None:
+    """
+    Like, guardado o seguir/dejar de seguir ya commiteados.
+    """
+    obtener_feed_cache().invalidar([usuario_id])
+
+
+def invalidar_feed_por_comercio(db: Session, comercio_id: int) -> None:
+    """
+    Publicación nueva de un comercio ya commiteada.
+
+    Solo consulta seguidores entre los usuarios cacheados (acotado por
+    FEED_CACHE_MAX_ENTRIES). Si la consulta falla se vacía el cache.
+    """
+    cache = obtener_feed_cache()
+    cacheados = [usuario_id for usuario_id in cache.usuarios_cacheados() if usuario_id is not None]
+
+    seguidores: List[int] = []
+    if cacheados:
+        try:
+            seguidores = [
+                usuario_id
+                for (usuario_id,) in (
+                    db.query(Seguidores.usuario_id)
+                    .filter(
+                        Seguidores.comercio_id == comercio_id,
+                        Seguidores.usuario_id.in_(cacheados),
+                    )
+                    .all()
+                )
+            ]
+        except Exception as exc:
+            db.rollback()
+            logger.warning(
+                "feed_cache_invalidation_error error_class=%s",
+                safe_error_class(exc),
+            )
+            cache.limpiar()
+            return
+
+    cache.invalidar_comercio(comercio_id, seguidores)
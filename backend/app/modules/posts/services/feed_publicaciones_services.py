@@ -6,145 +6,283 @@ ETAPA 55 FINAL:
 - sin N+1 en guardados
 - sin N+1 en embeddings de comercios
 - cálculo eficiente en memoria
-"""
-
-from datetime import datetime, timedelta
-from typing import List, Optional
 
-from sqlalchemy import func, case, literal
-from sqlalchemy.orm import Session
+Paginación por cursor:
+- Solo se rankea una ventana acotada de candidatas:
+  las VENTANA_RECIENTES más nuevas + la lista caliente (mayor score_feed
+  en publicacion_scores), cacheada por proceso TTL_LISTA_CALIENTE_SEGUNDOS
+- Contadores desnormalizados en publicaciones (sin COUNT por request);
+  la lista caliente sale del read model publicacion_scores
+- Afinidad vectorizada: coseno una vez por comercio distinto
+  (matriz normalizada @ vector usuario normalizado), luego se reparte
+  a sus publicaciones
+- Orden: score DESC, id DESC
+- El cursor es opaco (base64 de JSON) y lleva score + id del último ítem
+  y la hora de referencia del ranking, para que el bonus de recencia no
+  cambie entre páginas
+- El ranking calculado se cachea por usuario (feed_cache_services): la
+  página siguiente y los refresh dentro del TTL no vuelven a rankear
+"""
 
+import base64
+import binascii
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session, lazyload
+
+from app.core.operation_metrics import (
+    METRIC_FEED_CACHE_REBUILD_DURATION_MS,
+    record_duration,
+)
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
 from app.modules.posts.models.publicaciones_models import Publicacion
 from app.modules.spaces.models.comercios_models import Comercio
 from app.modules.social.models.likes_publicaciones_models import LikePublicacion
 
-from app.modules.posts.services.publicaciones_services import (
-    obtener_guardados_count_por_publicaciones,
-    obtener_interacciones_count_por_publicaciones,
+from app.modules.posts.services.feed_cache_services import obtener_feed_cache
+from app.modules.posts.services.publicacion_scores_services import (
+    calcular_score_feed,
 )
 from app.modules.ai.services.usuarios_embeddings_services import obtener_vector_usuario
 from app.modules.ai.services.comercios_embeddings_services import (
-    obtener_vectores_embeddings_comercios,
+    obtener_matriz_embeddings_comercios,
 )
 
 
-def _calcular_similitud_coseno(vector_a: list, vector_b: list) -> float:
-    if not vector_a or not vector_b:
-        return 0.0
+TAMANO_PAGINA_DEFAULT = 20
+TAMANO_PAGINA_MAXIMO = 50
 
-    if len(vector_a) != len(vector_b):
-        return 0.0
+# Ventana de candidatas por request: no crece con el total de publicaciones.
+VENTANA_RECIENTES = 300
+TAMANO_LISTA_CALIENTE = 200
+TTL_LISTA_CALIENTE_SEGUNDOS = 60.0
 
-    producto_punto = sum(a * b for a, b in zip(vector_a, vector_b))
-    norma_a = sum(a * a for a in vector_a) ** 0.5
-    norma_b = sum(b * b for b in vector_b) ** 0.5
+# Decimales del score en el cursor: mismo redondeo al comparar.
+DECIMALES_SCORE = 6
 
-    if norma_a == 0 or norma_b == 0:
-        return 0.0
 
-    return producto_punto / (norma_a * norma_b)
+class CursorFeedInvalidoError(ValueError):
+    pass
 
 
-def obtener_feed_publicaciones(
-    db: Session,
-    *,
-    usuario_id: Optional[int] = None,
-) -> List[Publicacion]:
+@dataclass(frozen=True)
+class CursorFeed:
+    score: float
+    publicacion_id: int
+    referencia: datetime
 
-    ahora = datetime.utcnow()
 
-    # -------------------------------------
-    # Embedding usuario (1 sola vez)
-    # -------------------------------------
-    vector_usuario = None
-    tiene_vector_usuario = False
+@dataclass
+class PaginaFeed:
+    items: List[Publicacion] = field(default_factory=list)
+    next_cursor: Optional[str] = None
 
-    if usuario_id is not None:
-        vector_usuario = obtener_vector_usuario(db=db, usuario_id=usuario_id)
-        tiene_vector_usuario = bool(vector_usuario)
 
-    # -------------------------------------
-    # Bonus recencia
-    # -------------------------------------
-    bonus_recencia = case(
-        (Publicacion.created_at >= ahora - timedelta(hours=6), 12),
-        (Publicacion.created_at >= ahora - timedelta(days=1), 8),
-        (Publicacion.created_at >= ahora - timedelta(days=3), 4),
-        (Publicacion.created_at >= ahora - timedelta(days=7), 1),
-        else_=0,
+_LISTA_CALIENTE_LOCK = threading.Lock()
+_lista_caliente: Dict[str, object] = {
+    "ids": [],
+    "calculada_en": None,
+}
+
+
+# ============================================================
+# Cursor
+# ============================================================
+
+def codificar_cursor(cursor: CursorFeed) -> str:
+    payload = json.dumps(
+        {
+            "s": cursor.score,
+            "id": cursor.publicacion_id,
+            "t": cursor.referencia.isoformat(),
+        },
+        separators=(",", ":"),
     )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
 
-    likes_count_expr = func.count(LikePublicacion.id)
 
-    if usuario_id is None:
-        liked_by_me_expr = literal(False).label("liked_by_me")
-    else:
-        liked_by_me_expr = func.max(
-            case(
-                (LikePublicacion.usuario_id == usuario_id, 1),
-                else_=0,
+def decodificar_cursor(valor: str) -> CursorFeed:
+    try:
+        relleno = "=" * (-len(valor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(valor + relleno).decode("utf-8"))
+        return CursorFeed(
+            score=float(datos["s"]),
+            publicacion_id=int(datos["id"]),
+            referencia=datetime.fromisoformat(datos["t"]),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+        raise CursorFeedInvalidoError("Cursor de feed invalido") from exc
+
+
+# ============================================================
+# Candidatas
+# ============================================================
+
+def _calcular_lista_caliente(db: Session) -> List[int]:
+    """
+    Publicaciones activas con mayor score base de feed.
+
+    Lectura indexada por (is_activa, score_feed) sobre el read model.
+    """
+    return [
+        publicacion_id
+        for (publicacion_id,) in (
+            db.query(PublicacionScore.publicacion_id)
+            .join(Comercio, PublicacionScore.comercio_id == Comercio.id)
+            .filter(
+                PublicacionScore.is_activa.is_(True),
+                Comercio.activo.is_(True),
+            )
+            .order_by(
+                PublicacionScore.score_feed.desc(),
+                PublicacionScore.publicacion_id.desc(),
             )
-        ).label("liked_by_me")
-
-    query = (
-        db.query(
-            Publicacion,
-            likes_count_expr.label("likes_count"),
-            bonus_recencia.label("bonus_recencia"),
-            liked_by_me_expr,
+            .limit(TAMANO_LISTA_CALIENTE)
+            .all()
         )
+    ]
+
+
+def obtener_lista_caliente(db: Session) -> List[int]:
+    ahora = time.monotonic()
+
+    with _LISTA_CALIENTE_LOCK:
+        calculada_en = _lista_caliente["calculada_en"]
+        if calculada_en is not None and ahora - calculada_en < TTL_LISTA_CALIENTE_SEGUNDOS:
+            return list(_lista_caliente["ids"])
+
+        ids = _calcular_lista_caliente(db)
+        _lista_caliente["ids"] = ids
+        _lista_caliente["calculada_en"] = ahora
+        return list(ids)
+
+
+def reiniciar_lista_caliente() -> None:
+    with _LISTA_CALIENTE_LOCK:
+        _lista_caliente["ids"] = []
+        _lista_caliente["calculada_en"] = None
+
+
+def _ids_candidatas(db: Session) -> List[int]:
+    recientes = (
+        db.query(Publicacion.id)
         .join(Comercio, Publicacion.comercio_id == Comercio.id)
-        .outerjoin(
-            LikePublicacion,
-            LikePublicacion.publicacion_id == Publicacion.id,
-        )
         .filter(
             Publicacion.is_activa.is_(True),
             Comercio.activo.is_(True),
         )
-        .group_by(Publicacion.id)
+        # id crece con created_at y usa la PK: no ordena la tabla completa.
+        .order_by(Publicacion.id.desc())
+        .limit(VENTANA_RECIENTES)
+        .all()
     )
 
-    resultados = query.all()
+    candidatas = {publicacion_id for (publicacion_id,) in recientes}
+    candidatas.update(obtener_lista_caliente(db))
+    return sorted(candidatas)
+
+
+# ============================================================
+# Scoring
+# ============================================================
+
+def _afinidades_por_comercio(
+    db: Session,
+    *,
+    vector_usuario: List[float],
+    comercios_ids: List[int],
+) -> Dict[int, float]:
+    """
+    Similitud coseno usuario-comercio, una vez por comercio distinto.
+
+    El vector del usuario se normaliza una vez y las filas de la matriz de
+    comercios ya vienen normalizadas: un solo producto matriz-vector.
+    Comercios sin vector (o de otra dimensión) no aparecen: afinidad 0.
+    """
+    usuario = np.asarray(vector_usuario, dtype=np.float32).reshape(-1)
+    norma = float(np.linalg.norm(usuario))
+    if usuario.shape[0] == 0 or norma == 0:
+        return {}
+
+    ids, matriz = obtener_matriz_embeddings_comercios(
+        db,
+        comercios_ids=comercios_ids,
+        dim=usuario.shape[0],
+    )
+    if not ids:
+        return {}
+
+    similitudes = matriz @ (usuario / norma)
+    return dict(zip(ids, similitudes.tolist()))
+
+
+def _rankear_candidatas(
+    db: Session,
+    *,
+    candidatas: List[int],
+    usuario_id: Optional[int],
+    referencia: datetime,
+) -> List[tuple]:
+    """
+    Devuelve [(publicacion, score)] ordenado por score DESC, id DESC.
+    """
+    if not candidatas:
+        return []
+
+    resultados = (
+        db.query(Publicacion)
+        .join(Comercio, Publicacion.comercio_id == Comercio.id)
+        # Las relaciones selectin (likes, guardados, historias) no se usan acá.
+        .options(lazyload("*"))
+        .filter(
+            Publicacion.id.in_(candidatas),
+            Publicacion.is_activa.is_(True),
+            Comercio.activo.is_(True),
+        )
+        .all()
+    )
 
     if not resultados:
         return []
 
-    # -------------------------------------
-    # IDs base
-    # -------------------------------------
-    publicaciones_ids = [p.id for p, _, _, _ in resultados]
-    comercios_ids = [p.comercio_id for p, _, _, _ in resultados]
+    publicaciones_ids = [publicacion.id for publicacion in resultados]
+    comercios_ids = [publicacion.comercio_id for publicacion in resultados]
 
     # -------------------------------------
-    # MAPAS BULK
+    # liked_by_me (1 query acotada a la ventana)
     # -------------------------------------
+    liked_ids = set()
+    vector_usuario = None
 
-    # likes
-    likes_count_map = {
-        p.id: int(likes_val or 0)
-        for p, likes_val, _, _ in resultados
-    }
-
-    # guardados (1 query)
-    guardados_count_map = obtener_guardados_count_por_publicaciones(
-        db=db,
-        publicaciones_ids=publicaciones_ids,
-    )
+    if usuario_id is not None:
+        liked_ids = {
+            publicacion_id
+            for (publicacion_id,) in (
+                db.query(LikePublicacion.publicacion_id)
+                .filter(
+                    LikePublicacion.usuario_id == usuario_id,
+                    LikePublicacion.publicacion_id.in_(publicaciones_ids),
+                )
+                .all()
+            )
+        }
 
-    # interacciones (sin query extra)
-    interacciones_count_map = obtener_interacciones_count_por_publicaciones(
-        publicaciones_ids=publicaciones_ids,
-        likes_count_map=likes_count_map,
-        guardados_count_map=guardados_count_map,
-    )
+        # Embedding usuario (1 sola vez)
+        vector_usuario = obtener_vector_usuario(db=db, usuario_id=usuario_id)
 
-    # embeddings comercios (1 query 🔥)
-    vectores_comercios_map = {}
+    # Afinidad IA: 1 query + 1 producto matriz-vector por request
+    afinidades: Dict[int, float] = {}
 
-    if tiene_vector_usuario:
-        vectores_comercios_map = obtener_vectores_embeddings_comercios(
-            db=db,
+    if vector_usuario:
+        afinidades = _afinidades_por_comercio(
+            db,
+            vector_usuario=vector_usuario,
             comercios_ids=comercios_ids,
         )
 
@@ -153,45 +291,200 @@ def obtener_feed_publicaciones(
     # -------------------------------------
     publicaciones_con_score = []
 
-    for publicacion, likes_val, bonus_val, liked_by_me_val in resultados:
-
-        likes_count_val = likes_count_map.get(publicacion.id, 0)
-        guardados_count_val = guardados_count_map.get(publicacion.id, 0)
-        interacciones_count_val = interacciones_count_map.get(publicacion.id, 0)
-        bonus_recencia_val = int(bonus_val or 0)
+    for publicacion in resultados:
 
-        publicacion.guardados_count = guardados_count_val
-        publicacion.interacciones_count = interacciones_count_val
-        publicacion.likes_count = likes_count_val
-        publicacion.liked_by_me = bool(liked_by_me_val)
+        publicacion.liked_by_me = publicacion.id in liked_ids
 
-        # Score base
-        score_base = (
-            + bonus_recencia_val
-            + (min(likes_count_val, 20) * 0.5)
-            + (min(guardados_count_val, 20) * 1.0)
+        # Score base: contadores desnormalizados + recencia a la hora de referencia
+        score_base = calcular_score_feed(
+            likes_count=publicacion.likes_count,
+            guardados_count=publicacion.guardados_count,
+            publicado_en=publicacion.created_at or referencia,
+            ahora=referencia,
         )
 
-        # Afinidad IA
-        bonus_afinidad = 0.0
+        bonus_afinidad = afinidades.get(publicacion.comercio_id, 0.0) * 10
+
+        score_total = round(score_base + bonus_afinidad, DECIMALES_SCORE)
+        publicaciones_con_score.append((publicacion, score_total))
+
+    publicaciones_con_score.sort(
+        key=lambda item: (item[1], item[0].id),
+        reverse=True,
+    )
+
+    return publicaciones_con_score
+
 
-        if tiene_vector_usuario:
-            vector_comercio = vectores_comercios_map.get(publicacion.comercio_id)
+# ============================================================
+# Página desde el ranking cacheado
+# ============================================================
 
-            if vector_comercio:
-                similitud = _calcular_similitud_coseno(
-                    vector_usuario,
-                    vector_comercio,
+def _hidratar_publicaciones(
+    db: Session,
+    *,
+    publicaciones_ids: List[int],
+    usuario_id: Optional[int],
+) -> Dict[int, Publicacion]:
+    """
+    Carga las publicaciones todavía visibles con liked_by_me actual
+    (el ranking cacheado solo guarda ids y scores).
+    """
+    if not publicaciones_ids:
+        return {}
+
+    resultados = (
+        db.query(Publicacion)
+        .join(Comercio, Publicacion.comercio_id == Comercio.id)
+        .options(lazyload("*"))
+        .filter(
+            Publicacion.id.in_(publicaciones_ids),
+            Publicacion.is_activa.is_(True),
+            Comercio.activo.is_(True),
+        )
+        .all()
+    )
+
+    liked_ids = set()
+    if usuario_id is not None and resultados:
+        liked_ids = {
+            publicacion_id
+            for (publicacion_id,) in (
+                db.query(LikePublicacion.publicacion_id)
+                .filter(
+                    LikePublicacion.usuario_id == usuario_id,
+                    LikePublicacion.publicacion_id.in_(publicaciones_ids),
                 )
+                .all()
+            )
+        }
 
-                bonus_afinidad = similitud * 10
+    publicaciones: Dict[int, Publicacion] = {}
+    for publicacion in resultados:
+        publicacion.liked_by_me = publicacion.id in liked_ids
+        publicaciones[publicacion.id] = publicacion
 
-        score_total = score_base + bonus_afinidad
-        publicaciones_con_score.append((publicacion, score_total))
+    return publicaciones
 
-    publicaciones_con_score.sort(
-        key=lambda item: (item[1], item[0].created_at),
-        reverse=True,
+
+def _pagina_desde_ranking(
+    db: Session,
+    *,
+    ranking: List[tuple],
+    usuario_id: Optional[int],
+    limit: int,
+) -> List[tuple]:
+    """
+    Devuelve hasta limit + 1 [(publicacion, score)] visibles, en orden.
+
+    Lo que dejó de ser visible desde que se cacheó se saltea.
+    """
+    pagina: List[tuple] = []
+    inicio = 0
+
+    while len(pagina) <= limit and inicio < len(ranking):
+        bloque = ranking[inicio : inicio + limit + 1 - len(pagina)]
+        inicio += len(bloque)
+
+        publicaciones = _hidratar_publicaciones(
+            db,
+            publicaciones_ids=[publicacion_id for publicacion_id, _ in bloque],
+            usuario_id=usuario_id,
+        )
+        pagina.extend(
+            (publicaciones[publicacion_id], score)
+            for publicacion_id, score in bloque
+            if publicacion_id in publicaciones
+        )
+
+    return pagina
+
+
+# ============================================================
+# API
+# ============================================================
+
+def obtener_feed_publicaciones(
+    db: Session,
+    *,
+    usuario_id: Optional[int] = None,
+    limit: int = TAMANO_PAGINA_DEFAULT,
+    cursor: Optional[str] = None,
+) -> PaginaFeed:
+    """
+    Devuelve una página del feed y el cursor de la siguiente (o None).
+
+    El ranking completo se cachea por usuario: las páginas siguientes
+    (y los refresh dentro del TTL) solo cargan sus propias publicaciones.
+
+    Lanza CursorFeedInvalidoError si el cursor no se puede decodificar.
+    """
+    limit = max(1, min(int(limit), TAMANO_PAGINA_MAXIMO))
+
+    cursor_actual = decodificar_cursor(cursor) if cursor else None
+    cache = obtener_feed_cache()
+    entrada = cache.obtener(
+        usuario_id,
+        referencia=cursor_actual.referencia if cursor_actual else None,
     )
 
-    return [item[0] for item in publicaciones_con_score]
+    rankeadas = None
+    if entrada is None:
+        inicio = time.perf_counter()
+        referencia = cursor_actual.referencia if cursor_actual else datetime.utcnow()
+        rankeadas = _rankear_candidatas(
+            db,
+            candidatas=_ids_candidatas(db),
+            usuario_id=usuario_id,
+            referencia=referencia,
+        )
+        entrada = cache.guardar(
+            usuario_id,
+            ranking=[(publicacion.id, score) for publicacion, score in rankeadas],
+            comercios_ids=frozenset(publicacion.comercio_id for publicacion, _ in rankeadas),
+            referencia=referencia,
+        )
+        record_duration(
+            METRIC_FEED_CACHE_REBUILD_DURATION_MS,
+            (time.perf_counter() - inicio) * 1000,
+        )
+
+    ranking = list(entrada.ranking)
+    if cursor_actual is not None:
+        ultimo = (cursor_actual.score, cursor_actual.publicacion_id)
+        ranking = [
+            (publicacion_id, score)
+            for publicacion_id, score in ranking
+            if (score, publicacion_id) < ultimo
+        ]
+
+    if rankeadas is not None:
+        # Recién rankeadas: los objetos ya están cargados y son visibles.
+        por_id = {publicacion.id: publicacion for publicacion, _ in rankeadas}
+        siguientes = [
+            (por_id[publicacion_id], score) for publicacion_id, score in ranking[: limit + 1]
+        ]
+    else:
+        siguientes = _pagina_desde_ranking(
+            db,
+            ranking=ranking,
+            usuario_id=usuario_id,
+            limit=limit,
+        )
+
+    pagina = siguientes[:limit]
+    next_cursor = None
+    if len(siguientes) > limit:
+        publicacion, score = pagina[-1]
+        next_cursor = codificar_cursor(
+            CursorFeed(
+                score=score,
+                publicacion_id=publicacion.id,
+                referencia=entrada.referencia,
+            )
+        )
+
+    return PaginaFeed(
+        items=[publicacion for publicacion, _ in pagina],
+        next_cursor=next_cursor,
+    )
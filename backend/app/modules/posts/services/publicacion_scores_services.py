@@ -0,0 +1,492 @@
+# app/modules/posts/services/publicacion_scores_services.py
+"""
+Service: Scores materializados de Publicaciones (read model)
+
+- Los eventos (like, guardado, alta, desactivación) recalculan la fila de
+  la publicación afectada desde sus contadores desnormalizados
+  (publicaciones.likes_count / guardados_count), sin COUNT
+- Alta y desactivación escriben la fila en su propia transacción: ranking
+  y feed hacen inner join y filtran por publicacion_scores.is_activa
+- Un worker de decaimiento recalcula solo las filas cuyo tramo de
+  recencia venció (recencia_hasta < ahora), sin recontar
+- Ranking y feed leen de acá en lugar de agrupar likes/guardados por request
+- Like y guardado solo registran un warning si falla el recalculo:
+  el request que los disparó no falla
+- La carga inicial no ocurre en las lecturas: después de crear la tabla
+  se corre reconstruir_publicacion_scores.py
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_PUBLICACION_SCORES_DECAY_COUNT,
+    METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT,
+    increment_counter,
+)
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
+from app.modules.posts.models.publicaciones_models import Publicacion
+
+
+# Tramos (edad máxima, bonus). Mismos criterios que usaban ranking y feed.
+TRAMOS_RECENCIA_RANKING = (
+    (timedelta(days=1), 3),
+    (timedelta(days=3), 2),
+    (timedelta(days=7), 1),
+)
+TRAMOS_RECENCIA_FEED = (
+    (timedelta(hours=6), 12),
+    (timedelta(days=1), 8),
+    (timedelta(days=3), 4),
+    (timedelta(days=7), 1),
+)
+_LIMITES_RECENCIA = sorted(
+    {limite for limite, _ in TRAMOS_RECENCIA_RANKING + TRAMOS_RECENCIA_FEED}
+)
+
+TOPE_CONTADOR_FEED = 20
+TAMANO_LOTE = 500
+
+logger = get_operation_logger("publicacion_scores")
+
+
+# ============================================================
+# Fórmulas
+# ============================================================
+
+def _utc_naive(valor: datetime) -> datetime:
+    if valor.tzinfo is not None:
+        return valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor
+
+
+def _bonus_recencia(tramos, publicado_en: datetime, ahora: datetime) -> int:
+    edad = _utc_naive(ahora) - _utc_naive(publicado_en)
+    for limite, bonus in tramos:
+        if edad <= limite:
+            return bonus
+    return 0
+
+
+def calcular_score_ranking(
+    *,
+    likes_count: int,
+    guardados_count: int,
+    publicado_en: datetime,
+    ahora: datetime,
+) -> float:
+    """
+    score = likes_count + (guardados_count * 2) + bonus_recencia
+    """
+    return float(
+        likes_count
+        + guardados_count * 2
+        + _bonus_recencia(TRAMOS_RECENCIA_RANKING, publicado_en, ahora)
+    )
+
+
+def calcular_score_feed(
+    *,
+    likes_count: int,
+    guardados_count: int,
+    publicado_en: datetime,
+    ahora: datetime,
+) -> float:
+    """
+    Score base del feed (sin el término de afinidad por usuario).
+    """
+    return float(
+        _bonus_recencia(TRAMOS_RECENCIA_FEED, publicado_en, ahora)
+        + min(likes_count, TOPE_CONTADOR_FEED) * 0.5
+        + min(guardados_count, TOPE_CONTADOR_FEED) * 1.0
+    )
+
+
+def proximo_cambio_recencia(publicado_en: datetime, ahora: datetime) -> Optional[datetime]:
+    """
+    Momento en que cambia algún bonus de recencia (None si ya no cambia).
+    """
+    publicado_en = _utc_naive(publicado_en)
+    ahora = _utc_naive(ahora)
+    for limite in _LIMITES_RECENCIA:
+        if publicado_en + limite >= ahora:
+            return publicado_en + limite
+    return None
+
+
+def _valores_calculados(
+    *,
+    likes_count: int,
+    guardados_count: int,
+    publicado_en: datetime,
+    ahora: datetime,
+) -> dict:
+    return {
+        "score": calcular_score_ranking(
+            likes_count=likes_count,
+            guardados_count=guardados_count,
+            publicado_en=publicado_en,
+            ahora=ahora,
+        ),
+        "score_feed": calcular_score_feed(
+            likes_count=likes_count,
+            guardados_count=guardados_count,
+            publicado_en=publicado_en,
+            ahora=ahora,
+        ),
+        "recencia_hasta": proximo_cambio_recencia(publicado_en, ahora),
+        "recalculado_en": ahora,
+    }
+
+
+# ============================================================
+# Recalculo desde publicaciones
+# ============================================================
+
+def _filas_scores(db: Session, publicacion_ids: List[int], ahora: datetime) -> List[dict]:
+    publicaciones = (
+        db.query(
+            Publicacion.id,
+            Publicacion.comercio_id,
+            Publicacion.is_activa,
+            Publicacion.created_at,
+            Publicacion.views_count,
+            Publicacion.likes_count,
+            Publicacion.guardados_count,
+        )
+        .filter(Publicacion.id.in_(publicacion_ids))
+        .all()
+    )
+
+    filas = []
+    for (
+        publicacion_id,
+        comercio_id,
+        is_activa,
+        created_at,
+        views_count,
+        likes_count,
+        guardados_count,
+    ) in publicaciones:
+        publicado_en = _utc_naive(created_at or ahora)
+        likes_count = int(likes_count or 0)
+        guardados_count = int(guardados_count or 0)
+        filas.append(
+            {
+                "publicacion_id": publicacion_id,
+                "comercio_id": comercio_id,
+                "is_activa": bool(is_activa),
+                "publicado_en": publicado_en,
+                "likes_count": likes_count,
+                "guardados_count": guardados_count,
+                "views_count": int(views_count or 0),
+                **_valores_calculados(
+                    likes_count=likes_count,
+                    guardados_count=guardados_count,
+                    publicado_en=publicado_en,
+                    ahora=ahora,
+                ),
+            }
+        )
+    return filas
+
+
+def _upsert_statement(db: Session, filas: List[dict]):
+    dialecto = db.get_bind().dialect.name
+    columnas = [columna for columna in filas[0] if columna != "publicacion_id"]
+
+    if dialecto == "mysql":
+        stmt = mysql_insert(PublicacionScore.__table__).values(filas)
+        return stmt.on_duplicate_key_update(
+            {columna: stmt.inserted[columna] for columna in columnas}
+        )
+
+    if dialecto == "sqlite":
+        stmt = sqlite_insert(PublicacionScore.__table__).values(filas)
+        return stmt.on_conflict_do_update(
+            index_elements=[PublicacionScore.publicacion_id],
+            set_={columna: stmt.excluded[columna] for columna in columnas},
+        )
+
+    return None
+
+
+def _guardar_filas(db: Session, filas: List[dict]) -> None:
+    stmt = _upsert_statement(db, filas)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+
+    # Otros motores: merge ORM fila por fila.
+    for fila in filas:
+        db.merge(PublicacionScore(**fila))
+
+
+def escribir_scores_publicaciones(
+    db: Session,
+    publicacion_ids: Iterable[int],
+    *,
+    ahora: Optional[datetime] = None,
+) -> int:
+    """
+    Escribe (o crea) las filas de las publicaciones indicadas sin commitear.
+
+    Para que el alta o la desactivación dejen su fila en la misma
+    transacción. Las publicaciones que ya no existen pierden su fila.
+    Devuelve la cantidad de filas escritas.
+    """
+    ids = sorted(set(publicacion_ids))
+    if not ids:
+        return 0
+
+    ahora = ahora or datetime.utcnow()
+    escritas = 0
+
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio : inicio + TAMANO_LOTE]
+        filas = _filas_scores(db, lote, ahora)
+        if filas:
+            _guardar_filas(db, filas)
+            escritas += len(filas)
+
+        inexistentes = set(lote) - {fila["publicacion_id"] for fila in filas}
+        if inexistentes:
+            (
+                db.query(PublicacionScore)
+                .filter(PublicacionScore.publicacion_id.in_(inexistentes))
+                .delete(synchronize_session=False)
+            )
+
+    return escritas
+
+
+def recalcular_scores_publicaciones(
+    db: Session,
+    publicacion_ids: Iterable[int],
+    *,
+    ahora: Optional[datetime] = None,
+) -> int:
+    """
+    Recalcula (o crea) las filas de las publicaciones indicadas y commitea.
+    """
+    escritas = escribir_scores_publicaciones(db, publicacion_ids, ahora=ahora)
+    db.commit()
+    return escritas
+
+
+def notificar_cambio_publicacion(db: Session, publicacion_id: int) -> None:
+    """
+    Hook de eventos: like, guardado, alta o desactivación ya commiteados.
+
+    Nunca propaga errores: el evento de negocio ya quedó persistido y
+    la fila se corrige en el próximo evento o con la reconstrucción.
+    """
+    try:
+        recalcular_scores_publicaciones(db, [publicacion_id])
+    except Exception as exc:
+        db.rollback()
+        increment_counter(METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT)
+        logger.warning(
+            "publicacion_scores_refresh_error error_class=%s",
+            safe_error_class(exc),
+        )
+
+
+def reconstruir_scores_publicaciones(
+    db: Session,
+    *,
+    tamano_lote: int = TAMANO_LOTE,
+    ahora: Optional[datetime] = None,
+) -> int:
+    """
+    Recalcula el read model completo recorriendo publicaciones por id.
+    """
+    ahora = ahora or datetime.utcnow()
+    ultimo_id = 0
+    total = 0
+
+    while True:
+        lote = [
+            publicacion_id
+            for (publicacion_id,) in (
+                db.query(Publicacion.id)
+                .filter(Publicacion.id > ultimo_id)
+                .order_by(Publicacion.id.asc())
+                .limit(tamano_lote)
+                .all()
+            )
+        ]
+        if not lote:
+            break
+        total += recalcular_scores_publicaciones(db, lote, ahora=ahora)
+        ultimo_id = lote[-1]
+
+    # Filas huérfanas (publicación borrada sin cascade, p. ej. en SQLite).
+    (
+        db.query(PublicacionScore)
+        .filter(~PublicacionScore.publicacion_id.in_(db.query(Publicacion.id)))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return total
+
+
+# ============================================================
+# Decaimiento de recencia
+# ============================================================
+
+def recalcular_recencia_vencida(
+    db: Session,
+    *,
+    ahora: Optional[datetime] = None,
+    limite: int = TAMANO_LOTE,
+) -> int:
+    """
+    Recalcula los scores de las filas cuyo tramo de recencia venció.
+
+    Usa los contadores ya materializados (no vuelve a contar likes).
+    """
+    ahora = ahora or datetime.utcnow()
+    tabla = PublicacionScore.__table__
+    total = 0
+
+    while True:
+        vencidas = (
+            db.query(
+                PublicacionScore.publicacion_id,
+                PublicacionScore.likes_count,
+                PublicacionScore.guardados_count,
+                PublicacionScore.publicado_en,
+            )
+            .filter(PublicacionScore.recencia_hasta < ahora)
+            .order_by(PublicacionScore.recencia_hasta.asc())
+            .limit(limite)
+            .all()
+        )
+        if not vencidas:
+            break
+
+        db.execute(
+            tabla.update()
+            .where(tabla.c.publicacion_id == bindparam("b_publicacion_id"))
+            .values(
+                score=bindparam("b_score"),
+                score_feed=bindparam("b_score_feed"),
+                recencia_hasta=bindparam("b_recencia_hasta"),
+                recalculado_en=bindparam("b_recalculado_en"),
+            ),
+            [
+                {
+                    "b_publicacion_id": publicacion_id,
+                    **{
+                        f"b_{clave}": valor
+                        for clave, valor in _valores_calculados(
+                            likes_count=likes_count,
+                            guardados_count=guardados_count,
+                            publicado_en=publicado_en,
+                            ahora=ahora,
+                        ).items()
+                    },
+                }
+                for publicacion_id, likes_count, guardados_count, publicado_en in vencidas
+            ],
+        )
+        db.commit()
+        total += len(vencidas)
+
+        if len(vencidas) < limite:
+            break
+
+    if total:
+        increment_counter(METRIC_PUBLICACION_SCORES_DECAY_COUNT, total)
+    return total
+
+
+class PublicacionScoresDecayWorker:
+    """
+    Hilo daemon que aplica el decaimiento de recencia cada intervalo.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        intervalo_segundos: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._intervalo = intervalo_segundos
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._loop,
+            name="publicacion-scores-decay",
+            daemon=True,
+        )
+        self._hilo.start()
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=timeout)
+        self._hilo = None
+
+    def ejecutar(self) -> int:
+        db = self._session_factory()
+        try:
+            return recalcular_recencia_vencida(db)
+        except Exception as exc:
+            db.rollback()
+            logger.error(
+                "publicacion_scores_decay_error error_class=%s",
+                safe_error_class(exc),
+            )
+            return 0
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._detener.wait(self._intervalo):
+            self.ejecutar()
+
+
+_WORKER: PublicacionScoresDecayWorker | None = None
+
+
+def iniciar_worker_decaimiento_scores(
+    session_factory: sessionmaker,
+) -> PublicacionScoresDecayWorker:
+    global _WORKER
+
+    if _WORKER is None:
+        _WORKER = PublicacionScoresDecayWorker(
+            session_factory,
+            settings.PUBLICACION_SCORES_DECAY_INTERVAL_SECONDS,
+        )
+    _WORKER.iniciar()
+    return _WORKER
+
+
+def detener_worker_decaimiento_scores() -> None:
+    global _WORKER
+
+    if _WORKER is not None:
+        _WORKER.detener()
+    _WORKER = None
@@ -0,0 +1,218 @@
+# app/modules/posts/services/publicacion_views_services.py
+"""
+Service: Contador de vistas de Publicaciones (write-behind)
+
+- El detalle registra la vista en un acumulador en memoria
+  (publicacion_id -> vistas pendientes): sin commit ni lock de fila
+- Un worker vacía el acumulador cada PUBLICACION_VIEWS_FLUSH_INTERVAL_SECONDS
+  con un único UPDATE por tabla (executemany ordenado por id)
+- publicaciones.views_count se commitea primero y por separado: si ese
+  UPDATE falla, las vistas vuelven al acumulador para el próximo ciclo
+- publicacion_scores es best-effort (como el hook de scores): si falla o
+  la tabla no existe, la fila se corrige con la reconstrucción
+- Al apagar se vacía lo pendiente
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+- Acumulador por proceso: con varios workers cada uno vacía lo suyo
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT,
+    METRIC_PUBLICACION_VIEWS_FLUSH_COUNT,
+    METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT,
+    increment_counter,
+)
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
+from app.modules.posts.models.publicaciones_models import Publicacion
+
+
+logger = get_operation_logger("publicacion_views")
+
+
+class AcumuladorViews:
+    """
+    Vistas pendientes por publicación, seguro entre threads.
+    """
+
+    def __init__(self) -> None:
+        self._pendientes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, publicacion_id: int, cantidad: int = 1) -> None:
+        with self._lock:
+            self._pendientes[publicacion_id] = self._pendientes.get(publicacion_id, 0) + cantidad
+
+    def pendientes(self, publicacion_id: int) -> int:
+        with self._lock:
+            return self._pendientes.get(publicacion_id, 0)
+
+    def tomar(self) -> Dict[int, int]:
+        """
+        Devuelve lo acumulado y deja el acumulador vacío.
+        """
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        return pendientes
+
+    def devolver(self, pendientes: Dict[int, int]) -> None:
+        with self._lock:
+            for publicacion_id, cantidad in pendientes.items():
+                self._pendientes[publicacion_id] = self._pendientes.get(publicacion_id, 0) + cantidad
+
+    @staticmethod
+    def _sumar_views(db: Session, tabla, columna_id: str, parametros: list) -> None:
+        db.execute(
+            tabla.update()
+            .where(tabla.c[columna_id] == bindparam("b_publicacion_id"))
+            .values(views_count=tabla.c.views_count + bindparam("b_delta")),
+            parametros,
+        )
+
+    def vaciar(self, db: Session) -> int:
+        """
+        Persiste las vistas pendientes. Devuelve la cantidad de vistas escritas.
+        """
+        pendientes = self.tomar()
+        if not pendientes:
+            return 0
+
+        # Orden fijo de ids: dos procesos vaciando a la vez toman los locks
+        # de fila en el mismo orden.
+        parametros = [
+            {"b_publicacion_id": publicacion_id, "b_delta": cantidad}
+            for publicacion_id, cantidad in sorted(pendientes.items())
+        ]
+
+        try:
+            self._sumar_views(db, Publicacion.__table__, "id", parametros)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            self.devolver(pendientes)
+            increment_counter(METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT)
+            logger.warning(
+                "publicacion_views_flush_error error_class=%s",
+                safe_error_class(exc),
+            )
+            return 0
+
+        try:
+            self._sumar_views(db, PublicacionScore.__table__, "publicacion_id", parametros)
+            db.commit()
+        except Exception as exc:
+            # Las vistas ya quedaron en publicaciones: no se re-encolan.
+            db.rollback()
+            increment_counter(METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT)
+            logger.warning(
+                "publicacion_views_scores_error error_class=%s",
+                safe_error_class(exc),
+            )
+
+        total = sum(pendientes.values())
+        increment_counter(METRIC_PUBLICACION_VIEWS_FLUSH_COUNT, total)
+        return total
+
+
+_ACUMULADOR = AcumuladorViews()
+
+
+def registrar_view_publicacion(publicacion_id: int) -> None:
+    _ACUMULADOR.registrar(publicacion_id)
+
+
+def views_pendientes_publicacion(publicacion_id: int) -> int:
+    return _ACUMULADOR.pendientes(publicacion_id)
+
+
+def vaciar_views_pendientes(db: Session) -> int:
+    return _ACUMULADOR.vaciar(db)
+
+
+def reiniciar_views_pendientes() -> None:
+    """
+    Descarta las vistas pendientes sin persistirlas.
+    """
+    _ACUMULADOR.tomar()
+
+
+class PublicacionViewsFlushWorker:
+    """
+    Hilo daemon que vacía el acumulador de vistas cada intervalo.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        intervalo_segundos: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._intervalo = intervalo_segundos
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._loop,
+            name="publicacion-views-flush",
+            daemon=True,
+        )
+        self._hilo.start()
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=timeout)
+        self._hilo = None
+        # Flush final: lo acumulado desde el último ciclo no se pierde.
+        self.ejecutar()
+
+    def ejecutar(self) -> int:
+        db = self._session_factory()
+        try:
+            return vaciar_views_pendientes(db)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._detener.wait(self._intervalo):
+            self.ejecutar()
+
+
+_WORKER: Optional[PublicacionViewsFlushWorker] = None
+
+
+def iniciar_worker_views_publicaciones(
+    session_factory: sessionmaker,
+) -> PublicacionViewsFlushWorker:
+    global _WORKER
+
+    if _WORKER is None:
+        _WORKER = PublicacionViewsFlushWorker(
+            session_factory,
+            settings.PUBLICACION_VIEWS_FLUSH_INTERVAL_SECONDS,
+        )
+    _WORKER.iniciar()
+    return _WORKER
+
+
+def detener_worker_views_publicaciones() -> None:
+    global _WORKER
+
+    if _WORKER is not None:
+        _WORKER.detener()
+    _WORKER = None
@@ -0,0 +1,513 @@
+# app/modules/posts/services/publicaciones_busqueda_services.py
+"""
+Service: Búsqueda full-text de Publicaciones (titulo + descripcion)
+
+- Reemplaza los ILIKE '%q%' (scan completo de publicaciones) del listado,
+  del candidate engine y de la búsqueda smart de comercios
+- MySQL con PUBLICACIONES_FULLTEXT_MYSQL=true (tras correr
+  migrate_publicaciones_fulltext.py): MATCH ... AGAINST en BOOLEAN MODE
+  sobre ft_publicaciones_titulo_descripcion. Si el índice no existe, el
+  proceso lo registra una vez y cae al índice en memoria
+- Resto de los casos: índice invertido en memoria por proceso, con
+  carga completa inicial y lectura incremental por updated_at (mismo
+  esquema que comercios_vector_index_services)
+- Tokens en minúscula y sin acentos ("Café" == "cafe"), sin stopwords
+  castellanas, prefijo por token y AND entre tokens
+- Consultas que el índice no puede resolver (algún término de menos de
+  MIN_LONGITUD_TOKEN caracteres o solo stopwords) usan el ILIKE '%q%'
+  anterior, así "té" o "2x" siguen encontrando lo mismo que antes
+- Sin limit no hay tope: los listados paginan sobre todas las coincidencias
+- Relevancia normalizada a (0, 1] dentro de cada búsqueda: el candidate
+  engine la usa como confidence
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+- Solo indexa publicaciones activas; la visibilidad del comercio la
+  filtra cada caller
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import desc, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.modules.posts.models.publicaciones_models import Publicacion
+
+
+logger = get_operation_logger("publicaciones_busqueda")
+
+NOMBRE_INDICE_FULLTEXT = "ft_publicaciones_titulo_descripcion"
+
+# innodb_ft_min_token_size por defecto: mismo criterio en ambos motores.
+MIN_LONGITUD_TOKEN = 3
+
+# Título pesa más que descripción en la relevancia del índice en memoria.
+PESO_TITULO = 2.0
+PESO_DESCRIPCION = 1.0
+
+# Saturación de frecuencia (estilo BM25).
+K1_SATURACION = 1.2
+
+INTERVALO_SINCRONIZACION_SEGUNDOS = 5.0
+MARGEN_MARCA_SEGUNDOS = 1
+
+STOPWORDS = frozenset(
+    {
+        "con", "del", "las", "los", "para", "por", "que", "sin",
+        "sus", "una", "uno", "unos", "unas", "como", "mas", "muy",
+    }
+)
+
+# Palabras cortas que no impiden usar el índice: se ignoran como siempre.
+STOPWORDS_CORTAS = frozenset(
+    {"a", "al", "de", "e", "el", "en", "la", "lo", "o", "se", "su", "u", "un", "y"}
+)
+
+# MySQL "Can't find FULLTEXT index matching the column list".
+ERROR_MYSQL_SIN_FULLTEXT = 1191
+
+
+@dataclass(frozen=True)
+class CoincidenciaPublicacion:
+    publicacion_id: int
+    comercio_id: int
+    relevancia: float
+
+
+def _sin_acentos(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(char for char in descompuesto if not unicodedata.combining(char))
+
+
+def _tokens_texto(texto: Optional[str]) -> List[str]:
+    return [
+        token
+        for token in re.split(r"[^a-z0-9]+", _sin_acentos(texto or ""))
+        if len(token) >= MIN_LONGITUD_TOKEN and token not in STOPWORDS
+    ]
+
+
+def indice_resuelve_busqueda(texto: Optional[str]) -> bool:
+    """
+    True si todos los términos útiles de texto entran en el índice.
+
+    Falso si no queda ninguno (solo stopwords) o si alguno es más corto que
+    MIN_LONGITUD_TOKEN: el índice no los ve y esas consultas usan ILIKE.
+    """
+    terminos = [
+        termino
+        for termino in re.split(r"[^a-z0-9]+", _sin_acentos(texto or ""))
+        if termino and termino not in STOPWORDS and termino not in STOPWORDS_CORTAS
+    ]
+    return bool(terminos) and all(len(termino) >= MIN_LONGITUD_TOKEN for termino in terminos)
+
+
+def tokenizar_busqueda(texto: Optional[str]) -> List[str]:
+    """
+    Tokens normalizados (sin acentos, sin stopwords, sin repetidos).
+    """
+    return list(dict.fromkeys(_tokens_texto(texto)))
+
+
+def construir_consulta_fulltext(tokens: Iterable[str]) -> str:
+    """
+    Consulta BOOLEAN MODE: todos los tokens obligatorios, con prefijo.
+
+    Los tokens ya vienen normalizados a [a-z0-9], así que no pueden
+    contener operadores de MySQL.
+    """
+    return " ".join(f"+{token}*" for token in tokens)
+
+
+class IndiceTextoPublicaciones:
+    """
+    Índice invertido token -> {publicacion_id: peso}, seguro entre threads.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documentos: Dict[int, Tuple[int, Tuple[str, ...]]] = {}
+        self._vocabulario: List[str] = []
+        self._vocabulario_sucio = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+    def _quitar(self, publicacion_id: int) -> None:
+        documento = self._documentos.pop(publicacion_id, None)
+        if documento is None:
+            return
+
+        for token in documento[1]:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(publicacion_id, None)
+            if not posting:
+                del self._postings[token]
+                self._vocabulario_sucio = True
+
+    def upsert(
+        self,
+        publicacion_id: int,
+        *,
+        comercio_id: int,
+        titulo: Optional[str],
+        descripcion: Optional[str],
+        activa: bool = True,
+    ) -> None:
+        pesos: Dict[str, float] = {}
+        if activa:
+            for peso, campo in ((PESO_TITULO, titulo), (PESO_DESCRIPCION, descripcion)):
+                for token in _tokens_texto(campo):
+                    pesos[token] = pesos.get(token, 0.0) + peso
+
+        with self._lock:
+            self._quitar(publicacion_id)
+            if not pesos:
+                return
+
+            self._documentos[publicacion_id] = (comercio_id, tuple(pesos))
+            for token, peso in pesos.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    self._vocabulario_sucio = True
+                posting[publicacion_id] = peso
+
+    def remove(self, publicacion_id: int) -> None:
+        with self._lock:
+            self._quitar(publicacion_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._documentos.clear()
+            self._vocabulario = []
+            self._vocabulario_sucio = False
+
+    def _terminos_con_prefijo(self, prefijo: str) -> List[str]:
+        if self._vocabulario_sucio:
+            self._vocabulario = sorted(self._postings)
+            self._vocabulario_sucio = False
+
+        inicio = bisect.bisect_left(self._vocabulario, prefijo)
+        terminos = []
+        for termino in self._vocabulario[inicio:]:
+            if not termino.startswith(prefijo):
+                break
+            terminos.append(termino)
+        return terminos
+
+    def buscar(
+        self,
+        tokens: List[str],
+        *,
+        limit: Optional[int] = None,
+    ) -> List[CoincidenciaPublicacion]:
+        """
+        AND de tokens (cada uno por prefijo), ordenado por relevancia DESC, id DESC.
+
+        Sin limit devuelve todas las coincidencias.
+        """
+        if not tokens or (limit is not None and limit <= 0):
+            return []
+
+        with self._lock:
+            total_documentos = len(self._documentos)
+            scores: Optional[Dict[int, float]] = None
+
+            for token in tokens:
+                # Para cada documento, el mejor término que extiende el prefijo.
+                parcial: Dict[int, float] = {}
+                for termino in self._terminos_con_prefijo(token):
+                    posting = self._postings[termino]
+                    frecuencia_documental = len(posting)
+                    idf = math.log(
+                        1.0
+                        + (total_documentos - frecuencia_documental + 0.5)
+                        / (frecuencia_documental + 0.5)
+                    )
+                    for publicacion_id, peso in posting.items():
+                        aporte = idf * peso * (K1_SATURACION + 1) / (peso + K1_SATURACION)
+                        if aporte > parcial.get(publicacion_id, 0.0):
+                            parcial[publicacion_id] = aporte
+
+                if scores is None:
+                    scores = parcial
+                else:
+                    scores = {
+                        publicacion_id: score + parcial[publicacion_id]
+                        for publicacion_id, score in scores.items()
+                        if publicacion_id in parcial
+                    }
+                if not scores:
+                    return []
+
+            ordenados = sorted(
+                scores.items(),
+                key=lambda item: (item[1], item[0]),
+                reverse=True,
+            )[:limit]
+            comercios = {
+                publicacion_id: self._documentos[publicacion_id][0]
+                for publicacion_id, _ in ordenados
+            }
+
+        return _normalizar_relevancias(
+            [
+                (publicacion_id, comercios[publicacion_id], score)
+                for publicacion_id, score in ordenados
+            ]
+        )
+
+
+def _normalizar_relevancias(
+    filas: List[Tuple[int, int, float]],
+) -> List[CoincidenciaPublicacion]:
+    maximo = max((float(score or 0.0) for _, _, score in filas), default=0.0)
+    if maximo <= 0:
+        maximo = 1.0
+
+    return [
+        CoincidenciaPublicacion(
+            publicacion_id=int(publicacion_id),
+            comercio_id=int(comercio_id),
+            relevancia=round(float(score or 0.0) / maximo, 6),
+        )
+        for publicacion_id, comercio_id, score in filas
+    ]
+
+
+_INDICE_PUBLICACIONES = IndiceTextoPublicaciones()
+_ESTADO_LOCK = threading.Lock()
+_estado: Dict[str, object] = {
+    "construido": False,
+    "marca_updated_at": None,
+    "sincronizado_en": 0.0,
+    "fulltext_mysql_disponible": True,
+}
+
+
+def _cargar_filas(db: Session, *, desde_updated_at=None):
+    query = db.query(
+        Publicacion.id,
+        Publicacion.comercio_id,
+        Publicacion.titulo,
+        Publicacion.descripcion,
+        Publicacion.is_activa,
+        Publicacion.updated_at,
+    )
+    if desde_updated_at is not None:
+        # Margen de 1s: updated_at puede tener granularidad de segundos.
+        query = query.filter(
+            Publicacion.updated_at
+            >= desde_updated_at - timedelta(seconds=MARGEN_MARCA_SEGUNDOS)
+        )
+    else:
+        query = query.filter(Publicacion.is_activa.is_(True))
+
+    marca = desde_updated_at
+    for publicacion_id, comercio_id, titulo, descripcion, activa, updated_at in query.all():
+        _INDICE_PUBLICACIONES.upsert(
+            publicacion_id,
+            comercio_id=comercio_id,
+            titulo=titulo,
+            descripcion=descripcion,
+            activa=bool(activa),
+        )
+        if updated_at is not None and (marca is None or updated_at > marca):
+            marca = updated_at
+
+    return marca
+
+
+def sincronizar_indice_texto_publicaciones(
+    db: Session,
+    *,
+    forzar: bool = False,
+) -> IndiceTextoPublicaciones:
+    """
+    Asegura que el índice en memoria esté construido y razonablemente fresco.
+    """
+    ahora = time.monotonic()
+
+    with _ESTADO_LOCK:
+        if not _estado["construido"] or forzar:
+            _INDICE_PUBLICACIONES.clear()
+            _estado["marca_updated_at"] = _cargar_filas(db)
+            _estado["construido"] = True
+            _estado["sincronizado_en"] = ahora
+            return _INDICE_PUBLICACIONES
+
+        if ahora - float(_estado["sincronizado_en"]) < INTERVALO_SINCRONIZACION_SEGUNDOS:
+            return _INDICE_PUBLICACIONES
+
+        _estado["marca_updated_at"] = _cargar_filas(
+            db,
+            desde_updated_at=_estado["marca_updated_at"],
+        )
+        _estado["sincronizado_en"] = ahora
+
+    return _INDICE_PUBLICACIONES
+
+
+def registrar_publicacion_en_indice_texto(publicacion: Publicacion) -> None:
+    """
+    Aplica el alta/edición/baja al índice local (sin tocar la BD).
+
+    Si el índice todavía no fue construido no hace nada: la carga
+    completa inicial ya va a leer la fila persistida.
+    """
+    if not _estado["construido"]:
+        return
+
+    _INDICE_PUBLICACIONES.upsert(
+        publicacion.id,
+        comercio_id=publicacion.comercio_id,
+        titulo=publicacion.titulo,
+        descripcion=publicacion.descripcion,
+        activa=bool(publicacion.is_activa),
+    )
+
+
+def reiniciar_indice_texto_publicaciones() -> None:
+    """
+    Descarta el índice en memoria. La próxima búsqueda lo reconstruye.
+    """
+    with _ESTADO_LOCK:
+        _INDICE_PUBLICACIONES.clear()
+        _estado["construido"] = False
+        _estado["marca_updated_at"] = None
+        _estado["sincronizado_en"] = 0.0
+        _estado["fulltext_mysql_disponible"] = True
+
+
+def _usa_fulltext_mysql(db: Session) -> bool:
+    return (
+        settings.PUBLICACIONES_FULLTEXT_MYSQL
+        and bool(_estado["fulltext_mysql_disponible"])
+        and db.get_bind().dialect.name == "mysql"
+    )
+
+
+def _falta_indice_fulltext(exc: DBAPIError) -> bool:
+    args = getattr(exc.orig, "args", None) or (None,)
+    return args[0] == ERROR_MYSQL_SIN_FULLTEXT
+
+
+def _buscar_mysql(
+    db: Session,
+    tokens: List[str],
+    *,
+    limit: Optional[int],
+) -> List[CoincidenciaPublicacion]:
+    relevancia = match(
+        Publicacion.titulo,
+        Publicacion.descripcion,
+        against=construir_consulta_fulltext(tokens),
+    ).in_boolean_mode()
+    query = (
+        db.query(Publicacion.id, Publicacion.comercio_id, relevancia.label("relevancia"))
+        .filter(Publicacion.is_activa.is_(True))
+        .filter(relevancia > 0)
+        .order_by(desc("relevancia"), Publicacion.id.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return _normalizar_relevancias([tuple(fila) for fila in query.all()])
+
+
+def _buscar_ilike(
+    db: Session,
+    q: str,
+    *,
+    limit: Optional[int],
+) -> List[CoincidenciaPublicacion]:
+    like = f"%{q}%"
+    query = (
+        db.query(Publicacion.id, Publicacion.comercio_id)
+        .filter(Publicacion.is_activa.is_(True))
+        .filter(
+            or_(
+                Publicacion.titulo.ilike(like),
+                Publicacion.descripcion.ilike(like),
+            )
+        )
+        .order_by(Publicacion.id.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return [
+        CoincidenciaPublicacion(
+            publicacion_id=int(publicacion_id),
+            comercio_id=int(comercio_id),
+            relevancia=1.0,
+        )
+        for publicacion_id, comercio_id in query.all()
+    ]
+
+
+def buscar_publicaciones_texto(
+    db: Session,
+    *,
+    q: Optional[str],
+    limit: Optional[int] = None,
+) -> List[CoincidenciaPublicacion]:
+    """
+    Publicaciones activas cuyo título/descripción matchea q.
+
+    Orden: relevancia DESC, id DESC. Sin limit no se trunca. Consultas que
+    el índice no resuelve van por ILIKE '%q%' (todas con relevancia 1.0).
+    """
+    q_normalizada = (q or "").strip()
+    if not q_normalizada or (limit is not None and limit <= 0):
+        return []
+
+    if not indice_resuelve_busqueda(q_normalizada):
+        return _buscar_ilike(db, q_normalizada, limit=limit)
+
+    tokens = tokenizar_busqueda(q_normalizada)
+    if _usa_fulltext_mysql(db):
+        try:
+            return _buscar_mysql(db, tokens, limit=limit)
+        except DBAPIError as exc:
+            if not _falta_indice_fulltext(exc):
+                raise
+            _estado["fulltext_mysql_disponible"] = False
+            logger.warning(
+                "publicaciones_fulltext_unavailable error_class=%s",
+                safe_error_class(exc),
+            )
+
+    return sincronizar_indice_texto_publicaciones(db).buscar(tokens, limit=limit)
+
+
+def buscar_comercio_ids_por_publicaciones(
+    db: Session,
+    *,
+    q: Optional[str],
+) -> Set[int]:
+    """
+    Comercios con al menos una publicación activa que matchea q.
+    """
+    return {
+        coincidencia.comercio_id
+        for coincidencia in buscar_publicaciones_texto(db, q=q)
+    }
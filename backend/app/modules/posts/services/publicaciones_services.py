@@ -14,14 +14,35 @@ ETAPA 57:
 - Se fuerza la carga del comercio relacionado en detalle/listados
   para poder exponer nombre real del comercio al frontend
 - Se guarda imagen_url al crear publicaciones
+
+Búsqueda:
+- q en listados resuelve título/descripción con publicaciones_busqueda_services
+  (FULLTEXT en MySQL, índice invertido en memoria en otros motores)
 """
 
 from typing import List, Dict, Optional
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import case, func, or_
 
+from app.modules.discovery.services.catalogo_version_services import (
+    CLAVE_BUSQUEDA,
+    incrementar_version_catalogo,
+)
 from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.feed_cache_services import invalidar_feed_por_comercio
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    buscar_publicaciones_texto,
+    registrar_publicacion_en_indice_texto,
+)
+from app.modules.posts.services.publicacion_scores_services import (
+    escribir_scores_publicaciones,
+)
+from app.modules.posts.services.publicacion_views_services import (
+    registrar_view_publicacion,
+    views_pendientes_publicacion,
+)
 from app.modules.spaces.models.comercios_models import Comercio
 from app.modules.spaces.services.comercios_ownership_services import (
     obtener_comercio_propio_o_error,
@@ -81,7 +102,7 @@ def crear_publicacion(
     - Se persiste imagen_url si viene informada.
     """
 
-    obtener_comercio_propio_o_error(
+    comercio = obtener_comercio_propio_o_error(
         db,
         comercio_id=comercio_id,
         usuario_autenticado=usuario_autenticado,
@@ -97,8 +118,16 @@ def crear_publicacion(
     )
 
     db.add(nueva_publicacion)
+    # Flag precalculado de Explorar (orden clásico).
+    comercio.tiene_publicaciones = True
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
+    # La fila del read model va en la misma transacción que el alta.
+    db.flush()
+    escribir_scores_publicaciones(db, [nueva_publicacion.id])
     db.commit()
+    invalidar_feed_por_comercio(db, comercio_id)
     db.refresh(nueva_publicacion)
+    registrar_publicacion_en_indice_texto(nueva_publicacion)
 
     return nueva_publicacion
 
@@ -134,12 +163,27 @@ def listar_publicaciones_activas(
 
     q_normalizada = (q or "").strip()
     if q_normalizada:
-        like = f"%{q_normalizada}%"
+        # Título/descripción por índice full-text; el nombre del comercio
+        # se resuelve aparte para filtrar por ids (sin scan de publicaciones).
+        publicaciones_ids = [
+            coincidencia.publicacion_id
+            for coincidencia in buscar_publicaciones_texto(db, q=q_normalizada)
+        ]
+        comercios_ids_nombre = [
+            comercio_id
+            for (comercio_id,) in (
+                db.query(Comercio.id)
+                .filter(
+                    Comercio.activo.is_(True),
+                    Comercio.nombre.ilike(f"%{q_normalizada}%"),
+                )
+                .all()
+            )
+        ]
         query = query.filter(
             or_(
-                Publicacion.titulo.ilike(like),
-                Publicacion.descripcion.ilike(like),
-                Comercio.nombre.ilike(like),
+                Publicacion.id.in_(publicaciones_ids),
+                Publicacion.comercio_id.in_(comercios_ids_nombre),
             )
         )
 
@@ -193,17 +237,25 @@ def obtener_publicacion_por_id_y_sumar_view(
     publicacion_id: int,
 ) -> Optional[Publicacion]:
     """
-    Obtiene una publicación por ID e incrementa su contador de vistas.
+    Obtiene una publicación por ID y registra la vista.
 
     ETAPA 57:
     - Se agrega joinedload del comercio para que el detalle también
       llegue con la relación lista y se pueda mostrar nombre real.
+
+    La vista se acumula en memoria (publicacion_views_services) y se
+    persiste por lote: una sola lectura y sin commit por request.
+    views_count sale con lo persistido más lo pendiente de este proceso
+    (incluida esta vista); las pendientes de otros workers aparecen al
+    próximo flush.
     """
 
     publicacion = (
         db.query(Publicacion)
         .join(Comercio, Publicacion.comercio_id == Comercio.id)
         .options(joinedload(Publicacion.comercio))
+        # views_count se recalcula desde la fila en cada lectura.
+        .populate_existing()
         .filter(
             Publicacion.id == publicacion_id,
             Publicacion.is_activa.is_(True),
@@ -215,29 +267,15 @@ def obtener_publicacion_por_id_y_sumar_view(
     if not publicacion:
         return None
 
-    # --------------------------------------------------
-    # Incremento real de views
-    # --------------------------------------------------
-    publicacion.views_count += 1
-    db.commit()
-
-    # --------------------------------------------------
-    # Releemos la publicación con el comercio cargado
-    # para devolver un objeto fresco y consistente
-    # --------------------------------------------------
-    publicacion_actualizada = (
-        db.query(Publicacion)
-        .join(Comercio, Publicacion.comercio_id == Comercio.id)
-        .options(joinedload(Publicacion.comercio))
-        .filter(
-            Publicacion.id == publicacion_id,
-            Publicacion.is_activa.is_(True),
-            Comercio.activo.is_(True),
-        )
-        .first()
+    registrar_view_publicacion(publicacion_id)
+    # Sin marcar el objeto como modificado: solo el flush por lote escribe.
+    set_committed_value(
+        publicacion,
+        "views_count",
+        (publicacion.views_count or 0) + views_pendientes_publicacion(publicacion_id),
     )
 
-    return publicacion_actualizada
+    return publicacion
 
 
 # --------------------------------------------------
@@ -254,8 +292,8 @@ def obtener_guardados_count(
     """
 
     return (
-        db.query(func.count(PublicacionGuardada.id))
-        .filter(PublicacionGuardada.publicacion_id == publicacion_id)
+        db.query(Publicacion.guardados_count)
+        .filter(Publicacion.id == publicacion_id)
         .scalar()
         or 0
     )
@@ -272,20 +310,13 @@ def obtener_interacciones_count(
     Interacciones = likes + guardados
     """
 
-    likes_count = (
-        db.query(func.count(LikePublicacion.id))
-        .filter(LikePublicacion.publicacion_id == publicacion_id)
+    return (
+        db.query(Publicacion.likes_count + Publicacion.guardados_count)
+        .filter(Publicacion.id == publicacion_id)
         .scalar()
         or 0
     )
 
-    guardados_count = obtener_guardados_count(
-        db=db,
-        publicacion_id=publicacion_id,
-    )
-
-    return likes_count + guardados_count
-
 
 def obtener_guardados_count_por_publicaciones(
     db: Session,
@@ -307,12 +338,8 @@ def obtener_guardados_count_por_publicaciones(
         return {}
 
     resultados = (
-        db.query(
-            PublicacionGuardada.publicacion_id,
-            func.count(PublicacionGuardada.id).label("guardados_count"),
-        )
-        .filter(PublicacionGuardada.publicacion_id.in_(publicaciones_ids))
-        .group_by(PublicacionGuardada.publicacion_id)
+        db.query(Publicacion.id, Publicacion.guardados_count)
+        .filter(Publicacion.id.in_(publicaciones_ids))
         .all()
     )
 
@@ -409,6 +436,101 @@ def obtener_publicaciones_interactuadas_por_usuario(
 
     return publicaciones
 
+# --------------------------------------------------
+# Contadores desnormalizados
+# --------------------------------------------------
+
+def ajustar_contador_publicacion(
+    db: Session,
+    *,
+    publicacion_id: int,
+    columna,
+    delta: int,
+) -> None:
+    """
+    UPDATE atómico de likes_count / guardados_count (nunca baja de 0).
+
+    No commitea: va en la misma transacción que el like/guardado.
+    """
+
+    if delta >= 0:
+        nuevo_valor = columna + delta
+    else:
+        nuevo_valor = case((columna + delta > 0, columna + delta), else_=0)
+
+    (
+        db.query(Publicacion)
+        .filter(Publicacion.id == publicacion_id)
+        .update({columna: nuevo_valor}, synchronize_session=False)
+    )
+
+
+def reconciliar_contadores_publicaciones(
+    db: Session,
+    *,
+    tamano_lote: int = 500,
+) -> List[int]:
+    """
+    Recalcula likes_count / guardados_count desde las tablas fuente.
+
+    Recorre publicaciones por id en lotes y solo escribe las que tienen
+    drift. Devuelve los ids corregidos.
+    """
+
+    corregidas: List[int] = []
+    ultimo_id = 0
+
+    while True:
+        lote = (
+            db.query(Publicacion.id, Publicacion.likes_count, Publicacion.guardados_count)
+            .filter(Publicacion.id > ultimo_id)
+            .order_by(Publicacion.id.asc())
+            .limit(tamano_lote)
+            .all()
+        )
+        if not lote:
+            break
+
+        ids = [publicacion_id for publicacion_id, _, _ in lote]
+        ultimo_id = ids[-1]
+
+        likes_map = dict(
+            db.query(LikePublicacion.publicacion_id, func.count(LikePublicacion.id))
+            .filter(LikePublicacion.publicacion_id.in_(ids))
+            .group_by(LikePublicacion.publicacion_id)
+            .all()
+        )
+        guardados_map = dict(
+            db.query(PublicacionGuardada.publicacion_id, func.count(PublicacionGuardada.id))
+            .filter(PublicacionGuardada.publicacion_id.in_(ids))
+            .group_by(PublicacionGuardada.publicacion_id)
+            .all()
+        )
+
+        for publicacion_id, likes_count, guardados_count in lote:
+            likes_real = int(likes_map.get(publicacion_id, 0))
+            guardados_real = int(guardados_map.get(publicacion_id, 0))
+            if (likes_count, guardados_count) == (likes_real, guardados_real):
+                continue
+
+            (
+                db.query(Publicacion)
+                .filter(Publicacion.id == publicacion_id)
+                .update(
+                    {
+                        Publicacion.likes_count: likes_real,
+                        Publicacion.guardados_count: guardados_real,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            corregidas.append(publicacion_id)
+
+        db.commit()
+
+    return corregidas
+
+
 # --------------------------------------------------
 # Eliminación lógica de publicaciones
 # --------------------------------------------------
@@ -445,8 +567,12 @@ def desactivar_publicacion(
     )
 
     publicacion.is_activa = False
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
+    db.flush()
+    escribir_scores_publicaciones(db, [publicacion.id])
 
     db.commit()
     db.refresh(publicacion)
+    registrar_publicacion_en_indice_texto(publicacion)
 
     return publicacion
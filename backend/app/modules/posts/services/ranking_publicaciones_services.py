@@ -9,88 +9,61 @@ Reglas:
 - Solo publicaciones activas
 - Sin HTTP (esto se usa desde routers)
 - No depende de usuario (liked_by_me siempre False)
+
+Read model:
+- El score sale de publicacion_scores (materializado por eventos y por
+  el job de decaimiento); el alta escribe la fila en su misma transacción
+- Una sola lectura indexada por (is_activa, score); el desempate por id
+  sigue el orden de publicación
 """
 
-from datetime import datetime, timedelta
 from typing import List
 
-from sqlalchemy import case, func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, lazyload
 
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
 from app.modules.posts.models.publicaciones_models import Publicacion
 from app.modules.spaces.models.comercios_models import Comercio
-from app.modules.social.models.likes_publicaciones_models import LikePublicacion
 
-# ✅ Import robusto del modelo de guardados (por si el nombre cambia)
-from app.modules.social.models.publicaciones_guardadas_models import PublicacionGuardada
+
+TOP_RANKING_DEFAULT = 100
+TOP_RANKING_MAXIMO = 200
 
 
-def listar_publicaciones_ranked(db: Session) -> List[Publicacion]:
+def listar_publicaciones_ranked(
+    db: Session,
+    *,
+    limit: int = TOP_RANKING_DEFAULT,
+) -> List[Publicacion]:
     """
-    Devuelve publicaciones ordenadas por score:
+    Devuelve las `limit` publicaciones con mayor score:
 
     score = likes_count + (guardados_count * 2) + bonus_recencia
     """
 
-    ahora = datetime.utcnow()
-
-    # Bonus por recencia (mismo criterio que venías usando)
-    bonus_recencia = case(
-        (Publicacion.created_at >= ahora - timedelta(days=1), 3),
-        (Publicacion.created_at >= ahora - timedelta(days=3), 2),
-        (Publicacion.created_at >= ahora - timedelta(days=7), 1),
-        else_=0,
-    )
-
-    # Contadores (distinct para evitar duplicados por joins)
-    likes_count_expr = func.count(func.distinct(LikePublicacion.id))
-    guardados_count_expr = func.count(func.distinct(PublicacionGuardada.id))
-
-    # Score final
-    score_expr = likes_count_expr + (guardados_count_expr * 2) + bonus_recencia
-
-    query = (
-        db.query(
-            Publicacion,
-            likes_count_expr.label("likes_count"),
-            guardados_count_expr.label("guardados_count"),
-            score_expr.label("score"),
-        )
+    resultados = (
+        db.query(Publicacion)
+        .join(PublicacionScore, PublicacionScore.publicacion_id == Publicacion.id)
         .join(Comercio, Publicacion.comercio_id == Comercio.id)
-        .outerjoin(
-            LikePublicacion,
-            LikePublicacion.publicacion_id == Publicacion.id,
-        )
-        .outerjoin(
-            PublicacionGuardada,
-            PublicacionGuardada.publicacion_id == Publicacion.id,
-        )
+        # Las relaciones selectin (likes, guardados, historias) no se usan acá.
+        .options(lazyload("*"))
         .filter(
-            Publicacion.is_activa.is_(True),
+            PublicacionScore.is_activa.is_(True),
             Comercio.activo.is_(True),
         )
-        .group_by(Publicacion.id)
         .order_by(
-            func.coalesce(score_expr, 0).desc(),
-            Publicacion.created_at.desc(),
+            PublicacionScore.score.desc(),
+            PublicacionScore.publicacion_id.desc(),
         )
+        .limit(max(1, min(int(limit), TOP_RANKING_MAXIMO)))
+        .all()
     )
 
-    resultados = query.all()
-
     publicaciones: List[Publicacion] = []
 
-    for publicacion, likes_count, guardados_count, _score in resultados:
-        # ✅ Seteamos los campos calculados para que el schema los devuelva
-        publicacion.likes_count = int(likes_count or 0)
-        publicacion.guardados_count = int(guardados_count or 0)
-
-        # Interacciones (si tu definición es otra, lo ajustamos después)
-        publicacion.interacciones_count = publicacion.likes_count + publicacion.guardados_count
-
+    for publicacion in resultados:
         # Ranking no depende de usuario
         publicacion.liked_by_me = False
-
         publicaciones.append(publicacion)
 
     return publicaciones
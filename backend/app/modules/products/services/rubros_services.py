@@ -12,6 +12,9 @@ from app.modules.discovery.models.taxonomy_models import (
     TaxonomyAssignment,
     TaxonomyNode,
 )
+from app.modules.discovery.services.catalogo_version_services import (
+    incrementar_version_catalogo,
+)
 from app.modules.products.models.rubros_models import Rubro
 
 
@@ -185,6 +188,7 @@ def asegurar_catalogo_rubros(db: Session) -> None:
         hubo_cambios = True
 
     if hubo_cambios:
+        incrementar_version_catalogo(db)
         db.commit()
 
 
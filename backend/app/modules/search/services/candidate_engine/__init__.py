@@ -8,6 +8,8 @@ from app.modules.search.services.candidate_engine.candidate_types import (
     CandidateEvidence,
     CandidateGenerationContext,
     CandidateSet,
+    CandidateSourceStats,
+    DiscoveryResolution,
 )
 from app.modules.search.services.candidate_engine.candidate_sources import (
     AssignmentCandidateSource,
@@ -17,9 +19,21 @@ from app.modules.search.services.candidate_engine.candidate_sources import (
     EspecialidadCandidateSource,
     PublicacionCandidateSource,
     RubroCandidateSource,
+    SemanticAnnCandidateSource,
+    resolve_discovery_context,
+)
+from app.modules.search.services.candidate_engine.candidate_cache import (
+    CachedCandidateGeneration,
+    CandidateCacheStore,
+    LocalCandidateCacheStore,
+    get_or_generate_candidates,
+    reset_candidate_cache,
+    set_candidate_cache_store,
 )
 from app.modules.search.services.candidate_engine.candidate_generator import (
+    candidate_source_stats_metadata,
     generate_candidates,
+    shutdown_candidate_executor,
 )
 from app.modules.search.services.candidate_engine.candidate_registry import (
     get_default_candidate_sources,
@@ -32,14 +46,26 @@ __all__ = [
     "CandidateEvidence",
     "CandidateGenerationContext",
     "CandidateSet",
+    "CandidateSourceStats",
+    "DiscoveryResolution",
     "AssignmentCandidateSource",
+    "CachedCandidateGeneration",
+    "CandidateCacheStore",
     "CandidateSource",
     "ComercioNombreCandidateSource",
     "DiscoveryCandidateSource",
     "EspecialidadCandidateSource",
+    "LocalCandidateCacheStore",
     "PublicacionCandidateSource",
     "RubroCandidateSource",
+    "SemanticAnnCandidateSource",
+    "candidate_source_stats_metadata",
     "generate_candidates",
     "get_default_candidate_sources",
+    "get_or_generate_candidates",
+    "reset_candidate_cache",
+    "resolve_discovery_context",
+    "set_candidate_cache_store",
+    "shutdown_candidate_executor",
     "union_candidate_evidence",
 ]
@@ -0,0 +1,266 @@
+"""
+candidate_cache.py
+------------------
+Cache of candidate generation results for repeated queries.
+
+Popular queries rerun discovery retrieval and every candidate source on
+each request and on each page. The discovery nodes and the CandidateSet
+of a query are cached so only the first request pays for them.
+
+- Key: engine version, normalized query, expanded terms, intent family
+  and the "catalogo" (taxonomy, rubros) and "busqueda" (commerces,
+  publications) version stamps. A write bumps its stamp, so older entries
+  are never read again and age out by LRU / TTL.
+- If a stamp cannot be read (table missing) nothing is cached.
+- Generations where any source timed out or failed are incomplete and
+  are returned but not stored.
+- Storage is pluggable (CandidateCacheStore). The default is a bounded
+  per-process LRU + TTL; a shared store must serialize values itself and
+  honour ttl_seconds. Store failures degrade to a miss.
+- Hits and misses are reported in operation_metrics.
+
+Cached values are shared between requests and must not be mutated.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_CANDIDATE_CACHE_HIT_COUNT,
+    METRIC_CANDIDATE_CACHE_MISS_COUNT,
+    increment_counter,
+)
+from app.modules.discovery.services.catalogo_version_services import (
+    CLAVE_BUSQUEDA,
+    CLAVE_CATALOGO,
+    obtener_version_catalogo,
+)
+from app.modules.search.services.candidate_engine.candidate_generator import STATUS_OK
+from app.modules.search.services.candidate_engine.candidate_types import CandidateSet
+
+
+# Bump when sources, registry or union change what a query produces.
+CANDIDATE_ENGINE_VERSION = 1
+CACHE_KEY_PREFIX = "candidates"
+
+MISS_ABSENT = "absent"
+MISS_NO_VERSION = "no_version"
+MISS_STORE_ERROR = "store_error"
+
+logger = get_operation_logger("candidate_engine")
+
+
+@dataclass(frozen=True)
+class CachedCandidateGeneration:
+    discovery_nodes: tuple[Any, ...]
+    candidate_set: CandidateSet
+
+
+class CandidateCacheStore(Protocol):
+    """
+    Storage contract for the candidate cache.
+    """
+
+    def get(self, key: str) -> CachedCandidateGeneration | None:
+        ...
+
+    def set(
+        self,
+        key: str,
+        value: CachedCandidateGeneration,
+        ttl_seconds: float,
+    ) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class LocalCandidateCacheStore:
+    """
+    Per-process LRU with per-entry expiry, thread safe.
+
+    max_entries <= 0 disables storage.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._entries: OrderedDict[str, tuple[float, CachedCandidateGeneration]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> CachedCandidateGeneration | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: CachedCandidateGeneration,
+        ttl_seconds: float,
+    ) -> None:
+        if self.max_entries <= 0 or ttl_seconds <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_STORE_LOCK = threading.Lock()
+_store: CandidateCacheStore | None = None
+
+
+def get_candidate_cache_store() -> CandidateCacheStore:
+    global _store
+    with _STORE_LOCK:
+        if _store is None:
+            _store = LocalCandidateCacheStore(settings.CANDIDATE_CACHE_MAX_ENTRIES)
+        return _store
+
+
+def set_candidate_cache_store(store: CandidateCacheStore) -> None:
+    """
+    Replace the store (e.g. with one backed by a shared cache).
+    """
+    global _store
+    with _STORE_LOCK:
+        _store = store
+
+
+def reset_candidate_cache() -> None:
+    """
+    Drop the store; the next use creates a local one from settings.
+    """
+    global _store
+    with _STORE_LOCK:
+        _store = None
+
+
+def candidate_cache_key(
+    *,
+    query_normalizada: str,
+    terminos_expandidos: Sequence[str],
+    familia_intencion: str | None,
+    catalog_version: int,
+    search_version: int,
+) -> str:
+    payload = json.dumps(
+        [
+            CANDIDATE_ENGINE_VERSION,
+            query_normalizada,
+            list(terminos_expandidos),
+            familia_intencion,
+            catalog_version,
+            search_version,
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{digest}"
+
+
+def _miss(reason: str) -> None:
+    increment_counter(METRIC_CANDIDATE_CACHE_MISS_COUNT, tags={"reason": reason})
+
+
+def get_or_generate_candidates(
+    db: Session,
+    *,
+    query_normalizada: str,
+    terminos_expandidos: Sequence[str],
+    familia_intencion: str | None,
+    generate: Callable[[], CachedCandidateGeneration],
+) -> tuple[CachedCandidateGeneration, bool]:
+    """
+    Cached generation for the query, or a fresh one stored for next time.
+
+    Returns (generation, cache_hit).
+    """
+    ttl_seconds = float(settings.CANDIDATE_CACHE_TTL_SECONDS)
+    if ttl_seconds <= 0 or int(settings.CANDIDATE_CACHE_MAX_ENTRIES) <= 0:
+        return generate(), False
+
+    catalog_version = obtener_version_catalogo(db, CLAVE_CATALOGO)
+    search_version = obtener_version_catalogo(db, CLAVE_BUSQUEDA)
+    if catalog_version is None or search_version is None:
+        _miss(MISS_NO_VERSION)
+        return generate(), False
+
+    key = candidate_cache_key(
+        query_normalizada=query_normalizada,
+        terminos_expandidos=terminos_expandidos,
+        familia_intencion=familia_intencion,
+        catalog_version=catalog_version,
+        search_version=search_version,
+    )
+    store = get_candidate_cache_store()
+
+    try:
+        cached = store.get(key)
+    except Exception as exc:
+        logger.warning(
+            "candidate_cache_get_error error_class=%s",
+            safe_error_class(exc),
+        )
+        _miss(MISS_STORE_ERROR)
+        return generate(), False
+
+    if cached is not None:
+        increment_counter(METRIC_CANDIDATE_CACHE_HIT_COUNT)
+        return cached, True
+
+    _miss(MISS_ABSENT)
+    generated = generate()
+    incomplete = sorted(
+        name
+        for name, stats in generated.candidate_set.source_stats.items()
+        if stats.status != STATUS_OK
+    )
+    if incomplete:
+        logger.info(
+            "candidate_cache_skip_incomplete sources=%s",
+            ",".join(incomplete),
+        )
+        return generated, False
+
+    try:
+        store.set(key, generated, ttl_seconds)
+    except Exception as exc:
+        logger.warning(
+            "candidate_cache_set_error error_class=%s",
+            safe_error_class(exc),
+        )
+    return generated, False
@@ -1,17 +1,56 @@
 """
 candidate_generator.py
 ----------------------
-Minimal runner for Candidate Engine sources.
+Runner for Candidate Engine sources.
+
+Sources run concurrently on a shared thread pool, each one with its own
+short-lived Session, so search latency is bounded by the slowest source
+instead of the sum of all of them. Every source gets a time budget
+(CANDIDATE_SOURCE_BUDGET_MS, or its own budget_ms attribute) that starts
+when the source begins running, not when it is queued; a source still
+queued after CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS is cancelled. A source
+that exceeds its budget, waits too long or raises is dropped with a
+recorded reason instead of failing the search. Per-source latency and
+evidence counts are reported in CandidateSet.source_stats.
+
+The pool is process-wide, so sources hold at most
+CANDIDATE_ENGINE_MAX_WORKERS extra connections at a time; the engine's
+max_overflow is sized for that (see app.core.database).
+
+Discovery data shared by the taxonomy sources (reliable nodes, specialty
+assignments, ancestor-expanded rubro ids) is resolved once per query on
+the caller's Session and attached to the context before dispatch.
+
+On SQLite (single connection, no real parallelism) or with
+CANDIDATE_ENGINE_MAX_WORKERS <= 1 sources run one after another on the
+caller's Session, still reporting stats and isolating errors. The
+caller's transaction is left alone: a failing source is not rolled back.
 """
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field, replace
+from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.core.operation_metrics import (
+    METRIC_CANDIDATE_SOURCE_DROPPED_COUNT,
+    METRIC_CANDIDATE_SOURCE_DURATION_MS,
+    increment_counter,
+    record_duration,
+)
 from app.modules.search.services.candidate_engine.candidate_sources import (
     CandidateSource,
+    resolve_discovery_context,
 )
 from app.modules.search.services.candidate_engine.candidate_registry import (
     get_default_candidate_sources,
@@ -20,19 +59,262 @@ from app.modules.search.services.candidate_engine.candidate_types import (
     CandidateEvidence,
     CandidateGenerationContext,
     CandidateSet,
+    CandidateSourceStats,
+    DiscoveryResolution,
 )
 from app.modules.search.services.candidate_engine.candidate_union import (
     union_candidate_evidence,
 )
 
 
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+logger = get_operation_logger("candidate_engine")
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _source_name(source: CandidateSource) -> str:
+    return str(getattr(source, "source", type(source).__name__))
+
+
+def _source_budget_ms(source: CandidateSource, budget_ms: float | None) -> float:
+    own_budget = getattr(source, "budget_ms", None)
+    if own_budget is not None:
+        return float(own_budget)
+    if budget_ms is not None:
+        return float(budget_ms)
+    return float(settings.CANDIDATE_SOURCE_BUDGET_MS)
+
+
+def _elapsed_ms(started_at: float) -> float:
+    return round((time.perf_counter() - started_at) * 1000, 3)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, int(settings.CANDIDATE_ENGINE_MAX_WORKERS)),
+                thread_name_prefix="candidate-source",
+            )
+        return _EXECUTOR
+
+
+def shutdown_candidate_executor() -> None:
+    """
+    Stop the shared pool. The next concurrent generation creates a new one.
+    """
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _runs_concurrently(
+    db: Session,
+    session_factory: Callable[[], Session] | None,
+    source_count: int,
+) -> bool:
+    if int(settings.CANDIDATE_ENGINE_MAX_WORKERS) <= 1 or source_count <= 1:
+        return False
+    if session_factory is not None:
+        return True
+    return db.get_bind().dialect.name != "sqlite"
+
+
+def _record(stats: CandidateSourceStats) -> CandidateSourceStats:
+    record_duration(
+        METRIC_CANDIDATE_SOURCE_DURATION_MS,
+        stats.latency_ms,
+        tags={"source": stats.source, "status": stats.status},
+    )
+    if stats.status != STATUS_OK:
+        increment_counter(
+            METRIC_CANDIDATE_SOURCE_DROPPED_COUNT,
+            tags={"source": stats.source, "status": stats.status},
+        )
+        logger.warning(
+            "candidate_source_dropped source=%s status=%s reason=%s latency_ms=%s",
+            stats.source,
+            stats.status,
+            stats.reason,
+            stats.latency_ms,
+        )
+    return stats
+
+
+@dataclass
+class _SourceRun:
+    """
+    Timing of one submitted source, written by the worker thread.
+    """
+
+    started: threading.Event = field(default_factory=threading.Event)
+    started_at: float = 0.0
+    finished_at: float | None = None
+
+    def latency_ms(self) -> float:
+        finished_at = self.finished_at or time.perf_counter()
+        return round((finished_at - self.started_at) * 1000, 3)
+
+
+def _run_in_own_session(
+    source: CandidateSource,
+    context: CandidateGenerationContext,
+    session_factory: Callable[[], Session],
+    run: _SourceRun,
+) -> list[CandidateEvidence]:
+    run.started_at = time.perf_counter()
+    run.started.set()
+    db = session_factory()
+    try:
+        return list(source.generate(context=context, db=db))
+    finally:
+        db.close()
+        run.finished_at = time.perf_counter()
+
+
+def _generate_sequentially(
+    sources: Sequence[CandidateSource],
+    context: CandidateGenerationContext,
+    db: Session,
+) -> tuple[list[CandidateEvidence], dict[str, CandidateSourceStats]]:
+    evidences: list[CandidateEvidence] = []
+    stats: dict[str, CandidateSourceStats] = {}
+
+    for source in sources:
+        name = _source_name(source)
+        started_at = time.perf_counter()
+        try:
+            generated = list(source.generate(context=context, db=db))
+        except Exception as exc:
+            stats[name] = _record(
+                CandidateSourceStats(
+                    source=name,
+                    status=STATUS_ERROR,
+                    latency_ms=_elapsed_ms(started_at),
+                    reason=safe_error_class(exc),
+                )
+            )
+            continue
+
+        evidences.extend(generated)
+        stats[name] = _record(
+            CandidateSourceStats(
+                source=name,
+                status=STATUS_OK,
+                latency_ms=_elapsed_ms(started_at),
+                evidence_count=len(generated),
+            )
+        )
+
+    return evidences, stats
+
+
+def _generate_concurrently(
+    sources: Sequence[CandidateSource],
+    context: CandidateGenerationContext,
+    session_factory: Callable[[], Session],
+    budget_ms: float | None,
+) -> tuple[list[CandidateEvidence], dict[str, CandidateSourceStats]]:
+    executor = _get_executor()
+    submitted_at = time.perf_counter()
+    queue_deadline = submitted_at + float(settings.CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS) / 1000
+    submitted: list[tuple[str, float, _SourceRun, Future]] = []
+    for source in sources:
+        run = _SourceRun()
+        submitted.append(
+            (
+                _source_name(source),
+                _source_budget_ms(source, budget_ms) / 1000,
+                run,
+                executor.submit(_run_in_own_session, source, context, session_factory, run),
+            )
+        )
+
+    evidences: list[CandidateEvidence] = []
+    stats: dict[str, CandidateSourceStats] = {}
+
+    def _dropped(name: str, status: str, latency_ms: float, reason: str) -> None:
+        stats[name] = _record(
+            CandidateSourceStats(
+                source=name,
+                status=status,
+                latency_ms=latency_ms,
+                reason=reason,
+            )
+        )
+
+    # Results are collected in registry order so evidence order is stable.
+    for name, budget_seconds, run, future in submitted:
+        # The budget starts when the source runs; queue time is bounded apart.
+        if not run.started.wait(max(0.0, queue_deadline - time.perf_counter())):
+            if future.cancel():
+                _dropped(name, STATUS_TIMEOUT, _elapsed_ms(submitted_at), "queue_timeout")
+                continue
+            run.started.wait()
+
+        try:
+            generated = future.result(
+                timeout=max(0.0, run.started_at + budget_seconds - time.perf_counter())
+            )
+        except FutureTimeoutError:
+            # The worker keeps running and closes its own Session when done.
+            _dropped(name, STATUS_TIMEOUT, run.latency_ms(), "budget_exceeded")
+            continue
+        except Exception as exc:
+            _dropped(name, STATUS_ERROR, run.latency_ms(), safe_error_class(exc))
+            continue
+
+        evidences.extend(generated)
+        stats[name] = _record(
+            CandidateSourceStats(
+                source=name,
+                status=STATUS_OK,
+                latency_ms=run.latency_ms(),
+                evidence_count=len(generated),
+            )
+        )
+
+    return evidences, stats
+
+
+def _resolve_discovery_once(
+    context: CandidateGenerationContext,
+    db: Session,
+) -> DiscoveryResolution | None:
+    try:
+        return resolve_discovery_context(context, db)
+    except Exception as exc:
+        # Sources fall back to resolving on their own (and fail in isolation).
+        db.rollback()
+        logger.warning(
+            "candidate_discovery_resolution_error error_class=%s",
+            safe_error_class(exc),
+        )
+        return None
+
+
 def generate_candidates(
     context: CandidateGenerationContext,
     db: Session,
     sources: Sequence[CandidateSource] | None = None,
+    *,
+    session_factory: Callable[[], Session] | None = None,
+    budget_ms: float | None = None,
 ) -> CandidateSet:
     """
     Execute candidate sources and return their unified candidate set.
+
+    session_factory defaults to SessionLocal when sources run concurrently.
     """
 
     selected_sources = (
@@ -40,9 +322,39 @@ def generate_candidates(
         if sources is not None
         else get_default_candidate_sources()
     )
-    evidences: list[CandidateEvidence] = []
 
-    for source in selected_sources:
-        evidences.extend(source.generate(context=context, db=db))
+    if context.discovery_resolution is None:
+        context = replace(
+            context,
+            discovery_resolution=_resolve_discovery_once(context, db),
+        )
+
+    if _runs_concurrently(db, session_factory, len(selected_sources)):
+        evidences, stats = _generate_concurrently(
+            selected_sources,
+            context,
+            session_factory or SessionLocal,
+            budget_ms,
+        )
+    else:
+        evidences, stats = _generate_sequentially(selected_sources, context, db)
+
+    candidate_set = union_candidate_evidence(evidences)
+    candidate_set.source_stats = stats
+    return candidate_set
 
-    return union_candidate_evidence(evidences)
+
+def candidate_source_stats_metadata(candidate_set: CandidateSet) -> dict[str, Any]:
+    """
+    Flat search-event metadata: latency/count per source and dropped sources.
+    """
+    metadata: dict[str, Any] = {}
+    for name, stats in candidate_set.source_stats.items():
+        metadata[f"candidate_source_ms_{name}"] = stats.latency_ms
+        metadata[f"candidate_source_count_{name}"] = stats.evidence_count
+    metadata["candidate_sources_dropped"] = sorted(
+        name
+        for name, stats in candidate_set.source_stats.items()
+        if stats.status != STATUS_OK
+    )
+    return metadata
@@ -6,6 +6,7 @@ Central registry for default Candidate Engine sources.
 
 from __future__ import annotations
 
+from app.core.config import settings
 from app.modules.search.services.candidate_engine.candidate_sources import (
     AssignmentCandidateSource,
     CandidateSource,
@@ -14,11 +15,12 @@ from app.modules.search.services.candidate_engine.candidate_sources import (
     EspecialidadCandidateSource,
     PublicacionCandidateSource,
     RubroCandidateSource,
+    SemanticAnnCandidateSource,
 )
 
 
 def get_default_candidate_sources() -> list[CandidateSource]:
-    return [
+    sources: list[CandidateSource] = [
         ComercioNombreCandidateSource(),
         PublicacionCandidateSource(),
         EspecialidadCandidateSource(),
@@ -26,3 +28,6 @@ def get_default_candidate_sources() -> list[CandidateSource]:
         RubroCandidateSource(),
         DiscoveryCandidateSource(),
     ]
+    if settings.EMBEDDINGS_ANN_ENABLED:
+        sources.append(SemanticAnnCandidateSource())
+    return sources
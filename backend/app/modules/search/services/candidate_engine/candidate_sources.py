@@ -10,9 +10,10 @@ import re
 import unicodedata
 from typing import Any, Protocol
 
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, lazyload
 
+from app.core.config import settings
+from app.modules.ai.services.comercios_ann_services import top_k_comercios_ann
 from app.modules.discovery.models.taxonomy_models import (
     TaxonomyAssignment,
     TaxonomyNode,
@@ -21,12 +22,19 @@ from app.modules.discovery.services.taxonomy_search_services import (
     buscar_rubro_ids_asignados_a_nodos_taxonomia,
 )
 from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    buscar_publicaciones_texto,
+)
 from app.modules.products.models.rubros_models import Rubro
 from app.modules.search.services.candidate_engine.candidate_types import (
     CandidateEvidence,
     CandidateGenerationContext,
+    DiscoveryResolution,
 )
 from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.spaces.services.comercios_texto_index_services import (
+    buscar_comercio_ids_por_texto,
+)
 
 
 class CandidateSource(Protocol):
@@ -181,24 +189,8 @@ def _is_reliable_discovery_node(
 
 def _reliable_discovery_nodes(
     context: CandidateGenerationContext,
-    db: Session,
+    taxonomy_nodes_by_id: dict[int, TaxonomyNode],
 ) -> list[Any]:
-    if not context.discovery_nodes:
-        return []
-
-    node_ids = _unique_node_ids(context.discovery_nodes)
-    taxonomy_nodes_by_id: dict[int, TaxonomyNode] = {}
-    if node_ids:
-        taxonomy_nodes_by_id = {
-            node.id: node
-            for node in (
-                db.query(TaxonomyNode)
-                .filter(TaxonomyNode.id.in_(node_ids))
-                .filter(TaxonomyNode.activo == True)
-                .all()
-            )
-        }
-
     reliable_nodes: list[Any] = []
     for node in context.discovery_nodes:
         node_id = _get_discovery_node_id(node)
@@ -219,7 +211,7 @@ def _reliable_discovery_nodes(
 
 def _node_ids_for_rubro_candidates(
     nodes: list[Any],
-    db: Session,
+    assigned_specialty_node_ids: frozenset[int],
 ) -> list[int]:
     direct_node_ids = _unique_node_ids(
         [
@@ -236,18 +228,6 @@ def _node_ids_for_rubro_candidates(
         ]
     )
 
-    assigned_specialty_node_ids: set[int] = set()
-    if specialty_node_ids:
-        assigned_specialty_node_ids = {
-            node_id
-            for (node_id,) in (
-                db.query(TaxonomyAssignment.taxonomy_node_id)
-                .filter(TaxonomyAssignment.entity_type == "comercio")
-                .filter(TaxonomyAssignment.taxonomy_node_id.in_(specialty_node_ids))
-                .all()
-            )
-        }
-
     node_ids: list[int] = []
     seen: set[int] = set()
     for node_id in [*direct_node_ids, *specialty_node_ids]:
@@ -264,9 +244,104 @@ def _node_ids_for_rubro_candidates(
     return node_ids
 
 
+def resolve_discovery_context(
+    context: CandidateGenerationContext,
+    db: Session,
+) -> DiscoveryResolution:
+    """
+    Resolve reliable discovery nodes and their derived ids once per query.
+
+    Queries: active taxonomy rows for the discovery nodes (columns only, no
+    eager relationships), assignments of the reliable specialty nodes and
+    the ancestor walk for rubro ids (starting from the parents already
+    loaded).
+    """
+
+    if not context.discovery_nodes:
+        return DiscoveryResolution()
+
+    node_ids = _unique_node_ids(context.discovery_nodes)
+    taxonomy_nodes_by_id: dict[int, TaxonomyNode] = {}
+    if node_ids:
+        taxonomy_nodes_by_id = {
+            node.id: node
+            for node in (
+                db.query(TaxonomyNode)
+                .options(lazyload("*"))
+                .filter(TaxonomyNode.id.in_(node_ids))
+                .filter(TaxonomyNode.activo == True)
+                .all()
+            )
+        }
+    taxonomy_parent_ids = {
+        node_id: node.parent_id
+        for node_id, node in taxonomy_nodes_by_id.items()
+    }
+
+    reliable_nodes = _reliable_discovery_nodes(context, taxonomy_nodes_by_id)
+    if not reliable_nodes:
+        return DiscoveryResolution(taxonomy_parent_ids=taxonomy_parent_ids)
+
+    specialty_node_ids = _unique_node_ids(
+        [
+            node
+            for node in reliable_nodes
+            if _get_discovery_node_type(node) == "especialidad"
+        ]
+    )
+    assigned_specialty_node_ids: frozenset[int] = frozenset()
+    if specialty_node_ids:
+        assigned_specialty_node_ids = frozenset(
+            node_id
+            for (node_id,) in (
+                db.query(TaxonomyAssignment.taxonomy_node_id)
+                .filter(TaxonomyAssignment.entity_type == "comercio")
+                .filter(TaxonomyAssignment.taxonomy_node_id.in_(specialty_node_ids))
+                .all()
+            )
+        )
+
+    rubro_node_ids = _node_ids_for_rubro_candidates(
+        reliable_nodes,
+        assigned_specialty_node_ids,
+    )
+    rubro_ids: frozenset[int] = frozenset()
+    if rubro_node_ids:
+        rubro_ids = frozenset(
+            buscar_rubro_ids_asignados_a_nodos_taxonomia(
+                db,
+                rubro_node_ids,
+                parent_ids_por_nodo=taxonomy_parent_ids,
+            )
+        )
+
+    return DiscoveryResolution(
+        reliable_nodes=tuple(reliable_nodes),
+        reliable_node_ids=tuple(_unique_node_ids(reliable_nodes)),
+        specialty_node_ids=tuple(specialty_node_ids),
+        taxonomy_parent_ids=taxonomy_parent_ids,
+        assigned_specialty_node_ids=assigned_specialty_node_ids,
+        rubro_node_ids=tuple(rubro_node_ids),
+        rubro_ids=rubro_ids,
+    )
+
+
+def _discovery_resolution(
+    context: CandidateGenerationContext,
+    db: Session,
+) -> DiscoveryResolution:
+    # generate_candidates resolves once; direct callers resolve on demand.
+    if context.discovery_resolution is not None:
+        return context.discovery_resolution
+
+    return resolve_discovery_context(context, db)
+
+
 class ComercioNombreCandidateSource:
     """
     Finds active commerces whose name matches the normalized query.
+
+    Substring matching is answered by the in-memory commerce text index.
     """
 
     source = "comercio_nombre"
@@ -281,14 +356,19 @@ class ComercioNombreCandidateSource:
             return []
 
         limit = max(1, int(context.limit_por_fuente))
-        like = f"%{query}%"
+        comercio_ids = buscar_comercio_ids_por_texto(
+            db,
+            q=query,
+            campos=("nombre",),
+            limit=limit,
+        )
+        if not comercio_ids:
+            return []
 
-        rows = (
+        nombres = dict(
             db.query(Comercio.id, Comercio.nombre)
+            .filter(Comercio.id.in_(comercio_ids))
             .filter(Comercio.activo == True)
-            .filter(Comercio.nombre.ilike(like))
-            .order_by(Comercio.id.desc())
-            .limit(limit)
             .all()
         )
 
@@ -296,12 +376,13 @@ class ComercioNombreCandidateSource:
             CandidateEvidence(
                 comercio_id=comercio_id,
                 source=self.source,
-                reason=nombre,
+                reason=nombres[comercio_id],
                 matched_entity_type="comercio",
                 matched_entity_id=comercio_id,
                 matched_text=query,
             )
-            for comercio_id, nombre in rows
+            for comercio_id in comercio_ids
+            if comercio_id in nombres
         ]
 
 
@@ -317,17 +398,7 @@ class EspecialidadCandidateSource:
         context: CandidateGenerationContext,
         db: Session,
     ) -> list[CandidateEvidence]:
-        reliable_nodes = _reliable_discovery_nodes(context, db)
-        if not reliable_nodes:
-            return []
-
-        node_ids = _unique_node_ids(
-            [
-                node
-                for node in reliable_nodes
-                if _get_discovery_node_type(node) == "especialidad"
-            ]
-        )
+        node_ids = list(_discovery_resolution(context, db).specialty_node_ids)
         if not node_ids:
             return []
 
@@ -375,11 +446,7 @@ class AssignmentCandidateSource:
         context: CandidateGenerationContext,
         db: Session,
     ) -> list[CandidateEvidence]:
-        reliable_nodes = _reliable_discovery_nodes(context, db)
-        if not reliable_nodes:
-            return []
-
-        node_ids = _unique_node_ids(reliable_nodes)
+        node_ids = list(_discovery_resolution(context, db).reliable_node_ids)
         if not node_ids:
             return []
 
@@ -426,15 +493,7 @@ class RubroCandidateSource:
         context: CandidateGenerationContext,
         db: Session,
     ) -> list[CandidateEvidence]:
-        reliable_nodes = _reliable_discovery_nodes(context, db)
-        if not reliable_nodes:
-            return []
-
-        node_ids = _node_ids_for_rubro_candidates(reliable_nodes, db)
-        if not node_ids:
-            return []
-
-        rubro_ids = buscar_rubro_ids_asignados_a_nodos_taxonomia(db, node_ids)
+        rubro_ids = _discovery_resolution(context, db).rubro_ids
         if not rubro_ids:
             return []
 
@@ -480,11 +539,7 @@ class DiscoveryCandidateSource:
         context: CandidateGenerationContext,
         db: Session,
     ) -> list[CandidateEvidence]:
-        reliable_nodes = _reliable_discovery_nodes(context, db)
-        if not reliable_nodes:
-            return []
-
-        node_ids = _unique_node_ids(reliable_nodes)
+        node_ids = list(_discovery_resolution(context, db).reliable_node_ids)
         if not node_ids:
             return []
 
@@ -522,6 +577,9 @@ class DiscoveryCandidateSource:
 class PublicacionCandidateSource:
     """
     Finds active posts whose title or description matches the normalized query.
+
+    Matching goes through the publication full-text search; its normalized
+    relevance is reported as the evidence confidence.
     """
 
     source = "publicacion"
@@ -536,38 +594,86 @@ class PublicacionCandidateSource:
             return []
 
         limit = max(1, int(context.limit_por_fuente))
-        like = f"%{query}%"
+        coincidencias = buscar_publicaciones_texto(
+            db,
+            q=query,
+            limit=settings.PUBLICACIONES_BUSQUEDA_MAX_RESULTADOS,
+        )
+        if not coincidencias:
+            return []
 
-        rows = (
-            db.query(
-                Publicacion.id,
-                Publicacion.comercio_id,
-                Publicacion.titulo,
-            )
+        # Full-text hits are ranked already; only commerce visibility is left.
+        titulos_visibles = dict(
+            db.query(Publicacion.id, Publicacion.titulo)
             .join(Comercio, Publicacion.comercio_id == Comercio.id)
-            .filter(
-                Publicacion.is_activa.is_(True),
-                Comercio.activo.is_(True),
-            )
-            .filter(
-                or_(
-                    Publicacion.titulo.ilike(like),
-                    Publicacion.descripcion.ilike(like),
-                )
-            )
-            .order_by(Publicacion.id.desc())
-            .limit(limit)
+            .filter(Publicacion.id.in_([c.publicacion_id for c in coincidencias]))
+            .filter(Comercio.activo.is_(True))
             .all()
         )
 
         return [
             CandidateEvidence(
-                comercio_id=comercio_id,
+                comercio_id=coincidencia.comercio_id,
                 source=self.source,
-                reason=titulo,
+                reason=titulos_visibles[coincidencia.publicacion_id],
                 matched_entity_type="publicacion",
-                matched_entity_id=publicacion_id,
+                matched_entity_id=coincidencia.publicacion_id,
                 matched_text=query,
+                confidence=coincidencia.relevancia,
+            )
+            for coincidencia in coincidencias
+            if coincidencia.publicacion_id in titulos_visibles
+        ][:limit]
+
+
+class SemanticAnnCandidateSource:
+    """
+    Finds the active commerces closest to the query embedding.
+
+    Reads the process-wide IVF index, so recall covers the whole catalog
+    instead of only what the text sources matched. The cosine score is
+    reported as the evidence confidence.
+    """
+
+    source = "semantic_ann"
+
+    def generate(
+        self,
+        context: CandidateGenerationContext,
+        db: Session,
+    ) -> list[CandidateEvidence]:
+        if context.query_vector is None:
+            return []
+
+        vecinos = top_k_comercios_ann(
+            db,
+            query_vector=context.query_vector,
+            k=max(1, int(context.limit_por_fuente)),
+        )
+        if not vecinos:
+            return []
+
+        # Deactivations from other workers reach the index on its next sync.
+        activos = {
+            comercio_id
+            for (comercio_id,) in (
+                db.query(Comercio.id)
+                .filter(Comercio.id.in_([comercio_id for comercio_id, _ in vecinos]))
+                .filter(Comercio.activo.is_(True))
+                .all()
+            )
+        }
+
+        return [
+            CandidateEvidence(
+                comercio_id=comercio_id,
+                source=self.source,
+                reason="embedding_similarity",
+                matched_entity_type="comercio",
+                matched_entity_id=comercio_id,
+                matched_text=context.query_normalizada,
+                confidence=score,
             )
-            for publicacion_id, comercio_id, titulo in rows
+            for comercio_id, score in vecinos
+            if comercio_id in activos
         ]
@@ -29,6 +29,22 @@ class CandidateEvidence:
     metadata: dict[str, Any] | None = None
 
 
+@dataclass(frozen=True)
+class CandidateSourceStats:
+    """
+    Execution report of one candidate source.
+
+    status is "ok", "timeout" (budget exceeded, evidence dropped) or
+    "error" (source raised, evidence dropped).
+    """
+
+    source: str
+    status: str
+    latency_ms: float
+    evidence_count: int = 0
+    reason: str | None = None
+
+
 @dataclass
 class CandidateSet:
     """
@@ -40,6 +56,25 @@ class CandidateSet:
     )
     source_counts: dict[str, int] = field(default_factory=dict)
     total_candidates: int = 0
+    source_stats: dict[str, CandidateSourceStats] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class DiscoveryResolution:
+    """
+    Discovery data resolved once per query and shared by every source.
+
+    Plain values only (no ORM instances), so sources running on other
+    threads and Sessions can read it safely.
+    """
+
+    reliable_nodes: tuple[Any, ...] = ()
+    reliable_node_ids: tuple[int, ...] = ()
+    specialty_node_ids: tuple[int, ...] = ()
+    taxonomy_parent_ids: dict[int, int | None] = field(default_factory=dict)
+    assigned_specialty_node_ids: frozenset[int] = frozenset()
+    rubro_node_ids: tuple[int, ...] = ()
+    rubro_ids: frozenset[int] = frozenset()
 
 
 @dataclass(frozen=True)
@@ -54,3 +89,6 @@ class CandidateGenerationContext:
     familia_intencion: str | None = None
     discovery_nodes: list[Any] = field(default_factory=list)
     limit_por_fuente: int = 50
+    discovery_resolution: DiscoveryResolution | None = None
+    # Query embedding for vector recall sources (None skips them).
+    query_vector: tuple[float, ...] | None = None
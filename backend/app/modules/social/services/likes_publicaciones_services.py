@@ -9,19 +9,28 @@ Reglas:
 
 Optimización ETAPA 55:
 - Evita recalcular embedding innecesariamente
-- Usa ventana temporal (5 min)
+- Aplica un delta incremental al embedding del usuario (costo constante)
+- likes_count y el delta del embedding van en la misma transacción que el
+  like, con la fila de embedding del usuario bloqueada desde el inicio
 """
 
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from app.modules.posts.models.publicaciones_models import Publicacion
 from app.modules.social.models.likes_publicaciones_models import LikePublicacion
 from app.modules.posts.services.publicaciones_services import (
+    ajustar_contador_publicacion,
     obtener_publicacion_visible_o_error,
 )
 from app.modules.ai.services.usuarios_embeddings_services import (
-    regenerar_embedding_usuario_si_corresponde
+    aplicar_interaccion_embedding_usuario,
+    bloquear_embedding_usuario,
+)
+from app.modules.posts.services.feed_cache_services import invalidar_feed_usuario
+from app.modules.posts.services.publicacion_scores_services import (
+    notificar_cambio_publicacion,
 )
 
 
@@ -40,6 +49,8 @@ def toggle_like_publicacion(
     """
 
     obtener_publicacion_visible_o_error(db, publicacion_id=publicacion_id)
+    # Serializa los toggles del usuario hasta el commit.
+    bloquear_embedding_usuario(db, usuario_id)
 
     like_existente: Optional[LikePublicacion] = (
         db.query(LikePublicacion)
@@ -51,14 +62,28 @@ def toggle_like_publicacion(
     )
 
     if like_existente:
-        db.delete(like_existente)
-        db.commit()
-
-        # ✅ ETAPA 55: recalcular SOLO si corresponde
-        regenerar_embedding_usuario_si_corresponde(
-            db=db,
-            usuario_id=usuario_id,
+        eliminados = (
+            db.query(LikePublicacion)
+            .filter(LikePublicacion.id == like_existente.id)
+            .delete(synchronize_session=False)
         )
+        # Solo descuenta si este request borró la fila (toggles concurrentes).
+        if eliminados:
+            ajustar_contador_publicacion(
+                db,
+                publicacion_id=publicacion_id,
+                columna=Publicacion.likes_count,
+                delta=-1,
+            )
+            aplicar_interaccion_embedding_usuario(
+                db=db,
+                usuario_id=usuario_id,
+                publicacion_id=publicacion_id,
+                agregada=False,
+            )
+        db.commit()
+        notificar_cambio_publicacion(db, publicacion_id)
+        invalidar_feed_usuario(usuario_id)
 
         return False
 
@@ -68,12 +93,21 @@ def toggle_like_publicacion(
     )
 
     db.add(nuevo_like)
-    db.commit()
-
-    # ✅ ETAPA 55: recalcular SOLO si corresponde
-    regenerar_embedding_usuario_si_corresponde(
+    ajustar_contador_publicacion(
+        db,
+        publicacion_id=publicacion_id,
+        columna=Publicacion.likes_count,
+        delta=1,
+    )
+    db.flush()
+    aplicar_interaccion_embedding_usuario(
         db=db,
         usuario_id=usuario_id,
+        publicacion_id=publicacion_id,
+        agregada=True,
     )
+    db.commit()
+    notificar_cambio_publicacion(db, publicacion_id)
+    invalidar_feed_usuario(usuario_id)
 
     return True
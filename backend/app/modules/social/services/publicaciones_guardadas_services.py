@@ -8,14 +8,19 @@ Contiene toda la logica de negocio:
 - Listar publicaciones guardadas por usuario.
 """
 
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.modules.ai.services.usuarios_embeddings_services import (
-    regenerar_embedding_usuario_si_corresponde,
+    aplicar_interaccion_embedding_usuario,
+    bloquear_embedding_usuario,
 )
 from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.feed_cache_services import invalidar_feed_usuario
+from app.modules.posts.services.publicacion_scores_services import (
+    notificar_cambio_publicacion,
+)
 from app.modules.posts.services.publicaciones_services import (
+    ajustar_contador_publicacion,
     obtener_publicacion_visible_o_error,
 )
 from app.modules.social.models.likes_publicaciones_models import LikePublicacion
@@ -35,6 +40,8 @@ def guardar_publicacion(
     """
 
     obtener_publicacion_visible_o_error(db, publicacion_id=publicacion_id)
+    # Serializa las interacciones del usuario hasta el commit.
+    bloquear_embedding_usuario(db, usuario_id)
 
     guardado_existente = (
         db.query(PublicacionGuardada)
@@ -46,6 +53,7 @@ def guardar_publicacion(
     )
 
     if guardado_existente:
+        db.commit()
         return guardado_existente
 
     guardado = PublicacionGuardada(
@@ -54,13 +62,23 @@ def guardar_publicacion(
     )
 
     db.add(guardado)
-    db.commit()
-    db.refresh(guardado)
-
-    regenerar_embedding_usuario_si_corresponde(
+    ajustar_contador_publicacion(
+        db,
+        publicacion_id=publicacion_id,
+        columna=Publicacion.guardados_count,
+        delta=1,
+    )
+    db.flush()
+    aplicar_interaccion_embedding_usuario(
         db=db,
         usuario_id=usuario_id,
+        publicacion_id=publicacion_id,
+        agregada=True,
     )
+    db.commit()
+    db.refresh(guardado)
+    notificar_cambio_publicacion(db, publicacion_id)
+    invalidar_feed_usuario(usuario_id)
 
     return guardado
 
@@ -76,6 +94,9 @@ def quitar_publicacion_guardada(
     La operacion es idempotente: si no existe la relacion, no falla.
     """
 
+    # Serializa las interacciones del usuario hasta el commit.
+    bloquear_embedding_usuario(db, usuario_id)
+
     guardado = (
         db.query(PublicacionGuardada)
         .filter(
@@ -86,15 +107,31 @@ def quitar_publicacion_guardada(
     )
 
     if not guardado:
+        db.commit()
         return
 
-    db.delete(guardado)
-    db.commit()
-
-    regenerar_embedding_usuario_si_corresponde(
-        db=db,
-        usuario_id=usuario_id,
+    eliminados = (
+        db.query(PublicacionGuardada)
+        .filter(PublicacionGuardada.id == guardado.id)
+        .delete(synchronize_session=False)
     )
+    # Solo descuenta si este request borró la fila (requests concurrentes).
+    if eliminados:
+        ajustar_contador_publicacion(
+            db,
+            publicacion_id=publicacion_id,
+            columna=Publicacion.guardados_count,
+            delta=-1,
+        )
+        aplicar_interaccion_embedding_usuario(
+            db=db,
+            usuario_id=usuario_id,
+            publicacion_id=publicacion_id,
+            agregada=False,
+        )
+    db.commit()
+    notificar_cambio_publicacion(db, publicacion_id)
+    invalidar_feed_usuario(usuario_id)
 
 
 def listar_publicaciones_guardadas(
@@ -127,26 +164,6 @@ def listar_publicaciones_guardadas(
 
     publicaciones_ids = [publicacion.id for _, publicacion, _ in filas]
 
-    likes_count_rows = (
-        db.query(
-            LikePublicacion.publicacion_id,
-            func.count(LikePublicacion.id).label("likes_count"),
-        )
-        .filter(LikePublicacion.publicacion_id.in_(publicaciones_ids))
-        .group_by(LikePublicacion.publicacion_id)
-        .all()
-    )
-
-    guardados_count_rows = (
-        db.query(
-            PublicacionGuardada.publicacion_id,
-            func.count(PublicacionGuardada.id).label("guardados_count"),
-        )
-        .filter(PublicacionGuardada.publicacion_id.in_(publicaciones_ids))
-        .group_by(PublicacionGuardada.publicacion_id)
-        .all()
-    )
-
     liked_by_me_rows = (
         db.query(LikePublicacion.publicacion_id)
         .filter(
@@ -155,23 +172,11 @@ def listar_publicaciones_guardadas(
         )
         .all()
     )
-
-    likes_count_map = {
-        publicacion_id: int(likes_count or 0)
-        for publicacion_id, likes_count in likes_count_rows
-    }
-    guardados_count_map = {
-        publicacion_id: int(guardados_count or 0)
-        for publicacion_id, guardados_count in guardados_count_rows
-    }
     liked_by_me_set = {publicacion_id for (publicacion_id,) in liked_by_me_rows}
 
     resultado = []
 
     for guardado, publicacion, comercio_nombre in filas:
-        likes_count = likes_count_map.get(publicacion.id, 0)
-        guardados_count = guardados_count_map.get(publicacion.id, 0)
-
         resultado.append(
             {
                 "publicacion_id": guardado.publicacion_id,
@@ -188,9 +193,9 @@ def listar_publicaciones_guardadas(
                     "is_activa": publicacion.is_activa,
                     "created_at": publicacion.created_at,
                     "updated_at": publicacion.updated_at,
-                    "likes_count": likes_count,
-                    "guardados_count": guardados_count,
-                    "interacciones_count": likes_count + guardados_count,
+                    "likes_count": publicacion.likes_count,
+                    "guardados_count": publicacion.guardados_count,
+                    "interacciones_count": publicacion.interacciones_count,
                     "liked_by_me": publicacion.id in liked_by_me_set,
                     "guardada_by_me": True,
                 },
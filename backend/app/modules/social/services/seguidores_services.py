@@ -15,6 +15,7 @@ Reglas:
 """
 
 from sqlalchemy.orm import Session
+from app.modules.posts.services.feed_cache_services import invalidar_feed_usuario
 from app.modules.social.models.seguidores_models import Seguidores
 from app.modules.spaces.models.comercios_models import Comercio
 from app.modules.spaces.services.comercios_services import (
@@ -56,6 +57,7 @@ def seguir_espacio(db: Session, usuario_id: int, comercio_id: int):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    invalidar_feed_usuario(usuario_id)
 
     return nuevo
 
@@ -87,6 +89,7 @@ def dejar_de_seguir_espacio(db: Session, usuario_id: int, comercio_id: int):
 
     db.delete(existente)
     db.commit()
+    invalidar_feed_usuario(usuario_id)
 
     try:
         return contar_seguidores(db, comercio_id)
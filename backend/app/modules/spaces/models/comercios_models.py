@@ -6,6 +6,12 @@ Modelo ORM para la entidad Comercio.
 Representa un negocio o servicio publicado en MiPlaza.
 No es un producto, no maneja stock ni ventas.
 Es la unidad principal de descubrimiento.
+
+Columnas precalculadas para Explorar (modo clásico en SQL):
+- ciudad_key / provincia_code: identidad territorial normalizada; se
+  recalculan al asignar ciudad / provincia
+- tiene_historias / tiene_publicaciones: se marcan al crear la primera
+  historia / publicación (nunca se borran filas, solo se desactivan)
 """
 
 from sqlalchemy import (
@@ -16,10 +22,12 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Float,
+    Index,
+    false,
     true,
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from app.core.database import Base
 
@@ -33,6 +41,16 @@ class Comercio(Base):
     """
 
     __tablename__ = "comercios"
+    __table_args__ = (
+        Index(
+            "ix_comercios_explorar_orden",
+            "activo",
+            "tiene_historias",
+            "tiene_publicaciones",
+            "id",
+        ),
+        Index("ix_comercios_territorio", "provincia_code", "ciudad_key"),
+    )
 
     # -----------------------------
     # Identificación
@@ -70,6 +88,11 @@ class Comercio(Base):
     ciudad = Column(String(100), nullable=False, index=True)
     direccion = Column(String(255))
 
+    # Precalculadas desde ciudad / provincia (ver _normalizar_territorio).
+    # provincia_code queda NULL si la provincia no es normalizable.
+    ciudad_key = Column(String(100))
+    provincia_code = Column(String(8))
+
     # -----------------------------
     # Contacto
     # -----------------------------
@@ -90,6 +113,20 @@ class Comercio(Base):
     # -----------------------------
     activo = Column(Boolean, default=True)
 
+    # Flags de actividad de Explorar (reemplazan los EXISTS por fila).
+    tiene_historias = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=false(),
+    )
+    tiene_publicaciones = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=false(),
+    )
+
     # -----------------------------
     # Timestamps
     # -----------------------------
@@ -153,6 +190,23 @@ class Comercio(Base):
         lazy="selectin",
     )
 
+    @validates("ciudad", "provincia")
+    def _normalizar_territorio(self, clave, valor):
+        # Import diferido: territorial_search_services importa este modelo.
+        from app.modules.search.services.territorial_search_services import (
+            normalize_city_key,
+            normalize_province_code,
+        )
+
+        if clave == "ciudad":
+            self.ciudad_key = normalize_city_key(valor) or None
+        else:
+            try:
+                self.provincia_code = normalize_province_code(valor)
+            except ValueError:
+                self.provincia_code = None
+        return valor
+
     @property
     def rubro_nombre(self):
         if not self.rubro:
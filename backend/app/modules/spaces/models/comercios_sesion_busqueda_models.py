@@ -0,0 +1,26 @@
+# app/modules/spaces/models/comercios_sesion_busqueda_models.py
+"""
+Modelo ORM: Sesiones de búsqueda de Explorar compartidas entre workers
+
+- Una fila por token de cursor con la sesión serializada (JSON) y su
+  vencimiento; la usa el store "db" de comercios_sesion_busqueda_services
+- La tabla se crea con create_tables.py (aditivo)
+
+Reglas:
+- Models = solo SQLAlchemy (sin lógica de negocio)
+- Las fechas son UTC naive, como el resto de los jobs
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, String, Text
+
+from app.core.database import Base
+
+
+class ComercioSesionBusqueda(Base):
+    __tablename__ = "comercios_sesiones_busqueda"
+
+    token = Column(String(32), primary_key=True)
+    payload = Column(Text, nullable=False)
+    vence_en = Column(DateTime, nullable=False, index=True)
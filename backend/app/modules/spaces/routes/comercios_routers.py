@@ -14,7 +14,7 @@ ETAPA 50 (IA v1 - MVP):
 - El router SOLO expone el flag y delega todo al service
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import Literal
 from sqlalchemy.orm import Session
 
@@ -40,15 +40,26 @@ from app.modules.spaces.services.comercios_services import (
     crear_comercio,
     listar_comercios,
     listar_comercios_activos,
+    listar_comercios_activos_por_cursor,
     obtener_comercio_por_id,
     actualizar_comercio,
     desactivar_comercio,
     adjuntar_horario_atencion_comercios,
     RubroInvalidoError,
 )
+from app.modules.spaces.services.comercios_sesion_busqueda_services import (
+    CursorComerciosInvalidoError,
+)
+from app.modules.spaces.services.comercios_texto_index_services import (
+    registrar_comercio_en_indice_texto,
+)
 from app.modules.discovery.services.taxonomy_assignment_services import (
     adjuntar_especialidad_ids_comercios,
 )
+from app.modules.discovery.services.catalogo_version_services import (
+    CLAVE_BUSQUEDA,
+    incrementar_version_catalogo,
+)
 
 
 router = APIRouter(
@@ -119,6 +130,7 @@ def listar_comercios_endpoint(
     response_model_exclude_none=True,
 )
 def listar_comercios_activos_endpoint(
+    response: Response,
     q: str | None = Query(
         default=None,
         description="Búsqueda por nombre (contiene). En modo smart o semantic, se usa como query base para ranking."
@@ -176,6 +188,15 @@ def listar_comercios_activos_endpoint(
 
     limit: int = Query(default=20, ge=1, le=100, description="Tamaño de página (1..100)"),
     offset: int = Query(default=0, ge=0, description="Offset para paginado"),
+    paginado_cursor: bool = Query(
+        default=False,
+        description="Si true, abre una sesión de búsqueda y devuelve el cursor de la página siguiente en el header X-Next-Cursor.",
+    ),
+    cursor: str | None = Query(
+        default=None,
+        max_length=512,
+        description="Cursor opaco (X-Next-Cursor) de la página siguiente. Ignora offset y los filtros.",
+    ),
     db: Session = Depends(get_db),
 ):
     """
@@ -191,8 +212,40 @@ def listar_comercios_activos_endpoint(
 
     ETAPA 51:
     - smart_semantic=true: ranking IA v2 (embeddings)
+
+    Paginado por cursor (paginado_cursor=true o cursor):
+    - La primera página rankea una vez y guarda el ranking en una sesión
+    - Las siguientes leen ese ranking (sin re-rankear, orden estable)
+    - El cursor siguiente viaja en X-Next-Cursor (sin header = no hay más)
     """
 
+    if paginado_cursor or cursor is not None:
+        try:
+            pagina = listar_comercios_activos_por_cursor(
+                db,
+                cursor=cursor,
+                q=q,
+                smart=smart,
+                smart_semantic=smart_semantic,
+                lat=lat,
+                lng=lng,
+                radio_km=radio_km,
+                city_key=city_key,
+                province_code=province_code,
+                country_code=country_code,
+                scope=scope,
+                expansion_km=expansion_km,
+                limit=limit,
+            )
+        except CursorComerciosInvalidoError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+        if pagina.next_cursor:
+            response.headers["X-Next-Cursor"] = pagina.next_cursor
+        return pagina.items
+
     try:
         return listar_comercios_activos(
             db,
@@ -359,7 +412,9 @@ def reactivar_comercio_endpoint(
 
     comercio.activo = True
     db.add(comercio)
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
     db.commit()
     db.refresh(comercio)
+    registrar_comercio_en_indice_texto(comercio)
 
     return comercio
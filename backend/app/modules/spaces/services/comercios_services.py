@@ -21,14 +21,17 @@ ETAPA 53.1:
 
 from __future__ import annotations
 
-import json
 import math
+from dataclasses import dataclass, field
 
-from sqlalchemy import case, or_
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import OperationalError, ProgrammingError
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, lazyload, selectinload
 
-from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.discovery.services.catalogo_version_services import (
+    CLAVE_BUSQUEDA,
+    incrementar_version_catalogo,
+)
 from app.modules.discovery.services.taxonomy_assignment_services import (
     obtener_especialidad_ids_comercio,
     sincronizar_assignments_comercio_desde_rubros,
@@ -37,9 +40,25 @@ from app.modules.discovery.services.taxonomy_assignment_services import (
 from app.modules.spaces.models.comercios_models import Comercio
 from app.modules.stories.models.historias_models import Historia
 from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    buscar_comercio_ids_por_publicaciones,
+)
 from app.modules.users.models.usuarios_models import Usuario
 from app.modules.spaces.schemas.comercios_schemas import ComercioCreate, ComercioUpdate
-from app.modules.ai.services.comercios_embeddings_services import upsert_embedding_comercio
+from app.modules.spaces.services.comercios_sesion_busqueda_services import (
+    CursorComercios,
+    SesionBusqueda,
+    codificar_cursor_comercios,
+    crear_sesion_busqueda,
+    decodificar_cursor_comercios,
+    obtener_sesion_busqueda,
+)
+from app.modules.spaces.services.comercios_texto_index_services import (
+    buscar_comercio_ids_por_texto,
+    registrar_comercio_en_indice_texto,
+)
+from app.modules.ai.services.comercios_ann_services import quitar_comercio_de_ann
+from app.modules.ai.services.embeddings_jobs_services import encolar_embedding_comercio
 from app.modules.products.services.rubros_services import obtener_rubro_por_id
 from app.modules.knowledge.services.knowledge_legacy_intent_services import (
     _expandir_intencion_busqueda as _knowledge_expandir_intencion_busqueda,
@@ -55,6 +74,7 @@ from app.modules.search.services.territorial_search_services import (
     TerritorialContext,
     filter_territorial_candidates,
 )
+from app.core.config import settings
 from app.core.operation_metrics import (
     METRIC_SEARCH_NO_RESULTS_COUNT,
     increment_counter,
@@ -68,6 +88,12 @@ class RubroInvalidoError(ValueError):
     pass
 
 
+@dataclass
+class PaginaComercios:
+    items: list[Comercio] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
 class ComercioNoVisibleError(ValueError):
     pass
 
@@ -505,35 +531,10 @@ def _calcular_score_comercio(
 
 
 # ============================================================
-# Helpers internos (ETAPA 51 - similitud embeddings)
+# Helpers internos (distancia)
 # ============================================================
 
-def _cosine_similarity(a: list[float], b: list[float]) -> float:
-    """
-    Similaridad coseno entre dos vectores.
-
-    - Devuelve valor en [-1..1]
-    - Si algún vector es nulo/degenerado, devuelve -1 para mandarlo al final
-    """
-    if not a or not b:
-        return -1.0
-
-    if len(a) != len(b):
-        return -1.0
-
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-
-    for i in range(len(a)):
-        dot += a[i] * b[i]
-        na += a[i] * a[i]
-        nb += b[i] * b[i]
-
-    if na <= 0.0 or nb <= 0.0:
-        return -1.0
-
-    return dot / (math.sqrt(na) * math.sqrt(nb))
+RADIO_TIERRA_KM = 6371.0
 
 def _calcular_distancia_km(
     lat_origen: float,
@@ -544,7 +545,7 @@ def _calcular_distancia_km(
     if lat_destino is None or lng_destino is None:
         return None
 
-    radio_tierra_km = 6371.0
+    radio_tierra_km = RADIO_TIERRA_KM
 
     lat1 = math.radians(lat_origen)
     lng1 = math.radians(lng_origen)
@@ -601,15 +602,10 @@ def _aplicar_distancia_y_radio(
             lng_destino=getattr(comercio, "longitud", None),
         )
 
+        publica = getattr(comercio, "mostrar_direccion_publicamente", True)
         comercio._distancia_interna_km = distancia
-        if getattr(comercio, "mostrar_direccion_publicamente", True):
-            comercio.distancia_km = distancia
-            comercio._distancia_orden_km = distancia
-        else:
-            comercio.distancia_km = None
-            comercio._distancia_orden_km = (
-                math.floor(distancia) if distancia is not None else None
-            )
+        comercio.distancia_km = distancia if publica else None
+        comercio._distancia_orden_km = _distancia_orden_km(distancia, publica)
 
         if distancia is None:
             resultado.append(comercio)
@@ -623,6 +619,39 @@ def _aplicar_distancia_y_radio(
     return resultado
 
 
+def _distancia_orden_km(distancia: float | None, publica: bool) -> float | None:
+    # Ubicación privada: se ordena por banda de 1 km, sin exponer la distancia.
+    if publica or distancia is None:
+        return distancia
+    return math.floor(distancia)
+
+
+def _caja_radio(
+    lat: float,
+    lng: float,
+    radio_km: float,
+) -> tuple[float, float, float | None, float | None]:
+    """
+    Caja (lat_min, lat_max, lng_min, lng_max) que contiene el círculo de
+    radio_km alrededor de (lat, lng), para prefiltrar en SQL antes del
+    cálculo exacto. Longitud None si la caja toca un polo o el antimeridiano.
+    """
+    # Margen por el redondeo a 2 decimales de _calcular_distancia_km.
+    angulo = (radio_km + 0.01) / RADIO_TIERRA_KM
+    lat_rad = math.radians(lat)
+    lat_min = math.degrees(lat_rad - angulo)
+    lat_max = math.degrees(lat_rad + angulo)
+    if lat_min <= -90 or lat_max >= 90:
+        return lat_min, lat_max, None, None
+
+    delta_lng = math.degrees(
+        math.asin(min(1.0, math.sin(angulo) / math.cos(lat_rad)))
+    )
+    if lng - delta_lng < -180 or lng + delta_lng > 180:
+        return lat_min, lat_max, None, None
+    return lat_min, lat_max, lng - delta_lng, lng + delta_lng
+
+
 def _distancia_sort_value(comercio: Comercio) -> float:
     distancia = getattr(comercio, "_distancia_orden_km", None)
     if distancia is None:
@@ -729,9 +758,11 @@ def crear_comercio(
         rubro_id_principal=comercio.rubro_id,
         especialidad_ids=data.especialidad_ids,
     )
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
     db.commit()
     comercio.especialidad_ids = obtener_especialidad_ids_comercio(db, comercio.id)
-    upsert_embedding_comercio(db=db, comercio=comercio)
+    encolar_embedding_comercio(db, comercio)
+    registrar_comercio_en_indice_texto(comercio)
 
     return comercio
 
@@ -790,6 +821,18 @@ def listar_comercios(
 # + ETAPA 53.1 (smart_semantic sin filtro previo por nombre)
 # ============================================================
 
+# Ventana de candidatos de los modos smart: más que "limit" para poder
+# reordenar por score, con cap para evitar explosión.
+VENTANA_RANKING_MINIMA = 50
+VENTANA_RANKING_MAXIMA = 500
+
+
+def _tamano_ventana_ranking(*, offset: int, limit: int, ranking_completo: bool) -> int:
+    if ranking_completo:
+        return VENTANA_RANKING_MAXIMA
+    return min(max((offset + limit) * 5, VENTANA_RANKING_MINIMA), VENTANA_RANKING_MAXIMA)
+
+
 def listar_comercios_activos(
     db: Session,
     q: str | None = None,
@@ -838,6 +881,49 @@ def listar_comercios_activos(
     - "Con publicaciones" = existe al menos 1 publicación del comercio.
     """
 
+    pagina, _ = _rankear_comercios_activos(
+        db,
+        q=q,
+        smart=smart,
+        smart_semantic=smart_semantic,
+        lat=lat,
+        lng=lng,
+        radio_km=radio_km,
+        city_key=city_key,
+        province_code=province_code,
+        country_code=country_code,
+        scope=scope,
+        expansion_km=expansion_km,
+        limit=limit,
+        offset=offset,
+    )
+    return pagina
+
+
+def _rankear_comercios_activos(
+    db: Session,
+    q: str | None = None,
+    smart: bool = False,
+    smart_semantic: bool = False,
+    lat: float | None = None,
+    lng: float | None = None,
+    radio_km: float | None = None,
+    city_key: str | None = None,
+    province_code: str | None = None,
+    country_code: str | None = None,
+    scope: str | None = None,
+    expansion_km: int | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    ranking_completo: bool = False,
+) -> tuple[list[Comercio], list[int]]:
+    """
+    Pipeline de Explorar: (página hidratada, ids del ranking completo).
+
+    ranking_completo=True rankea la ventana máxima de candidatos aunque se
+    pida la primera página (la sesión de búsqueda guarda todo el ranking).
+    """
+
     territorial_context = None
     if scope in {"local", "expanded"}:
         if not city_key or not province_code or not country_code:
@@ -894,6 +980,9 @@ def listar_comercios_activos(
         "expansion_km": expansion_km,
     }
 
+    # Stats por fuente del candidate engine (solo smart_semantic).
+    metadata_candidate_engine: dict = {}
+
     def _registrar_search_event(
         resultados: list[Comercio],
         *,
@@ -913,7 +1002,11 @@ def listar_comercios_activos(
             taxonomy_node_ids=taxonomy_node_ids,
             rubro_ids=rubro_ids,
             comercio_result_ids=[comercio.id for comercio in resultados],
-            metadata={**territorial_metadata, **(metadata or {})},
+            metadata={
+                **territorial_metadata,
+                **metadata_candidate_engine,
+                **(metadata or {}),
+            },
         )
         registrar_search_event_best_effort(db, payload)
         if not resultados:
@@ -929,6 +1022,9 @@ def listar_comercios_activos(
     # En ese caso, volvemos al modo clásico para mantener UX estable.
     if smart_semantic and q_normalizada:
         from app.modules.ai.core.embedding_factory import get_embedding_provider
+        from app.modules.ai.services.comercios_vector_index_services import (
+            puntuar_similitud_comercios,
+        )
         from app.modules.ai.services.rubros_embeddings_services import (
             detectar_rubros_por_query,
         )
@@ -940,8 +1036,11 @@ def listar_comercios_activos(
         )
         from app.modules.discovery.models.taxonomy_models import TaxonomyAssignment
         from app.modules.search.services.candidate_engine import (
+            CachedCandidateGeneration,
             CandidateGenerationContext,
+            candidate_source_stats_metadata,
             generate_candidates,
+            get_or_generate_candidates,
         )
 
         provider = get_embedding_provider()
@@ -954,23 +1053,46 @@ def listar_comercios_activos(
         terminos_filtro_intencion = _terminos_familia_intencion(query_texto)
         query_texto_embedding = " ".join(terminos_intencion)
         query_vector = provider.embed_text(query_texto_embedding)
-        nodos_discovery = recuperar_nodos_discovery(
+
+        # Nodos discovery + candidatos: cacheados por query normalizada
+        # (todas las páginas y requests repetidos comparten la entrada).
+        def _generar_candidatos() -> CachedCandidateGeneration:
+            nodos = recuperar_nodos_discovery(
+                db,
+                query_texto,
+                limit=10,
+            )
+            candidate_context = CandidateGenerationContext(
+                query_original=q or "",
+                query_normalizada=query_texto,
+                terminos_expandidos=terminos_intencion,
+                familia_intencion=familia_intencion,
+                discovery_nodes=nodos,
+                query_vector=tuple(query_vector) if query_vector is not None else None,
+            )
+            return CachedCandidateGeneration(
+                discovery_nodes=tuple(nodos),
+                candidate_set=generate_candidates(candidate_context, db),
+            )
+
+        generacion_candidatos, candidate_cache_hit = get_or_generate_candidates(
             db,
-            query_texto,
-            limit=10,
+            query_normalizada=query_texto,
+            terminos_expandidos=terminos_intencion,
+            familia_intencion=familia_intencion,
+            generate=_generar_candidatos,
         )
+        nodos_discovery = list(generacion_candidatos.discovery_nodes)
+        candidate_set = generacion_candidatos.candidate_set
+        metadata_candidate_engine["candidate_cache_hit"] = candidate_cache_hit
+        if not candidate_cache_hit:
+            metadata_candidate_engine.update(
+                candidate_source_stats_metadata(candidate_set)
+            )
         intencion_discovery_fuerte = any(
             nodo.text_score >= 0.85 or nodo.source in {"text", "mixed"}
             for nodo in nodos_discovery
         )
-        candidate_context = CandidateGenerationContext(
-            query_original=q or "",
-            query_normalizada=query_texto,
-            terminos_expandidos=terminos_intencion,
-            familia_intencion=familia_intencion,
-            discovery_nodes=nodos_discovery,
-        )
-        candidate_set = generate_candidates(candidate_context, db)
         candidate_engine_comercio_ids = set(
             candidate_set.candidates_by_comercio_id.keys()
         )
@@ -987,7 +1109,7 @@ def listar_comercios_activos(
                     "candidate_count": 0,
                 },
             )
-            return resultados
+            return resultados, []
         nodos_discovery_confiables = [
             nodo
             for nodo in nodos_discovery
@@ -1032,7 +1154,7 @@ def listar_comercios_activos(
                         "candidate_count": 0,
                     },
                 )
-                return resultados
+                return resultados, []
         rubro_ids_discovery = buscar_rubro_ids_asignados_a_nodos_taxonomia(
             db,
             [] if node_ids_especialidad_fuertes else node_ids_discovery_confiables,
@@ -1063,22 +1185,10 @@ def listar_comercios_activos(
             rubro_ids_discovery
             or {rubro.rubro_id for rubro in rubros_detectados}
         )
-        like_publicaciones = f"%{q_normalizada}%"
-        comercio_ids_publicaciones_match = {
-            comercio_id
-            for (comercio_id,) in (
-                db.query(Publicacion.comercio_id)
-                .filter(Publicacion.is_activa.is_(True))
-                .filter(
-                    or_(
-                        Publicacion.titulo.ilike(like_publicaciones),
-                        Publicacion.descripcion.ilike(like_publicaciones),
-                    )
-                )
-                .distinct()
-                .all()
-            )
-        }
+        comercio_ids_publicaciones_match = buscar_comercio_ids_por_publicaciones(
+            db,
+            q=q_normalizada,
+        )
         if node_ids_especialidad_fuertes:
             comercio_ids_publicaciones_match = set()
 
@@ -1098,15 +1208,15 @@ def listar_comercios_activos(
                     "candidate_count": 0,
                 },
             )
-            return resultados
+            return resultados, []
 
         # NO filtramos por nombre:
         # usamos un pool amplio de comercios activos y rankeamos por similitud.
-        fetch_size = (offset + limit) * 5
-        if fetch_size < 50:
-            fetch_size = 50
-        if fetch_size > 500:
-            fetch_size = 500
+        fetch_size = _tamano_ventana_ranking(
+            offset=offset,
+            limit=limit,
+            ranking_completo=ranking_completo,
+        )
 
         query_candidatos = query.filter(
             Comercio.id.in_(candidate_engine_comercio_ids)
@@ -1129,25 +1239,18 @@ def listar_comercios_activos(
                     "candidate_count": 0,
                 },
             )
-            return resultados
+            return resultados, []
 
         comercio_ids = [c.id for c in candidatos]
 
-        # Traemos embeddings en batch (1 query)
-        rows = (
-            db.query(ComercioEmbedding.comercio_id, ComercioEmbedding.vector)
-            .filter(ComercioEmbedding.comercio_id.in_(comercio_ids))
-            .all()
+        # Similitud en batch contra el indice vectorial en memoria.
+        # Sin embedding (o vector corrupto) -> no aparece y queda al final.
+        similitudes_por_id = puntuar_similitud_comercios(
+            db,
+            query_vector=query_vector,
+            comercio_ids=comercio_ids,
         )
 
-        embeddings_map: dict[int, list[float]] = {}
-        for comercio_id, vector_str in rows:
-            try:
-                embeddings_map[comercio_id] = json.loads(vector_str)
-            except Exception:
-                # Si hay vector corrupto, lo ignoramos (queda al final)
-                continue
-
         # Señales reales en batch para este pool
         comercios_con_historias = set(
             row[0] for row in (
@@ -1176,8 +1279,7 @@ def listar_comercios_activos(
         # - bonus pequeño por historias/publicaciones
         scored: list[tuple[float, int, Comercio]] = []
         for c in candidatos:
-            vec = embeddings_map.get(c.id)
-            sim = _cosine_similarity(query_vector, vec) if vec else -1.0
+            sim = similitudes_por_id.get(c.id, -1.0)
 
             nombre = _normalizar_texto(getattr(c, "nombre", None))
             descripcion = _normalizar_texto(getattr(c, "descripcion", None))
@@ -1272,7 +1374,10 @@ def listar_comercios_activos(
                 "scored_count": len(scored),
             },
         )
-        return adjuntar_horario_atencion_comercios(db, pagina)
+        return (
+            adjuntar_horario_atencion_comercios(db, pagina),
+            [c.id for c in comercios_rankeados],
+        )
 
     # ============================================================
     # SMART MODE (ETAPA 50)
@@ -1285,42 +1390,29 @@ def listar_comercios_activos(
 
         # Filtro de candidatos (MVP) para no traernos TODO:
         # - buscamos por varios campos, sin depender solo del nombre
-        # - es case-insensitive con ilike
+        # - subcadena sin mayúsculas/acentos sobre el índice de texto en
+        #   memoria (nombre, descripcion, ciudad, provincia)
         # (Esto NO existe en modo clásico; solo afecta cuando smart=True)
-        like = f"%{q_normalizada}%"
-        comercio_ids_publicaciones_match = {
-            comercio_id
-            for (comercio_id,) in (
-                db.query(Publicacion.comercio_id)
-                .filter(Publicacion.is_activa.is_(True))
-                .filter(
-                    or_(
-                        Publicacion.titulo.ilike(like),
-                        Publicacion.descripcion.ilike(like),
-                    )
-                )
-                .distinct()
-                .all()
-            )
-        }
+        comercio_ids_publicaciones_match = buscar_comercio_ids_por_publicaciones(
+            db,
+            q=q_normalizada,
+        )
+        comercio_ids_texto_match = buscar_comercio_ids_por_texto(
+            db,
+            q=q_normalizada,
+        )
         query = query.filter(
-            or_(
-                Comercio.nombre.ilike(like),
-                Comercio.descripcion.ilike(like),
-                Comercio.ciudad.ilike(like),
-                Comercio.provincia.ilike(like),
-                Comercio.id.in_(comercio_ids_publicaciones_match),
+            Comercio.id.in_(
+                set(comercio_ids_texto_match) | comercio_ids_publicaciones_match
             )
         )
 
         # Ventana de búsqueda para rankear en Python.
-        # Traemos más que "limit" para poder reordenar por score.
-        # Cap para evitar explosión.
-        fetch_size = (offset + limit) * 5
-        if fetch_size < 50:
-            fetch_size = 50
-        if fetch_size > 500:
-            fetch_size = 500
+        fetch_size = _tamano_ventana_ranking(
+            offset=offset,
+            limit=limit,
+            ranking_completo=ranking_completo,
+        )
 
         query_candidatos = query.order_by(Comercio.id.desc())
         if scope is None:
@@ -1335,7 +1427,7 @@ def listar_comercios_activos(
                     "candidate_count": 0,
                 },
             )
-            return resultados
+            return resultados, []
 
         # Precomputamos señales (historias/publicaciones) en batch para esta ventana
         comercio_ids = [c.id for c in candidatos]
@@ -1396,60 +1488,236 @@ def listar_comercios_activos(
                 "scored_count": len(scored),
             },
         )
-        return adjuntar_horario_atencion_comercios(db, pagina)
+        return (
+            adjuntar_horario_atencion_comercios(db, pagina),
+            [c.id for c in comercios_rankeados],
+        )
 
     # ============================================================
-    # CLÁSICO (ETAPA 48/49) - comportamiento existente
+    # CLÁSICO (ETAPA 48/49) - filtro, orden y paginado en SQL
     # ============================================================
+    # Territorio y flags de actividad son columnas precalculadas de
+    # comercios: el filtro y el orden corren en SQL y solo se hidratan los
+    # comercios de la página.
+
+    consulta_ids = db.query(Comercio.id).filter(Comercio.activo == True)
 
     # Búsqueda MVP: por nombre (como estaba)
     if q_normalizada:
-        query = query.filter(Comercio.nombre.ilike(f"%{q_normalizada}%"))
+        consulta_ids = consulta_ids.filter(Comercio.nombre.ilike(f"%{q_normalizada}%"))
 
-    # Flags de actividad (EXISTS correlacionado)
-    tiene_historias = (
-        db.query(Historia.id)
-        .filter(Historia.comercio_id == Comercio.id)
-        .exists()
-    )
+    if scope == "local":
+        consulta_ids = consulta_ids.filter(
+            Comercio.provincia_code == territorial_context.province_code,
+            Comercio.ciudad_key == territorial_context.city_key,
+        )
 
-    tiene_publicaciones = (
-        db.query(Publicacion.id)
-        .filter(Publicacion.comercio_id == Comercio.id)
-        .exists()
-    )
+    metadata_clasico: dict = {}
 
-    # Normalizamos a 1/0 para ordenar
-    score_historias = case((tiene_historias, 1), else_=0)
-    score_publicaciones = case((tiene_publicaciones, 1), else_=0)
+    if lat is None or lng is None:
+        # Orden inteligente (ETAPA 49): historias, publicaciones, id desc.
+        consulta_ids = consulta_ids.order_by(
+            Comercio.tiene_historias.desc(),
+            Comercio.tiene_publicaciones.desc(),
+            Comercio.id.desc(),
+        )
+        if ranking_completo:
+            tope = max(offset + limit, int(settings.COMERCIOS_SESION_BUSQUEDA_MAX_IDS))
+            ranking_ids = [comercio_id for (comercio_id,) in consulta_ids.limit(tope).all()]
+            pagina_ids = ranking_ids[offset: offset + limit]
+        else:
+            pagina_ids = [
+                comercio_id
+                for (comercio_id,) in consulta_ids.offset(offset).limit(limit).all()
+            ]
+            ranking_ids = pagina_ids
+        comercios = _cargar_comercios_activos_por_ids(db, pagina_ids)
+    else:
+        # Cercanía: la caja del radio se filtra en SQL; la distancia exacta
+        # se calcula sobre coordenadas (sin hidratar) y se ordena en Python.
+        if effective_radio_km is not None:
+            lat_min, lat_max, lng_min, lng_max = _caja_radio(lat, lng, effective_radio_km)
+            dentro_de_caja = [Comercio.latitud.between(lat_min, lat_max)]
+            if lng_min is not None:
+                dentro_de_caja.append(Comercio.longitud.between(lng_min, lng_max))
+            consulta_ids = consulta_ids.filter(
+                or_(
+                    Comercio.latitud.is_(None),
+                    Comercio.longitud.is_(None),
+                    and_(*dentro_de_caja),
+                )
+            )
 
-    # Orden inteligente (ETAPA 49)
-    query = query.order_by(
-        score_historias.desc(),
-        score_publicaciones.desc(),
-        Comercio.id.desc(),
-    )
+        ordenables: list[tuple[float, int]] = []
+        for comercio_id, latitud, longitud, publica in consulta_ids.with_entities(
+            Comercio.id,
+            Comercio.latitud,
+            Comercio.longitud,
+            Comercio.mostrar_direccion_publicamente,
+        ):
+            distancia = _calcular_distancia_km(
+                lat_origen=lat,
+                lng_origen=lng,
+                lat_destino=latitud,
+                lng_destino=longitud,
+            )
+            if (
+                distancia is not None
+                and effective_radio_km is not None
+                and distancia > effective_radio_km
+            ):
+                continue
+            orden = _distancia_orden_km(distancia, publica)
+            ordenables.append((999999.0 if orden is None else orden, -comercio_id))
+
+        ordenables.sort()
+        ranking_ids = [-comercio_id_negado for _, comercio_id_negado in ordenables]
+        metadata_clasico["candidate_count"] = len(ranking_ids)
+        comercios = _aplicar_distancia_y_radio(
+            _cargar_comercios_activos_por_ids(db, ranking_ids[offset: offset + limit]),
+            lat,
+            lng,
+        )
 
-    comercios = _aplicar_frontera(query.all())
-    candidate_count = len(comercios)
+    _registrar_search_event(comercios, metadata=metadata_clasico)
+    return adjuntar_horario_atencion_comercios(db, comercios), ranking_ids
 
-    if lat is not None and lng is not None:
-        comercios.sort(
-            key=lambda c: (
-                _distancia_sort_value(c),
-                -c.id,
-            )
+
+def _cargar_comercios_activos_por_ids(db: Session, comercio_ids: list[int]) -> list[Comercio]:
+    """
+    Comercios activos de comercio_ids, en ese orden (los que no están
+    activos se omiten). Sin cargar publicaciones / historias / embedding.
+    """
+    if not comercio_ids:
+        return []
+
+    por_id = {
+        comercio.id: comercio
+        for comercio in (
+            db.query(Comercio)
+            .options(selectinload(Comercio.rubro), lazyload("*"))
+            .filter(Comercio.id.in_(comercio_ids))
+            .filter(Comercio.activo == True)
+            .all()
         )
+    }
+    return [por_id[comercio_id] for comercio_id in comercio_ids if comercio_id in por_id]
 
-    comercios = comercios[offset: offset + limit]
 
-    _registrar_search_event(
-        comercios,
-        metadata={
-            "candidate_count": candidate_count,
-        },
-    )
-    return adjuntar_horario_atencion_comercios(db, comercios)
+def _hidratar_pagina_sesion(
+    db: Session,
+    *,
+    sesion: SesionBusqueda,
+    posicion: int,
+    limit: int,
+) -> tuple[list[Comercio], int]:
+    """
+    Hasta limit comercios del ranking guardado, desde posicion, que sigan
+    activos (los dados de baja después se saltean). Devuelve también la
+    posición de la página siguiente.
+    """
+    ranking = sesion.comercio_ids
+    pagina: list[Comercio] = []
+
+    while len(pagina) < limit and posicion < len(ranking):
+        bloque = ranking[posicion: posicion + limit - len(pagina)]
+        posicion += len(bloque)
+
+        pagina.extend(_cargar_comercios_activos_por_ids(db, list(bloque)))
+
+    # Sin radio: el ranking ya se filtró al abrir la sesión.
+    return _aplicar_distancia_y_radio(pagina, sesion.lat, sesion.lng), posicion
+
+
+def listar_comercios_activos_por_cursor(
+    db: Session,
+    *,
+    cursor: str | None = None,
+    q: str | None = None,
+    smart: bool = False,
+    smart_semantic: bool = False,
+    lat: float | None = None,
+    lng: float | None = None,
+    radio_km: float | None = None,
+    city_key: str | None = None,
+    province_code: str | None = None,
+    country_code: str | None = None,
+    scope: str | None = None,
+    expansion_km: int | None = None,
+    limit: int = 20,
+) -> PaginaComercios:
+    """
+    Explorar paginado por cursor sobre una sesión de búsqueda.
+
+    - Sin cursor: corre el pipeline del modo pedido sobre la ventana
+      completa, guarda el ranking y devuelve la primera página
+    - Con cursor: lee la página siguiente del ranking guardado e hidrata
+      solo esos comercios (los demás filtros se ignoran)
+
+    Lanza CursorComerciosInvalidoError si el cursor es inválido o la
+    sesión venció (el cliente vuelve a pedir la primera página).
+    """
+
+    if cursor is None:
+        pagina, ranking_ids = _rankear_comercios_activos(
+            db,
+            q=q,
+            smart=smart,
+            smart_semantic=smart_semantic,
+            lat=lat,
+            lng=lng,
+            radio_km=radio_km,
+            city_key=city_key,
+            province_code=province_code,
+            country_code=country_code,
+            scope=scope,
+            expansion_km=expansion_km,
+            limit=limit,
+            offset=0,
+            ranking_completo=True,
+        )
+        token, sesion = crear_sesion_busqueda(
+            ranking_ids,
+            q=q,
+            smart=smart,
+            smart_semantic=smart_semantic,
+            lat=lat,
+            lng=lng,
+            radio_km=expansion_km if scope == "expanded" else radio_km,
+        )
+        siguiente = len(pagina)
+    else:
+        cursor_actual = decodificar_cursor_comercios(cursor)
+        sesion = obtener_sesion_busqueda(cursor_actual.token)
+        token = cursor_actual.token
+        pagina, siguiente = _hidratar_pagina_sesion(
+            db,
+            sesion=sesion,
+            posicion=cursor_actual.posicion,
+            limit=limit,
+        )
+        payload = build_search_event_from_comercios_activos(
+            query_original=sesion.q,
+            smart=sesion.smart,
+            smart_semantic=sesion.smart_semantic,
+            limit=limit,
+            offset=cursor_actual.posicion,
+            radio_km=sesion.radio_km,
+            has_location=sesion.lat is not None and sesion.lng is not None,
+            result_count=len(pagina),
+            comercio_result_ids=[comercio.id for comercio in pagina],
+            metadata={"search_session": True},
+        )
+        registrar_search_event_best_effort(db, payload)
+        pagina = adjuntar_horario_atencion_comercios(db, pagina)
+
+    next_cursor = None
+    if token is not None and siguiente < len(sesion.comercio_ids):
+        next_cursor = codificar_cursor_comercios(
+            CursorComercios(token=token, posicion=siguiente)
+        )
+
+    return PaginaComercios(items=pagina, next_cursor=next_cursor)
 
 
 def _search_mode(*, smart: bool, smart_semantic: bool) -> str:
@@ -1536,8 +1804,12 @@ def actualizar_comercio(
             especialidad_ids=especialidad_ids,
         )
         db.commit()
+    # Al final: los assignments ya commiteados entran en la nueva version.
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
+    db.commit()
     comercio.especialidad_ids = obtener_especialidad_ids_comercio(db, comercio.id)
-    upsert_embedding_comercio(db=db, comercio=comercio)
+    encolar_embedding_comercio(db, comercio)
+    registrar_comercio_en_indice_texto(comercio)
 
     return comercio
 
@@ -1559,8 +1831,11 @@ def desactivar_comercio(
         raise PermissionError("No tenés permiso para desactivar este comercio")
 
     comercio.activo = False
+    incrementar_version_catalogo(db, CLAVE_BUSQUEDA)
 
     db.commit()
     db.refresh(comercio)
+    registrar_comercio_en_indice_texto(comercio)
+    quitar_comercio_de_ann(comercio.id)
 
     return comercio
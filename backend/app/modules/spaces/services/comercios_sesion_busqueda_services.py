@@ -0,0 +1,303 @@
+# app/modules/spaces/services/comercios_sesion_busqueda_services.py
+"""
+Service: Sesiones de búsqueda de Explorar (/comercios/activos por cursor)
+
+- La primera página corre el pipeline completo (clásico / smart /
+  smart_semantic) y guarda la lista rankeada de ids bajo un token corto
+- Las páginas siguientes leen esa lista desde el cursor (token + posición)
+  e hidratan solo los comercios de la página: no se vuelve a rankear y el
+  orden no cambia entre páginas
+- El cursor es opaco (base64 de JSON), como el del feed
+- Store enchufable (SesionBusquedaStore) elegido por
+  COMERCIOS_SESION_BUSQUEDA_STORE: "local" (LRU + TTL por proceso) o "db"
+  (tabla comercios_sesiones_busqueda, el token sirve en cualquier worker);
+  configurar_store_sesiones_busqueda acepta cualquier otro store compartido
+- Si el store falla al guardar, la primera página sale igual sin cursor
+- La lista se acota a COMERCIOS_SESION_BUSQUEDA_MAX_IDS
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Protocol, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.operation_logging import get_operation_logger, safe_error_class
+from app.modules.spaces.models.comercios_sesion_busqueda_models import (
+    ComercioSesionBusqueda,
+)
+
+
+logger = get_operation_logger("comercios_sesion_busqueda")
+
+STORES_SESION_BUSQUEDA = ("local", "db")
+
+
+class CursorComerciosInvalidoError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SesionBusqueda:
+    # Ranking completo de la primera página, en orden.
+    comercio_ids: Tuple[int, ...]
+    # Parámetros para hidratar (distancia) y registrar el search event.
+    q: Optional[str] = None
+    smart: bool = False
+    smart_semantic: bool = False
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    radio_km: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class CursorComercios:
+    token: str
+    posicion: int
+
+
+class SesionBusquedaStore(Protocol):
+    def obtener(self, token: str) -> Optional[SesionBusqueda]:
+        ...
+
+    def guardar(self, token: str, sesion: SesionBusqueda, ttl_segundos: float) -> None:
+        ...
+
+    def limpiar(self) -> None:
+        ...
+
+
+class SesionBusquedaStoreLocal:
+    """
+    LRU con vencimiento por entrada, seguro entre threads.
+
+    max_entries <= 0 desactiva el guardado.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._entradas: "OrderedDict[str, Tuple[float, SesionBusqueda]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+    def obtener(self, token: str) -> Optional[SesionBusqueda]:
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is None:
+                return None
+            vence_en, sesion = entrada
+            if time.monotonic() >= vence_en:
+                del self._entradas[token]
+                return None
+            self._entradas.move_to_end(token)
+            return sesion
+
+    def guardar(self, token: str, sesion: SesionBusqueda, ttl_segundos: float) -> None:
+        if self.max_entries <= 0 or ttl_segundos <= 0:
+            return
+
+        with self._lock:
+            self._entradas[token] = (time.monotonic() + ttl_segundos, sesion)
+            self._entradas.move_to_end(token)
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+class SesionBusquedaStoreBD:
+    """
+    Store compartido en la tabla comercios_sesiones_busqueda.
+
+    Cada operación abre su propia sesión (no toca la del request). Al
+    guardar se borran las sesiones vencidas.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None) -> None:
+        self._session_factory = session_factory or SessionLocal
+
+    def obtener(self, token: str) -> Optional[SesionBusqueda]:
+        db = self._session_factory()
+        try:
+            fila = db.get(ComercioSesionBusqueda, token)
+            if fila is None or fila.vence_en <= datetime.utcnow():
+                return None
+            datos = json.loads(fila.payload)
+        finally:
+            db.close()
+
+        return SesionBusqueda(**{**datos, "comercio_ids": tuple(datos["comercio_ids"])})
+
+    def guardar(self, token: str, sesion: SesionBusqueda, ttl_segundos: float) -> None:
+        if ttl_segundos <= 0:
+            return
+
+        ahora = datetime.utcnow()
+        db = self._session_factory()
+        try:
+            db.query(ComercioSesionBusqueda).filter(
+                ComercioSesionBusqueda.vence_en <= ahora
+            ).delete(synchronize_session=False)
+            db.add(
+                ComercioSesionBusqueda(
+                    token=token,
+                    payload=json.dumps(asdict(sesion), separators=(",", ":")),
+                    vence_en=ahora + timedelta(seconds=ttl_segundos),
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def limpiar(self) -> None:
+        db = self._session_factory()
+        try:
+            db.query(ComercioSesionBusqueda).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+_STORE_LOCK = threading.Lock()
+_store: Optional[SesionBusquedaStore] = None
+
+
+def _crear_store_configurado() -> SesionBusquedaStore:
+    nombre = (settings.COMERCIOS_SESION_BUSQUEDA_STORE or "local").strip().lower()
+    if nombre == "db":
+        return SesionBusquedaStoreBD()
+    if nombre == "local":
+        return SesionBusquedaStoreLocal(settings.COMERCIOS_SESION_BUSQUEDA_MAX_ENTRIES)
+
+    raise ValueError(
+        f"COMERCIOS_SESION_BUSQUEDA_STORE no soportado: '{nombre}'. "
+        f"Valores válidos: {', '.join(STORES_SESION_BUSQUEDA)}."
+    )
+
+
+def obtener_store_sesiones_busqueda() -> SesionBusquedaStore:
+    global _store
+    with _STORE_LOCK:
+        if _store is None:
+            _store = _crear_store_configurado()
+        return _store
+
+
+def configurar_store_sesiones_busqueda(store: SesionBusquedaStore) -> None:
+    """
+    Reemplaza el store (por ejemplo, por uno compartido entre workers).
+    """
+    global _store
+    with _STORE_LOCK:
+        _store = store
+
+
+def reiniciar_sesiones_busqueda() -> None:
+    """
+    Descarta el store; el próximo uso lo crea desde la configuración.
+    """
+    global _store
+    with _STORE_LOCK:
+        _store = None
+
+
+# ============================================================
+# Cursor
+# ============================================================
+
+def codificar_cursor_comercios(cursor: CursorComercios) -> str:
+    payload = json.dumps(
+        {"t": cursor.token, "p": cursor.posicion},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor_comercios(valor: str) -> CursorComercios:
+    try:
+        relleno = "=" * (-len(valor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(valor + relleno).decode("utf-8"))
+        cursor = CursorComercios(token=str(datos["t"]), posicion=int(datos["p"]))
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+        raise CursorComerciosInvalidoError("Cursor de busqueda invalido") from exc
+
+    if cursor.posicion < 0 or not cursor.token:
+        raise CursorComerciosInvalidoError("Cursor de busqueda invalido")
+    return cursor
+
+
+# ============================================================
+# API
+# ============================================================
+
+def crear_sesion_busqueda(
+    comercio_ids: Sequence[int],
+    *,
+    q: Optional[str] = None,
+    smart: bool = False,
+    smart_semantic: bool = False,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radio_km: Optional[float] = None,
+) -> Tuple[Optional[str], SesionBusqueda]:
+    """
+    Guarda el ranking y devuelve (token, sesión); token None si las
+    sesiones están desactivadas (TTL 0) o el store no pudo guardarla.
+    """
+    ttl_segundos = float(settings.COMERCIOS_SESION_BUSQUEDA_TTL_SECONDS)
+    sesion = SesionBusqueda(
+        comercio_ids=tuple(comercio_ids[: max(0, int(settings.COMERCIOS_SESION_BUSQUEDA_MAX_IDS))]),
+        q=q,
+        smart=smart,
+        smart_semantic=smart_semantic,
+        lat=lat,
+        lng=lng,
+        radio_km=radio_km,
+    )
+    if ttl_segundos <= 0:
+        return None, sesion
+
+    store = obtener_store_sesiones_busqueda()
+    token = secrets.token_urlsafe(12)
+    try:
+        store.guardar(token, sesion, ttl_segundos)
+    except Exception as exc:
+        logger.warning(
+            "comercios_sesion_busqueda_store_error error_class=%s",
+            safe_error_class(exc),
+        )
+        return None, sesion
+    return token, sesion
+
+
+def obtener_sesion_busqueda(token: str) -> SesionBusqueda:
+    """
+    Sesión vigente del token; CursorComerciosInvalidoError si venció.
+    """
+    sesion = obtener_store_sesiones_busqueda().obtener(token)
+    if sesion is None:
+        raise CursorComerciosInvalidoError("Sesion de busqueda vencida")
+    return sesion
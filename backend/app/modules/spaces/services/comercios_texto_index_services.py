@@ -0,0 +1,313 @@
+# app/modules/spaces/services/comercios_texto_index_services.py
+"""
+Service: Índice de texto de Comercios en memoria (trigramas + tokens)
+
+- Reemplaza los ILIKE '%q%' sobre nombre / descripcion / ciudad / provincia
+  del candidate engine y de la búsqueda smart (scan de comercios)
+- Se construye desde los comercios activos (1 lectura bulk) y se comparte
+  por proceso
+- Alta / edición / baja / reactivación lo actualizan en el mismo proceso;
+  los cambios de otros workers entran con una lectura incremental por
+  updated_at, como máximo cada INTERVALO_SINCRONIZACION_SEGUNDOS
+- Subcadena (q de 3+ caracteres): intersección de posting lists de
+  trigramas y verificación sobre el texto normalizado (mismo resultado
+  que ILIKE '%q%', sin falsos positivos)
+- Prefijo (q de 1-2 caracteres): tokens del campo que empiezan con q
+- Texto normalizado: minúsculas, sin acentos y espacios colapsados
+
+Reglas:
+- Services = lógica de negocio
+- Sin HTTP (eso va en routers)
+- Devuelve ids ordenados por id DESC (mismo orden que las queries previas)
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.modules.spaces.models.comercios_models import Comercio
+
+
+CAMPOS_TEXTO = ("nombre", "descripcion", "ciudad", "provincia")
+
+LONGITUD_TRIGRAMA = 3
+
+INTERVALO_SINCRONIZACION_SEGUNDOS = 5.0
+MARGEN_MARCA_SEGUNDOS = 1
+
+
+def normalizar_texto_comercio(valor: Optional[str]) -> str:
+    if not valor:
+        return ""
+
+    descompuesto = unicodedata.normalize("NFKD", str(valor).lower())
+    sin_acentos = "".join(char for char in descompuesto if not unicodedata.combining(char))
+    return " ".join(sin_acentos.split())
+
+
+def _trigramas(texto: str) -> Set[str]:
+    return {
+        texto[inicio: inicio + LONGITUD_TRIGRAMA]
+        for inicio in range(len(texto) - LONGITUD_TRIGRAMA + 1)
+    }
+
+
+class IndiceTextoComercios:
+    """
+    Posting lists por campo (trigrama -> ids, token -> ids), seguro entre threads.
+    """
+
+    def __init__(self) -> None:
+        self._textos: Dict[int, Dict[str, str]] = {}
+        self._trigramas: Dict[str, Dict[str, Set[int]]] = {campo: {} for campo in CAMPOS_TEXTO}
+        self._tokens: Dict[str, Dict[str, Set[int]]] = {campo: {} for campo in CAMPOS_TEXTO}
+        self._vocabulario: Dict[str, List[str]] = {campo: [] for campo in CAMPOS_TEXTO}
+        self._vocabulario_sucio: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._textos)
+
+    @staticmethod
+    def _quitar_de_posting(postings: Dict[str, Set[int]], clave: str, comercio_id: int) -> bool:
+        ids = postings.get(clave)
+        if ids is None:
+            return False
+        ids.discard(comercio_id)
+        if not ids:
+            del postings[clave]
+            return True
+        return False
+
+    def _quitar(self, comercio_id: int) -> None:
+        textos = self._textos.pop(comercio_id, None)
+        if textos is None:
+            return
+
+        for campo, texto in textos.items():
+            for trigrama in _trigramas(texto):
+                self._quitar_de_posting(self._trigramas[campo], trigrama, comercio_id)
+            for token in set(texto.split()):
+                if self._quitar_de_posting(self._tokens[campo], token, comercio_id):
+                    self._vocabulario_sucio.add(campo)
+
+    def upsert(self, comercio_id: int, *, activo: bool = True, **campos: Optional[str]) -> None:
+        textos = {
+            campo: texto
+            for campo in CAMPOS_TEXTO
+            if (texto := normalizar_texto_comercio(campos.get(campo)))
+        }
+
+        with self._lock:
+            self._quitar(comercio_id)
+            if not activo:
+                return
+
+            self._textos[comercio_id] = textos
+            for campo, texto in textos.items():
+                for trigrama in _trigramas(texto):
+                    self._trigramas[campo].setdefault(trigrama, set()).add(comercio_id)
+                for token in set(texto.split()):
+                    if token not in self._tokens[campo]:
+                        self._tokens[campo][token] = set()
+                        self._vocabulario_sucio.add(campo)
+                    self._tokens[campo][token].add(comercio_id)
+
+    def remove(self, comercio_id: int) -> None:
+        with self._lock:
+            self._quitar(comercio_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._textos.clear()
+            for campo in CAMPOS_TEXTO:
+                self._trigramas[campo].clear()
+                self._tokens[campo].clear()
+                self._vocabulario[campo] = []
+            self._vocabulario_sucio.clear()
+
+    def _buscar_subcadena(self, campo: str, query: str) -> Set[int]:
+        postings = self._trigramas[campo]
+        listas = []
+        for trigrama in _trigramas(query):
+            ids = postings.get(trigrama)
+            if not ids:
+                return set()
+            listas.append(ids)
+
+        listas.sort(key=len)
+        candidatos = set(listas[0])
+        for ids in listas[1:]:
+            candidatos &= ids
+            if not candidatos:
+                return candidatos
+
+        # Los trigramas no garantizan contigüidad: se verifica la subcadena.
+        return {
+            comercio_id
+            for comercio_id in candidatos
+            if query in self._textos[comercio_id].get(campo, "")
+        }
+
+    def _buscar_prefijo(self, campo: str, query: str) -> Set[int]:
+        if campo in self._vocabulario_sucio:
+            self._vocabulario[campo] = sorted(self._tokens[campo])
+            self._vocabulario_sucio.discard(campo)
+
+        vocabulario = self._vocabulario[campo]
+        encontrados: Set[int] = set()
+        for posicion in range(bisect.bisect_left(vocabulario, query), len(vocabulario)):
+            token = vocabulario[posicion]
+            if not token.startswith(query):
+                break
+            encontrados |= self._tokens[campo][token]
+        return encontrados
+
+    def buscar(
+        self,
+        query: str,
+        *,
+        campos: Sequence[str] = CAMPOS_TEXTO,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Ids de comercios cuyo texto contiene q en alguno de los campos (id DESC).
+        """
+        query = normalizar_texto_comercio(query)
+        if not query:
+            return []
+
+        with self._lock:
+            encontrados: Set[int] = set()
+            for campo in campos:
+                if len(query) >= LONGITUD_TRIGRAMA:
+                    encontrados |= self._buscar_subcadena(campo, query)
+                else:
+                    encontrados |= self._buscar_prefijo(campo, query)
+
+        ordenados = sorted(encontrados, reverse=True)
+        return ordenados if limit is None else ordenados[: max(0, int(limit))]
+
+
+_INDICE_COMERCIOS = IndiceTextoComercios()
+_ESTADO_LOCK = threading.Lock()
+_estado: Dict[str, object] = {
+    "construido": False,
+    "marca_updated_at": None,
+    "sincronizado_en": 0.0,
+}
+
+
+def _upsert_fila(comercio_id: int, activo, textos: Tuple[Optional[str], ...]) -> None:
+    _INDICE_COMERCIOS.upsert(
+        comercio_id,
+        activo=bool(activo),
+        **dict(zip(CAMPOS_TEXTO, textos)),
+    )
+
+
+def _cargar_filas(db: Session, *, desde_updated_at=None):
+    query = db.query(
+        Comercio.id,
+        Comercio.activo,
+        Comercio.updated_at,
+        *(getattr(Comercio, campo) for campo in CAMPOS_TEXTO),
+    )
+    if desde_updated_at is not None:
+        # Margen de 1s: updated_at puede tener granularidad de segundos.
+        query = query.filter(
+            Comercio.updated_at
+            >= desde_updated_at - timedelta(seconds=MARGEN_MARCA_SEGUNDOS)
+        )
+    else:
+        query = query.filter(Comercio.activo == True)
+
+    marca = desde_updated_at
+    for comercio_id, activo, updated_at, *textos in query.all():
+        _upsert_fila(comercio_id, activo, tuple(textos))
+        if updated_at is not None and (marca is None or updated_at > marca):
+            marca = updated_at
+
+    return marca
+
+
+def sincronizar_indice_texto_comercios(
+    db: Session,
+    *,
+    forzar: bool = False,
+) -> IndiceTextoComercios:
+    """
+    Asegura que el índice esté construido y razonablemente fresco.
+    """
+    ahora = time.monotonic()
+
+    with _ESTADO_LOCK:
+        if not _estado["construido"] or forzar:
+            _INDICE_COMERCIOS.clear()
+            _estado["marca_updated_at"] = _cargar_filas(db)
+            _estado["construido"] = True
+            _estado["sincronizado_en"] = ahora
+            return _INDICE_COMERCIOS
+
+        if ahora - float(_estado["sincronizado_en"]) < INTERVALO_SINCRONIZACION_SEGUNDOS:
+            return _INDICE_COMERCIOS
+
+        _estado["marca_updated_at"] = _cargar_filas(
+            db,
+            desde_updated_at=_estado["marca_updated_at"],
+        )
+        _estado["sincronizado_en"] = ahora
+
+    return _INDICE_COMERCIOS
+
+
+def buscar_comercio_ids_por_texto(
+    db: Session,
+    *,
+    q: Optional[str],
+    campos: Iterable[str] = CAMPOS_TEXTO,
+    limit: Optional[int] = None,
+) -> List[int]:
+    """
+    Comercios activos cuyo texto contiene q (id DESC).
+    """
+    if not normalizar_texto_comercio(q):
+        return []
+
+    indice = sincronizar_indice_texto_comercios(db)
+    return indice.buscar(q or "", campos=tuple(campos), limit=limit)
+
+
+def registrar_comercio_en_indice_texto(comercio: Comercio) -> None:
+    """
+    Aplica alta / edición / baja al índice local (sin tocar la BD).
+
+    Si el índice todavía no fue construido no hace nada: la carga completa
+    inicial ya va a leer la fila persistida.
+    """
+    if not _estado["construido"]:
+        return
+
+    _upsert_fila(
+        comercio.id,
+        comercio.activo,
+        tuple(getattr(comercio, campo, None) for campo in CAMPOS_TEXTO),
+    )
+
+
+def reiniciar_indice_texto_comercios() -> None:
+    """
+    Descarta el índice en memoria. La próxima búsqueda lo reconstruye.
+    """
+    with _ESTADO_LOCK:
+        _INDICE_COMERCIOS.clear()
+        _estado["construido"] = False
+        _estado["marca_updated_at"] = None
+        _estado["sincronizado_en"] = 0.0
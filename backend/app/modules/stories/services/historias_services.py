@@ -91,7 +91,7 @@ def crear_historia(
     - No resuelve lógica de vistas.
     """
 
-    obtener_comercio_propio_o_error(
+    comercio = obtener_comercio_propio_o_error(
         db,
         comercio_id=comercio_id,
         usuario_autenticado=usuario_autenticado,
@@ -106,6 +106,8 @@ def crear_historia(
     )
 
     db.add(nueva_historia)
+    # Flag precalculado de Explorar (orden clásico).
+    comercio.tiene_historias = True
     db.commit()
     db.refresh(nueva_historia)
     nueva_historia.puede_administrar = True
@@ -0,0 +1,164 @@
+"""
+construir_indice_ann.py
+-----------------------
+Construye el indice aproximado (IVF) de comercios y lo guarda en disco.
+
+Lee comercios_embeddings, entrena el IVF, escribe el archivo mapeable y
+mide recall@k y latencia contra el indice exacto (VectorIndex) usando
+una muestra de los propios vectores como consultas:
+
+python construir_indice_ann.py
+python construir_indice_ann.py --salida /var/lib/feedgo/comercios.ivf --n-probe 12
+
+La ruta por defecto es EMBEDDINGS_ANN_INDEX_PATH. Los workers que ya lo
+tengan abierto lo reabren al reiniciar (o con reiniciar_indice_ann_comercios).
+
+Devuelve 1 si el recall medio queda por debajo de --recall-minimo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.ivf_index import IVFIndex, IVFIndexError, medir_recall
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.services.comercios_ann_services import (
+    construir_indice_ann_comercios,
+)
+
+
+K = 10
+MAX_QUERIES = 200
+RECALL_MINIMO_DEFAULT = 0.9
+SALIDA_DEFAULT = "comercios_ann.ivf"
+
+
+@dataclass(frozen=True)
+class ResultadoEvaluacion:
+    vectores: int
+    n_listas: int
+    n_probe: int
+    k: int
+    queries: int
+    recall_medio: float
+    latencia_ann_ms_p50: float
+    latencia_ann_ms_p99: float
+    latencia_exacta_ms_p50: float
+
+
+def _latencias_ms(consulta, queries) -> np.ndarray:
+    tiempos = []
+    for query in queries:
+        inicio = time.perf_counter()
+        consulta(query)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return np.asarray(tiempos)
+
+
+def evaluar_indice(
+    indice: IVFIndex,
+    *,
+    k: int = K,
+    max_queries: int = MAX_QUERIES,
+    seed: int = 0,
+) -> ResultadoEvaluacion:
+    """
+    Compara el IVF contra el indice exacto con los mismos vectores.
+    """
+    vigentes = indice.items()
+    exacto = VectorIndex(dim=indice.dim)
+    exacto.upsert_many(vigentes)
+
+    rng = np.random.default_rng(seed)
+    muestra = rng.choice(len(vigentes), size=min(max_queries, len(vigentes)), replace=False)
+    queries = [vigentes[posicion][1] for posicion in muestra]
+
+    recall = medir_recall(indice, exacto, queries, k=k)
+    latencias_ann = _latencias_ms(lambda query: indice.top_k(query, k), queries)
+    latencias_exactas = _latencias_ms(lambda query: exacto.top_k(query, k), queries)
+
+    return ResultadoEvaluacion(
+        vectores=len(vigentes),
+        n_listas=indice.n_listas,
+        n_probe=indice.n_probe,
+        k=k,
+        queries=len(queries),
+        recall_medio=recall,
+        latencia_ann_ms_p50=float(np.percentile(latencias_ann, 50)),
+        latencia_ann_ms_p99=float(np.percentile(latencias_ann, 99)),
+        latencia_exacta_ms_p50=float(np.percentile(latencias_exactas, 50)),
+    )
+
+
+def construir_y_guardar(
+    db: Session,
+    *,
+    salida: str,
+    n_listas: int | None = None,
+    n_probe: int | None = None,
+) -> IVFIndex:
+    indice = construir_indice_ann_comercios(db, n_listas=n_listas, n_probe=n_probe)
+    indice.guardar(salida)
+    # Se evalúa el archivo tal como lo van a abrir los workers.
+    return IVFIndex.cargar(salida)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Construye y guarda el indice IVF de embeddings de comercios.",
+    )
+    parser.add_argument(
+        "--salida",
+        default=settings.EMBEDDINGS_ANN_INDEX_PATH or SALIDA_DEFAULT,
+    )
+    parser.add_argument("--n-listas", type=int, default=None, help="Default: ~sqrt(N).")
+    parser.add_argument("--n-probe", type=int, default=settings.EMBEDDINGS_ANN_N_PROBE)
+    parser.add_argument("--k", type=int, default=K)
+    parser.add_argument("--recall-minimo", type=float, default=RECALL_MINIMO_DEFAULT)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    import_all_models()
+
+    db = SessionLocal()
+    try:
+        indice = construir_y_guardar(
+            db,
+            salida=args.salida,
+            n_listas=args.n_listas,
+            n_probe=args.n_probe,
+        )
+    except IVFIndexError as exc:
+        print(f"No se pudo construir el indice: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+    resultado = evaluar_indice(indice, k=args.k)
+    ok = resultado.recall_medio >= args.recall_minimo
+    print(
+        f"\nIndice IVF guardado en {args.salida}\n"
+        f"vectores={resultado.vectores} listas={resultado.n_listas} "
+        f"n_probe={resultado.n_probe}\n"
+        f"recall@{resultado.k} medio={resultado.recall_medio:.3f} "
+        f"({resultado.queries} queries) {'OK' if ok else 'BAJO'}\n"
+        f"latencia ANN p50={resultado.latencia_ann_ms_p50:.3f}ms "
+        f"p99={resultado.latencia_ann_ms_p99:.3f}ms | "
+        f"exacta p50={resultado.latencia_exacta_ms_p50:.3f}ms\n"
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+evaluar_indice_cuantizado.py
+----------------------------
+Chequeo de regresión de los indices vectoriales cuantizados (float16/int8).
+
+Toma las consultas smart_semantic reales (search_events), las embebe con el
+provider activo y compara el top-k de cada indice cuantizado contra float32
+sobre los vectores de comercios, nodos de taxonomia y rubros.
+
+Correr antes de cambiar EMBEDDINGS_INDEX_PRECISION en un ambiente:
+
+python evaluar_indice_cuantizado.py
+
+Devuelve 1 si algún recall@k medio queda por debajo del umbral.
+"""
+
+from __future__ import annotations
+
+import os
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.vector_codec import VectorCodecError, desempaquetar_vector
+from app.modules.ai.core.vector_index import (
+    PRECISION_FLOAT16,
+    PRECISION_INT8,
+    comparar_ranking_cuantizado,
+)
+from app.modules.ai.models.catalogo_embeddings_models import CatalogoEmbedding
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.services.comercios_embeddings_services import (
+    _deserializar_vector,
+)
+from app.modules.search.models.search_event_models import SearchEvent
+
+
+K = 10
+MAX_QUERIES = 200
+UMBRAL_RECALL_ENV = "FEEDGO_QUANTIZATION_MIN_RECALL"
+UMBRAL_RECALL_DEFAULT = 0.95
+PRECISIONES = (PRECISION_FLOAT16, PRECISION_INT8)
+
+
+def queries_smart_semantic(db: Session, limite: int = MAX_QUERIES) -> list[str]:
+    filas = (
+        db.query(SearchEvent.query_normalizada)
+        .filter(SearchEvent.modo_busqueda == "smart_semantic")
+        .filter(SearchEvent.query_normalizada.isnot(None))
+        .group_by(SearchEvent.query_normalizada)
+        .order_by(func.count(SearchEvent.id).desc(), SearchEvent.query_normalizada.asc())
+        .limit(limite)
+        .all()
+    )
+    return [query for (query,) in filas if query]
+
+
+def _vectores_comercios(db: Session) -> list[tuple[int, object]]:
+    vectores = []
+    for comercio_id, vector_binario, vector_legacy in db.query(
+        ComercioEmbedding.comercio_id,
+        ComercioEmbedding.vector_binario,
+        ComercioEmbedding.vector,
+    ):
+        try:
+            vector = _deserializar_vector(vector_binario, vector_legacy)
+        except Exception:
+            continue
+        if vector is not None:
+            vectores.append((comercio_id, vector))
+    return vectores
+
+
+def _vectores_catalogo(db: Session, model_id: str) -> dict[str, list[tuple[int, object]]]:
+    por_tipo: dict[str, list[tuple[int, object]]] = {}
+    for entity_type, entity_id, vector_binario in db.query(
+        CatalogoEmbedding.entity_type,
+        CatalogoEmbedding.entity_id,
+        CatalogoEmbedding.vector_binario,
+    ).filter(CatalogoEmbedding.model_id == model_id):
+        try:
+            vector = desempaquetar_vector(vector_binario)
+        except VectorCodecError:
+            continue
+        por_tipo.setdefault(entity_type, []).append((entity_id, vector))
+    return por_tipo
+
+
+def evaluar(
+    db: Session,
+    *,
+    precisiones: tuple[str, ...] = PRECISIONES,
+    k: int = K,
+) -> list[dict[str, object]]:
+    """
+    Devuelve un resultado por (corpus, precisión) con recall@k y memoria.
+    """
+    queries = queries_smart_semantic(db)
+    if not queries:
+        return []
+
+    provider = get_embedding_provider()
+    query_vectors = provider.embed_texts(queries)
+
+    corpus = {"comercios": _vectores_comercios(db)}
+    corpus.update(_vectores_catalogo(db, provider.model_id))
+
+    resultados = []
+    for nombre, vectores in corpus.items():
+        if not vectores:
+            continue
+        for precision in precisiones:
+            resultado = comparar_ranking_cuantizado(
+                vectores,
+                query_vectors,
+                precision=precision,
+                k=k,
+            )
+            resultados.append({"corpus": nombre, **resultado})
+    return resultados
+
+
+def main() -> int:
+    import_all_models()
+    umbral = float(os.environ.get(UMBRAL_RECALL_ENV, UMBRAL_RECALL_DEFAULT))
+
+    db = SessionLocal()
+    try:
+        resultados = evaluar(db)
+    finally:
+        db.close()
+
+    if not resultados:
+        print("Sin consultas smart_semantic o sin vectores: nada para evaluar.")
+        return 0
+
+    fallidos = 0
+    for resultado in resultados:
+        ok = resultado["recall_medio"] >= umbral
+        fallidos += 0 if ok else 1
+        print(
+            f"{resultado['corpus']} [{resultado['precision']}] "
+            f"recall@{resultado['k']} medio={resultado['recall_medio']:.3f} "
+            f"min={resultado['recall_minimo']:.3f} "
+            f"queries={resultado['queries']} "
+            f"memoria={resultado['memoria_bytes']}B "
+            f"(x{resultado['reduccion_memoria']:.1f} vs float32) "
+            f"{'OK' if ok else 'REGRESION'}"
+        )
+
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,7 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.error_handlers import register_exception_handlers
 from app.core.operation_logging import configure_logging, get_operation_logger, safe_error_class
@@ -9,6 +10,26 @@ from app.core.operation_alerts import configure_default_alerting
 from app.core.operation_metrics import OperationalMetricsMiddleware
 from app.core.request_context import RequestContextMiddleware
 from app.modules.products.services.rubros_services import asegurar_catalogo_rubros
+from app.modules.ai.core.embedding_factory import iniciar_precalentamiento_embeddings
+from app.modules.ai.services.catalogo_embeddings_services import (
+    precargar_embeddings_catalogo,
+)
+from app.modules.ai.services.comercios_ann_services import (
+    sincronizar_indice_ann_comercios,
+)
+from app.modules.ai.services.embeddings_jobs_services import (
+    detener_worker_embeddings,
+    iniciar_worker_embeddings,
+)
+from app.modules.posts.services.publicacion_scores_services import (
+    detener_worker_decaimiento_scores,
+    iniciar_worker_decaimiento_scores,
+)
+from app.modules.posts.services.publicacion_views_services import (
+    detener_worker_views_publicaciones,
+    iniciar_worker_views_publicaciones,
+)
+from app.modules.search.services.candidate_engine import shutdown_candidate_executor
 
 # Routers
 from app.modules.products.routes.productos_routers import router as productos_routers
@@ -89,6 +110,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.get("/")
@@ -111,6 +133,95 @@ def inicializar_catalogos():
         db.close()
 
 
+@app.on_event("startup")
+def precalentar_modelo_embeddings():
+    # Evita que el primer request absorba la carga del modelo local.
+    if settings.EMBEDDINGS_WARMUP_ON_STARTUP:
+        iniciar_precalentamiento_embeddings()
+        logger.info("startup_embeddings_precalentamiento_iniciado")
+
+
+@app.on_event("startup")
+def precargar_embeddings():
+    # No critico: sin precarga, la primera busqueda semantica carga en bulk.
+    db = SessionLocal()
+    try:
+        cargados = precargar_embeddings_catalogo(db)
+        logger.info("startup_embeddings_catalogo_precargados total=%s", cargados)
+    except Exception as exc:
+        logger.warning(
+            "startup_embeddings_catalogo_error error_class=%s",
+            safe_error_class(exc),
+        )
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def abrir_indice_ann_comercios():
+    # Abre (o construye) el IVF antes del primer request de smart_semantic.
+    if not settings.EMBEDDINGS_ANN_ENABLED:
+        return
+    db = SessionLocal()
+    try:
+        indice = sincronizar_indice_ann_comercios(db, forzar=True)
+        logger.info(
+            "startup_indice_ann_comercios_abierto total=%s",
+            len(indice) if indice is not None else 0,
+        )
+    except Exception as exc:
+        logger.warning(
+            "startup_indice_ann_comercios_error error_class=%s",
+            safe_error_class(exc),
+        )
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def iniciar_cola_embeddings():
+    # Procesa tambien los jobs que hayan quedado de una ejecucion anterior.
+    if settings.EMBEDDINGS_JOBS_WORKER_ENABLED:
+        iniciar_worker_embeddings(SessionLocal)
+        logger.info("startup_embeddings_jobs_worker_iniciado")
+
+
+@app.on_event("shutdown")
+def detener_cola_embeddings():
+    detener_worker_embeddings()
+
+
+@app.on_event("startup")
+def iniciar_decaimiento_scores_publicaciones():
+    # Recalcula los scores cuyo tramo de recencia vencio (publicacion_scores).
+    if settings.PUBLICACION_SCORES_DECAY_WORKER_ENABLED:
+        iniciar_worker_decaimiento_scores(SessionLocal)
+        logger.info("startup_publicacion_scores_decay_worker_iniciado")
+
+
+@app.on_event("shutdown")
+def detener_decaimiento_scores_publicaciones():
+    detener_worker_decaimiento_scores()
+
+
+@app.on_event("startup")
+def iniciar_flush_views_publicaciones():
+    # Persiste por lote las vistas acumuladas en memoria por el detalle.
+    iniciar_worker_views_publicaciones(SessionLocal)
+    logger.info("startup_publicacion_views_worker_iniciado")
+
+
+@app.on_event("shutdown")
+def detener_flush_views_publicaciones():
+    # Incluye el flush final de las vistas pendientes.
+    detener_worker_views_publicaciones()
+
+
+@app.on_event("shutdown")
+def detener_pool_candidate_engine():
+    shutdown_candidate_executor()
+
+
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -0,0 +1,182 @@
+"""
+migrate_comercios_explorar_sql.py
+---------------------------------
+Migracion aditiva de columnas precalculadas de Explorar en comercios.
+
+Agrega tiene_historias / tiene_publicaciones (completadas con un UPDATE
+por columna desde historias / publicaciones), ciudad_key / provincia_code
+(completadas en Python con la normalizacion territorial de la busqueda)
+y los indices ix_comercios_explorar_orden e ix_comercios_territorio.
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+from app.modules.search.services.territorial_search_services import (
+    normalize_city_key,
+    normalize_province_code,
+)
+
+
+TABLE_NAME = "comercios"
+FLAG_COLUMNS = {
+    "tiene_historias": "historias",
+    "tiene_publicaciones": "publicaciones",
+}
+TERRITORY_COLUMNS = {
+    "ciudad_key": "VARCHAR(100) NULL",
+    "provincia_code": "VARCHAR(8) NULL",
+}
+INDEXES = {
+    "ix_comercios_explorar_orden": (
+        "activo, tiene_historias, tiene_publicaciones, id"
+    ),
+    "ix_comercios_territorio": "provincia_code, ciudad_key",
+}
+ACTION_ENV = "FEEDGO_COMERCIOS_EXPLORAR_MIGRATION"
+
+
+class ComerciosExplorarMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def existing_columns(connection) -> set[str]:
+    return {
+        column["name"] for column in inspect(connection).get_columns(TABLE_NAME)
+    } & (set(FLAG_COLUMNS) | set(TERRITORY_COLUMNS))
+
+
+def existing_indexes(connection) -> set[str]:
+    return {
+        index["name"] for index in inspect(connection).get_indexes(TABLE_NAME)
+    } & set(INDEXES)
+
+
+def provincia_code(provincia: str | None) -> str | None:
+    try:
+        return normalize_province_code(provincia)
+    except ValueError:
+        return None
+
+
+def backfill(connection) -> None:
+    for name, source_table in FLAG_COLUMNS.items():
+        connection.execute(
+            text(
+                f"UPDATE {TABLE_NAME} SET {name} = EXISTS ("
+                f"SELECT 1 FROM {source_table} "
+                f"WHERE {source_table}.comercio_id = {TABLE_NAME}.id)"
+            )
+        )
+
+    filas = connection.execute(
+        text(f"SELECT id, provincia, ciudad FROM {TABLE_NAME}")
+    ).all()
+    for comercio_id, provincia, ciudad in filas:
+        connection.execute(
+            text(
+                f"UPDATE {TABLE_NAME} SET ciudad_key = :ciudad_key, "
+                "provincia_code = :provincia_code WHERE id = :id"
+            ),
+            {
+                "id": comercio_id,
+                "ciudad_key": normalize_city_key(ciudad) or None,
+                "provincia_code": provincia_code(provincia),
+            },
+        )
+
+
+def upgrade(connection) -> str:
+    columnas = existing_columns(connection)
+    indices = existing_indexes(connection)
+    completas = len(columnas) == len(FLAG_COLUMNS) + len(TERRITORY_COLUMNS)
+    if completas and len(indices) == len(INDEXES):
+        return "already_exists"
+
+    for name in FLAG_COLUMNS:
+        if name not in columnas:
+            connection.execute(
+                text(
+                    f"ALTER TABLE {TABLE_NAME} "
+                    f"ADD COLUMN {name} BOOLEAN NOT NULL DEFAULT FALSE"
+                )
+            )
+    for name, ddl in TERRITORY_COLUMNS.items():
+        if name not in columnas:
+            connection.execute(text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {name} {ddl}"))
+    backfill(connection)
+
+    for name, columns in INDEXES.items():
+        if name not in indices:
+            connection.execute(text(f"CREATE INDEX {name} ON {TABLE_NAME} ({columns})"))
+    return "created"
+
+
+def downgrade(connection) -> str:
+    presentes = existing_columns(connection)
+    indices = existing_indexes(connection)
+    if not presentes and not indices:
+        return "already_absent"
+
+    for name in indices:
+        if connection.dialect.name == "mysql":
+            connection.execute(text(f"DROP INDEX {name} ON {TABLE_NAME}"))
+        else:
+            connection.execute(text(f"DROP INDEX {name}"))
+    for name in presentes:
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} DROP COLUMN {name}"))
+    return "dropped"
+
+
+def apply_migration(action: str | None) -> str:
+    if action not in {"upgrade", "downgrade"}:
+        raise ComerciosExplorarMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        columnas = existing_columns(connection)
+        indices = existing_indexes(connection)
+    print(f"Columnas existentes: {sorted(columnas) or 'ninguna'}")
+    print(f"Indices existentes: {sorted(indices) or 'ninguno'}")
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except ComerciosExplorarMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""
+migrate_embeddings_jobs_reclamo.py
+----------------------------------
+Migracion aditiva del reclamo de jobs en embeddings_jobs.
+
+Agrega reclamado_por y reclamado_hasta, que el worker usa para reclamar
+cada lote antes de procesarlo. Las filas existentes quedan libres y se
+reclaman en la proxima pasada del worker.
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+
+
+TABLE_NAME = "embeddings_jobs"
+COLUMNS = {
+    "reclamado_por": "VARCHAR(32) NULL",
+    "reclamado_hasta": "DATETIME NULL",
+}
+ACTION_ENV = "FEEDGO_EMBEDDINGS_JOBS_CLAIM_MIGRATION"
+
+
+class EmbeddingsJobsClaimMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def existing_columns(connection) -> set[str]:
+    return {
+        column["name"] for column in inspect(connection).get_columns(TABLE_NAME)
+    } & set(COLUMNS)
+
+
+def upgrade(connection) -> str:
+    faltantes = [name for name in COLUMNS if name not in existing_columns(connection)]
+    if not faltantes:
+        return "already_exists"
+
+    for name in faltantes:
+        connection.execute(
+            text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {name} {COLUMNS[name]}")
+        )
+    return "created"
+
+
+def downgrade(connection) -> str:
+    presentes = [name for name in COLUMNS if name in existing_columns(connection)]
+    if not presentes:
+        return "already_absent"
+
+    for name in presentes:
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} DROP COLUMN {name}"))
+    return "dropped"
+
+
+def apply_migration(action: str | None) -> str:
+    if action not in {"upgrade", "downgrade"}:
+        raise EmbeddingsJobsClaimMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        presentes = existing_columns(connection)
+    print(f"Columnas existentes: {sorted(presentes) or 'ninguna'}")
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except EmbeddingsJobsClaimMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
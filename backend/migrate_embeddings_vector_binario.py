@@ -0,0 +1,272 @@
+"""
+migrate_embeddings_vector_binario.py
+------------------------------------
+Migracion aditiva de vectores de embeddings a formato binario float32.
+
+Aplica sobre comercios_embeddings y usuarios_embeddings:
+- agrega la columna vector_binario
+- relaja vector (JSON legado) a NULL (MODIFY en MySQL; en SQLite, que no
+  soporta MODIFY, se reconstruye la tabla)
+- convierte filas existentes por lotes y libera el JSON convertido
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+from app.modules.ai.core.vector_codec import (
+    desempaquetar_vector,
+    empaquetar_vector,
+)
+
+
+TABLES = ("comercios_embeddings", "usuarios_embeddings")
+COLUMN_NAME = "vector_binario"
+LEGACY_COLUMN_NAME = "vector"
+ACTION_ENV = "FEEDGO_EMBEDDINGS_BINARY_MIGRATION"
+BATCH_SIZE = 500
+
+
+class EmbeddingsBinaryMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def _columns(connection, table: str) -> dict[str, dict]:
+    return {
+        column["name"]: column
+        for column in inspect(connection).get_columns(table)
+    }
+
+
+def column_exists(connection, table: str) -> bool:
+    return COLUMN_NAME in _columns(connection, table)
+
+
+def legacy_column_nullable(connection, table: str) -> bool:
+    column = _columns(connection, table).get(LEGACY_COLUMN_NAME)
+    return bool(column and column.get("nullable"))
+
+
+def pending_rows(connection, table: str) -> int:
+    if not column_exists(connection, table):
+        return int(
+            connection.execute(
+                text(f"SELECT COUNT(*) FROM {table} WHERE vector IS NOT NULL")
+            ).scalar()
+            or 0
+        )
+
+    return int(
+        connection.execute(
+            text(
+                f"SELECT COUNT(*) FROM {table} "
+                "WHERE vector_binario IS NULL AND vector IS NOT NULL"
+            )
+        ).scalar()
+        or 0
+    )
+
+
+_LEGACY_NOT_NULL = re.compile(r'(\b"?vector"?\s+TEXT)\s+NOT\s+NULL', re.IGNORECASE)
+
+
+def _rebuild_sqlite_table(connection, table: str) -> None:
+    """
+    Recrea la tabla con vector nullable (SQLite no tiene ALTER COLUMN):
+    misma definición, copia de filas y re-creación de índices.
+    """
+    create_sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table},
+    ).scalar()
+    index_sqls = connection.execute(
+        text(
+            "SELECT sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"
+        ),
+        {"name": table},
+    ).scalars().all()
+
+    new_table = f"{table}__relax"
+    relaxed_sql = _LEGACY_NOT_NULL.sub(r"\1", create_sql, count=1)
+    relaxed_sql = re.sub(
+        rf'^(\s*CREATE\s+TABLE\s+)"?{table}"?',
+        rf"\1{new_table}",
+        relaxed_sql,
+        count=1,
+        flags=re.IGNORECASE,
+    )
+
+    connection.execute(text(relaxed_sql))
+    connection.execute(text(f"INSERT INTO {new_table} SELECT * FROM {table}"))
+    connection.execute(text(f"DROP TABLE {table}"))
+    connection.execute(text(f"ALTER TABLE {new_table} RENAME TO {table}"))
+    for index_sql in index_sqls:
+        connection.execute(text(index_sql))
+
+
+def _relax_legacy_column(connection, table: str) -> None:
+    if legacy_column_nullable(connection, table):
+        return
+
+    if connection.dialect.name == "mysql":
+        connection.execute(text(f"ALTER TABLE {table} MODIFY vector TEXT NULL"))
+    elif connection.dialect.name == "sqlite":
+        _rebuild_sqlite_table(connection, table)
+    else:
+        connection.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN vector DROP NOT NULL")
+        )
+
+
+def convert_rows(connection, table: str, batch_size: int = BATCH_SIZE) -> int:
+    clear_legacy = legacy_column_nullable(connection, table)
+    update_sql = (
+        f"UPDATE {table} SET vector_binario = :blob, vector = NULL WHERE id = :id"
+        if clear_legacy
+        else f"UPDATE {table} SET vector_binario = :blob WHERE id = :id"
+    )
+
+    converted = 0
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            text(
+                f"SELECT id, vector FROM {table} "
+                "WHERE id > :last_id "
+                "AND vector_binario IS NULL AND vector IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size},
+        ).all()
+        if not rows:
+            return converted
+
+        params = []
+        for row_id, vector_json in rows:
+            last_id = row_id
+            try:
+                blob = empaquetar_vector(json.loads(vector_json))
+            except (TypeError, ValueError):
+                # Vector corrupto: se deja intacto para revision manual.
+                continue
+            params.append({"id": row_id, "blob": blob})
+
+        if params:
+            connection.execute(text(update_sql), params)
+            converted += len(params)
+
+
+def upgrade(connection) -> dict[str, str]:
+    results: dict[str, str] = {}
+
+    for table in TABLES:
+        status = "already_exists"
+        if not column_exists(connection, table):
+            connection.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN vector_binario BLOB NULL")
+            )
+            status = "created"
+
+        _relax_legacy_column(connection, table)
+        converted = convert_rows(connection, table)
+        results[table] = f"{status}:converted={converted}"
+
+    return results
+
+
+def _restore_legacy_rows(connection, table: str) -> int:
+    rows = connection.execute(
+        text(
+            f"SELECT id, vector_binario FROM {table} "
+            "WHERE vector IS NULL AND vector_binario IS NOT NULL"
+        )
+    ).all()
+
+    params = [
+        {
+            "id": row_id,
+            "vector": json.dumps(desempaquetar_vector(blob).tolist()),
+        }
+        for row_id, blob in rows
+    ]
+    if params:
+        connection.execute(
+            text(f"UPDATE {table} SET vector = :vector WHERE id = :id"),
+            params,
+        )
+    return len(params)
+
+
+def downgrade(connection) -> dict[str, str]:
+    results: dict[str, str] = {}
+
+    for table in TABLES:
+        if not column_exists(connection, table):
+            results[table] = "already_absent"
+            continue
+
+        restored = _restore_legacy_rows(connection, table)
+        connection.execute(text(f"ALTER TABLE {table} DROP COLUMN vector_binario"))
+        results[table] = f"dropped:restored={restored}"
+
+    return results
+
+
+def apply_migration(action: str | None) -> dict[str, str]:
+    if action not in {"upgrade", "downgrade"}:
+        raise EmbeddingsBinaryMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        for table in TABLES:
+            exists = column_exists(connection, table)
+            pending = pending_rows(connection, table)
+            print(
+                f"{table}: columna {COLUMN_NAME} "
+                f"{'si' if exists else 'no'}, filas JSON pendientes {pending}"
+            )
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except EmbeddingsBinaryMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
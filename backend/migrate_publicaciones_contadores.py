@@ -0,0 +1,117 @@
+"""
+migrate_publicaciones_contadores.py
+-----------------------------------
+Migracion aditiva de contadores desnormalizados en publicaciones.
+
+Agrega likes_count y guardados_count y los completa desde
+likes_publicaciones / publicaciones_guardadas con un UPDATE por columna.
+Despues del upgrade conviene correr reconstruir_publicacion_scores.py.
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+
+
+TABLE_NAME = "publicaciones"
+COLUMNS = {
+    "likes_count": "likes_publicaciones",
+    "guardados_count": "publicaciones_guardadas",
+}
+ACTION_ENV = "FEEDGO_PUBLICACIONES_COUNTERS_MIGRATION"
+
+
+class PublicacionesCountersMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def existing_columns(connection) -> set[str]:
+    return {
+        column["name"] for column in inspect(connection).get_columns(TABLE_NAME)
+    } & set(COLUMNS)
+
+
+def backfill(connection) -> None:
+    for name, source_table in COLUMNS.items():
+        connection.execute(
+            text(
+                f"UPDATE {TABLE_NAME} SET {name} = ("
+                f"SELECT COUNT(*) FROM {source_table} "
+                f"WHERE {source_table}.publicacion_id = {TABLE_NAME}.id)"
+            )
+        )
+
+
+def upgrade(connection) -> str:
+    faltantes = [name for name in COLUMNS if name not in existing_columns(connection)]
+    if not faltantes:
+        return "already_exists"
+
+    for name in faltantes:
+        connection.execute(
+            text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0")
+        )
+    backfill(connection)
+    return "created"
+
+
+def downgrade(connection) -> str:
+    presentes = [name for name in COLUMNS if name in existing_columns(connection)]
+    if not presentes:
+        return "already_absent"
+
+    for name in presentes:
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} DROP COLUMN {name}"))
+    return "dropped"
+
+
+def apply_migration(action: str | None) -> str:
+    if action not in {"upgrade", "downgrade"}:
+        raise PublicacionesCountersMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        presentes = existing_columns(connection)
+    print(f"Columnas existentes: {sorted(presentes) or 'ninguna'}")
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except PublicacionesCountersMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
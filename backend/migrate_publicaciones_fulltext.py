@@ -0,0 +1,109 @@
+"""
+migrate_publicaciones_fulltext.py
+---------------------------------
+Migracion aditiva del indice FULLTEXT de publicaciones (MySQL).
+
+Crea ft_publicaciones_titulo_descripcion sobre (titulo, descripcion), que
+usa la busqueda de publicaciones con MATCH ... AGAINST. La busqueda solo
+lo consulta con PUBLICACIONES_FULLTEXT_MYSQL=true, que se activa despues
+de aplicar esta migracion. En otros motores no hace nada: la busqueda usa
+el indice invertido en memoria.
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+
+
+TABLE_NAME = "publicaciones"
+INDEX_NAME = "ft_publicaciones_titulo_descripcion"
+INDEX_COLUMNS = ("titulo", "descripcion")
+ACTION_ENV = "FEEDGO_PUBLICACIONES_FULLTEXT_MIGRATION"
+
+
+class PublicacionesFulltextMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def index_exists(connection) -> bool:
+    return any(
+        index.get("name") == INDEX_NAME
+        for index in inspect(connection).get_indexes(TABLE_NAME)
+    )
+
+
+def upgrade(connection) -> str:
+    if connection.dialect.name != "mysql":
+        return "not_applicable"
+    if index_exists(connection):
+        return "already_exists"
+
+    connection.execute(
+        text(
+            f"ALTER TABLE {TABLE_NAME} ADD FULLTEXT INDEX {INDEX_NAME} "
+            f"({', '.join(INDEX_COLUMNS)})"
+        )
+    )
+    return "created"
+
+
+def downgrade(connection) -> str:
+    if connection.dialect.name != "mysql":
+        return "not_applicable"
+    if not index_exists(connection):
+        return "already_absent"
+
+    connection.execute(text(f"ALTER TABLE {TABLE_NAME} DROP INDEX {INDEX_NAME}"))
+    return "dropped"
+
+
+def apply_migration(action: str | None) -> str:
+    if action not in {"upgrade", "downgrade"}:
+        raise PublicacionesFulltextMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        existe = index_exists(connection)
+    print(f"Indice {INDEX_NAME}: {'presente' if existe else 'ausente'}")
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except PublicacionesFulltextMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""
+migrate_usuarios_embeddings_acumulador.py
+-----------------------------------------
+Migracion aditiva del acumulador incremental en usuarios_embeddings.
+
+Agrega vector_suma_binario, interacciones_count y reconstruido_en. Las filas
+existentes quedan sin acumulador y se reconstruyen en la proxima interaccion
+o con reconstruir_embeddings_usuarios.py.
+
+Importar este modulo no modifica la base. La ejecucion directa audita por
+defecto y solo aplica upgrade o downgrade con una accion explicita.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+
+
+TABLE_NAME = "usuarios_embeddings"
+COLUMNS = {
+    "vector_suma_binario": "BLOB NULL",
+    "interacciones_count": "INTEGER NOT NULL DEFAULT 0",
+    "reconstruido_en": "DATETIME NULL",
+}
+ACTION_ENV = "FEEDGO_USER_EMBEDDINGS_ACCUMULATOR_MIGRATION"
+
+
+class UserEmbeddingsAccumulatorMigrationError(RuntimeError):
+    pass
+
+
+def safe_database_target() -> str:
+    host = engine.url.host or "<sin-host>"
+    database = engine.url.database or "<sin-base>"
+    return f"{engine.dialect.name}://{host}/{database}"
+
+
+def existing_columns(connection) -> set[str]:
+    return {
+        column["name"] for column in inspect(connection).get_columns(TABLE_NAME)
+    } & set(COLUMNS)
+
+
+def upgrade(connection) -> str:
+    faltantes = [name for name in COLUMNS if name not in existing_columns(connection)]
+    if not faltantes:
+        return "already_exists"
+
+    for name in faltantes:
+        connection.execute(
+            text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {name} {COLUMNS[name]}")
+        )
+    return "created"
+
+
+def downgrade(connection) -> str:
+    presentes = [name for name in COLUMNS if name in existing_columns(connection)]
+    if not presentes:
+        return "already_absent"
+
+    for name in presentes:
+        connection.execute(text(f"ALTER TABLE {TABLE_NAME} DROP COLUMN {name}"))
+    return "dropped"
+
+
+def apply_migration(action: str | None) -> str:
+    if action not in {"upgrade", "downgrade"}:
+        raise UserEmbeddingsAccumulatorMigrationError(
+            f"{ACTION_ENV} debe ser 'upgrade' o 'downgrade'."
+        )
+
+    with engine.begin() as connection:
+        if action == "upgrade":
+            return upgrade(connection)
+        return downgrade(connection)
+
+
+def main() -> int:
+    print(f"Destino: {safe_database_target()}")
+    with engine.connect() as connection:
+        presentes = existing_columns(connection)
+    print(f"Columnas existentes: {sorted(presentes) or 'ninguna'}")
+
+    action = os.environ.get(ACTION_ENV)
+    if action is None:
+        print("Modo auditoria: esquema no modificado.")
+        print(f"Para aplicar, definir {ACTION_ENV}=upgrade o downgrade.")
+        return 0
+
+    try:
+        result = apply_migration(action)
+    except UserEmbeddingsAccumulatorMigrationError as exc:
+        print(f"MIGRACION FALLIDA: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"MIGRACION OK: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
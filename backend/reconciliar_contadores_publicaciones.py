@@ -0,0 +1,39 @@
+"""
+reconciliar_contadores_publicaciones.py
+---------------------------------------
+Reconciliacion de likes_count / guardados_count de publicaciones.
+
+Los likes/guardados ajustan los contadores con UPDATE +-1; este script los
+recalcula desde likes_publicaciones y publicaciones_guardadas, corrige solo
+las filas con drift y refresca su fila en publicacion_scores. Pensado para
+correr por cron, por ejemplo una vez por dia:
+
+python reconciliar_contadores_publicaciones.py
+"""
+
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.posts.services.publicacion_scores_services import (
+    recalcular_scores_publicaciones,
+)
+from app.modules.posts.services.publicaciones_services import (
+    reconciliar_contadores_publicaciones,
+)
+
+
+def main() -> int:
+    import_all_models()
+
+    db = SessionLocal()
+    try:
+        corregidas = reconciliar_contadores_publicaciones(db)
+        recalcular_scores_publicaciones(db, corregidas)
+    finally:
+        db.close()
+
+    print(f"Publicaciones con contadores corregidos: {len(corregidas)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+"""
+reconstruir_embeddings_usuarios.py
+----------------------------------
+Reconstruccion periodica del acumulador de embeddings de usuario.
+
+Los likes/guardados aplican deltas incrementales; este script recalcula suma
+y promedio desde cero para corregir drift (comercios re-embebidos, cambios de
+modelo). Pensado para correr por cron, por ejemplo una vez por dia:
+
+python reconstruir_embeddings_usuarios.py
+"""
+
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.ai.models.usuarios_embeddings_models import UsuarioEmbedding
+from app.modules.ai.services.usuarios_embeddings_services import (
+    reconstruir_acumulador_usuario,
+)
+
+
+def main() -> int:
+    import_all_models()
+
+    db = SessionLocal()
+    try:
+        usuario_ids = [
+            usuario_id
+            for (usuario_id,) in (
+                db.query(UsuarioEmbedding.usuario_id)
+                .order_by(UsuarioEmbedding.usuario_id.asc())
+                .all()
+            )
+        ]
+
+        for usuario_id in usuario_ids:
+            reconstruir_acumulador_usuario(db, usuario_id)
+    finally:
+        db.close()
+
+    print(f"Embeddings de usuario reconstruidos: {len(usuario_ids)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
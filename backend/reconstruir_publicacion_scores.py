@@ -0,0 +1,36 @@
+"""
+reconstruir_publicacion_scores.py
+---------------------------------
+Reconstruccion completa del read model publicacion_scores.
+
+Los eventos (likes, guardados, altas, desactivaciones) mantienen cada fila
+y el worker de decaimiento actualiza la recencia; este script recalcula
+todo desde publicaciones. Ranking y feed hacen inner join con la tabla y
+no la llenan al leer: correr una vez despues de crearla (create_tables.py),
+antes de servir trafico, y opcionalmente por cron para corregir drift:
+
+python reconstruir_publicacion_scores.py
+"""
+
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.posts.services.publicacion_scores_services import (
+    reconstruir_scores_publicaciones,
+)
+
+
+def main() -> int:
+    import_all_models()
+
+    db = SessionLocal()
+    try:
+        total = reconstruir_scores_publicaciones(db)
+    finally:
+        db.close()
+
+    print(f"Scores de publicaciones reconstruidos: {total}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
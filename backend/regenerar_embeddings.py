@@ -4,74 +4,267 @@ Script para regenerar embeddings de todos los espacios.
 Se ejecuta desde consola:
 
 python regenerar_embeddings.py
+python regenerar_embeddings.py --workers 4 --tamano-lote 512
+
+- Recorre comercios por id en lotes (keyset), con el rubro eager-loaded
+- Cada lote: una inferencia batch + un upsert en una sola sentencia
+- Con --workers > 1 la inferencia corre en un pool de procesos
+- Guarda un checkpoint con el último id escrito: si la corrida se corta,
+  la siguiente retoma desde ahí (--desde-cero lo ignora)
+- Al terminar informa el throughput (comercios/s)
 """
 
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload, lazyload
+
+from app.core.database import SessionLocal
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.embedding_factory import get_embedding_provider
+from app.modules.ai.core.embedding_provider import DEFAULT_BATCH_SIZE
+from app.modules.ai.services.comercios_embeddings_services import (
+    _build_texto_comercio,
+    guardar_vectores_comercios,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+
+
+# Comercios por lote: una inferencia batch + un commit por lote.
+TAMANO_LOTE = 256
+CHECKPOINT_DEFAULT = "regenerar_embeddings.checkpoint.json"
+
+
+@dataclass(frozen=True)
+class ResumenRegeneracion:
+    procesados: int
+    ultimo_id: int
+    reanudado_desde: int
+    segundos: float
+
+    @property
+    def comercios_por_segundo(self) -> float:
+        if self.segundos <= 0:
+            return float(self.procesados)
+        return self.procesados / self.segundos
+
+
 # ============================================================
-# IMPORTANTE:
-# Importamos TODOS los modelos relacionados para que
-# SQLAlchemy registre correctamente los mappers.
+# Checkpoint
 # ============================================================
 
-# USERS
-import app.modules.users.models.usuarios_models
-import app.modules.users.models.tokens_models
+def leer_checkpoint(path: Path, model_id: str) -> int:
+    """
+    Devuelve el último id escrito por una corrida anterior (0 si no hay).
 
-# SPACES
-import app.modules.spaces.models.comercios_models
+    Un checkpoint de otro modelo se ignora: sus vectores no son compatibles.
+    """
+    try:
+        datos = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
 
-# PRODUCTS
-import app.modules.products.models.productos_models
-import app.modules.products.models.rubros_models
-import app.modules.products.models.secciones_models
+    if datos.get("model_id") != model_id:
+        return 0
+    return int(datos.get("ultimo_id") or 0)
 
-# POSTS
-import app.modules.posts.models.publicaciones_models
 
-# STORIES
-import app.modules.stories.models.historias_models
-import app.modules.stories.models.historias_vistas_models
-import app.modules.stories.models.historias_likes_models
+def guardar_checkpoint(path: Path, *, model_id: str, ultimo_id: int, procesados: int) -> None:
+    temporal = path.with_suffix(path.suffix + ".tmp")
+    temporal.write_text(
+        json.dumps(
+            {
+                "model_id": model_id,
+                "ultimo_id": ultimo_id,
+                "procesados": procesados,
+            }
+        ),
+        encoding="utf-8",
+    )
+    # Reemplazo atómico: un corte a mitad de escritura no corrompe el archivo.
+    os.replace(temporal, path)
 
-# SOCIAL
-import app.modules.social.models.likes_publicaciones_models
-import app.modules.social.models.publicaciones_guardadas_models
-import app.modules.social.models.seguidores_models
 
-# AI
-import app.modules.ai.models.comercios_embeddings_models
-import app.modules.ai.models.usuarios_embeddings_models
+# ============================================================
+# Pipeline
+# ============================================================
 
-from app.core.database import SessionLocal
+def iterar_lotes(
+    db: Session,
+    *,
+    desde_id: int = 0,
+    tamano_lote: int = TAMANO_LOTE,
+) -> Iterator[list[tuple[int, str]]]:
+    """
+    Lotes de (comercio_id, texto) en orden de id, sin cargar toda la tabla.
+    """
+    ultimo_id = desde_id
+    while True:
+        comercios = (
+            db.query(Comercio)
+            # Solo el rubro: el resto de relaciones (selectin) no se usa acá.
+            .options(joinedload(Comercio.rubro), lazyload("*"))
+            .filter(Comercio.id > ultimo_id)
+            .order_by(Comercio.id.asc())
+            .limit(tamano_lote)
+            .all()
+        )
+        if not comercios:
+            return
 
-from app.modules.spaces.models.comercios_models import Comercio
+        lote = [(comercio.id, _build_texto_comercio(comercio)) for comercio in comercios]
+        ultimo_id = lote[-1][0]
+        # Memoria acotada: los ORM del lote ya no se necesitan.
+        db.expunge_all()
+        yield lote
 
-from app.modules.ai.services.comercios_embeddings_services import (
-    upsert_embedding_comercio,
-)
 
+def embeber_textos(textos: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> list[list[float]]:
+    # Corre también dentro de los procesos del pool: cada uno carga su provider.
+    return get_embedding_provider(usar_cache=False).embed_texts(textos, batch_size=batch_size)
 
-def main():
-    db = SessionLocal()
 
-    comercios = db.query(Comercio).all()
+def _vectores_en_orden(
+    lotes: Iterator[list[tuple[int, str]]],
+    *,
+    workers: int,
+    batch_size: int,
+) -> Iterator[tuple[list[tuple[int, str]], list[list[float]]]]:
+    if workers <= 1:
+        for lote in lotes:
+            yield lote, embeber_textos([texto for _, texto in lote], batch_size)
+        return
 
-    print(f"\nTotal espacios: {len(comercios)}\n")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pendientes: deque[tuple[list[tuple[int, str]], Future]] = deque()
+        for lote in lotes:
+            pendientes.append(
+                (lote, pool.submit(embeber_textos, [texto for _, texto in lote], batch_size))
+            )
+            # Se escribe en orden de id para que el checkpoint sea monotónico.
+            if len(pendientes) >= workers * 2:
+                lote_listo, futuro = pendientes.popleft()
+                yield lote_listo, futuro.result()
+
+        while pendientes:
+            lote_listo, futuro = pendientes.popleft()
+            yield lote_listo, futuro.result()
 
-    for comercio in comercios:
-        print(
-            f"Recalculando embedding -> "
-            f"{comercio.id} - {comercio.nombre}"
-        )
 
-        upsert_embedding_comercio(
-            db=db,
-            comercio=comercio,
+def regenerar_embeddings(
+    db: Session,
+    *,
+    tamano_lote: int = TAMANO_LOTE,
+    workers: int = 1,
+    checkpoint_path: Path | None = None,
+    desde_cero: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ResumenRegeneracion:
+    model_id = get_embedding_provider().model_id
+    desde_id = 0
+    if checkpoint_path is not None and not desde_cero:
+        desde_id = leer_checkpoint(checkpoint_path, model_id)
+
+    inicio = time.perf_counter()
+    procesados = 0
+    ultimo_id = desde_id
+
+    lotes = iterar_lotes(db, desde_id=desde_id, tamano_lote=max(1, tamano_lote))
+    for lote, vectores in _vectores_en_orden(lotes, workers=workers, batch_size=batch_size):
+        guardar_vectores_comercios(
+            db,
+            {comercio_id: vector for (comercio_id, _), vector in zip(lote, vectores)},
         )
+        procesados += len(lote)
+        ultimo_id = lote[-1][0]
+        if checkpoint_path is not None:
+            guardar_checkpoint(
+                checkpoint_path,
+                model_id=model_id,
+                ultimo_id=ultimo_id,
+                procesados=procesados,
+            )
+        print(f"Embeddings escritos -> hasta id {ultimo_id} ({procesados} espacios)")
+
+    if checkpoint_path is not None:
+        # Corrida completa: la próxima arranca desde el principio.
+        checkpoint_path.unlink(missing_ok=True)
+
+    return ResumenRegeneracion(
+        procesados=procesados,
+        ultimo_id=ultimo_id,
+        reanudado_desde=desde_id,
+        segundos=time.perf_counter() - inicio,
+    )
+
 
-    db.close()
+# ============================================================
+# CLI
+# ============================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Regenera los embeddings de todos los comercios por lotes.",
+    )
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para la inferencia (1 = en el proceso actual).",
+    )
+    parser.add_argument("--checkpoint", default=CHECKPOINT_DEFAULT)
+    parser.add_argument(
+        "--desde-cero",
+        action="store_true",
+        help="Ignora el checkpoint de una corrida anterior.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    import_all_models()
+
+    db = SessionLocal()
+    try:
+        resumen = regenerar_embeddings(
+            db,
+            tamano_lote=args.tamano_lote,
+            workers=args.workers,
+            checkpoint_path=Path(args.checkpoint),
+            desde_cero=args.desde_cero,
+        )
+    except SQLAlchemyError as exc:
+        db.rollback()
+        print(
+            f"REGENERACION INTERRUMPIDA: {exc.__class__.__name__}. "
+            "Volver a ejecutar para retomar desde el checkpoint.",
+            file=sys.stderr,
+        )
+        return 2
+    finally:
+        db.close()
 
-    print("\nEmbeddings regenerados correctamente.\n")
+    if resumen.reanudado_desde:
+        print(f"Retomado desde id {resumen.reanudado_desde}.")
+    print(
+        f"\nEmbeddings regenerados: {resumen.procesados} espacios en "
+        f"{resumen.segundos:.1f}s ({resumen.comercios_por_segundo:.1f} comercios/s).\n"
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
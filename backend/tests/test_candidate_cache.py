@@ -0,0 +1,215 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.core.operation_metrics import (
+    METRIC_CANDIDATE_CACHE_HIT_COUNT,
+    METRIC_CANDIDATE_CACHE_MISS_COUNT,
+    local_metrics_sink,
+)
+from app.modules.discovery.services.catalogo_version_services import (
+    CLAVE_BUSQUEDA,
+    incrementar_version_catalogo,
+    obtener_version_catalogo,
+    reiniciar_memo_version_catalogo,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine import (
+    CachedCandidateGeneration,
+    CandidateSet,
+    CandidateSourceStats,
+    LocalCandidateCacheStore,
+    get_or_generate_candidates,
+    reset_candidate_cache,
+    set_candidate_cache_store,
+)
+from app.modules.search.services.candidate_engine import candidate_cache
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.spaces.services.comercios_services import desactivar_comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _generacion(etiqueta):
+    return CachedCandidateGeneration(
+        discovery_nodes=(etiqueta,),
+        candidate_set=CandidateSet(),
+    )
+
+
+class StoreRoto:
+    def get(self, key):
+        raise ConnectionError("store caido")
+
+    def set(self, key, value, ttl_seconds):
+        raise ConnectionError("store caido")
+
+    def clear(self):
+        pass
+
+
+class LocalCandidateCacheStoreTests(unittest.TestCase):
+    def test_lru_acotado_y_vencimiento_por_ttl(self):
+        store = LocalCandidateCacheStore(max_entries=2)
+        with patch.object(candidate_cache.time, "monotonic", return_value=100.0):
+            store.set("a", _generacion("a"), ttl_seconds=10)
+            store.set("b", _generacion("b"), ttl_seconds=10)
+            store.get("a")
+            store.set("c", _generacion("c"), ttl_seconds=10)
+
+            self.assertIsNone(store.get("b"))
+            self.assertEqual(store.get("a").discovery_nodes, ("a",))
+
+        with patch.object(candidate_cache.time, "monotonic", return_value=110.0):
+            self.assertIsNone(store.get("a"))
+        self.assertEqual(len(store), 1)
+
+
+class CandidateCacheTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_memo_version_catalogo()
+        reset_candidate_cache()
+        local_metrics_sink.clear()
+        self.db = SessionLocal()
+        self.generadas = []
+
+    def tearDown(self):
+        self.db.close()
+        reiniciar_memo_version_catalogo()
+        reset_candidate_cache()
+        Base.metadata.drop_all(bind=engine)
+
+    def _generar(self, query="pizza", terminos=("pizza", "pizzeria")):
+        def generate():
+            self.generadas.append(query)
+            return _generacion(f"{query}-{len(self.generadas)}")
+
+        return get_or_generate_candidates(
+            self.db,
+            query_normalizada=query,
+            terminos_expandidos=list(terminos),
+            familia_intencion="comida",
+            generate=generate,
+        )
+
+    def _metric_total(self, name):
+        return sum(
+            sample.value
+            for sample in local_metrics_sink.snapshot()
+            if sample.name == name
+        )
+
+    def test_query_repetida_reusa_la_generacion(self):
+        primera, hit_primera = self._generar()
+        segunda, hit_segunda = self._generar()
+        self._generar(terminos=("pizza",))
+
+        self.assertEqual((hit_primera, hit_segunda), (False, True))
+        self.assertIs(segunda, primera)
+        self.assertEqual(len(self.generadas), 2)
+        self.assertEqual(self._metric_total(METRIC_CANDIDATE_CACHE_HIT_COUNT), 1)
+        self.assertEqual(self._metric_total(METRIC_CANDIDATE_CACHE_MISS_COUNT), 2)
+
+    def test_generacion_con_fuente_caida_no_se_cachea(self):
+        def generate():
+            self.generadas.append("pizza")
+            return CachedCandidateGeneration(
+                discovery_nodes=(),
+                candidate_set=CandidateSet(
+                    source_stats={
+                        "text": CandidateSourceStats(source="text", status="ok", latency_ms=1.0),
+                        "discovery": CandidateSourceStats(
+                            source="discovery", status="timeout", latency_ms=50.0
+                        ),
+                    }
+                ),
+            )
+
+        for _ in range(2):
+            _, hit = get_or_generate_candidates(
+                self.db,
+                query_normalizada="pizza",
+                terminos_expandidos=["pizza"],
+                familia_intencion=None,
+                generate=generate,
+            )
+            self.assertFalse(hit)
+
+        self.assertEqual(len(self.generadas), 2)
+        self.assertEqual(self._generar()[1], False)
+        self.assertEqual(self._generar()[1], True)
+
+    def test_cambio_de_comercios_invalida_por_version(self):
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        self.db.add(
+            Comercio(
+                id=1,
+                usuario_id=1,
+                nombre="Pizzería",
+                portada_url="/uploads/test.jpg",
+                rubro_id=1,
+                provincia="Santa Fe",
+                ciudad="Rafaela",
+                activo=True,
+            )
+        )
+        self.db.commit()
+        self._generar()
+
+        desactivar_comercio(self.db, self.db.get(Usuario, 1), self.db.get(Comercio, 1))
+
+        self.assertEqual(obtener_version_catalogo(self.db, CLAVE_BUSQUEDA), 1)
+        _, hit = self._generar()
+        self.assertFalse(hit)
+        self.assertEqual(len(self.generadas), 2)
+
+        incrementar_version_catalogo(self.db)
+        self.db.commit()
+        _, hit = self._generar()
+        self.assertFalse(hit)
+
+    def test_sin_tabla_de_versiones_no_cachea(self):
+        Base.metadata.drop_all(bind=engine)
+
+        self._generar()
+        _, hit = self._generar()
+
+        self.assertFalse(hit)
+        self.assertEqual(len(self.generadas), 2)
+        self.assertEqual(
+            [
+                sample.tags
+                for sample in local_metrics_sink.snapshot()
+                if sample.name == METRIC_CANDIDATE_CACHE_MISS_COUNT
+            ],
+            [{"reason": "no_version"}, {"reason": "no_version"}],
+        )
+
+    def test_store_enchufable_que_falla_degrada_a_miss(self):
+        set_candidate_cache_store(StoreRoto())
+
+        generacion, hit = self._generar()
+
+        self.assertFalse(hit)
+        self.assertEqual(generacion.discovery_nodes, ("pizza-1",))
+        self.assertEqual(self._metric_total(METRIC_CANDIDATE_CACHE_MISS_COUNT), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
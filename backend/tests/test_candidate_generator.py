@@ -0,0 +1,213 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.operation_metrics import (
+    METRIC_CANDIDATE_SOURCE_DROPPED_COUNT,
+    local_metrics_sink,
+)
+from app.modules.search.services.candidate_engine import (
+    CandidateEvidence,
+    CandidateGenerationContext,
+    candidate_source_stats_metadata,
+    generate_candidates,
+    shutdown_candidate_executor,
+)
+
+
+engine = create_engine("sqlite://")
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class FuenteFija:
+    def __init__(self, source, comercio_ids, *, espera=None, error=None, budget_ms=None):
+        self.source = source
+        self.comercio_ids = comercio_ids
+        self.espera = espera
+        self.error = error
+        self.sesiones = []
+        if budget_ms is not None:
+            self.budget_ms = budget_ms
+
+    def generate(self, context, db):
+        self.sesiones.append(db)
+        if self.espera is not None:
+            self.espera.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [
+            CandidateEvidence(
+                comercio_id=comercio_id,
+                source=self.source,
+                reason=context.query_normalizada,
+                matched_entity_type="comercio",
+            )
+            for comercio_id in self.comercio_ids
+        ]
+
+
+class SesionFalsa:
+    def __init__(self, cerradas):
+        self._cerradas = cerradas
+
+    def close(self):
+        self._cerradas.append(self)
+
+
+class CandidateGeneratorTests(unittest.TestCase):
+    def setUp(self):
+        local_metrics_sink.clear()
+        self.context = CandidateGenerationContext(
+            query_original="Pizza",
+            query_normalizada="pizza",
+        )
+
+    def tearDown(self):
+        shutdown_candidate_executor()
+
+    def _dropped(self):
+        return [
+            sample.tags
+            for sample in local_metrics_sink.snapshot()
+            if sample.name == METRIC_CANDIDATE_SOURCE_DROPPED_COUNT
+        ]
+
+    def test_secuencial_en_sqlite_aisla_errores_y_reporta_stats(self):
+        db = TestingSessionLocal()
+        fuentes = [
+            FuenteFija("nombre", [1, 2]),
+            FuenteFija("rota", [9], error=RuntimeError("boom")),
+            FuenteFija("rubro", [2, 3]),
+        ]
+
+        with patch.object(db, "rollback") as rollback:
+            candidate_set = generate_candidates(self.context, db, fuentes)
+        db.close()
+
+        # La transacción del llamador no se toca.
+        rollback.assert_not_called()
+        self.assertEqual(sorted(candidate_set.candidates_by_comercio_id), [1, 2, 3])
+        self.assertTrue(all(fuente.sesiones == [db] for fuente in fuentes))
+        stats = candidate_set.source_stats
+        self.assertEqual(
+            [(stats[n].status, stats[n].evidence_count) for n in ("nombre", "rota", "rubro")],
+            [("ok", 2), ("error", 0), ("ok", 2)],
+        )
+        self.assertEqual(stats["rota"].reason, "RuntimeError")
+        self.assertEqual(self._dropped(), [{"source": "rota", "status": "error"}])
+
+        metadata = candidate_source_stats_metadata(candidate_set)
+        self.assertEqual(metadata["candidate_source_count_nombre"], 2)
+        self.assertIn("candidate_source_ms_rubro", metadata)
+        self.assertEqual(metadata["candidate_sources_dropped"], ["rota"])
+
+    def test_concurrente_usa_una_sesion_por_fuente_y_descarta_la_lenta(self):
+        cerradas = []
+        liberar = threading.Event()
+        lenta = FuenteFija("lenta", [7], espera=liberar, budget_ms=50)
+        rapidas = [FuenteFija("nombre", [1]), FuenteFija("rubro", [2])]
+
+        try:
+            inicio = time.perf_counter()
+            candidate_set = generate_candidates(
+                self.context,
+                TestingSessionLocal(),
+                [lenta, *rapidas],
+                session_factory=lambda: SesionFalsa(cerradas),
+                budget_ms=2000,
+            )
+            duracion = time.perf_counter() - inicio
+        finally:
+            liberar.set()
+
+        self.assertLess(duracion, 1.5)
+        self.assertEqual(sorted(candidate_set.candidates_by_comercio_id), [1, 2])
+        self.assertEqual(candidate_set.source_stats["lenta"].status, "timeout")
+        self.assertEqual(candidate_set.source_stats["lenta"].reason, "budget_exceeded")
+        self.assertEqual(candidate_set.source_stats["nombre"].status, "ok")
+
+        sesiones = [s for f in (lenta, *rapidas) for s in f.sesiones]
+        self.assertEqual(len({id(s) for s in sesiones}), 3)
+        shutdown_candidate_executor()
+        for _ in range(50):
+            if len(cerradas) == 3:
+                break
+            time.sleep(0.01)
+        # La fuente descartada también cierra su sesión al terminar.
+        self.assertEqual(len(cerradas), 3)
+
+    def _generar_con_dos_workers(self, fuentes, **settings_extra):
+        shutdown_candidate_executor()
+        with patch.object(settings, "CANDIDATE_ENGINE_MAX_WORKERS", 2):
+            with patch.multiple(settings, **settings_extra):
+                return generate_candidates(
+                    self.context,
+                    TestingSessionLocal(),
+                    fuentes,
+                    session_factory=lambda: SesionFalsa([]),
+                    budget_ms=2000,
+                )
+
+    def test_el_presupuesto_corre_desde_que_la_fuente_arranca(self):
+        ocupadas = [
+            FuenteFija(f"ocupada_{i}", [i], espera=threading.Event(), budget_ms=2000)
+            for i in (1, 2)
+        ]
+        liberador = threading.Timer(0.3, lambda: [f.espera.set() for f in ocupadas])
+        liberador.start()
+        # En cola ~300 ms, más que su presupuesto de 100 ms.
+        encolada = FuenteFija("encolada", [3], budget_ms=100)
+
+        candidate_set = self._generar_con_dos_workers(
+            [*ocupadas, encolada],
+            CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS=2000,
+        )
+        liberador.join()
+
+        self.assertEqual(candidate_set.source_stats["encolada"].status, "ok")
+        self.assertLess(candidate_set.source_stats["encolada"].latency_ms, 100)
+        self.assertEqual(sorted(candidate_set.candidates_by_comercio_id), [1, 2, 3])
+
+    def test_fuente_que_no_arranca_a_tiempo_se_cancela(self):
+        liberar = threading.Event()
+        ocupadas = [
+            FuenteFija(f"ocupada_{i}", [i], espera=liberar, budget_ms=100)
+            for i in (1, 2)
+        ]
+        encolada = FuenteFija("encolada", [3])
+
+        try:
+            candidate_set = self._generar_con_dos_workers(
+                [*ocupadas, encolada],
+                CANDIDATE_SOURCE_QUEUE_TIMEOUT_MS=50,
+            )
+        finally:
+            liberar.set()
+
+        stats = candidate_set.source_stats["encolada"]
+        self.assertEqual((stats.status, stats.reason), ("timeout", "queue_timeout"))
+        self.assertEqual(encolada.sesiones, [])
+
+    def test_un_solo_worker_ejecuta_secuencial(self):
+        db = TestingSessionLocal()
+        fuentes = [FuenteFija("nombre", [1]), FuenteFija("rubro", [2])]
+
+        with patch.object(settings, "CANDIDATE_ENGINE_MAX_WORKERS", 1):
+            generate_candidates(
+                self.context,
+                db,
+                fuentes,
+                session_factory=lambda: SesionFalsa([]),
+            )
+        db.close()
+
+        self.assertTrue(all(fuente.sesiones == [db] for fuente in fuentes))
+
+
+if __name__ == "__main__":
+    unittest.main()
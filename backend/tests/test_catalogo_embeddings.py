@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.models.catalogo_embeddings_models import CatalogoEmbedding
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+from app.modules.ai.services import rubros_embeddings_services
+from app.modules.ai.services.catalogo_embeddings_services import (
+    ENTITY_RUBRO,
+    ENTITY_TAXONOMY_NODE,
+    obtener_embeddings_catalogo,
+    precargar_embeddings_catalogo,
+    reiniciar_cache_embeddings_catalogo,
+)
+from app.modules.ai.services.rubros_embeddings_services import detectar_rubros_por_query
+from app.modules.products.models.rubros_models import Rubro
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class _CountingProvider(SimulatedEmbeddingProvider):
+    def __init__(self, dim=8, model_id="fake-v1"):
+        super().__init__(dim=dim)
+        self._model_id = model_id
+        self.embedded = []
+
+    @property
+    def model_id(self):
+        return self._model_id
+
+    def embed_texts(self, texts, batch_size=64):
+        self.embedded.extend(texts)
+        return super().embed_texts(texts, batch_size)
+
+
+class CatalogoEmbeddingsTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_cache_embeddings_catalogo()
+        rubros_embeddings_services._RUBROS_EMBEDDINGS_CACHE.clear()
+        self.db = SessionLocal()
+        self.provider = _CountingProvider()
+        patcher = patch(
+            "app.modules.ai.services.catalogo_embeddings_services.get_embedding_provider",
+            return_value=self.provider,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch(
+            "app.modules.ai.services.catalogo_embeddings_services.model_id_configurado",
+            return_value=self.provider.model_id,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+        reiniciar_cache_embeddings_catalogo()
+        rubros_embeddings_services._RUBROS_EMBEDDINGS_CACHE.clear()
+        Base.metadata.drop_all(bind=engine)
+
+    def _obtener(self, textos):
+        return obtener_embeddings_catalogo(
+            self.db,
+            entity_type=ENTITY_TAXONOMY_NODE,
+            textos_por_id=textos,
+        )
+
+    def test_persiste_y_otro_worker_no_recalcula(self):
+        primero = self._obtener({1: "pizzeria", 2: "ferreteria"})
+        self.assertEqual(sorted(self.provider.embedded), ["ferreteria", "pizzeria"])
+        self.assertEqual(self.db.query(CatalogoEmbedding).count(), 2)
+
+        # Simula un worker nuevo: memoria vacía, misma BD.
+        reiniciar_cache_embeddings_catalogo()
+        self.provider.embedded.clear()
+        self.assertEqual(precargar_embeddings_catalogo(self.db), 2)
+
+        segundo = self._obtener({1: "pizzeria", 2: "ferreteria"})
+
+        self.assertEqual(self.provider.embedded, [])
+        for entity_id in (1, 2):
+            self.assertEqual(segundo[entity_id], primero[entity_id])
+
+    def test_persistir_no_toca_la_sesion_del_request(self):
+        with patch.object(self.db, "commit") as commit, patch.object(
+            self.db, "rollback"
+        ) as rollback:
+            self._obtener({1: "pizzeria"})
+
+        commit.assert_not_called()
+        rollback.assert_not_called()
+        self.assertEqual(self.db.query(CatalogoEmbedding).count(), 1)
+
+    def test_solo_recalcula_textos_cambiados(self):
+        self._obtener({1: "pizzeria", 2: "ferreteria"})
+        self.provider.embedded.clear()
+
+        self._obtener({1: "pizzeria", 2: "ferreteria industrial"})
+
+        self.assertEqual(self.provider.embedded, ["ferreteria industrial"])
+        self.assertEqual(self.db.query(CatalogoEmbedding).count(), 2)
+
+    def test_cambio_de_modelo_recalcula_sin_pisar_vectores_previos(self):
+        self._obtener({1: "pizzeria"})
+
+        self.provider._model_id = "fake-v2"
+        self.provider.embedded.clear()
+        self._obtener({1: "pizzeria"})
+
+        self.assertEqual(self.provider.embedded, ["pizzeria"])
+        self.assertEqual(
+            {fila.model_id for fila in self.db.query(CatalogoEmbedding).all()},
+            {"fake-v1", "fake-v2"},
+        )
+
+    def test_deteccion_de_rubros_usa_vectores_persistidos(self):
+        self.db.add(Rubro(id=1, nombre="Gastronomia", descripcion="Comida", activo=True))
+        self.db.commit()
+
+        with patch(
+            "app.modules.ai.services.rubros_embeddings_services.get_embedding_provider",
+            return_value=self.provider,
+        ):
+            detectar_rubros_por_query(self.db, "gastronomia")
+            rubros_embeddings_services._RUBROS_EMBEDDINGS_CACHE.clear()
+            reiniciar_cache_embeddings_catalogo()
+            self.provider.embedded.clear()
+
+            detectar_rubros_por_query(self.db, "gastronomia")
+
+        self.assertEqual(self.provider.embedded, [])
+        fila = self.db.query(CatalogoEmbedding).one()
+        self.assertEqual((fila.entity_type, fila.entity_id), (ENTITY_RUBRO, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
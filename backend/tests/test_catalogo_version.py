@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+from app.modules.ai.services import rubros_embeddings_services
+from app.modules.ai.services.catalogo_embeddings_services import (
+    reiniciar_cache_embeddings_catalogo,
+)
+from app.modules.ai.services.rubros_embeddings_services import detectar_rubros_por_query
+from app.modules.discovery.services import catalogo_version_services
+from app.modules.discovery.services.catalogo_version_services import (
+    incrementar_version_catalogo,
+    obtener_version_catalogo,
+    reiniciar_memo_version_catalogo,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.products.services.rubros_services import asegurar_catalogo_rubros
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class CatalogoVersionTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_memo_version_catalogo()
+        reiniciar_cache_embeddings_catalogo()
+        rubros_embeddings_services._RUBROS_EMBEDDINGS_CACHE.clear()
+        self.db = SessionLocal()
+
+    def tearDown(self):
+        self.db.close()
+        reiniciar_memo_version_catalogo()
+        reiniciar_cache_embeddings_catalogo()
+        rubros_embeddings_services._RUBROS_EMBEDDINGS_CACHE.clear()
+        Base.metadata.drop_all(bind=engine)
+
+    def test_incremento_visible_para_otros_workers_al_vencer_ttl(self):
+        self.assertEqual(obtener_version_catalogo(self.db), 0)
+
+        incrementar_version_catalogo(self.db)
+        incrementar_version_catalogo(self.db)
+        self.db.commit()
+        self.assertEqual(obtener_version_catalogo(self.db), 2)
+
+        # Otro worker incrementa directo en la BD; el memo local vence por TTL.
+        otra_sesion = SessionLocal()
+        incrementar_version_catalogo(otra_sesion)
+        otra_sesion.commit()
+        otra_sesion.close()
+        obtener_version_catalogo(self.db)
+
+        with patch.object(catalogo_version_services, "TTL_VERSION_SEGUNDOS", 0):
+            self.assertEqual(obtener_version_catalogo(self.db), 3)
+
+    def test_existencia_de_la_tabla_se_consulta_una_vez_por_engine(self):
+        with patch.object(
+            catalogo_version_services,
+            "inspect",
+            wraps=catalogo_version_services.inspect,
+        ) as inspeccion:
+            for _ in range(3):
+                incrementar_version_catalogo(self.db)
+            self.db.commit()
+
+        self.assertLessEqual(inspeccion.call_count, 1)
+        self.assertEqual(obtener_version_catalogo(self.db), 3)
+
+    def test_asegurar_catalogo_rubros_incrementa_version_solo_con_cambios(self):
+        asegurar_catalogo_rubros(self.db)
+        self.assertEqual(obtener_version_catalogo(self.db), 1)
+
+        asegurar_catalogo_rubros(self.db)
+        reiniciar_memo_version_catalogo()
+        self.assertEqual(obtener_version_catalogo(self.db), 1)
+
+    def test_cache_de_rubros_no_relee_tabla_mientras_no_cambie_version(self):
+        self.db.add(Rubro(id=1, nombre="Gastronomia", descripcion="Comida", activo=True))
+        self.db.commit()
+
+        sentencias = []
+
+        def _registrar(conn, cursor, statement, *args):
+            sentencias.append(statement)
+
+        provider = SimulatedEmbeddingProvider()
+        with patch(
+            "app.modules.ai.services.rubros_embeddings_services.get_embedding_provider",
+            return_value=provider,
+        ), patch(
+            "app.modules.ai.services.catalogo_embeddings_services.get_embedding_provider",
+            return_value=provider,
+        ):
+            detectar_rubros_por_query(self.db, "gastronomia")
+
+            event.listen(engine, "before_cursor_execute", _registrar)
+            try:
+                detectar_rubros_por_query(self.db, "gastronomia")
+            finally:
+                event.remove(engine, "before_cursor_execute", _registrar)
+
+            self.assertFalse(any("FROM rubros" in sql for sql in sentencias))
+
+            rubro = self.db.get(Rubro, 1)
+            rubro.nombre = "Ferreteria"
+            incrementar_version_catalogo(self.db)
+            self.db.commit()
+
+            detectados = detectar_rubros_por_query(
+                self.db,
+                "Ferreteria. Comida",
+                min_score=0.99,
+            )
+
+        self.assertEqual([item.nombre for item in detectados], ["Ferreteria"])
+
+
+if __name__ == "__main__":
+    unittest.main()
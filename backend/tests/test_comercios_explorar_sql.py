@@ -0,0 +1,219 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.posts.schemas.publicaciones_schemas import PublicacionCreate
+from app.modules.posts.services.publicaciones_services import crear_publicacion
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.spaces.services.comercios_services import (
+    _calcular_distancia_km,
+    _caja_radio,
+    listar_comercios_activos,
+)
+from app.modules.spaces.services.comercios_sesion_busqueda_services import (
+    reiniciar_sesiones_busqueda,
+)
+from app.modules.stories.schemas.historias_schemas import HistoriaCreate
+from app.modules.stories.services.historias_services import crear_historia
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_comercios_explorar_sql import downgrade, upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class CajaRadioTests(unittest.TestCase):
+    def test_la_caja_contiene_el_circulo(self):
+        lat, lng = -31.25, -61.49
+        lat_min, lat_max, lng_min, lng_max = _caja_radio(lat, lng, 50)
+
+        for destino in ((lat_min, lng), (lat_max, lng), (lat, lng_min), (lat, lng_max)):
+            self.assertGreaterEqual(
+                _calcular_distancia_km(lat, lng, *destino),
+                50,
+            )
+
+    def test_sin_limite_de_longitud_cerca_del_polo(self):
+        self.assertEqual(_caja_radio(89.9, 0.0, 50)[2:], (None, None))
+        self.assertEqual(_caja_radio(0.0, 179.9, 50)[2:], (None, None))
+
+
+class ComerciosExplorarSqlTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_sesiones_busqueda()
+        self.db = TestingSessionLocal()
+        self.usuario = Usuario(id=1, email="owner@example.com", hashed_password="hash")
+        self.db.add(self.usuario)
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        self.db.commit()
+
+        self.evento_patch = patch(
+            "app.modules.spaces.services.comercios_services.registrar_search_event_best_effort"
+        )
+        self.registrar_evento = self.evento_patch.start()
+        self.hidratados = []
+        event.listen(Comercio, "load", self._registrar_hidratado)
+
+    def tearDown(self):
+        event.remove(Comercio, "load", self._registrar_hidratado)
+        self.evento_patch.stop()
+        reiniciar_sesiones_busqueda()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _registrar_hidratado(self, comercio, context):
+        self.hidratados.append(comercio.id)
+
+    def _comercio(self, comercio_id, *, ciudad="Rafaela", latitud=-31.25, **extra):
+        self.db.add(
+            Comercio(
+                id=comercio_id,
+                usuario_id=1,
+                nombre=f"Comercio {comercio_id}",
+                portada_url="/uploads/test.jpg",
+                rubro_id=1,
+                provincia="Santa Fe",
+                ciudad=ciudad,
+                latitud=latitud,
+                longitud=-61.49 if latitud is not None else None,
+                activo=True,
+                **extra,
+            )
+        )
+
+    def test_claves_territoriales_se_precalculan(self):
+        self._comercio(1, ciudad="Municipio de Sunchales")
+        self.db.commit()
+        comercio = self.db.get(Comercio, 1)
+
+        self.assertEqual((comercio.ciudad_key, comercio.provincia_code), ("sunchales", "AR-S"))
+        comercio.provincia = "Atlantida"
+        self.assertIsNone(comercio.provincia_code)
+
+    def test_primera_pagina_hidrata_solo_la_pagina(self):
+        for comercio_id in range(1, 31):
+            self._comercio(comercio_id)
+        self.db.commit()
+        self.db.expunge_all()
+
+        pagina = listar_comercios_activos(self.db, limit=5, offset=5)
+
+        self.assertEqual([c.id for c in pagina], [25, 24, 23, 22, 21])
+        self.assertEqual(sorted(self.hidratados), [21, 22, 23, 24, 25])
+
+    def test_flags_de_actividad_ordenan_y_los_servicios_los_marcan(self):
+        for comercio_id in range(1, 4):
+            self._comercio(comercio_id)
+        self.db.commit()
+        crear_publicacion(
+            self.db,
+            comercio_id=1,
+            publicacion_in=PublicacionCreate(titulo="Promo"),
+            usuario_autenticado=self.usuario,
+        )
+        crear_historia(
+            self.db,
+            comercio_id=2,
+            historia_in=HistoriaCreate(
+                media_url="/uploads/historia.jpg",
+                expira_en=datetime.now(timezone.utc) + timedelta(days=1),
+            ),
+            usuario_autenticado=self.usuario,
+        )
+
+        self.assertTrue(self.db.get(Comercio, 1).tiene_publicaciones)
+        self.assertTrue(self.db.get(Comercio, 2).tiene_historias)
+        self.assertEqual([c.id for c in listar_comercios_activos(self.db)], [2, 1, 3])
+
+    def test_territorio_local_y_radio_se_filtran_en_sql(self):
+        self._comercio(1)
+        self._comercio(2, ciudad="Sunchales")
+        self._comercio(3, latitud=-31.30)
+        self._comercio(4, latitud=-32.50)
+        self._comercio(5, latitud=None)
+        self.db.commit()
+        self.db.expunge_all()
+
+        local = listar_comercios_activos(
+            self.db,
+            city_key="rafaela",
+            province_code="AR-S",
+            country_code="AR",
+            scope="local",
+        )
+        self.db.expunge_all()
+        self.hidratados.clear()
+        cercanos = listar_comercios_activos(
+            self.db,
+            lat=-31.25,
+            lng=-61.49,
+            radio_km=10,
+            limit=2,
+        )
+
+        self.assertEqual([c.id for c in local], [5, 4, 3, 1])
+        # Distancia ascendente; sin coordenadas al final; el 4 queda afuera.
+        self.assertEqual([c.id for c in cercanos], [2, 1])
+        self.assertEqual(sorted(self.hidratados), [1, 2])
+        evento = self.registrar_evento.call_args.args[1]
+        self.assertEqual(evento["metadata_json"]["candidate_count"], 4)
+
+
+class ComerciosExplorarMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_upgrade_completa_flags_y_territorio_y_es_idempotente(self):
+        with self.engine.begin() as connection:
+            self.assertEqual(downgrade(connection), "dropped")
+            connection.execute(
+                text(
+                    "INSERT INTO comercios "
+                    "(id, usuario_id, nombre, portada_url, rubro_id, provincia, ciudad) "
+                    "VALUES (1, 1, 'A', '/a.jpg', 1, 'Santa Fe', 'Ciudad de Rafaela'), "
+                    "(2, 1, 'B', '/b.jpg', 1, 'Atlantida', 'Sunchales')"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO publicaciones (id, comercio_id, titulo, is_activa) "
+                    "VALUES (1, 2, 'Promo', 1)"
+                )
+            )
+
+            self.assertEqual(upgrade(connection), "created")
+            self.assertEqual(upgrade(connection), "already_exists")
+            filas = connection.execute(
+                text(
+                    "SELECT id, tiene_historias, tiene_publicaciones, ciudad_key, "
+                    "provincia_code FROM comercios ORDER BY id"
+                )
+            ).all()
+
+        self.assertEqual(
+            [tuple(fila) for fila in filas],
+            [(1, 0, 0, "rafaela", "AR-S"), (2, 0, 1, "sunchales", None)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
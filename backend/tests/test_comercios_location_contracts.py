@@ -111,7 +111,7 @@ class ComercioLocationServiceTests(unittest.TestCase):
         self.engine.dispose()
 
     @patch(
-        "app.modules.spaces.services.comercios_services.upsert_embedding_comercio"
+        "app.modules.spaces.services.comercios_services.encolar_embedding_comercio"
     )
     @patch(
         "app.modules.spaces.services.comercios_services.sincronizar_especialidades_comercio"
@@ -123,7 +123,7 @@ class ComercioLocationServiceTests(unittest.TestCase):
         self,
         _sincronizar_assignments,
         _sincronizar_especialidades,
-        _upsert_embedding,
+        _encolar_embedding,
     ):
         comercio = crear_comercio(
             self.db,
@@ -136,11 +136,11 @@ class ComercioLocationServiceTests(unittest.TestCase):
         self.assertTrue(comercio.mostrar_direccion_publicamente)
 
     @patch(
-        "app.modules.spaces.services.comercios_services.upsert_embedding_comercio"
+        "app.modules.spaces.services.comercios_services.encolar_embedding_comercio"
     )
     def test_historico_incompleto_sigue_siendo_administrable(
         self,
-        _upsert_embedding,
+        _encolar_embedding,
     ):
         historico = Comercio(
             usuario_id=self.usuario.id,
@@ -0,0 +1,256 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.model_registry import import_all_models
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.spaces.routes.comercios_routers import router as comercios_router
+from app.modules.spaces.models.comercios_sesion_busqueda_models import (
+    ComercioSesionBusqueda,
+)
+from app.modules.spaces.services import comercios_services
+from app.modules.spaces.services import comercios_sesion_busqueda_services
+from app.modules.spaces.services.comercios_services import (
+    listar_comercios_activos,
+    listar_comercios_activos_por_cursor,
+)
+from app.modules.spaces.services.comercios_sesion_busqueda_services import (
+    CursorComercios,
+    CursorComerciosInvalidoError,
+    SesionBusqueda,
+    codificar_cursor_comercios,
+    SesionBusquedaStoreBD,
+    configurar_store_sesiones_busqueda,
+    obtener_store_sesiones_busqueda,
+    reiniciar_sesiones_busqueda,
+)
+from app.modules.spaces.services.comercios_texto_index_services import (
+    reiniciar_indice_texto_comercios,
+)
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app = FastAPI()
+app.include_router(comercios_router)
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+class StoreCompartido:
+    """
+    Store de otro worker: guarda la sesión serializada, como uno externo.
+    """
+
+    def __init__(self):
+        self.datos = {}
+
+    def obtener(self, token):
+        datos = self.datos.get(token)
+        return SesionBusqueda(**datos) if datos is not None else None
+
+    def guardar(self, token, sesion, ttl_segundos):
+        self.datos[token] = {**sesion.__dict__, "comercio_ids": tuple(sesion.comercio_ids)}
+
+    def limpiar(self):
+        self.datos.clear()
+
+
+class ComerciosSesionBusquedaTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_sesiones_busqueda()
+        reiniciar_indice_texto_comercios()
+        self.db = TestingSessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in range(1, 8):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Pizzeria {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    latitud=-31.25,
+                    longitud=-61.49,
+                    activo=True,
+                )
+            )
+        self.db.commit()
+        self.evento_patch = patch(
+            "app.modules.spaces.services.comercios_services.registrar_search_event_best_effort"
+        )
+        self.registrar_evento = self.evento_patch.start()
+
+    def tearDown(self):
+        self.evento_patch.stop()
+        reiniciar_sesiones_busqueda()
+        reiniciar_indice_texto_comercios()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _recorrer(self, **params):
+        paginas = []
+        pagina = listar_comercios_activos_por_cursor(self.db, limit=3, **params)
+        paginas.append([c.id for c in pagina.items])
+        while pagina.next_cursor:
+            pagina = listar_comercios_activos_por_cursor(
+                self.db,
+                cursor=pagina.next_cursor,
+                limit=3,
+            )
+            paginas.append([c.id for c in pagina.items])
+        return paginas
+
+    def test_cursor_recorre_el_mismo_orden_que_offset(self):
+        for params in ({}, {"q": "pizz", "smart": True}):
+            with self.subTest(params=params):
+                por_offset = [
+                    [c.id for c in listar_comercios_activos(self.db, limit=3, offset=offset, **params)]
+                    for offset in (0, 3, 6)
+                ]
+                self.assertEqual(self._recorrer(**params), por_offset)
+
+    def test_paginas_siguientes_no_re_rankean_e_hidratan_solo_la_pagina(self):
+        primera = listar_comercios_activos_por_cursor(self.db, limit=3, lat=-31.25, lng=-61.49)
+
+        with patch.object(
+            comercios_services,
+            "_rankear_comercios_activos",
+            side_effect=AssertionError("no debe re-rankear"),
+        ):
+            self.db.get(Comercio, 3).activo = False
+            self.db.commit()
+            segunda = listar_comercios_activos_por_cursor(
+                self.db,
+                cursor=primera.next_cursor,
+                limit=3,
+            )
+
+        # El 3 se dio de baja después de rankear: se saltea y se completa.
+        self.assertEqual([c.id for c in segunda.items], [4, 2, 1])
+        self.assertIsNone(segunda.next_cursor)
+        self.assertEqual(segunda.items[0].distancia_km, 0.0)
+        evento = self.registrar_evento.call_args.args[1]
+        self.assertEqual(evento["offset"], 3)
+        self.assertTrue(evento["metadata_json"]["search_session"])
+
+    def test_cursor_invalido_o_vencido(self):
+        with self.assertRaises(CursorComerciosInvalidoError):
+            listar_comercios_activos_por_cursor(self.db, cursor="no-es-un-cursor")
+
+        vencido = codificar_cursor_comercios(CursorComercios(token="otro", posicion=3))
+        with self.assertRaises(CursorComerciosInvalidoError):
+            listar_comercios_activos_por_cursor(self.db, cursor=vencido)
+
+    def test_store_compartido_sirve_el_token_en_otro_worker(self):
+        store = StoreCompartido()
+        configurar_store_sesiones_busqueda(store)
+        primera = listar_comercios_activos_por_cursor(self.db, limit=5)
+
+        # Otro worker: mismo store compartido, sin estado local.
+        reiniciar_sesiones_busqueda()
+        configurar_store_sesiones_busqueda(store)
+        segunda = listar_comercios_activos_por_cursor(
+            self.db,
+            cursor=primera.next_cursor,
+            limit=5,
+        )
+
+        self.assertEqual([c.id for c in segunda.items], [2, 1])
+
+    def test_store_db_por_configuracion_comparte_el_token_entre_workers(self):
+        with patch.object(settings, "COMERCIOS_SESION_BUSQUEDA_STORE", "db"), patch.object(
+            comercios_sesion_busqueda_services, "SessionLocal", TestingSessionLocal
+        ):
+            self.assertIsInstance(obtener_store_sesiones_busqueda(), SesionBusquedaStoreBD)
+            primera = listar_comercios_activos_por_cursor(self.db, limit=5)
+
+            # Otro worker: sin estado local, lee la sesión desde la tabla.
+            reiniciar_sesiones_busqueda()
+            segunda = listar_comercios_activos_por_cursor(
+                self.db,
+                cursor=primera.next_cursor,
+                limit=5,
+            )
+
+            self.assertEqual([c.id for c in segunda.items], [2, 1])
+            fila = self.db.query(ComercioSesionBusqueda).one()
+            fila.vence_en = fila.vence_en.replace(year=2000)
+            self.db.commit()
+            with self.assertRaises(CursorComerciosInvalidoError):
+                listar_comercios_activos_por_cursor(self.db, cursor=primera.next_cursor)
+
+            # Guardar una sesión nueva purga la vencida.
+            listar_comercios_activos_por_cursor(self.db, limit=5)
+            self.assertEqual(self.db.query(ComercioSesionBusqueda).count(), 1)
+
+    def test_store_desconocido_o_que_falla(self):
+        with patch.object(settings, "COMERCIOS_SESION_BUSQUEDA_STORE", "memcache"):
+            with self.assertRaises(ValueError):
+                obtener_store_sesiones_busqueda()
+
+        store = StoreCompartido()
+        configurar_store_sesiones_busqueda(store)
+        with patch.object(store, "guardar", side_effect=RuntimeError("caido")):
+            pagina = listar_comercios_activos_por_cursor(self.db, limit=3)
+
+        self.assertEqual([c.id for c in pagina.items], [7, 6, 5])
+        self.assertIsNone(pagina.next_cursor)
+
+    def test_ttl_cero_desactiva_el_cursor(self):
+        with patch.object(settings, "COMERCIOS_SESION_BUSQUEDA_TTL_SECONDS", 0):
+            pagina = listar_comercios_activos_por_cursor(self.db, limit=3)
+
+        self.assertEqual([c.id for c in pagina.items], [7, 6, 5])
+        self.assertIsNone(pagina.next_cursor)
+
+    def test_endpoint_devuelve_el_cursor_en_header(self):
+        primera = client.get(
+            "/comercios/activos",
+            params={"limit": 4, "paginado_cursor": True},
+        )
+        segunda = client.get(
+            "/comercios/activos",
+            params={"limit": 4, "cursor": primera.headers["X-Next-Cursor"]},
+        )
+        invalida = client.get("/comercios/activos", params={"cursor": "x"})
+        sin_cursor = client.get("/comercios/activos", params={"limit": 4})
+
+        self.assertEqual([c["id"] for c in primera.json()], [7, 6, 5, 4])
+        self.assertEqual([c["id"] for c in segunda.json()], [3, 2, 1])
+        self.assertNotIn("X-Next-Cursor", segunda.headers)
+        self.assertEqual(invalida.status_code, 400)
+        self.assertNotIn("X-Next-Cursor", sin_cursor.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
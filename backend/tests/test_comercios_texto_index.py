@@ -0,0 +1,137 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine.candidate_sources import (
+    ComercioNombreCandidateSource,
+)
+from app.modules.search.services.candidate_engine.candidate_types import (
+    CandidateGenerationContext,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.spaces.services.comercios_services import desactivar_comercio
+from app.modules.spaces.services.comercios_texto_index_services import (
+    IndiceTextoComercios,
+    buscar_comercio_ids_por_texto,
+    registrar_comercio_en_indice_texto,
+    reiniciar_indice_texto_comercios,
+)
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class IndiceTextoComerciosTests(unittest.TestCase):
+    def setUp(self):
+        self.indice = IndiceTextoComercios()
+        self.indice.upsert(1, nombre="Pizzería Napolitana", ciudad="Rafaela")
+        self.indice.upsert(2, nombre="Napoli Café", descripcion="Pizzas al molde")
+        self.indice.upsert(3, nombre="Ferretería Central", provincia="Santa Fe")
+
+    def test_subcadena_sin_acentos_ni_mayusculas(self):
+        self.assertEqual(self.indice.buscar("NAPOL"), [2, 1])
+        self.assertEqual(self.indice.buscar("zeria"), [1])
+        self.assertEqual(self.indice.buscar("pizz", campos=("nombre",)), [1])
+        self.assertEqual(self.indice.buscar("pizz"), [2, 1])
+
+    def test_trigramas_sin_contiguidad_no_son_match(self):
+        self.indice.upsert(4, nombre="Casa Sasa")
+
+        # "cas", "asa" y "sas" están en el nombre, pero "casasa" no.
+        self.assertEqual(self.indice.buscar("casasa"), [])
+        self.assertEqual(self.indice.buscar("casa sasa"), [4])
+        self.assertEqual(self.indice.buscar("santa fe"), [3])
+
+    def test_query_corta_busca_por_prefijo_de_token(self):
+        self.assertEqual(self.indice.buscar("ce"), [3])
+        self.assertEqual(self.indice.buscar("na", campos=("nombre",)), [2, 1])
+
+    def test_upsert_reemplaza_y_baja_quita(self):
+        self.indice.upsert(2, nombre="Heladería Polo")
+        self.indice.upsert(3, nombre="Ferretería Central", activo=False)
+
+        self.assertEqual(self.indice.buscar("napol"), [1])
+        self.assertEqual(self.indice.buscar("polo"), [2])
+        self.assertEqual(self.indice.buscar("central"), [])
+        self.assertEqual(len(self.indice), 2)
+
+
+class ComerciosTextoIndexServiceTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_indice_texto_comercios()
+
+        self.db = TestingSessionLocal()
+        self.usuario = Usuario(id=1, email="owner@example.com", hashed_password="hash")
+        self.db.add(self.usuario)
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id, nombre, activo in (
+            (1, "Pizzería Don Juan", True),
+            (2, "La Pizza Loca", True),
+            (3, "Pizza Cerrada", False),
+            (4, "Verdulería", True),
+        ):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=nombre,
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=activo,
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        reiniciar_indice_texto_comercios()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def test_construye_desde_activos_y_refleja_cambios_locales(self):
+        self.assertEqual(buscar_comercio_ids_por_texto(self.db, q="pizz"), [2, 1])
+
+        desactivar_comercio(self.db, self.usuario, self.db.get(Comercio, 1))
+        cerrado = self.db.get(Comercio, 3)
+        cerrado.activo = True
+        self.db.commit()
+        registrar_comercio_en_indice_texto(cerrado)
+
+        self.assertEqual(buscar_comercio_ids_por_texto(self.db, q="pizz"), [3, 2])
+        self.assertEqual(
+            buscar_comercio_ids_por_texto(self.db, q="rafaela", campos=("nombre",)),
+            [],
+        )
+
+    def test_candidate_source_nombre_respeta_orden_y_limite(self):
+        context = CandidateGenerationContext(
+            query_original="Pizza",
+            query_normalizada="pizz",
+            limit_por_fuente=1,
+        )
+
+        evidencias = ComercioNombreCandidateSource().generate(context, self.db)
+
+        self.assertEqual(
+            [(e.comercio_id, e.reason) for e in evidencias],
+            [(2, "La Pizza Loca")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
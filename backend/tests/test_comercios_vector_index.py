@@ -0,0 +1,296 @@
+import math
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.services import comercios_vector_index_services
+from app.modules.ai.services.comercios_embeddings_services import (
+    _serializar_vector,
+    obtener_vector_embedding_comercio,
+    upsert_embedding_comercio,
+    upsert_embeddings_comercios,
+)
+from app.modules.ai.services.comercios_vector_index_services import (
+    puntuar_similitud_comercios,
+    registrar_vector_comercio_en_indice,
+    reiniciar_indice_vectorial_comercios,
+    top_k_comercios_similares,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+class VectorIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = VectorIndex()
+        self.vectors = {
+            1: [1.0, 0.0, 0.0],
+            2: [0.9, 0.1, 0.0],
+            3: [0.0, 1.0, 0.0],
+            4: [0.5, 0.5, 0.5],
+        }
+        self.index.upsert_many(self.vectors.items())
+
+    def test_scores_coinciden_con_coseno_python(self):
+        query = [0.8, 0.3, 0.1]
+        scores = self.index.scores(query)
+
+        self.assertEqual(set(scores), set(self.vectors))
+        for entity_id, vector in self.vectors.items():
+            self.assertAlmostEqual(scores[entity_id], _cosine(query, vector), places=5)
+
+    def test_scores_sobre_subconjunto_ignora_ids_ausentes(self):
+        scores = self.index.scores([1.0, 0.0, 0.0], [3, 1, 99])
+        self.assertEqual(set(scores), {1, 3})
+
+    def test_top_k_ordena_por_score_y_desempata_por_id(self):
+        self.index.upsert(5, [2.0, 0.0, 0.0])
+
+        top = self.index.top_k([1.0, 0.0, 0.0], 3)
+
+        self.assertEqual([entity_id for entity_id, _ in top], [5, 1, 2])
+        self.assertAlmostEqual(top[0][1], 1.0, places=5)
+
+    def test_remove_compacta_y_mantiene_mapa(self):
+        self.assertTrue(self.index.remove(1))
+        self.assertFalse(self.index.remove(1))
+
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(set(self.index.ids()), {2, 3, 4})
+        self.assertAlmostEqual(
+            self.index.scores([0.0, 1.0, 0.0], [3])[3],
+            1.0,
+            places=5,
+        )
+
+    def test_vectores_degenerados_o_de_otra_dimension_quedan_fuera(self):
+        self.assertFalse(self.index.upsert(2, [0.0, 0.0, 0.0]))
+        self.assertFalse(self.index.upsert(6, [1.0, 0.0]))
+
+        self.assertNotIn(2, self.index)
+        self.assertNotIn(6, self.index)
+        self.assertEqual(self.index.scores([1.0, 0.0]), {})
+
+    def test_crece_por_encima_de_la_capacidad_inicial(self):
+        index = VectorIndex()
+        for entity_id in range(1, 201):
+            index.upsert(entity_id, [float(entity_id), 1.0])
+
+        self.assertEqual(len(index), 200)
+        self.assertEqual(index.top_k([1.0, 0.0], 1)[0][0], 200)
+
+
+class ComerciosVectorIndexServicesTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_indice_vectorial_comercios()
+        self.db = SessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in (1, 2, 3):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    direccion="Direccion publica",
+                    activo=True,
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        reiniciar_indice_vectorial_comercios()
+        Base.metadata.drop_all(bind=engine)
+
+    def _persistir_vector(self, comercio_id, vector):
+        self.db.add(
+            ComercioEmbedding(
+                comercio_id=comercio_id,
+                vector_binario=_serializar_vector(vector),
+                model_version=1,
+            )
+        )
+        self.db.commit()
+
+    def test_construye_desde_tabla_y_puntua_candidatos(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        self.db.add(ComercioEmbedding(comercio_id=2, vector="[0.0, 1.0]", model_version=1))
+        self.db.add(ComercioEmbedding(comercio_id=3, vector="no-json", model_version=1))
+        self.db.commit()
+
+        scores = puntuar_similitud_comercios(
+            self.db,
+            query_vector=[1.0, 0.0],
+            comercio_ids=[1, 2, 3],
+        )
+
+        self.assertEqual(set(scores), {1, 2})
+        self.assertAlmostEqual(scores[1], 1.0, places=5)
+        self.assertAlmostEqual(scores[2], 0.0, places=5)
+
+    def test_upsert_embedding_actualiza_indice_del_proceso(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=1)
+
+        comercio = self.db.get(Comercio, 2)
+        with patch(
+            "app.modules.ai.services.comercios_embeddings_services.get_embedding_provider"
+        ) as provider_factory:
+            provider_factory.return_value.embed_text.return_value = [3.0, 0.0]
+            upsert_embedding_comercio(self.db, comercio)
+
+        with patch.object(
+            comercios_vector_index_services,
+            "INTERVALO_SINCRONIZACION_SEGUNDOS",
+            3600,
+        ):
+            top = top_k_comercios_similares(
+                self.db,
+                query_vector=[1.0, 0.0],
+                k=2,
+            )
+
+        self.assertEqual([comercio_id for comercio_id, _ in top], [2, 1])
+
+    def test_upsert_bulk_escribe_binario_y_actualiza_indice(self):
+        self._persistir_vector(1, [0.0, 1.0])
+        top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=1)
+
+        comercios = [self.db.get(Comercio, comercio_id) for comercio_id in (1, 2)]
+        with patch(
+            "app.modules.ai.services.comercios_embeddings_services.get_embedding_provider"
+        ) as provider_factory:
+            provider_factory.return_value.embed_texts.return_value = [
+                [1.0, 0.0],
+                [0.6, 0.8],
+            ]
+            escritos = upsert_embeddings_comercios(self.db, comercios)
+
+        self.assertEqual(escritos, 2)
+        provider_factory.return_value.embed_texts.assert_called_once()
+        self.assertEqual(obtener_vector_embedding_comercio(self.db, 1), [1.0, 0.0])
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 2)
+
+        with patch.object(
+            comercios_vector_index_services,
+            "INTERVALO_SINCRONIZACION_SEGUNDOS",
+            3600,
+        ):
+            top = top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=2)
+
+        self.assertEqual([comercio_id for comercio_id, _ in top], [1, 2])
+
+    def test_sincronizacion_incremental_incorpora_vectores_de_otros_workers(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=1)
+
+        self._persistir_vector(3, [0.0, 1.0])
+        with patch.object(
+            comercios_vector_index_services,
+            "INTERVALO_SINCRONIZACION_SEGUNDOS",
+            0,
+        ):
+            scores = puntuar_similitud_comercios(
+                self.db,
+                query_vector=[0.0, 1.0],
+                comercio_ids=[1, 3],
+            )
+
+        self.assertAlmostEqual(scores[3], 1.0, places=5)
+
+    def test_carga_completa_excluye_comercios_inactivos(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        self._persistir_vector(2, [0.0, 1.0])
+        self.db.get(Comercio, 2).activo = False
+        self.db.commit()
+
+        top = top_k_comercios_similares(self.db, query_vector=[0.0, 1.0], k=3)
+
+        self.assertEqual([comercio_id for comercio_id, _ in top], [1])
+
+    def test_sincronizacion_incremental_saca_comercios_desactivados(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        self._persistir_vector(2, [0.0, 1.0])
+        top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=2)
+
+        # Otro worker desactiva el comercio: solo cambia comercios.updated_at.
+        self.db.get(Comercio, 2).activo = False
+        self.db.commit()
+        with patch.object(
+            comercios_vector_index_services,
+            "INTERVALO_SINCRONIZACION_SEGUNDOS",
+            0,
+        ):
+            scores = puntuar_similitud_comercios(
+                self.db,
+                query_vector=[0.0, 1.0],
+                comercio_ids=[1, 2],
+            )
+
+        self.assertEqual(set(scores), {1})
+
+    def test_lectura_corre_fuera_del_lock_y_respeta_upserts_locales(self):
+        self._persistir_vector(1, [1.0, 0.0])
+        self._persistir_vector(2, [1.0, 0.0])
+        top_k_comercios_similares(self.db, query_vector=[1.0, 0.0], k=1)
+        leer_filas = comercios_vector_index_services._leer_filas
+        lock = comercios_vector_index_services._ESTADO_LOCK
+
+        def _leer_filas_espiando(db, **kwargs):
+            filas = leer_filas(db, **kwargs)
+            # Sin el lock tomado por la sincronización, otro request puede
+            # tomarlo; el upsert local es más nuevo que la fila leída.
+            self.assertTrue(lock.acquire(blocking=False))
+            lock.release()
+            registrar_vector_comercio_en_indice(2, [0.0, 1.0])
+            return filas
+
+        with patch.object(
+            comercios_vector_index_services,
+            "INTERVALO_SINCRONIZACION_SEGUNDOS",
+            0,
+        ), patch.object(
+            comercios_vector_index_services,
+            "_leer_filas",
+            side_effect=_leer_filas_espiando,
+        ):
+            scores = puntuar_similitud_comercios(
+                self.db,
+                query_vector=[0.0, 1.0],
+                comercio_ids=[1, 2],
+            )
+
+        self.assertAlmostEqual(scores[2], 1.0, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
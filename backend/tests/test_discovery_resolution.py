@@ -0,0 +1,137 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.discovery.models.taxonomy_models import TaxonomyAssignment, TaxonomyNode
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine import (
+    AssignmentCandidateSource,
+    CandidateGenerationContext,
+    DiscoveryCandidateSource,
+    EspecialidadCandidateSource,
+    RubroCandidateSource,
+    generate_candidates,
+    resolve_discovery_context,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _fuentes_taxonomia():
+    return [
+        EspecialidadCandidateSource(),
+        AssignmentCandidateSource(),
+        RubroCandidateSource(),
+        DiscoveryCandidateSource(),
+    ]
+
+
+class DiscoveryResolutionTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        self.db = TestingSessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id, nombre in ((1, "Pizzería Don Juan"), (2, "Bar del Centro")):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=nombre,
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=True,
+                )
+            )
+        self.db.add(TaxonomyNode(id=1, type="rubro", slug="gastronomia", nombre="Gastronomia"))
+        self.db.add(
+            TaxonomyNode(id=2, parent_id=1, type="especialidad", slug="pizza", nombre="Pizza")
+        )
+        self.db.add(TaxonomyAssignment(taxonomy_node_id=1, entity_type="rubro", entity_id=1))
+        self.db.add(TaxonomyAssignment(taxonomy_node_id=2, entity_type="comercio", entity_id=1))
+        self.db.commit()
+
+        self.context = CandidateGenerationContext(
+            query_original="Pizza",
+            query_normalizada="pizza",
+            discovery_nodes=[
+                {"node_id": 2, "type": "especialidad", "source": "text", "text_score": 0.9},
+                {"node_id": 99, "type": "especialidad", "score": 0.1},
+            ],
+        )
+
+        self.sentencias = []
+        event.listen(engine, "before_cursor_execute", self._registrar_sentencia)
+
+    def tearDown(self):
+        event.remove(engine, "before_cursor_execute", self._registrar_sentencia)
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _registrar_sentencia(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias.append(statement)
+
+    def test_resolucion_una_vez_por_query(self):
+        resolucion = resolve_discovery_context(self.context, self.db)
+
+        self.assertEqual(resolucion.reliable_node_ids, (2,))
+        self.assertEqual(resolucion.specialty_node_ids, (2,))
+        self.assertEqual(resolucion.assigned_specialty_node_ids, frozenset({2}))
+        self.assertEqual(resolucion.rubro_ids, frozenset({1}))
+        # Nodos, asignaciones de especialidad, ancestro (nodo 1) y rubros.
+        self.assertEqual(len(self.sentencias), 4)
+
+    def test_generate_candidates_comparte_la_resolucion_entre_fuentes(self):
+        por_fuente = {}
+        for fuente in _fuentes_taxonomia():
+            por_fuente[fuente.source] = sorted(
+                e.comercio_id for e in fuente.generate(self.context, self.db)
+            )
+        sentencias_por_fuente = len(self.sentencias)
+        self.sentencias.clear()
+
+        candidate_set = generate_candidates(self.context, self.db, _fuentes_taxonomia())
+
+        self.assertEqual(
+            {
+                fuente: sorted(
+                    comercio_id
+                    for comercio_id, evidencias in candidate_set.candidates_by_comercio_id.items()
+                    if any(e.source == fuente for e in evidencias)
+                )
+                for fuente in por_fuente
+            },
+            por_fuente,
+        )
+        self.assertEqual(por_fuente["rubro"], [1, 2])
+        # 4 sentencias de resolución + 1 propia por fuente.
+        self.assertEqual(len(self.sentencias), 8)
+        self.assertLess(len(self.sentencias), sentencias_por_fuente)
+        self.assertEqual(
+            sum(
+                1
+                for sentencia in self.sentencias
+                if "FROM taxonomy_nodes" in sentencia and "JOIN" not in sentencia
+            ),
+            2,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
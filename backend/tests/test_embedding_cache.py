@@ -0,0 +1,173 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.operation_metrics import (
+    METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+    METRIC_EMBEDDINGS_CACHE_HIT_COUNT,
+    METRIC_EMBEDDINGS_CACHE_MISS_COUNT,
+    local_metrics_sink,
+)
+from app.modules.ai.core import embedding_cache, embedding_factory
+from app.modules.ai.core.embedding_cache import (
+    CachedEmbeddingProvider,
+    EmbeddingDiskCache,
+)
+from app.modules.ai.core.embedding_provider import EmbeddingProvider
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+
+
+class _CountingProvider(EmbeddingProvider):
+    def __init__(self, model_id="counting-v1"):
+        self._model_id = model_id
+        self.batches = []
+
+    @property
+    def model_id(self):
+        return self._model_id
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts, batch_size=64):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+class CachedEmbeddingProviderTests(unittest.TestCase):
+    def setUp(self):
+        local_metrics_sink.clear()
+        self.inner = _CountingProvider()
+
+    def _metric_total(self, name, **tags):
+        return sum(
+            sample.value
+            for sample in local_metrics_sink.snapshot()
+            if sample.name == name
+            and all(sample.tags.get(key) == value for key, value in tags.items())
+        )
+
+    def test_textos_repetidos_se_calculan_una_vez(self):
+        provider = CachedEmbeddingProvider(self.inner, max_entries=8)
+
+        primero = provider.embed_texts(["cafe", " cafe ", "te"])
+        primero[0][0] = 99.0
+        segundo = provider.embed_texts(["te", "cafe"])
+
+        self.assertEqual(self.inner.batches, [["cafe", "te"]])
+        self.assertEqual(segundo, [[2.0, 0.5], [4.0, 0.5]])
+        self.assertEqual(provider.model_id, "counting-v1")
+        self.assertEqual(self._metric_total(METRIC_EMBEDDINGS_CACHE_MISS_COUNT), 2)
+        self.assertEqual(
+            self._metric_total(METRIC_EMBEDDINGS_CACHE_HIT_COUNT, tier="memory"),
+            2,
+        )
+
+    def test_lru_desaloja_la_entrada_menos_usada(self):
+        provider = CachedEmbeddingProvider(self.inner, max_entries=2)
+
+        provider.embed_text("a")
+        provider.embed_text("bb")
+        provider.embed_text("a")
+        provider.embed_text("ccc")
+        provider.embed_text("a")
+        provider.embed_text("bb")
+
+        self.assertEqual(self.inner.batches, [["a"], ["bb"], ["ccc"], ["bb"]])
+        self.assertEqual(provider.estadisticas()["entradas"], 2)
+        self.assertEqual(
+            self._metric_total(
+                METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+                tier="memory",
+                reason="size",
+            ),
+            2,
+        )
+
+    def test_ttl_vence_entradas_de_memoria(self):
+        provider = CachedEmbeddingProvider(self.inner, max_entries=8, ttl_seconds=10)
+
+        with patch.object(embedding_cache.time, "monotonic", return_value=100.0):
+            provider.embed_text("cafe")
+        with patch.object(embedding_cache.time, "monotonic", return_value=105.0):
+            provider.embed_text("cafe")
+        with patch.object(embedding_cache.time, "monotonic", return_value=111.0):
+            provider.embed_text("cafe")
+
+        self.assertEqual(self.inner.batches, [["cafe"], ["cafe"]])
+        self.assertEqual(provider.estadisticas()["evictions"], 1)
+
+    def test_nivel_disco_sobrevive_reinicio_y_separa_modelos(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache" / "embeddings.sqlite3"
+
+            disco = EmbeddingDiskCache(path)
+            CachedEmbeddingProvider(self.inner, disk_cache=disco).embed_text("pizza")
+            disco.cerrar()
+
+            reiniciado = _CountingProvider()
+            disco = EmbeddingDiskCache(path)
+            vector = CachedEmbeddingProvider(reiniciado, disk_cache=disco).embed_text("pizza")
+
+            otro_modelo = _CountingProvider(model_id="counting-v2")
+            CachedEmbeddingProvider(otro_modelo, disk_cache=disco).embed_text("pizza")
+            disco.cerrar()
+
+        self.assertEqual(vector, [5.0, 0.5])
+        self.assertEqual(reiniciado.batches, [])
+        self.assertEqual(otro_modelo.batches, [["pizza"]])
+        self.assertEqual(
+            self._metric_total(METRIC_EMBEDDINGS_CACHE_HIT_COUNT, tier="disk"),
+            1,
+        )
+
+    def test_nivel_disco_acotado_borra_las_entradas_mas_viejas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disco = EmbeddingDiskCache(Path(tmp) / "embeddings.sqlite3", max_entries=2)
+            provider = CachedEmbeddingProvider(self.inner, max_entries=0, disk_cache=disco)
+
+            with patch.object(embedding_cache.time, "time", side_effect=[1.0, 2.0, 3.0]):
+                provider.embed_text("a")
+                provider.embed_text("bb")
+                provider.embed_text("ccc")
+            provider.embed_texts(["bb", "ccc", "a"])
+            filas = disco._contar()
+            disco.cerrar()
+
+        self.assertEqual(self.inner.batches, [["a"], ["bb"], ["ccc"], ["a"]])
+        self.assertEqual(filas, 2)
+        self.assertEqual(
+            self._metric_total(
+                METRIC_EMBEDDINGS_CACHE_EVICTION_COUNT,
+                tier="disk",
+                reason="size",
+            ),
+            2,
+        )
+
+    def test_cache_es_transparente_para_el_provider_simulado(self):
+        simulado = SimulatedEmbeddingProvider()
+        provider = CachedEmbeddingProvider(simulado, max_entries=8)
+        textos = ["Pizzeria", "", None, "Ferreteria centro"]
+
+        self.assertEqual(provider.embed_texts(textos), simulado.embed_texts(textos))
+        self.assertEqual(provider.embed_texts(textos), simulado.embed_texts(textos))
+
+    def test_factory_envuelve_el_provider_configurado(self):
+        with patch.dict(embedding_factory._PROVIDERS_CACHE, clear=True), patch.object(
+            embedding_factory.settings,
+            "EMBEDDINGS_PROVIDER",
+            "simulated",
+        ):
+            provider = embedding_factory.get_embedding_provider()
+            sin_cache = embedding_factory.get_embedding_provider(usar_cache=False)
+
+        self.assertIsInstance(provider, CachedEmbeddingProvider)
+        self.assertIsInstance(provider.provider, SimulatedEmbeddingProvider)
+        self.assertIs(sin_cache, provider.provider)
+        self.assertEqual(provider.model_id, SimulatedEmbeddingProvider().model_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
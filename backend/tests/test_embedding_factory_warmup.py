@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.health import DEGRADED, HEALTHY, WARMING, embeddings_check
+from app.modules.ai.core import embedding_factory
+from app.modules.ai.core.embedding_cache import CachedEmbeddingProvider
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class _SlowProvider(SimulatedEmbeddingProvider):
+    def __init__(self, liberar: threading.Event):
+        super().__init__()
+        self.liberar = liberar
+
+    def embed_text(self, text):
+        self.liberar.wait(5)
+        return super().embed_text(text)
+
+
+class EmbeddingFactoryWarmupTests(unittest.TestCase):
+    def setUp(self):
+        self._patches = [
+            patch.dict(embedding_factory._PROVIDERS_CACHE, clear=True),
+            patch.dict(embedding_factory._ESTADOS, clear=True),
+            patch.object(embedding_factory.settings, "EMBEDDINGS_PROVIDER", "local"),
+        ]
+        for patcher in self._patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in reversed(self._patches):
+            patcher.stop()
+
+    def test_importar_factory_no_carga_sentence_transformers(self):
+        resultado = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; import app.modules.ai.core.embedding_factory; "
+                "print('sentence_transformers' in sys.modules)",
+            ],
+            cwd=BACKEND_DIR,
+            env={**os.environ},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        self.assertEqual(resultado.stdout.strip(), "False")
+
+    def test_health_informa_warming_hasta_que_el_modelo_responde(self):
+        liberar = threading.Event()
+        with patch.object(
+            embedding_factory,
+            "_crear_provider_local",
+            return_value=(_SlowProvider(liberar), embedding_factory.ESTADO_LISTO),
+        ):
+            self.assertEqual(embedding_factory.estado_embeddings(), "cold")
+
+            hilo = embedding_factory.iniciar_precalentamiento_embeddings()
+            self.assertIsNotNone(hilo)
+            self.assertIsNone(embedding_factory.iniciar_precalentamiento_embeddings())
+            self.assertEqual(embedding_factory.estado_embeddings(), "warming")
+            self.assertEqual(embeddings_check().status, WARMING)
+
+            liberar.set()
+            hilo.join(5)
+
+        self.assertEqual(embedding_factory.estado_embeddings(), "ready")
+        self.assertEqual(embeddings_check().status, HEALTHY)
+        self.assertIsInstance(
+            embedding_factory.get_embedding_provider(),
+            CachedEmbeddingProvider,
+        )
+
+    def test_estado_y_model_id_no_esperan_la_carga_del_modelo(self):
+        cargando = threading.Event()
+        liberar = threading.Event()
+
+        def crear_lento():
+            cargando.set()
+            liberar.wait(5)
+            return SimulatedEmbeddingProvider(), embedding_factory.ESTADO_LISTO
+
+        with patch.object(embedding_factory, "_crear_provider_local", side_effect=crear_lento):
+            hilo = embedding_factory.iniciar_precalentamiento_embeddings()
+            self.assertTrue(cargando.wait(5))
+
+            # Con la carga en curso (lock tomado) no se bloquea.
+            self.assertEqual(embedding_factory.estado_embeddings(), "warming")
+            self.assertEqual(
+                embedding_factory.model_id_configurado(),
+                f"sentence-transformers:{embedding_factory.settings.EMBEDDINGS_LOCAL_MODEL_PATH}",
+            )
+
+            liberar.set()
+            hilo.join(5)
+
+        self.assertEqual(
+            embedding_factory.model_id_configurado(),
+            SimulatedEmbeddingProvider().model_id,
+        )
+
+    def test_modelo_local_no_disponible_queda_degradado(self):
+        with patch.dict(
+            sys.modules,
+            {"app.modules.ai.providers.local_provider": None},
+        ):
+            provider = embedding_factory.get_embedding_provider()
+
+        self.assertIsInstance(provider.provider, SimulatedEmbeddingProvider)
+        self.assertEqual(embedding_factory.estado_embeddings(), "fallback")
+        self.assertEqual(embeddings_check().status, DEGRADED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from app.modules.ai.core.embedding_provider import EmbeddingProvider
+from app.modules.ai.providers.local_provider import LocalEmbeddingProvider
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append((list(texts), batch_size))
+        return np.asarray([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+class _LoopProvider(EmbeddingProvider):
+    def embed_text(self, text):
+        return [float(len(text))]
+
+
+class EmbeddingProvidersBatchTests(unittest.TestCase):
+    def test_simulated_batch_coincide_con_embed_text(self):
+        provider = SimulatedEmbeddingProvider()
+        textos = ["Pizzeria", "  pizzeria  ", "", None, "Ferreteria centro"]
+
+        self.assertEqual(
+            provider.embed_texts(textos),
+            [provider.embed_text(texto) for texto in textos],
+        )
+        self.assertEqual(provider.embed_texts([]), [])
+
+    def test_default_embed_texts_respeta_orden(self):
+        self.assertEqual(_LoopProvider().embed_texts(["ab", "a"]), [[2.0], [1.0]])
+
+    def test_local_codifica_lote_unico_sin_duplicados(self):
+        provider = LocalEmbeddingProvider.__new__(LocalEmbeddingProvider)
+        provider.model = _FakeModel()
+
+        vectores = provider.embed_texts(["cafe ", "te", "cafe"], batch_size=16)
+
+        self.assertEqual(vectores, [[4.0, 1.0], [2.0, 1.0], [4.0, 1.0]])
+        self.assertEqual(provider.model.calls, [(["cafe", "te"], 16)])
+
+
+if __name__ == "__main__":
+    unittest.main()
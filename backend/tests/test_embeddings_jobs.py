@@ -0,0 +1,227 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.models.embeddings_jobs_models import EmbeddingJob
+from app.modules.ai.services import embeddings_jobs_services
+from app.modules.ai.services.comercios_vector_index_services import (
+    reiniciar_indice_vectorial_comercios,
+)
+from app.modules.ai.services.embeddings_jobs_services import (
+    MAX_INTENTOS,
+    EmbeddingsJobsWorker,
+    encolar_embedding_comercio,
+    procesar_embeddings_pendientes,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_embeddings_jobs_reclamo import COLUMNS, downgrade, upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class EmbeddingsJobsTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_indice_vectorial_comercios()
+        self.db = SessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in (1, 2):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    direccion="Direccion publica",
+                    activo=True,
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        reiniciar_indice_vectorial_comercios()
+        Base.metadata.drop_all(bind=engine)
+
+    def _comercio(self, comercio_id):
+        return self.db.get(Comercio, comercio_id)
+
+    def _procesar_vencidos(self):
+        return procesar_embeddings_pendientes(
+            self.db,
+            ahora=datetime.utcnow() + timedelta(minutes=1),
+        )
+
+    def test_pedidos_repetidos_se_agrupan_en_un_job(self):
+        encolar_embedding_comercio(self.db, self._comercio(1))
+        encolar_embedding_comercio(self.db, self._comercio(1))
+
+        self.assertEqual(self.db.query(EmbeddingJob).count(), 1)
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 0)
+
+    def test_respeta_debounce_y_procesa_en_un_lote(self):
+        encolar_embedding_comercio(self.db, self._comercio(1))
+        encolar_embedding_comercio(self.db, self._comercio(2))
+
+        with patch.object(settings, "EMBEDDINGS_JOBS_DEBOUNCE_SECONDS", 60):
+            self.assertEqual(procesar_embeddings_pendientes(self.db), 0)
+
+        with patch(
+            "app.modules.ai.services.comercios_embeddings_services.get_embedding_provider"
+        ) as provider_factory:
+            provider_factory.return_value.embed_texts.return_value = [
+                [1.0, 0.0],
+                [0.0, 1.0],
+            ]
+            self.assertEqual(self._procesar_vencidos(), 2)
+
+        provider_factory.assert_called_once_with(usar_cache=False)
+        provider_factory.return_value.embed_texts.assert_called_once()
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 2)
+        self.assertEqual(self.db.query(EmbeddingJob).count(), 0)
+
+    def test_pedido_durante_el_proceso_no_se_pierde(self):
+        encolar_embedding_comercio(self.db, self._comercio(1))
+        # MySQL guarda DATETIME sin microsegundos: el re-pedido debe diferir.
+        self.db.query(EmbeddingJob).update(
+            {EmbeddingJob.solicitado_en: datetime.utcnow() - timedelta(minutes=5)}
+        )
+        self.db.commit()
+
+        def _upsert_con_nuevo_pedido(db, comercios):
+            embeddings_jobs_services._marcar_pendiente(db, "comercio", 1)
+            return len(comercios)
+
+        with patch.object(
+            embeddings_jobs_services,
+            "upsert_embeddings_comercios",
+            side_effect=_upsert_con_nuevo_pedido,
+        ):
+            self._procesar_vencidos()
+
+        job = self.db.query(EmbeddingJob).one()
+        self.assertEqual((job.reclamado_por, job.reclamado_hasta), (None, None))
+
+    def test_jobs_reclamados_por_otro_worker_no_se_procesan(self):
+        encolar_embedding_comercio(self.db, self._comercio(1))
+        encolar_embedding_comercio(self.db, self._comercio(2))
+        ahora = datetime.utcnow() + timedelta(minutes=1)
+
+        _, primero = embeddings_jobs_services._reclamar_jobs(self.db, limite=1, ahora=ahora)
+        _, segundo = embeddings_jobs_services._reclamar_jobs(self.db, limite=2, ahora=ahora)
+
+        self.assertEqual([job[2] for job in primero], [1])
+        self.assertEqual([job[2] for job in segundo], [2])
+
+        with patch.object(
+            embeddings_jobs_services,
+            "upsert_embeddings_comercios",
+            return_value=0,
+        ) as upsert:
+            self.assertEqual(procesar_embeddings_pendientes(self.db, ahora=ahora), 0)
+            upsert.assert_not_called()
+
+            # Worker caído: el reclamo vence y el job vuelve a la cola.
+            vencido = ahora + timedelta(seconds=settings.EMBEDDINGS_JOBS_CLAIM_TIMEOUT_SECONDS)
+            self.assertEqual(procesar_embeddings_pendientes(self.db, ahora=vencido), 2)
+
+        self.assertEqual(self.db.query(EmbeddingJob).count(), 0)
+
+    def test_errores_incrementan_intentos_hasta_descartar(self):
+        encolar_embedding_comercio(self.db, self._comercio(1))
+
+        with patch.object(
+            embeddings_jobs_services,
+            "upsert_embeddings_comercios",
+            side_effect=RuntimeError("provider caido"),
+        ):
+            for _ in range(MAX_INTENTOS + 1):
+                self._procesar_vencidos()
+
+        job = self.db.query(EmbeddingJob).one()
+        self.assertEqual(job.intentos, MAX_INTENTOS)
+        self.assertEqual(job.ultimo_error, "RuntimeError")
+
+    def test_sin_tabla_de_jobs_calcula_sincronico(self):
+        with patch.object(
+            embeddings_jobs_services,
+            "_marcar_pendiente",
+            side_effect=OperationalError("INSERT", {}, Exception("no such table")),
+        ), patch.object(
+            embeddings_jobs_services,
+            "upsert_embedding_comercio",
+        ) as upsert_sincronico:
+            encolar_embedding_comercio(self.db, self._comercio(1))
+
+        upsert_sincronico.assert_called_once()
+
+    def test_worker_en_segundo_plano_alcanza_la_cola(self):
+        worker = EmbeddingsJobsWorker(SessionLocal, intervalo_segundos=0.05)
+        with patch.object(settings, "EMBEDDINGS_JOBS_DEBOUNCE_SECONDS", 0):
+            worker.iniciar()
+            try:
+                encolar_embedding_comercio(self.db, self._comercio(1))
+                worker.notificar()
+
+                limite = time.monotonic() + 5
+                while time.monotonic() < limite:
+                    self.db.expire_all()
+                    if self.db.query(ComercioEmbedding).count():
+                        break
+                    time.sleep(0.05)
+            finally:
+                worker.detener()
+
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 1)
+        self.assertEqual(self.db.query(EmbeddingJob).count(), 0)
+
+
+
+class EmbeddingsJobsReclamoMigrationTests(unittest.TestCase):
+    def test_upgrade_es_aditivo_e_idempotente(self):
+        engine_legacy = create_engine("sqlite://")
+        with engine_legacy.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE embeddings_jobs ("
+                    "id INTEGER PRIMARY KEY, entity_type VARCHAR(50), entity_id INTEGER, "
+                    "solicitado_en DATETIME, intentos INTEGER, ultimo_error VARCHAR(255))"
+                )
+            )
+
+            self.assertEqual(upgrade(connection), "created")
+            self.assertEqual(upgrade(connection), "already_exists")
+            columns = {
+                column["name"]
+                for column in inspect(connection).get_columns("embeddings_jobs")
+            }
+            self.assertTrue(set(COLUMNS) <= columns)
+            self.assertEqual(downgrade(connection), "dropped")
+            self.assertEqual(downgrade(connection), "already_absent")
+
+if __name__ == "__main__":
+    unittest.main()
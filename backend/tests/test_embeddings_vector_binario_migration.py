@@ -0,0 +1,150 @@
+import json
+import unittest
+
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+
+from app.modules.ai.core.vector_codec import (
+    HEADER_BYTES,
+    VectorCodecError,
+    desempaquetar_vector,
+    empaquetar_vector,
+    leer_vector_persistido,
+)
+from migrate_embeddings_vector_binario import TABLES, downgrade, upgrade
+
+
+class VectorCodecTests(unittest.TestCase):
+    def test_roundtrip_float32_con_header(self):
+        blob = empaquetar_vector([0.25, -1.5, 3.0])
+
+        self.assertEqual(len(blob), HEADER_BYTES + 3 * 4)
+        np.testing.assert_array_equal(
+            desempaquetar_vector(blob),
+            np.asarray([0.25, -1.5, 3.0], dtype=np.float32),
+        )
+
+    def test_rechaza_blob_sin_header_o_truncado(self):
+        with self.assertRaises(VectorCodecError):
+            desempaquetar_vector(b"[1.0, 2.0]")
+        with self.assertRaises(VectorCodecError):
+            desempaquetar_vector(empaquetar_vector([1.0, 2.0])[:-1])
+
+    def test_lectura_prioriza_binario_y_cae_al_json_legado(self):
+        blob = empaquetar_vector([1.0, 0.0])
+
+        self.assertEqual(leer_vector_persistido(blob, "[0.0, 1.0]").tolist(), [1.0, 0.0])
+        self.assertEqual(leer_vector_persistido(None, "[0.0, 1.0]").tolist(), [0.0, 1.0])
+        self.assertIsNone(leer_vector_persistido(None, None))
+
+
+class EmbeddingsBinaryMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as connection:
+            for table in TABLES:
+                connection.execute(
+                    text(
+                        f"CREATE TABLE {table} ("
+                        "id INTEGER PRIMARY KEY, vector TEXT NULL)"
+                    )
+                )
+                connection.execute(
+                    text(f"INSERT INTO {table} (id, vector) VALUES (:id, :vector)"),
+                    [
+                        {"id": 1, "vector": "[1.0, 0.0]"},
+                        {"id": 2, "vector": "[0.5, 0.5]"},
+                        {"id": 3, "vector": "no-json"},
+                    ],
+                )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_upgrade_convierte_filas_y_es_idempotente(self):
+        with self.engine.begin() as connection:
+            self.assertEqual(
+                upgrade(connection),
+                {table: "created:converted=2" for table in TABLES},
+            )
+            self.assertEqual(
+                upgrade(connection),
+                {table: "already_exists:converted=0" for table in TABLES},
+            )
+
+        with self.engine.connect() as connection:
+            for table in TABLES:
+                rows = connection.execute(
+                    text(f"SELECT id, vector, vector_binario FROM {table} ORDER BY id")
+                ).all()
+                self.assertIsNone(rows[0].vector)
+                self.assertEqual(
+                    desempaquetar_vector(rows[1].vector_binario).tolist(),
+                    [0.5, 0.5],
+                )
+                # La fila corrupta queda intacta para revision manual.
+                self.assertEqual(rows[2].vector, "no-json")
+                self.assertIsNone(rows[2].vector_binario)
+
+    def test_upgrade_relaja_vector_not_null_en_sqlite(self):
+        engine = create_engine("sqlite://")
+        self.addCleanup(engine.dispose)
+        with engine.begin() as connection:
+            for table in TABLES:
+                connection.execute(
+                    text(
+                        f"CREATE TABLE {table} ("
+                        "id INTEGER PRIMARY KEY, owner_id INTEGER NOT NULL, "
+                        "vector TEXT NOT NULL)"
+                    )
+                )
+                connection.execute(
+                    text(f"CREATE UNIQUE INDEX ix_{table}_owner ON {table} (owner_id)")
+                )
+                connection.execute(
+                    text(f"INSERT INTO {table} VALUES (1, 10, '[1.0, 0.0]')")
+                )
+
+            upgrade(connection)
+
+        inspector = inspect(engine)
+        for table in TABLES:
+            columns = {column["name"]: column for column in inspector.get_columns(table)}
+            self.assertTrue(columns["vector"]["nullable"])
+            self.assertIn(
+                f"ix_{table}_owner",
+                {index["name"] for index in inspector.get_indexes(table)},
+            )
+            with engine.begin() as connection:
+                # Escritura nueva: solo binario.
+                connection.execute(
+                    text(f"INSERT INTO {table} (id, owner_id, vector_binario) VALUES (2, 20, :blob)"),
+                    {"blob": empaquetar_vector([0.0, 1.0])},
+                )
+                fila = connection.execute(
+                    text(f"SELECT owner_id, vector, vector_binario FROM {table} WHERE id = 1")
+                ).one()
+            self.assertEqual(fila.owner_id, 10)
+            self.assertIsNone(fila.vector)
+            self.assertEqual(desempaquetar_vector(fila.vector_binario).tolist(), [1.0, 0.0])
+
+    def test_downgrade_restaura_json_y_elimina_columna(self):
+        with self.engine.begin() as connection:
+            upgrade(connection)
+            downgrade(connection)
+
+        for table in TABLES:
+            columns = {
+                column["name"] for column in inspect(self.engine).get_columns(table)
+            }
+            self.assertNotIn("vector_binario", columns)
+
+            with self.engine.connect() as connection:
+                vector = connection.execute(
+                    text(f"SELECT vector FROM {table} WHERE id = 1")
+                ).scalar()
+            self.assertEqual(json.loads(vector), [1.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
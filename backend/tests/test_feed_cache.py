@@ -0,0 +1,218 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.core.operation_metrics import (
+    METRIC_FEED_CACHE_HIT_COUNT,
+    METRIC_FEED_CACHE_MISS_COUNT,
+    METRIC_FEED_CACHE_REBUILD_DURATION_MS,
+    local_metrics_sink,
+)
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.schemas.publicaciones_schemas import PublicacionCreate
+from app.modules.posts.services import feed_cache_services, feed_publicaciones_services
+from app.modules.posts.services.feed_cache_services import (
+    FeedCache,
+    invalidar_feed_por_comercio,
+    obtener_feed_cache,
+    reiniciar_feed_cache,
+)
+from app.modules.posts.services.feed_publicaciones_services import (
+    obtener_feed_publicaciones,
+    reiniciar_lista_caliente,
+)
+from app.modules.posts.services.publicaciones_services import (
+    crear_publicacion,
+    reconciliar_contadores_publicaciones,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.social.services.likes_publicaciones_services import toggle_like_publicacion
+from app.modules.social.services.seguidores_services import seguir_espacio
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class FeedCacheTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_lista_caliente()
+        reiniciar_feed_cache()
+        local_metrics_sink.clear()
+
+        self.db = TestingSessionLocal()
+        for usuario_id in range(1, 4):
+            self.db.add(
+                Usuario(id=usuario_id, email=f"u{usuario_id}@example.com", hashed_password="hash")
+            )
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in (1, 3):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=True,
+                )
+            )
+
+        viejo = datetime.utcnow() - timedelta(days=30)
+        for publicacion_id in range(1, 6):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=1,
+                    titulo=f"Publicacion {publicacion_id}",
+                    created_at=viejo,
+                    updated_at=viejo,
+                )
+            )
+        self.db.commit()
+        self.db.add(LikePublicacion(usuario_id=3, publicacion_id=2))
+        self.db.commit()
+        reconciliar_contadores_publicaciones(self.db)
+
+    def tearDown(self):
+        reiniciar_lista_caliente()
+        reiniciar_feed_cache()
+        local_metrics_sink.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _metric_total(self, name):
+        return sum(
+            sample.value for sample in local_metrics_sink.snapshot() if sample.name == name
+        )
+
+    def _metric_count(self, name):
+        return len([sample for sample in local_metrics_sink.snapshot() if sample.name == name])
+
+    def _ids(self, usuario_id, **kwargs):
+        pagina = obtener_feed_publicaciones(self.db, usuario_id=usuario_id, **kwargs)
+        return [publicacion.id for publicacion in pagina.items], pagina
+
+    def test_refresh_y_paginas_siguientes_salen_del_cache(self):
+        with patch.object(
+            feed_publicaciones_services,
+            "_rankear_candidatas",
+            wraps=feed_publicaciones_services._rankear_candidatas,
+        ) as rankear:
+            primera, pagina = self._ids(1, limit=2)
+            refresh, _ = self._ids(1, limit=2)
+            segunda, _ = self._ids(1, limit=2, cursor=pagina.next_cursor)
+
+        self.assertEqual(primera, [2, 5])
+        self.assertEqual(refresh, [2, 5])
+        self.assertEqual(segunda, [4, 3])
+        self.assertEqual(rankear.call_count, 1)
+        self.assertEqual(self._metric_total(METRIC_FEED_CACHE_MISS_COUNT), 1)
+        self.assertEqual(self._metric_total(METRIC_FEED_CACHE_HIT_COUNT), 2)
+        self.assertEqual(self._metric_count(METRIC_FEED_CACHE_REBUILD_DURATION_MS), 1)
+
+    def test_like_invalida_solo_el_feed_del_usuario(self):
+        self._ids(1)
+        self._ids(2)
+
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=4)
+
+        self.assertEqual(obtener_feed_cache().usuarios_cacheados(), [2])
+        ids, pagina = self._ids(1)
+        self.assertEqual(ids[:2], [4, 2])
+        self.assertTrue(pagina.items[0].liked_by_me)
+
+    def test_publicacion_nueva_invalida_seguidores_afines_y_anonimo(self):
+        seguir_espacio(self.db, usuario_id=2, comercio_id=3)
+        for usuario_id in (None, 1, 2):
+            self._ids(usuario_id)
+
+        # Comercio 3 no está en ningún ranking: solo seguidores y anónimo.
+        crear_publicacion(
+            self.db,
+            comercio_id=3,
+            publicacion_in=PublicacionCreate(titulo="Nueva"),
+            usuario_autenticado=self.db.get(Usuario, 1),
+        )
+        self.assertEqual(obtener_feed_cache().usuarios_cacheados(), [1])
+
+        # Comercio 1 ya está en el ranking de usuario 1 (afín).
+        invalidar_feed_por_comercio(self.db, 1)
+        self.assertEqual(obtener_feed_cache().usuarios_cacheados(), [])
+
+    def test_publicacion_desactivada_se_saltea_al_servir_desde_cache(self):
+        self._ids(1, limit=2)
+        self.db.get(Publicacion, 5).is_activa = False
+        self.db.commit()
+
+        ids, pagina = self._ids(1, limit=2)
+
+        self.assertEqual(ids, [2, 4])
+        self.assertIsNotNone(pagina.next_cursor)
+        self.assertEqual(self._metric_total(METRIC_FEED_CACHE_HIT_COUNT), 1)
+
+    def test_lru_y_ttl_acotan_las_entradas(self):
+        cache = FeedCache(max_entries=2, ttl_seconds=30)
+        referencia = datetime(2026, 1, 1)
+        with patch.object(feed_cache_services.time, "monotonic", return_value=100.0):
+            for usuario_id in (None, 1, 2):
+                cache.guardar(
+                    usuario_id,
+                    ranking=[(1, 1.0)],
+                    comercios_ids=frozenset({1}),
+                    referencia=referencia,
+                )
+            self.assertEqual(cache.usuarios_cacheados(), [1, 2])
+            self.assertIsNotNone(cache.obtener(1))
+            self.assertIsNone(cache.obtener(1, referencia=datetime(2026, 1, 2)))
+
+        with patch.object(feed_cache_services.time, "monotonic", return_value=130.0):
+            self.assertIsNone(cache.obtener(2))
+
+        self.assertFalse(FeedCache(max_entries=0, ttl_seconds=30).habilitado)
+
+    def test_ranking_con_referencia_anterior_no_pisa_la_entrada_vigente(self):
+        cache = FeedCache(max_entries=2, ttl_seconds=30)
+        nueva = datetime(2026, 1, 2)
+        with patch.object(feed_cache_services.time, "monotonic", return_value=100.0):
+            cache.guardar(1, ranking=[(2, 1.0)], comercios_ids=frozenset({1}), referencia=nueva)
+            vieja = cache.guardar(
+                1,
+                ranking=[(1, 1.0)],
+                comercios_ids=frozenset({1}),
+                referencia=datetime(2026, 1, 1),
+            )
+
+            self.assertEqual(vieja.ranking, ((1, 1.0),))
+            self.assertEqual(cache.obtener(1).referencia, nueva)
+
+        with patch.object(feed_cache_services.time, "monotonic", return_value=130.0):
+            cache.guardar(
+                1,
+                ranking=[(1, 1.0)],
+                comercios_ids=frozenset({1}),
+                referencia=datetime(2026, 1, 1),
+            )
+            self.assertEqual(cache.obtener(1).referencia, datetime(2026, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
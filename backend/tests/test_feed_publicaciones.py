@@ -0,0 +1,236 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.auth import obtener_usuario_actual
+from app.core.database import Base, get_db
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.vector_codec import empaquetar_vector
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.models.usuarios_embeddings_models import UsuarioEmbedding
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.routes.feed_publicaciones_routers import router as feed_router
+from app.modules.posts.services import feed_publicaciones_services
+from app.modules.posts.services.feed_cache_services import reiniciar_feed_cache
+from app.modules.posts.services.feed_publicaciones_services import (
+    CursorFeed,
+    CursorFeedInvalidoError,
+    codificar_cursor,
+    decodificar_cursor,
+    obtener_feed_publicaciones,
+    reiniciar_lista_caliente,
+)
+from app.modules.posts.services.publicacion_scores_services import (
+    reconstruir_scores_publicaciones,
+)
+from app.modules.posts.services.publicaciones_services import reconciliar_contadores_publicaciones
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.social.models.publicaciones_guardadas_models import PublicacionGuardada
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app = FastAPI()
+app.include_router(feed_router)
+client = TestClient(app)
+
+
+class FeedPublicacionesPaginadoTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_lista_caliente()
+        reiniciar_feed_cache()
+        app.dependency_overrides = {
+            get_db: override_get_db,
+            obtener_usuario_actual: lambda: Usuario(id=1, email="u1@example.com"),
+        }
+
+        self.db = TestingSessionLocal()
+        for usuario_id in range(1, 5):
+            self.db.add(
+                Usuario(id=usuario_id, email=f"u{usuario_id}@example.com", hashed_password="hash")
+            )
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id, activo in ((1, True), (2, False), (3, True)):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=activo,
+                )
+            )
+
+        # Publicaciones viejas (sin bonus de recencia): el orden sale de likes.
+        viejo = datetime.utcnow() - timedelta(days=30)
+        for publicacion_id in range(1, 8):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=1,
+                    titulo=f"Publicacion {publicacion_id}",
+                    created_at=viejo,
+                    updated_at=viejo,
+                )
+            )
+        self.db.add(Publicacion(id=8, comercio_id=1, titulo="Inactiva", is_activa=False))
+        self.db.add(Publicacion(id=9, comercio_id=2, titulo="De comercio inactivo"))
+        self.db.commit()
+
+        for usuario_id in (1, 2, 3):
+            self.db.add(LikePublicacion(usuario_id=usuario_id, publicacion_id=2))
+        self.db.add(LikePublicacion(usuario_id=2, publicacion_id=5))
+        self.db.add(PublicacionGuardada(usuario_id=2, publicacion_id=5))
+        self.db.commit()
+        reconciliar_contadores_publicaciones(self.db)
+        reconstruir_scores_publicaciones(self.db)
+
+    def tearDown(self):
+        reiniciar_lista_caliente()
+        reiniciar_feed_cache()
+        app.dependency_overrides = {}
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _recorrer(self, limit):
+        ids, cursor, paginas = [], None, 0
+        while True:
+            pagina = obtener_feed_publicaciones(self.db, usuario_id=1, limit=limit, cursor=cursor)
+            ids.extend(publicacion.id for publicacion in pagina.items)
+            paginas += 1
+            cursor = pagina.next_cursor
+            if cursor is None:
+                return ids, paginas
+
+    def test_paginas_recorren_el_ranking_completo_sin_repetir(self):
+        completo = obtener_feed_publicaciones(self.db, usuario_id=1, limit=50)
+        ids, paginas = self._recorrer(limit=2)
+
+        # likes 3 -> 1.5 ; like + guardado -> 1.5 ; empate por id DESC.
+        self.assertEqual([publicacion.id for publicacion in completo.items], [5, 2, 7, 6, 4, 3, 1])
+        self.assertIsNone(completo.next_cursor)
+        self.assertEqual(ids, [5, 2, 7, 6, 4, 3, 1])
+        self.assertEqual(paginas, 4)
+
+        primera = obtener_feed_publicaciones(self.db, usuario_id=1, limit=2)
+        self.assertTrue(primera.items[1].liked_by_me)
+        self.assertEqual(primera.items[1].likes_count, 3)
+
+    def test_solo_rankea_la_ventana_de_recientes_y_la_lista_caliente(self):
+        with patch.object(feed_publicaciones_services, "VENTANA_RECIENTES", 2), patch.object(
+            feed_publicaciones_services, "TAMANO_LISTA_CALIENTE", 2
+        ):
+            pagina = obtener_feed_publicaciones(self.db, usuario_id=1, limit=50)
+
+        # 7 y 6 (más nuevas) + 2 y 5 (lista caliente).
+        self.assertEqual([publicacion.id for publicacion in pagina.items], [5, 2, 7, 6])
+
+    def test_lista_caliente_se_reutiliza_dentro_del_ttl(self):
+        sentencias = []
+
+        def _registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        obtener_feed_publicaciones(self.db, usuario_id=1)
+        event.listen(engine, "before_cursor_execute", _registrar)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", _registrar)
+        obtener_feed_publicaciones(self.db, usuario_id=1)
+
+        self.assertFalse(
+            [
+                sentencia
+                for sentencia in sentencias
+                if "ORDER BY publicacion_scores.score_feed" in sentencia
+            ]
+        )
+
+    def test_afinidad_se_calcula_por_comercio_y_se_reparte(self):
+        viejo = datetime.utcnow() - timedelta(days=30)
+        for publicacion_id in (10, 11):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=3,
+                    titulo=f"Publicacion {publicacion_id}",
+                    created_at=viejo,
+                    updated_at=viejo,
+                )
+            )
+        self.db.add(UsuarioEmbedding(usuario_id=1, vector_binario=empaquetar_vector([2.0, 0.0, 0.0])))
+        self.db.add(ComercioEmbedding(comercio_id=1, vector_binario=empaquetar_vector([0.0, 1.0, 0.0])))
+        self.db.add(ComercioEmbedding(comercio_id=3, vector_binario=empaquetar_vector([3.0, 3.0, 0.0])))
+        self.db.commit()
+
+        pagina = obtener_feed_publicaciones(self.db, usuario_id=1, limit=3)
+        siguiente = decodificar_cursor(pagina.next_cursor)
+
+        # coseno([1,0,0], [1,1,0]) * 10 = 7.071068 para las dos de comercio 3.
+        self.assertEqual([publicacion.id for publicacion in pagina.items], [11, 10, 5])
+        self.assertEqual(siguiente.score, 1.5)
+
+        sin_vector = obtener_feed_publicaciones(self.db, usuario_id=2, limit=2)
+        self.assertEqual([publicacion.id for publicacion in sin_vector.items], [5, 2])
+
+    def test_cursor_conserva_la_hora_de_referencia(self):
+        referencia = datetime(2026, 1, 2, 3, 4, 5)
+        cursor = decodificar_cursor(
+            codificar_cursor(CursorFeed(score=1.5, publicacion_id=9, referencia=referencia))
+        )
+
+        self.assertEqual(cursor, CursorFeed(score=1.5, publicacion_id=9, referencia=referencia))
+        with self.assertRaises(CursorFeedInvalidoError):
+            decodificar_cursor("no-es-un-cursor")
+
+    def test_endpoint_devuelve_items_y_next_cursor(self):
+        response = client.get("/feed/publicaciones", params={"limit": 3})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item["id"] for item in body["items"]], [5, 2, 7])
+
+        siguiente = client.get(
+            "/feed/publicaciones",
+            params={"limit": 3, "cursor": body["next_cursor"]},
+        )
+        self.assertEqual([item["id"] for item in siguiente.json()["items"]], [6, 4, 3])
+
+        self.assertEqual(
+            client.get("/feed/publicaciones", params={"cursor": "%%%"}).status_code,
+            400,
+        )
+        self.assertEqual(
+            client.get("/feed/publicaciones", params={"limit": 500}).status_code,
+            422,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
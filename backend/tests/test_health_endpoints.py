@@ -10,6 +10,7 @@ from app.core.health import (
     DEGRADED,
     HEALTHY,
     UNHEALTHY,
+    WARMING,
     HealthCheckResult,
     HealthRegistry,
     backup_evidence_check,
@@ -111,6 +112,17 @@ class HealthEndpointTests(unittest.TestCase):
         self.assertEqual(response.status_code, 503)
         self.assertEqual(response.json()["status"], UNHEALTHY)
 
+    def test_readiness_warming_returns_503_until_model_loaded(self):
+        registry = HealthRegistry()
+        registry.register_readiness(lambda: _check("backup_evidence", DEGRADED))
+        registry.register_readiness(lambda: _check("embeddings", WARMING))
+        client = _build_test_client(registry)
+
+        response = client.get("/health/ready")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], WARMING)
+
 
 class HealthCheckTests(unittest.TestCase):
     def test_backup_evidence_check_reports_valid_manifest_without_exposing_path(self):
@@ -0,0 +1,304 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import construir_indice_ann
+from app.core.config import settings
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.ivf_index import IVFIndex, IVFIndexError, medir_recall
+from app.modules.ai.core.vector_index import VectorIndex
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+from app.modules.ai.services.comercios_ann_services import (
+    compactar_indice_ann_comercios,
+    quitar_comercio_de_ann,
+    registrar_vector_comercio_en_ann,
+    reiniciar_indice_ann_comercios,
+    sincronizar_indice_ann_comercios,
+    top_k_comercios_ann,
+)
+from app.modules.ai.services.comercios_embeddings_services import (
+    _serializar_vector,
+    guardar_vectores_comercios,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine import (
+    CandidateGenerationContext,
+    SemanticAnnCandidateSource,
+    get_default_candidate_sources,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _corpus_agrupado(total=2000, dim=64, clusters=40, seed=3):
+    rng = np.random.default_rng(seed)
+    centros = rng.normal(size=(clusters, dim))
+    asignacion = rng.integers(0, clusters, size=total)
+    vectores = centros[asignacion] + 0.8 * rng.normal(size=(total, dim))
+    queries = centros[rng.integers(0, clusters, size=50)] + 0.8 * rng.normal(size=(50, dim))
+    return list(enumerate(vectores, start=1)), list(queries)
+
+
+class IVFIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.vectores, self.queries = _corpus_agrupado()
+        self.indice = IVFIndex.construir(self.vectores, n_probe=8)
+        self.exacto = VectorIndex()
+        self.exacto.upsert_many(self.vectores)
+
+    def test_recall_contra_indice_exacto(self):
+        self.assertEqual(self.indice.n_listas, 45)
+        self.assertGreaterEqual(medir_recall(self.indice, self.exacto, self.queries, k=10), 0.9)
+        # Sondear todas las listas equivale a la búsqueda exacta.
+        self.assertEqual(
+            medir_recall(
+                self.indice,
+                self.exacto,
+                self.queries,
+                k=10,
+                n_probe=self.indice.n_listas,
+            ),
+            1.0,
+        )
+
+    def test_top_k_ordena_por_score_y_desempata_por_id(self):
+        indice = IVFIndex.construir(
+            [(1, [1.0, 0.0]), (2, [2.0, 0.0]), (3, [0.0, 1.0])],
+            n_listas=1,
+        )
+
+        top = indice.top_k([1.0, 0.0], 3)
+
+        self.assertEqual([entity_id for entity_id, _ in top], [2, 1, 3])
+        self.assertAlmostEqual(top[0][1], 1.0, places=5)
+        self.assertEqual(indice.top_k([1.0, 0.0, 0.0], 3), [])
+        self.assertEqual(indice.top_k([1.0, 0.0], 0), [])
+
+    def test_upsert_y_baja_incrementales_sin_reconstruir(self):
+        query = self.queries[0]
+        primero = self.indice.top_k(query, 1)[0][0]
+
+        # Reemplazo: la fila base queda como tombstone y el vector va al delta.
+        self.indice.upsert(primero, -np.asarray(query))
+        self.assertNotIn(primero, [entity_id for entity_id, _ in self.indice.top_k(query, 10)])
+
+        self.indice.upsert(9999, query)
+        self.assertEqual(self.indice.top_k(query, 1)[0][0], 9999)
+        self.assertEqual(self.indice.tamano_delta(), 2)
+
+        self.assertTrue(self.indice.remove(9999))
+        self.assertFalse(self.indice.remove(9999))
+        self.assertNotIn(9999, self.indice)
+        self.assertEqual(len(self.indice), len(self.vectores))
+
+        compacto = self.indice.compactar()
+        self.assertEqual(compacto.tamano_delta(), 0)
+        self.assertEqual(len(compacto), len(self.vectores))
+        self.assertIn(primero, compacto)
+
+    def test_guardar_y_cargar_con_memmap(self):
+        self.indice.metadata["model_id"] = "simulated"
+        self.indice.upsert(9999, self.queries[1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.indice.guardar(Path(tmp) / "comercios.ivf")
+            cargado = IVFIndex.cargar(path)
+
+            self.assertIsInstance(cargado._matriz, np.memmap)
+            self.assertEqual(cargado.metadata["model_id"], "simulated")
+            self.assertEqual(len(cargado), len(self.vectores) + 1)
+            self.assertEqual(cargado.tamano_delta(), 0)
+            self.exacto.upsert(9999, self.queries[1])
+            for query in self.queries[:5]:
+                self.assertEqual(
+                    [entity_id for entity_id, _ in cargado.top_k(query, 10, n_probe=cargado.n_listas)],
+                    [entity_id for entity_id, _ in self.exacto.top_k(query, 10)],
+                )
+
+            # El archivo es de solo lectura: los cambios van al delta en memoria.
+            cargado.upsert(1, self.queries[2])
+            self.assertEqual(cargado.top_k(self.queries[2], 1)[0][0], 1)
+            del cargado
+
+    def test_archivo_invalido_es_error_del_indice(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "roto.ivf"
+            path.write_bytes(b"no es un indice")
+            with self.assertRaises(IVFIndexError):
+                IVFIndex.cargar(path)
+
+        with self.assertRaises(IVFIndexError):
+            IVFIndex.construir([(1, None), (2, [0.0, 0.0])])
+
+
+class ComerciosAnnServicesTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        self.db = SessionLocal()
+        self.provider = SimulatedEmbeddingProvider()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in range(1, 6):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=True,
+                )
+            )
+        for comercio_id, texto in enumerate(
+            ("pizzeria", "ferreteria", "cafeteria", "heladeria"),
+            start=1,
+        ):
+            self.db.add(
+                ComercioEmbedding(
+                    comercio_id=comercio_id,
+                    vector_binario=_serializar_vector(self.provider.embed_text(texto)),
+                    model_version=1,
+                )
+            )
+        self.db.commit()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "comercios.ivf"
+        self._patch = patch.object(settings, "EMBEDDINGS_ANN_INDEX_PATH", str(self.path))
+        self._patch.start()
+        reiniciar_indice_ann_comercios()
+
+    def tearDown(self):
+        reiniciar_indice_ann_comercios()
+        self._patch.stop()
+        self.tmp.cleanup()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def test_construye_guarda_y_reabre_desde_archivo(self):
+        query = self.provider.embed_text("ferreteria")
+
+        self.assertEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 2)
+        self.assertTrue(self.path.exists())
+
+        reiniciar_indice_ann_comercios()
+        with patch(
+            "app.modules.ai.services.comercios_ann_services.construir_indice_ann_comercios",
+        ) as construir:
+            top = top_k_comercios_ann(self.db, query_vector=query, k=1)
+
+        construir.assert_not_called()
+        self.assertEqual(top[0][0], 2)
+
+    def test_upsert_de_embedding_actualiza_el_indice_abierto(self):
+        query = self.provider.embed_text("libreria")
+        top_k_comercios_ann(self.db, query_vector=query, k=1)
+
+        guardar_vectores_comercios(self.db, {5: self.provider.embed_text("libreria")})
+
+        self.assertEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 5)
+
+    def test_upsert_durante_la_compactacion_no_se_pierde(self):
+        query = self.provider.embed_text("libreria")
+        indice = sincronizar_indice_ann_comercios(self.db)
+        compactar_original = indice.compactar
+
+        def compactar_con_upsert_concurrente(**kwargs):
+            compacto = compactar_original(**kwargs)
+            registrar_vector_comercio_en_ann(5, query)
+            return compacto
+
+        with patch.object(indice, "compactar", side_effect=compactar_con_upsert_concurrente):
+            compacto = compactar_indice_ann_comercios(self.db)
+
+        self.assertIsNot(compacto, indice)
+        self.assertEqual(compacto.top_k(query, 1)[0][0], 5)
+        self.assertEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 5)
+
+    def test_desactivacion_saca_al_comercio_y_la_sincronizacion_lo_repone(self):
+        query = self.provider.embed_text("ferreteria")
+        self.assertEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 2)
+
+        quitar_comercio_de_ann(2)
+        self.assertNotEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 2)
+
+        # Un cambio posterior del comercio (p. ej. reactivarlo en otro worker)
+        # lo repone por updated_at.
+        comercio = self.db.get(Comercio, 2)
+        comercio.nombre = "Ferreteria reabierta"
+        self.db.commit()
+        with patch(
+            "app.modules.ai.services.comercios_ann_services.INTERVALO_SINCRONIZACION_SEGUNDOS",
+            0.0,
+        ):
+            self.assertEqual(top_k_comercios_ann(self.db, query_vector=query, k=1)[0][0], 2)
+
+    def test_construccion_excluye_comercios_inactivos(self):
+        self.db.get(Comercio, 2).activo = False
+        self.db.commit()
+        query = self.provider.embed_text("ferreteria")
+
+        vecinos = top_k_comercios_ann(self.db, query_vector=query, k=4)
+
+        self.assertEqual(sorted(comercio_id for comercio_id, _ in vecinos), [1, 3, 4])
+
+    def test_fuente_semantic_ann_solo_con_el_indice_habilitado(self):
+        query = tuple(self.provider.embed_text("ferreteria"))
+        self.db.get(Comercio, 1).activo = False
+        self.db.commit()
+        sincronizar_indice_ann_comercios(self.db)
+        context = CandidateGenerationContext(
+            query_original="ferreteria",
+            query_normalizada="ferreteria",
+            limit_por_fuente=2,
+            query_vector=query,
+        )
+
+        evidencias = SemanticAnnCandidateSource().generate(context, self.db)
+
+        self.assertEqual(evidencias[0].comercio_id, 2)
+        self.assertNotIn(1, [evidencia.comercio_id for evidencia in evidencias])
+        self.assertEqual(
+            SemanticAnnCandidateSource().generate(
+                CandidateGenerationContext(query_original="x", query_normalizada="x"),
+                self.db,
+            ),
+            [],
+        )
+        fuentes = [type(fuente) for fuente in get_default_candidate_sources()]
+        self.assertNotIn(SemanticAnnCandidateSource, fuentes)
+        with patch.object(settings, "EMBEDDINGS_ANN_ENABLED", True):
+            fuentes = [type(fuente) for fuente in get_default_candidate_sources()]
+        self.assertIn(SemanticAnnCandidateSource, fuentes)
+
+    def test_script_construye_y_mide_recall(self):
+        indice = construir_indice_ann.construir_y_guardar(self.db, salida=str(self.path))
+        resultado = construir_indice_ann.evaluar_indice(indice, k=2)
+
+        self.assertEqual(resultado.vectores, 4)
+        self.assertEqual(resultado.queries, 4)
+        self.assertEqual(resultado.recall_medio, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
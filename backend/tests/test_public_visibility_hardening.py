@@ -18,6 +18,13 @@ from app.modules.posts.routes.feed_publicaciones_routers import (
     router as feed_publicaciones_router,
 )
 from app.modules.posts.routes.publicaciones_routers import router as publicaciones_router
+from app.modules.posts.services.feed_cache_services import reiniciar_feed_cache
+from app.modules.posts.services.publicacion_scores_services import (
+    reconstruir_scores_publicaciones,
+)
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    reiniciar_indice_texto_publicaciones,
+)
 from app.modules.posts.routes.ranking_publicaciones_routers import (
     router as ranking_publicaciones_router,
 )
@@ -71,6 +78,8 @@ client = TestClient(app)
 class PublicVisibilityHardeningTests(unittest.TestCase):
     def setUp(self):
         Base.metadata.create_all(bind=engine)
+        reiniciar_feed_cache()
+        reiniciar_indice_texto_publicaciones()
         app.dependency_overrides = {get_db: override_get_db}
         db = TestingSessionLocal()
         db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
@@ -78,6 +87,8 @@ class PublicVisibilityHardeningTests(unittest.TestCase):
         db.close()
 
     def tearDown(self):
+        reiniciar_feed_cache()
+        reiniciar_indice_texto_publicaciones()
         app.dependency_overrides = {get_db: override_get_db}
         Base.metadata.drop_all(bind=engine)
 
@@ -237,7 +248,8 @@ class PublicVisibilityHardeningTests(unittest.TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual([item["id"] for item in response.json()], [20])
+        self.assertEqual([item["id"] for item in response.json()["items"]], [20])
+        self.assertIsNone(response.json()["next_cursor"])
 
     def test_ranking_excluye_publicaciones_de_comercio_inactivo(self):
         db = TestingSessionLocal()
@@ -245,6 +257,7 @@ class PublicVisibilityHardeningTests(unittest.TestCase):
         self._crear_comercio(db, comercio_id=11, activo=False)
         self._crear_publicacion(db, publicacion_id=20, comercio_id=10)
         self._crear_publicacion(db, publicacion_id=21, comercio_id=11)
+        reconstruir_scores_publicaciones(db)
         db.close()
 
         response = client.get("/ranking/publicaciones")
@@ -0,0 +1,256 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.core.operation_metrics import (
+    METRIC_PUBLICACION_SCORES_DECAY_COUNT,
+    METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT,
+    local_metrics_sink,
+)
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.schemas.publicaciones_schemas import PublicacionCreate
+from app.modules.posts.services import publicacion_scores_services
+from app.modules.posts.services.publicacion_scores_services import (
+    calcular_score_feed,
+    calcular_score_ranking,
+    notificar_cambio_publicacion,
+    recalcular_recencia_vencida,
+    reconstruir_scores_publicaciones,
+)
+from app.modules.posts.services.publicacion_views_services import (
+    reiniciar_views_pendientes,
+    vaciar_views_pendientes,
+)
+from app.modules.posts.services.publicaciones_services import (
+    crear_publicacion,
+    desactivar_publicacion,
+    obtener_publicacion_por_id_y_sumar_view,
+    reconciliar_contadores_publicaciones,
+)
+from app.modules.posts.services.ranking_publicaciones_services import (
+    listar_publicaciones_ranked,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.social.services.likes_publicaciones_services import toggle_like_publicacion
+from app.modules.social.services.publicaciones_guardadas_services import (
+    guardar_publicacion,
+    quitar_publicacion_guardada,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class PublicacionScoresTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        local_metrics_sink.clear()
+        reiniciar_views_pendientes()
+
+        self.db = TestingSessionLocal()
+        self.ahora = datetime.utcnow()
+        for usuario_id in range(1, 4):
+            self.db.add(
+                Usuario(id=usuario_id, email=f"u{usuario_id}@example.com", hashed_password="hash")
+            )
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        self.db.add(
+            Comercio(
+                id=1,
+                usuario_id=1,
+                nombre="Comercio 1",
+                portada_url="/uploads/test.jpg",
+                rubro_id=1,
+                provincia="Santa Fe",
+                ciudad="Rafaela",
+                activo=True,
+            )
+        )
+        viejo = self.ahora - timedelta(days=30)
+        for publicacion_id in range(1, 5):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=1,
+                    titulo=f"Publicacion {publicacion_id}",
+                    created_at=viejo,
+                    updated_at=viejo,
+                )
+            )
+        self.db.add(
+            Publicacion(
+                id=5,
+                comercio_id=1,
+                titulo="Nueva",
+                created_at=self.ahora - timedelta(hours=2),
+                updated_at=self.ahora,
+            )
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        local_metrics_sink.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _metric_total(self, name):
+        return sum(
+            sample.value for sample in local_metrics_sink.snapshot() if sample.name == name
+        )
+
+    def _fila(self, publicacion_id):
+        self.db.expire_all()
+        return self.db.get(PublicacionScore, publicacion_id)
+
+    def test_formulas_conservan_los_criterios_de_ranking_y_feed(self):
+        hace_dos_horas = self.ahora - timedelta(hours=2)
+
+        self.assertEqual(
+            calcular_score_ranking(
+                likes_count=3, guardados_count=1, publicado_en=hace_dos_horas, ahora=self.ahora
+            ),
+            8.0,
+        )
+        self.assertEqual(
+            calcular_score_feed(
+                likes_count=50, guardados_count=1, publicado_en=hace_dos_horas, ahora=self.ahora
+            ),
+            23.0,
+        )
+
+    def test_eventos_de_like_y_guardado_actualizan_la_fila(self):
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=2)
+        toggle_like_publicacion(self.db, usuario_id=2, publicacion_id=2)
+        guardar_publicacion(self.db, usuario_id=3, publicacion_id=2)
+
+        fila = self._fila(2)
+        self.assertEqual((fila.likes_count, fila.guardados_count), (2, 1))
+        self.assertEqual(fila.score, 4.0)
+
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=2)
+        quitar_publicacion_guardada(self.db, usuario_id=3, publicacion_id=2)
+
+        fila = self._fila(2)
+        self.assertEqual((fila.likes_count, fila.guardados_count), (1, 0))
+        self.assertEqual(fila.score, 1.0)
+
+    def test_views_suman_sobre_la_fila_existente(self):
+        reconstruir_scores_publicaciones(self.db)
+
+        obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=3)
+        obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=3)
+        vaciar_views_pendientes(self.db)
+
+        self.assertEqual(self._fila(3).views_count, 2)
+
+    def test_desactivar_saca_la_publicacion_del_ranking(self):
+        toggle_like_publicacion(self.db, usuario_id=2, publicacion_id=4)
+        self.assertIn(4, [p.id for p in listar_publicaciones_ranked(self.db)])
+
+        desactivar_publicacion(
+            self.db,
+            publicacion_id=4,
+            usuario_autenticado=self.db.get(Usuario, 1),
+        )
+
+        self.assertFalse(self._fila(4).is_activa)
+        self.assertNotIn(4, [p.id for p in listar_publicaciones_ranked(self.db)])
+
+    def test_ranking_lee_solo_el_read_model_y_respeta_el_limite(self):
+        for usuario_id in (1, 2):
+            self.db.add(LikePublicacion(usuario_id=usuario_id, publicacion_id=1))
+        self.db.add(LikePublicacion(usuario_id=3, publicacion_id=3))
+        self.db.commit()
+        reconciliar_contadores_publicaciones(self.db)
+
+        # La lectura no reconstruye: la carga inicial es un paso explícito.
+        self.assertEqual(listar_publicaciones_ranked(self.db), [])
+        self.assertEqual(self.db.query(PublicacionScore).count(), 0)
+
+        reconstruir_scores_publicaciones(self.db)
+        ranking = listar_publicaciones_ranked(self.db, limit=3)
+
+        # 5 -> bonus 3 ; 1 -> 2 likes ; 3 -> 1 like.
+        self.assertEqual([p.id for p in ranking], [5, 1, 3])
+        self.assertEqual(ranking[1].likes_count, 2)
+
+    def test_alta_escribe_la_fila_en_la_misma_transaccion(self):
+        reconstruir_scores_publicaciones(self.db)
+        toggle_like_publicacion(self.db, usuario_id=2, publicacion_id=4)
+
+        with patch.object(
+            publicacion_scores_services,
+            "recalcular_scores_publicaciones",
+            side_effect=AssertionError("no debe recalcular después del commit"),
+        ):
+            nueva = crear_publicacion(
+                self.db,
+                comercio_id=1,
+                publicacion_in=PublicacionCreate(titulo="Recién publicada"),
+                usuario_autenticado=self.db.get(Usuario, 1),
+            )
+
+        fila = self._fila(nueva.id)
+        self.assertEqual((fila.is_activa, fila.score), (True, 3.0))
+        # 6 y 5 empatan en bonus 3: desempata el id más nuevo.
+        self.assertEqual([p.id for p in listar_publicaciones_ranked(self.db)], [6, 5, 4, 3, 2, 1])
+
+    def test_decaimiento_recalcula_solo_tramos_vencidos(self):
+        reconstruir_scores_publicaciones(self.db, ahora=self.ahora)
+        fila = self._fila(5)
+        self.assertEqual((fila.score, fila.score_feed), (3.0, 12.0))
+        self.assertIsNotNone(fila.recencia_hasta)
+        self.assertIsNone(self._fila(1).recencia_hasta)
+
+        recalculadas = recalcular_recencia_vencida(
+            self.db, ahora=self.ahora + timedelta(hours=5)
+        )
+        self.assertEqual(recalculadas, 1)
+        fila = self._fila(5)
+        self.assertEqual((fila.score, fila.score_feed), (3.0, 8.0))
+
+        self.assertEqual(
+            recalcular_recencia_vencida(self.db, ahora=self.ahora + timedelta(days=10)),
+            1,
+        )
+        fila = self._fila(5)
+        self.assertEqual((fila.score, fila.score_feed), (0.0, 0.0))
+        self.assertIsNone(fila.recencia_hasta)
+        self.assertEqual(
+            self._metric_total(METRIC_PUBLICACION_SCORES_DECAY_COUNT),
+            2,
+        )
+
+    def test_falla_del_hook_no_propaga_y_queda_en_metricas(self):
+        with patch.object(
+            publicacion_scores_services,
+            "recalcular_scores_publicaciones",
+            side_effect=RuntimeError("db caida"),
+        ):
+            notificar_cambio_publicacion(self.db, 1)
+
+        self.assertEqual(
+            self._metric_total(METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT),
+            1,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
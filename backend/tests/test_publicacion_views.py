@@ -0,0 +1,185 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.core.operation_metrics import (
+    METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT,
+    METRIC_PUBLICACION_VIEWS_FLUSH_COUNT,
+    METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT,
+    local_metrics_sink,
+)
+from app.modules.posts.models.publicacion_scores_models import PublicacionScore
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services import publicacion_views_services
+from app.modules.posts.services.publicacion_scores_services import (
+    recalcular_scores_publicaciones,
+)
+from app.modules.posts.services.publicacion_views_services import (
+    PublicacionViewsFlushWorker,
+    reiniciar_views_pendientes,
+    vaciar_views_pendientes,
+    views_pendientes_publicacion,
+)
+from app.modules.posts.services.publicaciones_services import (
+    obtener_publicacion_por_id_y_sumar_view,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class PublicacionViewsTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        local_metrics_sink.clear()
+        reiniciar_views_pendientes()
+
+        self.db = TestingSessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        self.db.add(
+            Comercio(
+                id=1,
+                usuario_id=1,
+                nombre="Comercio 1",
+                portada_url="/uploads/test.jpg",
+                rubro_id=1,
+                provincia="Santa Fe",
+                ciudad="Rafaela",
+                activo=True,
+            )
+        )
+        for publicacion_id in (1, 2):
+            self.db.add(Publicacion(id=publicacion_id, comercio_id=1, titulo=f"P{publicacion_id}"))
+        self.db.commit()
+        recalcular_scores_publicaciones(self.db, [1, 2])
+
+    def tearDown(self):
+        reiniciar_views_pendientes()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _views(self, publicacion_id):
+        self.db.expire_all()
+        return (
+            self.db.get(Publicacion, publicacion_id).views_count,
+            self.db.get(PublicacionScore, publicacion_id).views_count,
+        )
+
+    def _metric_total(self, name):
+        return sum(
+            sample.value for sample in local_metrics_sink.snapshot() if sample.name == name
+        )
+
+    def test_detalle_acumula_la_vista_sin_escribir(self):
+        sentencias = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            with patch.object(self.db, "commit", wraps=self.db.commit) as commit:
+                publicacion = obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+                obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        self.assertEqual(publicacion.id, 1)
+        # Persistidas (0) + pendientes de este proceso, sin ensuciar la sesión.
+        self.assertEqual(publicacion.views_count, 2)
+        self.assertNotIn(publicacion, self.db.dirty)
+        commit.assert_not_called()
+        self.assertTrue(sentencias)
+        self.assertTrue(all(sentencia.lstrip().startswith("SELECT") for sentencia in sentencias))
+        self.assertEqual(views_pendientes_publicacion(1), 2)
+        self.assertEqual(self._views(1), (0, 0))
+
+    def test_detalle_suma_pendientes_sobre_lo_persistido(self):
+        obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+        vaciar_views_pendientes(self.db)
+
+        publicacion = obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+
+        self.assertEqual(publicacion.views_count, 2)
+        self.assertEqual(self._views(1), (1, 1))
+
+    def test_flush_escribe_un_update_por_tabla(self):
+        for publicacion_id in (2, 1, 2):
+            obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=publicacion_id)
+
+        updates = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE"):
+                updates.append((statement, executemany))
+
+        event.listen(engine, "before_cursor_execute", capturar)
+        try:
+            self.assertEqual(vaciar_views_pendientes(self.db), 3)
+        finally:
+            event.remove(engine, "before_cursor_execute", capturar)
+
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(all(executemany for _, executemany in updates))
+        self.assertEqual(self._views(1), (1, 1))
+        self.assertEqual(self._views(2), (2, 2))
+        self.assertEqual(views_pendientes_publicacion(2), 0)
+        self.assertEqual(vaciar_views_pendientes(self.db), 0)
+        self.assertEqual(self._metric_total(METRIC_PUBLICACION_VIEWS_FLUSH_COUNT), 3)
+
+    def test_flush_fallido_devuelve_las_vistas_al_acumulador(self):
+        obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+
+        with patch.object(self.db, "commit", side_effect=RuntimeError("db caida")):
+            self.assertEqual(vaciar_views_pendientes(self.db), 0)
+
+        self.assertEqual(views_pendientes_publicacion(1), 1)
+        self.assertEqual(self._metric_total(METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT), 1)
+
+        self.assertEqual(vaciar_views_pendientes(self.db), 1)
+        self.assertEqual(self._views(1), (1, 1))
+
+    def test_sin_tabla_de_scores_persiste_publicaciones_y_no_reencola(self):
+        obtener_publicacion_por_id_y_sumar_view(self.db, publicacion_id=1)
+        PublicacionScore.__table__.drop(bind=engine)
+
+        self.assertEqual(vaciar_views_pendientes(self.db), 1)
+
+        self.assertEqual(views_pendientes_publicacion(1), 0)
+        self.db.expire_all()
+        self.assertEqual(self.db.get(Publicacion, 1).views_count, 1)
+        self.assertEqual(
+            self._metric_total(METRIC_PUBLICACION_SCORES_REFRESH_FAILED_COUNT),
+            1,
+        )
+        self.assertEqual(self._metric_total(METRIC_PUBLICACION_VIEWS_FLUSH_FAILED_COUNT), 0)
+
+    def test_detener_worker_vacia_lo_pendiente(self):
+        publicacion_views_services.registrar_view_publicacion(2)
+        worker = PublicacionViewsFlushWorker(TestingSessionLocal, intervalo_segundos=3600)
+        worker.iniciar()
+
+        worker.detener()
+
+        self.assertEqual(views_pendientes_publicacion(2), 0)
+        self.assertEqual(self._views(2), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    buscar_comercio_ids_por_publicaciones,
+    buscar_publicaciones_texto,
+    construir_consulta_fulltext,
+    indice_resuelve_busqueda,
+    registrar_publicacion_en_indice_texto,
+    reiniciar_indice_texto_publicaciones,
+    tokenizar_busqueda,
+)
+from app.modules.posts.services.publicaciones_services import listar_publicaciones_activas
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine.candidate_sources import (
+    PublicacionCandidateSource,
+)
+from app.modules.search.services.candidate_engine.candidate_types import (
+    CandidateGenerationContext,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_publicaciones_fulltext import downgrade, upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class TokenizacionBusquedaTests(unittest.TestCase):
+    def test_tokens_sin_acentos_stopwords_ni_repetidos(self):
+        self.assertEqual(
+            tokenizar_busqueda("Café con LECHE y medialunas, café"),
+            ["cafe", "leche", "medialunas"],
+        )
+        self.assertEqual(tokenizar_busqueda("de la y"), [])
+
+    def test_terminos_cortos_o_solo_stopwords_no_usan_el_indice(self):
+        self.assertTrue(indice_resuelve_busqueda("pan de campo"))
+        self.assertFalse(indice_resuelve_busqueda("té verde"))
+        self.assertFalse(indice_resuelve_busqueda("para"))
+
+    def test_consulta_booleana_exige_todos_los_prefijos(self):
+        self.assertEqual(
+            construir_consulta_fulltext(tokenizar_busqueda("Pizzería napolitana")),
+            "+pizzeria* +napolitana*",
+        )
+
+
+class PublicacionesBusquedaTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        reiniciar_indice_texto_publicaciones()
+
+        self.db = TestingSessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id, nombre, activo in (
+            (1, "Bar Central", True),
+            (2, "Panaderia Sol", True),
+            (3, "Cerrado", False),
+        ):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=nombre,
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    activo=activo,
+                )
+            )
+        for publicacion_id, comercio_id, titulo, descripcion, activa in (
+            (1, 1, "Café de especialidad", "Tostado en el local", True),
+            (2, 2, "Medialunas", "Ideales para acompañar el cafe", True),
+            (3, 2, "Pizzería al paso", None, True),
+            (4, 1, "Café viejo", None, False),
+            (5, 3, "Café de comercio cerrado", None, True),
+        ):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=comercio_id,
+                    titulo=titulo,
+                    descripcion=descripcion,
+                    is_activa=activa,
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        reiniciar_indice_texto_publicaciones()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def test_busqueda_sin_acentos_por_prefijo_y_relevancia(self):
+        coincidencias = buscar_publicaciones_texto(self.db, q="CAFÉ")
+
+        self.assertEqual([c.publicacion_id for c in coincidencias], [5, 1, 2])
+        self.assertEqual(coincidencias[0].relevancia, 1.0)
+        # Match en título pesa más que en descripción.
+        self.assertGreater(coincidencias[1].relevancia, coincidencias[2].relevancia)
+        self.assertEqual(
+            [c.publicacion_id for c in buscar_publicaciones_texto(self.db, q="pizz")],
+            [3],
+        )
+        self.assertEqual(buscar_publicaciones_texto(self.db, q="cafe pizza"), [])
+
+    def test_cambios_locales_actualizan_el_indice(self):
+        buscar_publicaciones_texto(self.db, q="cafe")
+
+        publicacion = self.db.get(Publicacion, 1)
+        publicacion.is_activa = False
+        self.db.commit()
+        registrar_publicacion_en_indice_texto(publicacion)
+
+        nueva = Publicacion(id=6, comercio_id=2, titulo="Cafetería nueva")
+        self.db.add(nueva)
+        self.db.commit()
+        registrar_publicacion_en_indice_texto(nueva)
+
+        self.assertEqual(
+            [c.publicacion_id for c in buscar_publicaciones_texto(self.db, q="cafe")],
+            [6, 5, 2],
+        )
+        self.assertEqual(buscar_comercio_ids_por_publicaciones(self.db, q="cafe"), {2, 3})
+
+    def test_listado_combina_full_text_y_nombre_de_comercio(self):
+        ids_por_texto = {p.id for p in listar_publicaciones_activas(self.db, q="cafe")}
+        ids_por_comercio = {p.id for p in listar_publicaciones_activas(self.db, q="Panaderia")}
+
+        self.assertEqual(ids_por_texto, {1, 2})
+        self.assertEqual(ids_por_comercio, {2, 3})
+
+    def test_consultas_cortas_mantienen_el_ilike(self):
+        self.assertEqual(
+            [c.publicacion_id for c in buscar_publicaciones_texto(self.db, q="al")],
+            [3, 2, 1],
+        )
+        self.assertEqual(
+            {p.id for p in listar_publicaciones_activas(self.db, q="al paso")},
+            {3},
+        )
+
+    def test_listado_no_trunca_las_coincidencias(self):
+        for publicacion_id in range(6, 12):
+            self.db.add(
+                Publicacion(id=publicacion_id, comercio_id=2, titulo="Cafe del dia")
+            )
+        self.db.commit()
+
+        with patch.object(settings, "PUBLICACIONES_BUSQUEDA_MAX_RESULTADOS", 2):
+            ids = {p.id for p in listar_publicaciones_activas(self.db, q="cafe")}
+            evidencias = PublicacionCandidateSource().generate(
+                CandidateGenerationContext(
+                    query_original="cafe",
+                    query_normalizada="cafe",
+                    limit_por_fuente=5,
+                ),
+                self.db,
+            )
+
+        self.assertEqual(ids, {1, 2, 6, 7, 8, 9, 10, 11})
+        self.assertEqual(len(evidencias), 2)
+
+    def test_sin_indice_fulltext_cae_al_indice_en_memoria(self):
+        error = OperationalError("MATCH", {}, Exception(1191, "Can't find FULLTEXT index"))
+        modulo = "app.modules.posts.services.publicaciones_busqueda_services"
+
+        with patch(f"{modulo}._buscar_mysql", side_effect=error) as buscar_mysql, patch(
+            f"{modulo}.settings.PUBLICACIONES_FULLTEXT_MYSQL", True
+        ), patch.object(self.db.get_bind().dialect, "name", "mysql"):
+            primera = buscar_publicaciones_texto(self.db, q="pizz")
+            segunda = buscar_publicaciones_texto(self.db, q="pizz")
+
+        self.assertEqual([c.publicacion_id for c in primera], [3])
+        self.assertEqual(segunda, primera)
+        self.assertEqual(buscar_mysql.call_count, 1)
+
+    def test_candidate_source_usa_relevancia_como_confidence(self):
+        context = CandidateGenerationContext(
+            query_original="Café",
+            query_normalizada="cafe",
+            limit_por_fuente=5,
+        )
+
+        evidencias = PublicacionCandidateSource().generate(context, self.db)
+
+        self.assertEqual(
+            [(e.matched_entity_id, e.comercio_id) for e in evidencias],
+            [(1, 1), (2, 2)],
+        )
+        self.assertEqual(evidencias[0].reason, "Café de especialidad")
+        self.assertTrue(all(0 < e.confidence <= 1 for e in evidencias))
+        self.assertGreater(evidencias[0].confidence, evidencias[1].confidence)
+
+
+class PublicacionesFulltextMigrationTests(unittest.TestCase):
+    def test_fuera_de_mysql_no_aplica(self):
+        with engine.begin() as connection:
+            self.assertEqual(upgrade(connection), "not_applicable")
+            self.assertEqual(downgrade(connection), "not_applicable")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.posts.services.publicaciones_services import (
+    obtener_guardados_count_por_publicaciones,
+    obtener_interacciones_count,
+    reconciliar_contadores_publicaciones,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.social.services.likes_publicaciones_services import toggle_like_publicacion
+from app.modules.social.services.publicaciones_guardadas_services import (
+    guardar_publicacion,
+    listar_publicaciones_guardadas,
+    quitar_publicacion_guardada,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_publicaciones_contadores import downgrade, upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class PublicacionesContadoresTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+
+        self.db = TestingSessionLocal()
+        for usuario_id in (1, 2):
+            self.db.add(
+                Usuario(id=usuario_id, email=f"u{usuario_id}@example.com", hashed_password="hash")
+            )
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        self.db.add(
+            Comercio(
+                id=1,
+                usuario_id=1,
+                nombre="Comercio 1",
+                portada_url="/uploads/test.jpg",
+                rubro_id=1,
+                provincia="Santa Fe",
+                ciudad="Rafaela",
+                activo=True,
+            )
+        )
+        for publicacion_id in (1, 2):
+            self.db.add(Publicacion(id=publicacion_id, comercio_id=1, titulo=f"P{publicacion_id}"))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _contadores(self, publicacion_id):
+        self.db.expire_all()
+        publicacion = self.db.get(Publicacion, publicacion_id)
+        return publicacion.likes_count, publicacion.guardados_count
+
+    def test_like_y_guardado_ajustan_los_contadores(self):
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=1)
+        toggle_like_publicacion(self.db, usuario_id=2, publicacion_id=1)
+        guardar_publicacion(self.db, usuario_id=1, publicacion_id=1)
+        # Guardar dos veces es idempotente: no vuelve a sumar.
+        guardar_publicacion(self.db, usuario_id=1, publicacion_id=1)
+
+        self.assertEqual(self._contadores(1), (2, 1))
+        self.assertEqual(obtener_interacciones_count(self.db, publicacion_id=1), 3)
+        self.assertEqual(
+            obtener_guardados_count_por_publicaciones(self.db, publicaciones_ids=[1, 2]),
+            {1: 1, 2: 0},
+        )
+
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=1)
+        quitar_publicacion_guardada(self.db, usuario_id=1, publicacion_id=1)
+        quitar_publicacion_guardada(self.db, usuario_id=1, publicacion_id=1)
+
+        self.assertEqual(self._contadores(1), (1, 0))
+
+    def test_guardadas_leen_los_contadores_de_la_publicacion(self):
+        toggle_like_publicacion(self.db, usuario_id=2, publicacion_id=2)
+        guardar_publicacion(self.db, usuario_id=1, publicacion_id=2)
+
+        guardadas = listar_publicaciones_guardadas(self.db, usuario_id=1)
+
+        publicacion = guardadas[0]["publicacion"]
+        self.assertEqual(
+            (
+                publicacion["likes_count"],
+                publicacion["guardados_count"],
+                publicacion["interacciones_count"],
+                publicacion["liked_by_me"],
+            ),
+            (1, 1, 2, False),
+        )
+
+    def test_reconciliacion_corrige_solo_las_publicaciones_con_drift(self):
+        toggle_like_publicacion(self.db, usuario_id=1, publicacion_id=1)
+        self.db.add(LikePublicacion(usuario_id=2, publicacion_id=2))
+        self.db.commit()
+        self.db.query(Publicacion).filter(Publicacion.id == 1).update(
+            {Publicacion.guardados_count: 7}
+        )
+        self.db.commit()
+
+        self.assertEqual(reconciliar_contadores_publicaciones(self.db, tamano_lote=1), [1, 2])
+        self.assertEqual(self._contadores(1), (1, 0))
+        self.assertEqual(self._contadores(2), (1, 0))
+        self.assertEqual(reconciliar_contadores_publicaciones(self.db), [])
+
+
+class PublicacionesContadoresMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE publicaciones (id INTEGER PRIMARY KEY)"))
+            connection.execute(
+                text("CREATE TABLE likes_publicaciones (id INTEGER PRIMARY KEY, publicacion_id INTEGER)")
+            )
+            connection.execute(
+                text(
+                    "CREATE TABLE publicaciones_guardadas "
+                    "(id INTEGER PRIMARY KEY, publicacion_id INTEGER)"
+                )
+            )
+            connection.execute(text("INSERT INTO publicaciones (id) VALUES (1), (2)"))
+            connection.execute(
+                text("INSERT INTO likes_publicaciones (publicacion_id) VALUES (1), (1), (2)")
+            )
+            connection.execute(
+                text("INSERT INTO publicaciones_guardadas (publicacion_id) VALUES (2)")
+            )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_upgrade_completa_contadores_y_downgrade_los_quita(self):
+        with self.engine.begin() as connection:
+            self.assertEqual(upgrade(connection), "created")
+            self.assertEqual(upgrade(connection), "already_exists")
+
+        with self.engine.connect() as connection:
+            filas = connection.execute(
+                text("SELECT id, likes_count, guardados_count FROM publicaciones ORDER BY id")
+            ).all()
+        self.assertEqual([tuple(fila) for fila in filas], [(1, 2, 0), (2, 1, 1)])
+
+        with self.engine.begin() as connection:
+            self.assertEqual(downgrade(connection), "dropped")
+            self.assertEqual(downgrade(connection), "already_absent")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import regenerar_embeddings
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+from app.modules.ai.services.comercios_embeddings_services import (
+    guardar_vectores_comercios,
+    obtener_vector_embedding_comercio,
+)
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_embeddings_vector_binario import upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class _RecordingProvider(SimulatedEmbeddingProvider):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.lotes = []
+
+    def embed_texts(self, texts, batch_size=64):
+        self.lotes.append(list(texts))
+        return super().embed_texts(texts, batch_size)
+
+
+class RegenerarEmbeddingsTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        self.db = SessionLocal()
+        self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id in range(1, 6):
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    direccion="Direccion publica",
+                    activo=True,
+                )
+            )
+        # Fila legada: la regeneración la pasa a binario.
+        self.db.add(ComercioEmbedding(comercio_id=1, vector="[1.0, 0.0]", model_version=1))
+        self.db.commit()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = Path(self.tmp.name) / "checkpoint.json"
+        self.provider = _RecordingProvider()
+        self._patch = patch.object(
+            regenerar_embeddings,
+            "get_embedding_provider",
+            return_value=self.provider,
+        )
+        self._patch.start()
+
+    def tearDown(self):
+        self._patch.stop()
+        self.tmp.cleanup()
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _contar_sentencias(self):
+        sentencias = []
+
+        def _registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement.split()[0].upper())
+
+        event.listen(engine, "before_cursor_execute", _registrar)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", _registrar)
+        return sentencias
+
+    def test_regenera_por_lotes_con_dos_sentencias_por_lote(self):
+        sentencias = self._contar_sentencias()
+
+        resumen = regenerar_embeddings.regenerar_embeddings(
+            self.db,
+            tamano_lote=2,
+            checkpoint_path=self.checkpoint,
+        )
+
+        self.assertEqual(resumen.procesados, 5)
+        self.assertEqual(resumen.ultimo_id, 5)
+        self.assertGreater(resumen.comercios_por_segundo, 0)
+        self.assertEqual([len(lote) for lote in self.provider.lotes], [2, 2, 1])
+        self.assertIn("rubro del comercio: Gastronomia", self.provider.lotes[0][0])
+        # Por lote: 1 SELECT (rubro en JOIN) + 1 INSERT..ON CONFLICT; más el SELECT final vacío.
+        self.assertEqual(sentencias.count("SELECT"), 4)
+        self.assertEqual(sentencias.count("INSERT"), 3)
+
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 5)
+        self.assertEqual(
+            self.db.query(ComercioEmbedding).filter(ComercioEmbedding.vector.isnot(None)).count(),
+            0,
+        )
+        np.testing.assert_allclose(
+            obtener_vector_embedding_comercio(self.db, 3),
+            self.provider.embed_text(self.provider.lotes[1][0]),
+            rtol=1e-6,
+        )
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_corrida_interrumpida_retoma_desde_el_checkpoint(self):
+        guardar_original = regenerar_embeddings.guardar_vectores_comercios
+        llamadas = []
+
+        def _falla_en_el_segundo_lote(db, vectores):
+            llamadas.append(list(vectores))
+            if len(llamadas) == 2:
+                raise RuntimeError("corte de luz")
+            return guardar_original(db, vectores)
+
+        with patch.object(
+            regenerar_embeddings,
+            "guardar_vectores_comercios",
+            side_effect=_falla_en_el_segundo_lote,
+        ):
+            with self.assertRaises(RuntimeError):
+                regenerar_embeddings.regenerar_embeddings(
+                    self.db,
+                    tamano_lote=2,
+                    checkpoint_path=self.checkpoint,
+                )
+
+        self.db.rollback()
+        self.assertEqual(json.loads(self.checkpoint.read_text())["ultimo_id"], 2)
+
+        self.provider.lotes.clear()
+        resumen = regenerar_embeddings.regenerar_embeddings(
+            self.db,
+            tamano_lote=2,
+            checkpoint_path=self.checkpoint,
+        )
+
+        self.assertEqual(resumen.reanudado_desde, 2)
+        self.assertEqual(resumen.procesados, 3)
+        self.assertEqual([len(lote) for lote in self.provider.lotes], [2, 1])
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 5)
+
+    def test_checkpoint_de_otro_modelo_se_ignora(self):
+        regenerar_embeddings.guardar_checkpoint(
+            self.checkpoint,
+            model_id="otro-modelo",
+            ultimo_id=4,
+            procesados=4,
+        )
+
+        resumen = regenerar_embeddings.regenerar_embeddings(
+            self.db,
+            tamano_lote=10,
+            checkpoint_path=self.checkpoint,
+        )
+
+        self.assertEqual(resumen.reanudado_desde, 0)
+        self.assertEqual(resumen.procesados, 5)
+
+    def test_pool_de_procesos_escribe_en_orden_de_id(self):
+        # Los procesos del pool usan el provider configurado (simulated).
+        self._patch.stop()
+        try:
+            resumen = regenerar_embeddings.regenerar_embeddings(
+                self.db,
+                tamano_lote=2,
+                workers=2,
+                checkpoint_path=self.checkpoint,
+            )
+        finally:
+            self._patch.start()
+
+        self.assertEqual(resumen.procesados, 5)
+        self.assertEqual(resumen.ultimo_id, 5)
+        self.assertEqual(self.db.query(ComercioEmbedding).count(), 5)
+
+
+class GuardarVectoresEsquemaLegadoTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        # Esquema previo a la migración: vector legado NOT NULL.
+        with self.engine.begin() as connection:
+            create_sql = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE name = 'comercios_embeddings'")
+            ).scalar()
+            index_sqls = connection.execute(
+                text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' "
+                    "AND tbl_name = 'comercios_embeddings' AND sql IS NOT NULL"
+                )
+            ).scalars().all()
+            connection.execute(text("DROP TABLE comercios_embeddings"))
+            connection.execute(
+                text(create_sql.replace("vector TEXT,", "vector TEXT NOT NULL,"))
+            )
+            for index_sql in index_sqls:
+                connection.execute(text(index_sql))
+        self.Session = sessionmaker(bind=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _guardar(self):
+        db = self.Session()
+        try:
+            return guardar_vectores_comercios(db, {1: [1.0, 0.0], 2: [0.0, 1.0]})
+        finally:
+            db.close()
+
+    def test_lote_falla_sin_relajar_y_guarda_despues_de_la_migracion(self):
+        with self.assertRaises(IntegrityError):
+            self._guardar()
+
+        with self.engine.begin() as connection:
+            upgrade(connection)
+
+        self.assertEqual(self._guardar(), 2)
+        self.assertEqual(self._guardar(), 2)
+        with self.engine.connect() as connection:
+            filas = connection.execute(
+                text("SELECT comercio_id, vector FROM comercios_embeddings ORDER BY comercio_id")
+            ).all()
+        self.assertEqual([tuple(fila) for fila in filas], [(1, None), (2, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,14 @@ from sqlalchemy.pool import StaticPool
 
 from app.core.database import Base
 from app.core.model_registry import import_all_models
+from app.modules.ai.services.comercios_vector_index_services import (
+    reiniciar_indice_vectorial_comercios,
+)
+from app.modules.posts.services.publicaciones_busqueda_services import (
+    reiniciar_indice_texto_publicaciones,
+)
 from app.modules.products.models.rubros_models import Rubro
+from app.modules.search.services.candidate_engine import reset_candidate_cache
 from app.modules.search.services.territorial_search_services import (
     TerritorialContext,
     commerce_matches_territory,
@@ -17,6 +24,9 @@ from app.modules.search.services.territorial_search_services import (
 from app.modules.spaces.models.comercios_models import Comercio
 from app.modules.spaces.schemas.comercios_schemas import ComercioPublicResponse
 from app.modules.spaces.services.comercios_services import listar_comercios_activos
+from app.modules.spaces.services.comercios_texto_index_services import (
+    reiniciar_indice_texto_comercios,
+)
 from app.modules.users.models.usuarios_models import Usuario
 
 
@@ -52,6 +62,10 @@ class TerritorialNormalizationTests(unittest.TestCase):
 class TerritorialSearchTests(unittest.TestCase):
     def setUp(self):
         Base.metadata.create_all(bind=engine)
+        reiniciar_indice_vectorial_comercios()
+        reiniciar_indice_texto_publicaciones()
+        reiniciar_indice_texto_comercios()
+        reset_candidate_cache()
         self.db = SessionLocal()
         self.db.add(Usuario(id=1, email="owner@example.com", hashed_password="hash"))
         self.db.add(Rubro(id=1, nombre="Servicios", activo=True))
@@ -0,0 +1,241 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.models.usuarios_embeddings_models import UsuarioEmbedding
+from app.modules.ai.services.comercios_embeddings_services import _serializar_vector
+from app.modules.ai.services import usuarios_embeddings_services
+from app.modules.ai.services.usuarios_embeddings_services import (
+    generar_embedding_usuario,
+    obtener_vector_usuario,
+    reconstruir_acumulador_usuario,
+)
+from app.modules.posts.models.publicaciones_models import Publicacion
+from app.modules.social.models.likes_publicaciones_models import LikePublicacion
+from app.modules.products.models.rubros_models import Rubro
+from app.modules.social.services.likes_publicaciones_services import (
+    toggle_like_publicacion,
+)
+from app.modules.social.services.publicaciones_guardadas_services import (
+    guardar_publicacion,
+    quitar_publicacion_guardada,
+)
+from app.modules.spaces.models.comercios_models import Comercio
+from app.modules.users.models.usuarios_models import Usuario
+from migrate_usuarios_embeddings_acumulador import COLUMNS, upgrade
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+VECTORES = {
+    1: [1.0, 0.0, 0.0],
+    2: [0.0, 1.0, 0.0],
+    3: [0.0, 0.0, 1.0],
+}
+
+
+class UsuariosEmbeddingsIncrementalesTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        self.db = SessionLocal()
+        self.db.add(Usuario(id=1, email="user@example.com", hashed_password="hash"))
+        self.db.add(Rubro(id=1, nombre="Gastronomia", activo=True))
+        for comercio_id, vector in VECTORES.items():
+            self.db.add(
+                Comercio(
+                    id=comercio_id,
+                    usuario_id=1,
+                    nombre=f"Comercio {comercio_id}",
+                    portada_url="/uploads/test.jpg",
+                    rubro_id=1,
+                    provincia="Santa Fe",
+                    ciudad="Rafaela",
+                    direccion="Direccion publica",
+                    activo=True,
+                )
+            )
+            self.db.add(
+                ComercioEmbedding(
+                    comercio_id=comercio_id,
+                    vector_binario=_serializar_vector(vector),
+                )
+            )
+        for publicacion_id in range(1, 41):
+            self.db.add(
+                Publicacion(
+                    id=publicacion_id,
+                    comercio_id=(publicacion_id - 1) % 3 + 1,
+                    titulo="Oferta",
+                    descripcion="Descripcion",
+                    is_activa=True,
+                )
+            )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def _like(self, publicacion_id):
+        return toggle_like_publicacion(
+            self.db,
+            usuario_id=1,
+            publicacion_id=publicacion_id,
+        )
+
+    def _vector(self):
+        return obtener_vector_usuario(self.db, 1)
+
+    def test_deltas_de_like_coinciden_con_promedio_completo(self):
+        self._like(1)
+        np.testing.assert_allclose(self._vector(), VECTORES[1])
+
+        self._like(2)
+        self._like(4)
+        np.testing.assert_allclose(self._vector(), [2 / 3, 1 / 3, 0.0], rtol=1e-6)
+
+        self._like(1)
+        np.testing.assert_allclose(self._vector(), [0.5, 0.5, 0.0], rtol=1e-6)
+        np.testing.assert_allclose(
+            self._vector(),
+            generar_embedding_usuario(self.db, 1),
+            rtol=1e-6,
+        )
+
+        embedding = self.db.query(UsuarioEmbedding).one()
+        self.assertEqual(embedding.interacciones_count, 2)
+
+    def test_like_y_guardado_de_la_misma_publicacion_cuentan_una_vez(self):
+        self._like(2)
+        guardar_publicacion(self.db, usuario_id=1, publicacion_id=2)
+        self._like(3)
+
+        embedding = self.db.query(UsuarioEmbedding).one()
+        self.assertEqual(embedding.interacciones_count, 2)
+
+        self._like(2)
+        np.testing.assert_allclose(self._vector(), [0.0, 0.5, 0.5], rtol=1e-6)
+        self.assertEqual(self.db.query(UsuarioEmbedding).one().interacciones_count, 2)
+
+        quitar_publicacion_guardada(self.db, usuario_id=1, publicacion_id=2)
+        np.testing.assert_allclose(self._vector(), VECTORES[3])
+
+        self._like(3)
+        self.assertIsNone(self._vector())
+
+    def test_acumulador_vencido_se_reconstruye(self):
+        self._like(1)
+        embedding = self.db.query(UsuarioEmbedding).one()
+        embedding.interacciones_count = 99
+        embedding.reconstruido_en = datetime.utcnow() - timedelta(days=2)
+        self.db.commit()
+
+        self._like(2)
+
+        embedding = self.db.query(UsuarioEmbedding).one()
+        self.assertEqual(embedding.interacciones_count, 2)
+        np.testing.assert_allclose(self._vector(), [0.5, 0.5, 0.0], rtol=1e-6)
+
+    def test_delta_va_en_la_misma_transaccion_que_el_like(self):
+        self._like(1)
+
+        with patch.object(
+            usuarios_embeddings_services,
+            "obtener_vector_embedding_comercio",
+            side_effect=RuntimeError("db caida"),
+        ):
+            with self.assertRaises(RuntimeError):
+                self._like(2)
+        self.db.rollback()
+
+        # Sin delta tampoco queda el like: nada para corregir después.
+        self.assertEqual(self.db.query(LikePublicacion).count(), 1)
+        self.assertEqual(self.db.get(Publicacion, 2).likes_count, 0)
+        self.assertEqual(self.db.query(UsuarioEmbedding).one().interacciones_count, 1)
+
+    def test_alta_concurrente_de_la_fila_usa_la_existente(self):
+        self._like(1)
+        bloquear = usuarios_embeddings_services.bloquear_embedding_usuario
+
+        # Primera lectura sin fila (otro request la inserta antes del INSERT).
+        with patch.object(
+            usuarios_embeddings_services,
+            "bloquear_embedding_usuario",
+            side_effect=[None, bloquear(self.db, 1)],
+        ):
+            vector = reconstruir_acumulador_usuario(self.db, 1)
+
+        np.testing.assert_allclose(vector, VECTORES[1])
+        embedding = self.db.query(UsuarioEmbedding).one()
+        self.assertEqual(embedding.interacciones_count, 1)
+
+    def test_costo_por_click_no_depende_del_historial(self):
+        def sentencias_de_un_like(publicacion_id):
+            sentencias = []
+
+            def _registrar(conn, cursor, statement, *args):
+                sentencias.append(statement)
+
+            event.listen(engine, "before_cursor_execute", _registrar)
+            try:
+                self._like(publicacion_id)
+            finally:
+                event.remove(engine, "before_cursor_execute", _registrar)
+            return len(sentencias)
+
+        self._like(1)
+        con_historial_corto = sentencias_de_un_like(2)
+
+        for publicacion_id in range(3, 38):
+            self._like(publicacion_id)
+        con_historial_largo = sentencias_de_un_like(38)
+
+        self.assertEqual(con_historial_corto, con_historial_largo)
+
+
+class UsuariosEmbeddingsAcumuladorMigrationTests(unittest.TestCase):
+    def test_upgrade_es_aditivo_e_idempotente(self):
+        engine_legacy = create_engine("sqlite://")
+        with engine_legacy.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE usuarios_embeddings ("
+                    "id INTEGER PRIMARY KEY, usuario_id INTEGER, vector TEXT)"
+                )
+            )
+            connection.execute(
+                text("INSERT INTO usuarios_embeddings VALUES (1, 1, '[1.0]')")
+            )
+
+            self.assertEqual(upgrade(connection), "created")
+            self.assertEqual(upgrade(connection), "already_exists")
+
+        columns = {
+            column["name"]
+            for column in inspect(engine_legacy).get_columns("usuarios_embeddings")
+        }
+        self.assertTrue(set(COLUMNS) <= columns)
+        with engine_legacy.connect() as connection:
+            count = connection.execute(
+                text("SELECT interacciones_count FROM usuarios_embeddings")
+            ).scalar()
+        self.assertEqual(count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import evaluar_indice_cuantizado
+from app.core.database import Base
+from app.core.model_registry import import_all_models
+from app.modules.ai.core.vector_index import (
+    PRECISION_FLOAT16,
+    PRECISION_FLOAT32,
+    PRECISION_INT8,
+    VectorIndex,
+    comparar_ranking_cuantizado,
+    resolver_precision,
+)
+from app.modules.ai.models.comercios_embeddings_models import ComercioEmbedding
+from app.modules.ai.providers.simulated_provider import SimulatedEmbeddingProvider
+from app.modules.ai.services.comercios_embeddings_services import _serializar_vector
+from app.modules.search.models.search_event_models import SearchEvent
+
+
+import_all_models()
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _corpus_agrupado(total=600, dim=384, clusters=24, seed=7):
+    # Vectores alrededor de centros: se parece más a embeddings reales
+    # que ruido uniforme (donde todos los cosenos son ~0).
+    rng = np.random.default_rng(seed)
+    centros = rng.normal(size=(clusters, dim))
+    asignacion = rng.integers(0, clusters, size=total)
+    vectores = centros[asignacion] + 0.6 * rng.normal(size=(total, dim))
+    queries = centros[rng.integers(0, clusters, size=40)] + 0.6 * rng.normal(size=(40, dim))
+    return list(enumerate(vectores, start=1)), list(queries)
+
+
+class VectorIndexCuantizadoTests(unittest.TestCase):
+    def test_scores_cuantizados_aproximan_float32(self):
+        vectores, queries = _corpus_agrupado(total=50)
+        referencia = VectorIndex()
+        referencia.upsert_many(vectores)
+
+        for precision, tolerancia in ((PRECISION_FLOAT16, 2e-3), (PRECISION_INT8, 2e-2)):
+            indice = VectorIndex(precision=precision)
+            indice.upsert_many(vectores)
+            esperados = referencia.scores(queries[0])
+            obtenidos = indice.scores(queries[0])
+
+            self.assertEqual(set(obtenidos), set(esperados))
+            for entity_id, score in esperados.items():
+                self.assertAlmostEqual(obtenidos[entity_id], score, delta=tolerancia)
+
+    def test_int8_reduce_memoria_cerca_de_4x(self):
+        vectores, _ = _corpus_agrupado(total=100)
+        referencia = VectorIndex()
+        int8 = VectorIndex(precision=PRECISION_INT8)
+        float16 = VectorIndex(precision=PRECISION_FLOAT16)
+        for indice in (referencia, int8, float16):
+            indice.upsert_many(vectores)
+
+        self.assertGreater(referencia.memory_bytes() / int8.memory_bytes(), 3.9)
+        self.assertEqual(referencia.memory_bytes() / float16.memory_bytes(), 2.0)
+
+    def test_baja_compacta_tambien_las_escalas(self):
+        indice = VectorIndex(precision=PRECISION_INT8)
+        indice.upsert_many([(1, [10.0, 0.0]), (2, [0.0, 0.1]), (3, [1.0, 1.0])])
+
+        self.assertTrue(indice.remove(1))
+
+        scores = indice.scores([0.0, 1.0])
+        self.assertAlmostEqual(scores[2], 1.0, places=2)
+        self.assertAlmostEqual(scores[3], 0.7071, places=2)
+
+    def test_regresion_de_ranking_contra_float32(self):
+        vectores, queries = _corpus_agrupado()
+
+        for precision, recall_minimo in ((PRECISION_FLOAT16, 0.99), (PRECISION_INT8, 0.95)):
+            resultado = comparar_ranking_cuantizado(
+                vectores,
+                queries,
+                precision=precision,
+                k=10,
+            )
+            self.assertGreaterEqual(resultado["recall_medio"], recall_minimo, precision)
+            self.assertEqual(resultado["queries"], len(queries))
+
+    def test_precision_desconocida_es_error_de_configuracion(self):
+        self.assertEqual(resolver_precision(" INT8 "), PRECISION_INT8)
+        self.assertEqual(resolver_precision(None), PRECISION_FLOAT32)
+        with self.assertRaises(ValueError):
+            VectorIndex(precision="int4")
+
+
+class EvaluarIndiceCuantizadoScriptTests(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine)
+        self.db = SessionLocal()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    def test_evalua_consultas_smart_semantic_reales(self):
+        provider = SimulatedEmbeddingProvider()
+        for query in ("pizza", "pizza", "ferreteria", "cafe"):
+            self.db.add(
+                SearchEvent(
+                    endpoint="/comercios/activos",
+                    query_normalizada=query,
+                    modo_busqueda="smart_semantic",
+                    smart_semantic=True,
+                )
+            )
+        self.db.add(
+            SearchEvent(
+                endpoint="/comercios/activos",
+                query_normalizada="solo clasica",
+                modo_busqueda="classic",
+            )
+        )
+        for comercio_id, texto in enumerate(("pizzeria", "ferreteria", "cafeteria"), start=1):
+            self.db.add(
+                ComercioEmbedding(
+                    comercio_id=comercio_id,
+                    vector_binario=_serializar_vector(provider.embed_text(texto)),
+                    model_version=1,
+                )
+            )
+        self.db.commit()
+
+        self.assertEqual(
+            evaluar_indice_cuantizado.queries_smart_semantic(self.db),
+            ["pizza", "cafe", "ferreteria"],
+        )
+
+        with patch.object(
+            evaluar_indice_cuantizado,
+            "get_embedding_provider",
+            return_value=provider,
+        ):
+            resultados = evaluar_indice_cuantizado.evaluar(self.db, k=2)
+
+        self.assertEqual(
+            [(resultado["corpus"], resultado["precision"]) for resultado in resultados],
+            [("comercios", PRECISION_FLOAT16), ("comercios", PRECISION_INT8)],
+        )
+        for resultado in resultados:
+            self.assertEqual(resultado["queries"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,4 @@
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 
 import { queryKeys } from "@core/constants/queryKeys";
 import { fetchFeedPublicaciones } from "@features/posts/services/feed_service";
@@ -12,15 +12,20 @@ import { fetchFeedPublicaciones } from "@features/posts/services/feed_service";
 | - obtener publicaciones del feed
 | - manejar cache automticamente
 | - centralizar loading/error/refetch
+| - paginar por cursor (next_cursor del backend) con useInfiniteQuery
 | - preparar optimistic/realtime future
 |
 */
 
 export function useFeedPublicaciones() {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: queryKeys.feed.publicaciones(),
 
-    queryFn: fetchFeedPublicaciones,
+    initialPageParam: null,
+
+    queryFn: ({ pageParam }) => fetchFeedPublicaciones({ cursor: pageParam }),
+
+    getNextPageParam: (lastPage) => lastPage?.next_cursor || undefined,
 
     /*
     |--------------------------------------------------------------------------
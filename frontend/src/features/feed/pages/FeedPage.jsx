@@ -7,7 +7,7 @@
  * - Backend sigue siendo fuente de verdad
  */
 
-import { useEffect, useRef, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useLocation, useNavigate } from "react-router-dom";
 import { ActiveLayer } from "@core";
 
@@ -39,11 +39,22 @@ export default function FeedPage() {
   const location = useLocation();
 
   const {
-    data: feedData = [],
+    data: feedPages,
     isLoading: isFeedLoading,
     error: feedQueryError,
+    hasNextPage: feedHasNextPage,
+    fetchNextPage: fetchNextFeedPage,
+    isFetchingNextPage: isFetchingNextFeedPage,
   } = useFeedPublicaciones();
 
+  const feedData = useMemo(
+    () =>
+      feedPages?.pages
+        ? feedPages.pages.flatMap((pagina) => pagina?.items || [])
+        : [],
+    [feedPages]
+  );
+
   const {
     data: guardadasData = [],
   } = usePublicacionesGuardadas();
@@ -474,6 +485,18 @@ export default function FeedPage() {
                 />
               </Surface>
             ))}
+
+            {feedHasNextPage && (
+              <Button
+                type="button"
+                onClick={() => fetchNextFeedPage()}
+                disabled={isFetchingNextFeedPage}
+                variant="secondary"
+                className="w-full px-4 py-2"
+              >
+                {isFetchingNextFeedPage ? "Cargando..." : "Cargar más"}
+              </Button>
+            )}
           </section>
         )}
       </main>
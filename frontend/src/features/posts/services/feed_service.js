@@ -167,12 +167,27 @@ async function completarPublicacionGuardada(publicacionNormalizada, token) {
 /**
  * fetchFeedPublicaciones
  * Backend:
- * - GET /feed/publicaciones
+ * - GET /feed/publicaciones?limit=&cursor=
+ *
+ * El backend pagina por cursor ({ items, next_cursor }).
+ * Devuelve { items, next_cursor }: next_cursor es null en la última página
+ * y se pasa tal cual como `cursor` para pedir la siguiente.
  */
-export async function fetchFeedPublicaciones() {
+export async function fetchFeedPublicaciones({ limit = 50, cursor = null } = {}) {
   const token = getAccessToken();
-  const data = await httpGet("/feed/publicaciones", token);
-  return normalizarListaRespuesta(data);
+  const params = new URLSearchParams();
+  params.set("limit", String(limit));
+
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+
+  const data = await httpGet(`/feed/publicaciones?${params.toString()}`, token);
+
+  return {
+    items: normalizarListaRespuesta(data),
+    next_cursor: data?.next_cursor ?? null,
+  };
 }
 
 /**
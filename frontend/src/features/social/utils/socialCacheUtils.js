@@ -48,6 +48,16 @@ function actualizarPublicacionEnData(data, publicacionId, updater) {
     return actualizarPublicacionEnLista(data, publicacionId, updater);
   }
 
+  // Caso: infinite query (Feed pagina por cursor)
+  if (Array.isArray(data.pages)) {
+    return {
+      ...data,
+      pages: data.pages.map((pagina) =>
+        actualizarPublicacionEnData(pagina, publicacionId, updater)
+      ),
+    };
+  }
+
   // Caso: respuesta paginada o agrupada
   return {
     ...data,
@@ -105,6 +115,15 @@ function obtenerPublicacionDeData(data, publicacionId) {
     return obtenerPublicacionDeLista(data, publicacionId);
   }
 
+  if (Array.isArray(data.pages)) {
+    for (const pagina of data.pages) {
+      const publicacion = obtenerPublicacionDeData(pagina, publicacionId);
+      if (publicacion) return publicacion;
+    }
+
+    return null;
+  }
+
   return (
     obtenerPublicacionDeLista(data.publicaciones, publicacionId) ||
     obtenerPublicacionDeLista(data.items, publicacionId) ||
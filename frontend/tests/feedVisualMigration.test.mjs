@@ -72,7 +72,8 @@ test("HistoriasBar usa Button compartido y conserva orden y apertura", () => {
 
 test("Cache-First y carga no bloquean datos utilizables", () => {
   assert.match(feedHook, /queryKey: queryKeys\.feed\.publicaciones\(\)/);
-  assert.match(feedHook, /queryFn: fetchFeedPublicaciones/);
+  assert.match(feedHook, /queryFn: \(\{ pageParam \}\) => fetchFeedPublicaciones\(\{ cursor: pageParam \}\)/);
+  assert.match(feedHook, /getNextPageParam: \(lastPage\) => lastPage\?\.next_cursor/);
   assert.match(feedHook, /staleTime: 1000 \* 30/);
   assert.match(feed, /feedItems\.length > 0 && publicaciones\.length === 0/);
   assert.match(feed, /isFeedLoading && publicaciones\.length === 0 && feedItems\.length === 0/);